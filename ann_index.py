@@ -0,0 +1,289 @@
+import logging
+import math
+from typing import Any, Dict, Optional
+
+import faiss
+import numpy as np
+
+# Supported index types. All use inner product on L2-normalized vectors (cosine similarity)
+# and are wrapped in an IndexIDMap2 so vectors are addressed by stable chunk ids.
+INDEX_TYPES = ("flat", "sq_fp16", "sq8", "hnsw", "ivf_flat", "ivf_pq")
+
+DEFAULT_INDEX_PARAMS = {
+    "hnsw_m": 32,            # HNSW graph degree
+    "ef_construction": 200,  # HNSW build-time beam width
+    "ef_search": 64,         # HNSW query-time beam width
+    "nlist": None,           # IVF lists (None: about 4 * sqrt(n))
+    "nprobe": 16,            # IVF lists scanned per query
+    "pq_m": 64,              # PQ sub-quantizers (reduced to a divisor of the dimension)
+    "pq_nbits": 8,           # Bits per PQ code
+}
+
+# IVF training wants roughly this many points per list; PQ needs 2^nbits points per codebook
+MIN_POINTS_PER_LIST = 39
+
+
+def resolve_params(index_type: str, params: Optional[Dict[str, Any]], n: int, dimension: int) -> Dict[str, Any]:
+    """
+    Fill in defaults and size-dependent parameters for an index.
+
+    Falls back to a flat index when the corpus is too small to train the
+    requested structure, so tiny corpora never get a degenerate ANN index.
+
+    Args:
+        index_type: One of INDEX_TYPES
+        params: Overrides for DEFAULT_INDEX_PARAMS
+        n: Number of vectors the index will be trained on
+        dimension: Vector dimension
+
+    Returns:
+        Parameters including the effective 'type'
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}' (expected one of {', '.join(INDEX_TYPES)})")
+
+    resolved = dict(DEFAULT_INDEX_PARAMS)
+    resolved.update({key: value for key, value in (params or {}).items() if value is not None})
+    resolved["type"] = index_type
+
+    if index_type in ("ivf_flat", "ivf_pq"):
+        nlist = resolved["nlist"] or int(4 * math.sqrt(max(n, 1)))
+        nlist = max(1, min(nlist, n // MIN_POINTS_PER_LIST))
+        resolved["nlist"] = nlist
+        resolved["nprobe"] = min(resolved["nprobe"], nlist)
+
+        min_points = MIN_POINTS_PER_LIST
+        if index_type == "ivf_pq":
+            pq_m = min(resolved["pq_m"], dimension)
+            while dimension % pq_m:
+                pq_m -= 1
+            resolved["pq_m"] = pq_m
+            min_points = max(min_points, 2 ** resolved["pq_nbits"])
+
+        if n < min_points or nlist < 2:
+            logging.warning(f"⚠️ {n} vectors are too few to train {index_type}, using a flat index")
+            return resolve_params("flat", params, n, dimension)
+
+    return resolved
+
+
+def create_index(dimension: int, params: Dict[str, Any]) -> faiss.Index:
+    """
+    Create an empty (untrained) ID-mapped index from resolved parameters.
+
+    Args:
+        dimension: Vector dimension
+        params: Output of resolve_params
+
+    Returns:
+        faiss.IndexIDMap2 wrapping the requested structure
+    """
+    index_type = params["type"]
+    metric = faiss.METRIC_INNER_PRODUCT
+
+    if index_type == "flat":
+        base = faiss.IndexFlatIP(dimension)
+    elif index_type == "sq_fp16":
+        base = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_fp16, metric)
+    elif index_type == "sq8":
+        base = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit, metric)
+    elif index_type == "hnsw":
+        base = faiss.IndexHNSWFlat(dimension, params["hnsw_m"], metric)
+        base.hnsw.efConstruction = params["ef_construction"]
+    elif index_type == "ivf_flat":
+        base = faiss.IndexIVFFlat(faiss.IndexFlatIP(dimension), dimension, params["nlist"], metric)
+    else:
+        base = faiss.IndexIVFPQ(faiss.IndexFlatIP(dimension), dimension, params["nlist"],
+                                params["pq_m"], params["pq_nbits"], metric)
+
+    # The faiss Python wrappers keep the inner index and quantizer alive
+    return faiss.IndexIDMap2(base)
+
+
+def build_ann_index(vectors: np.ndarray, ids: np.ndarray, params: Dict[str, Any]) -> faiss.Index:
+    """
+    Create, train (if needed) and fill an index.
+
+    Args:
+        vectors: Normalized float32 vectors
+        ids: int64 id per vector
+        params: Output of resolve_params
+
+    Returns:
+        Populated index with query-time parameters applied
+    """
+    index = create_index(vectors.shape[1], params)
+    if not index.is_trained:
+        index.train(vectors)
+    index.add_with_ids(vectors, ids)
+    apply_search_params(index, params)
+    return index
+
+
+def apply_search_params(index: faiss.Index, params: Dict[str, Any]) -> None:
+    """
+    Set query-time knobs (efSearch for HNSW, nprobe for IVF).
+
+    These are not stored in the FAISS file, so they are re-applied after loading.
+    """
+    inner = faiss.downcast_index(index.index) if hasattr(index, "id_map") else index
+    if isinstance(inner, faiss.IndexHNSW) and params.get("ef_search"):
+        inner.hnsw.efSearch = int(params["ef_search"])
+    ivf = faiss.try_extract_index_ivf(inner)
+    if ivf is not None and params.get("nprobe"):
+        ivf.nprobe = int(params["nprobe"])
+
+
+def search_parameters(index: faiss.Index, params: Dict[str, Any],
+                      selector: Optional[faiss.IDSelector] = None) -> faiss.SearchParameters:
+    """
+    Per-search parameters carrying an ID selector.
+
+    Passing SearchParameters replaces the index's own efSearch/nprobe, so the
+    configured values are copied in. An IndexIDMap2 translates the selector,
+    which therefore works on chunk ids.
+    """
+    inner = faiss.downcast_index(index.index) if hasattr(index, "id_map") else index
+    if isinstance(inner, faiss.IndexHNSW):
+        search_params = faiss.SearchParametersHNSW()
+        search_params.efSearch = int(params.get("ef_search") or inner.hnsw.efSearch)
+    elif faiss.try_extract_index_ivf(inner) is not None:
+        search_params = faiss.SearchParametersIVF()
+        search_params.nprobe = int(params.get("nprobe") or faiss.extract_index_ivf(inner).nprobe)
+    else:
+        search_params = faiss.SearchParameters()
+    if selector is not None:
+        search_params.sel = selector
+    return search_params
+
+
+def supports_removal(index: faiss.Index) -> bool:
+    """Whether vectors can be removed in place (HNSW graphs cannot)"""
+    inner = faiss.downcast_index(index.index) if hasattr(index, "id_map") else index
+    return not isinstance(inner, faiss.IndexHNSW)
+
+
+def estimate_index_bytes(index: faiss.Index) -> int:
+    """
+    Approximate resident size of an index without serializing it.
+
+    Counts vector codes, HNSW level-0 links, IVF ids and centroids, and the
+    id map (plus the reverse map of an IndexIDMap2).
+    """
+    n = index.ntotal
+    total = 0
+    inner = index
+    if hasattr(index, "id_map"):
+        total += 8 * n + (32 * n if isinstance(index, faiss.IndexIDMap2) else 0)
+        inner = faiss.downcast_index(index.index)
+
+    ivf = faiss.try_extract_index_ivf(inner)
+    if ivf is not None:
+        total += (ivf.code_size + 8) * n + ivf.nlist * ivf.d * 4
+    elif isinstance(inner, faiss.IndexHNSW):
+        storage = faiss.downcast_index(inner.storage)
+        total += storage.code_size * n + 2 * inner.hnsw.nb_neighbors(1) * 4 * n
+    elif hasattr(inner, "code_size"):
+        total += inner.code_size * n
+    return int(total)
+
+
+def index_memory_bytes(index: faiss.Index) -> int:
+    """Serialized size of an index, a close proxy for its resident memory"""
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def _single_list_ivf(index: faiss.Index) -> Optional[faiss.Index]:
+    """
+    The same vectors as a one-list IVF index, or None if the index has no such form.
+
+    faiss only memory-maps IVF inverted lists, so flat and scalar-quantizer
+    indexes are stored this way (ANN indexes never have fewer than two
+    lists). With one list and nprobe 1 a search is still an exact scan over
+    the same codes in the same order, so results and ties are unchanged.
+    """
+    if not hasattr(index, "id_map"):
+        return None
+    inner = faiss.downcast_index(index.index)
+    quantizer = faiss.IndexFlat(index.d, index.metric_type)
+    quantizer.add(np.zeros((1, index.d), dtype='float32'))
+    if isinstance(inner, faiss.IndexScalarQuantizer):
+        ivf = faiss.IndexIVFScalarQuantizer(quantizer, index.d, 1, inner.sq.qtype, index.metric_type, False)
+        ivf.sq = inner.sq
+        ivf.code_size = inner.code_size
+    elif isinstance(inner, faiss.IndexFlat):
+        ivf = faiss.IndexIVFFlat(quantizer, index.d, 1, index.metric_type)
+    else:
+        return None
+    ivf.is_trained = True
+    ivf.nprobe = 1
+    shared = faiss.IndexIDMap2(ivf)
+    if index.ntotal:
+        codes = faiss.vector_to_array(inner.codes)
+        positions = np.arange(index.ntotal, dtype='int64')
+        ivf.invlists.add_entries(0, index.ntotal, faiss.swig_ptr(positions), faiss.swig_ptr(codes))
+        ivf.ntotal = shared.ntotal = index.ntotal
+        faiss.copy_array_to_vector(faiss.vector_to_array(index.id_map), shared.id_map)
+    return shared
+
+
+def _from_single_list_ivf(index: faiss.Index) -> faiss.Index:
+    """Rebuild the flat or scalar-quantizer index from its one-list IVF form"""
+    ivf = faiss.extract_index_ivf(index)
+    if isinstance(ivf, faiss.IndexIVFScalarQuantizer):
+        inner = faiss.IndexScalarQuantizer(ivf.d, ivf.sq.qtype, ivf.metric_type)
+        inner.sq = ivf.sq
+        inner.is_trained = True
+    else:
+        inner = faiss.IndexFlat(ivf.d, ivf.metric_type)
+    restored = faiss.IndexIDMap2(inner)
+    n = ivf.invlists.list_size(0)
+    if n:
+        codes = faiss.rev_swig_ptr(ivf.invlists.get_codes(0), n * ivf.code_size).copy()
+        faiss.copy_array_to_vector(codes, inner.codes)
+        faiss.copy_array_to_vector(faiss.vector_to_array(index.id_map), restored.id_map)
+        inner.ntotal = restored.ntotal = n
+        restored.construct_rev_map()
+    return restored
+
+
+def _is_single_list_ivf(index: faiss.Index) -> bool:
+    if not hasattr(index, "id_map"):
+        return False
+    ivf = faiss.try_extract_index_ivf(faiss.downcast_index(index.index))
+    return ivf is not None and ivf.nlist == 1 and isinstance(ivf, (faiss.IndexIVFFlat, faiss.IndexIVFScalarQuantizer))
+
+
+def write_index(index: faiss.Index, path: str) -> None:
+    """Write an index in a layout read_index can memory-map"""
+    if is_memory_mapped(index):
+        # faiss writes a corrupt file from read-only mapped inverted lists; use read_index(mmap=False)
+        raise ValueError("Cannot write a memory-mapped index")
+    faiss.write_index(_single_list_ivf(index) or index, path)
+
+
+def read_index(path: str, mmap: bool = True) -> faiss.Index:
+    """
+    Read an index written by write_index.
+
+    Args:
+        path: Index file
+        mmap: Map the vector codes read-only from the file, so every process
+            that opens it shares one copy in the page cache. HNSW graphs are
+            always read into memory. Without mmap the index is writable and
+            has the id-mapped layout that incremental updates expect.
+
+    Returns:
+        The index
+    """
+    if mmap:
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    index = faiss.read_index(path)
+    return _from_single_list_ivf(index) if _is_single_list_ivf(index) else index
+
+
+def is_memory_mapped(index: faiss.Index) -> bool:
+    """Whether the index's vector codes live in a shared read-only file mapping"""
+    inner = faiss.downcast_index(index.index) if hasattr(index, "id_map") else index
+    ivf = faiss.try_extract_index_ivf(inner)
+    return ivf is not None and isinstance(faiss.downcast_InvertedLists(ivf.invlists), faiss.OnDiskInvertedLists)
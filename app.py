@@ -1,5 +1,7 @@
 import os
 import os.path
+import hmac
+import math
 import pickle
 import json
 import logging
@@ -16,7 +18,12 @@ from googleapiclient.discovery import build
 from prompt_library import BarranaPromptLibrary
 from validation import ContentValidator
 from seo_manager import SEOManager
-from rag_system import BarranaRAGSystem
+from corpus_registry import CorpusRegistry
+from rollout_scheduler import RolloutScheduler
+from query_cache import RequestMemo
+from context_packer import context_budget
+from semantic_cache import SemanticContentCache
+from history_store import HistoryStore
 
 # Load environment variables
 load_dotenv()
@@ -30,6 +37,15 @@ client = OpenAI()
 # Feature flags
 USE_JSON_LIBRARY = os.environ.get('USE_JSON_LIBRARY', 'true').lower() == 'true'
 FALLBACK_TO_SHEETS = os.environ.get('FALLBACK_TO_SHEETS', 'true').lower() == 'true'
+ROLLOUT_DISPATCH_INTERVAL = float(os.environ.get('ROLLOUT_DISPATCH_INTERVAL', '0'))
+RAG_WATCH_INTERVAL = float(os.environ.get('RAG_WATCH_INTERVAL', '0'))
+SEMANTIC_CACHE_ENABLED = os.environ.get('SEMANTIC_CACHE_ENABLED', 'false').lower() == 'true'
+SEMANTIC_CACHE_MARK_HITS = os.environ.get('SEMANTIC_CACHE_MARK_HITS', 'true').lower() == 'true'
+PROVENANCE_ENABLED = os.environ.get('PROVENANCE_ENABLED', 'true').lower() == 'true'
+GENERATION_HISTORY_ENABLED = os.environ.get('GENERATION_HISTORY_ENABLED', 'false').lower() == 'true'
+GENERATION_HISTORY_DIMENSIONS = int(os.environ.get('GENERATION_HISTORY_DIMENSIONS', '256'))
+GENERATION_HISTORY_EMBEDDING_MODEL = os.environ.get('GENERATION_HISTORY_EMBEDDING_MODEL', 'text-embedding-3-large')
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
 
 # Initialize Flask app with static folder configuration
 app = Flask(__name__, 
@@ -60,11 +76,24 @@ CORS(app, origins=allowed_origins)
 prompt_library = None
 validator = None
 seo_manager = None
-rag_system = None
+rag_registry = None
+rollout_scheduler = None
+semantic_cache = None
+generation_history = None
+
+def embed_history_text(text):
+    """Embed a post or search query for the generation history
+    
+    Calls the embeddings API directly: whole posts would only evict
+    queries from the RAG query cache without ever being looked up again.
+    """
+    response = client.embeddings.create(model=GENERATION_HISTORY_EMBEDDING_MODEL, input=[text],
+                                        dimensions=GENERATION_HISTORY_DIMENSIONS)
+    return response.data[0].embedding
 
 def initialize_new_systems():
     """Initialize the new JSON-based systems"""
-    global prompt_library, validator, seo_manager, rag_system
+    global prompt_library, validator, seo_manager, rag_registry, rollout_scheduler, semantic_cache, generation_history
     
     try:
         if USE_JSON_LIBRARY:
@@ -72,18 +101,52 @@ def initialize_new_systems():
             validator = ContentValidator(prompt_library)
             seo_manager = SEOManager(prompt_library)
             
-            # Initialize RAG system (optional - will gracefully degrade if corpus not available)
-            rag_system = None
+            # Rollout scheduler for engagement clusters (local stub sink by default)
+            if prompt_library.comments_engine:
+                rollout_scheduler = RolloutScheduler(prompt_library.comments_engine.get('timing_and_cadence', {}))
+                if ROLLOUT_DISPATCH_INTERVAL > 0:
+                    rollout_scheduler.start(ROLLOUT_DISPATCH_INTERVAL)
+            
+            # Initialize RAG corpora from RAG_CORPORA (optional - will gracefully degrade if no corpus is available)
+            rag_registry = None
             try:
-                rag_system = BarranaRAGSystem()
-                if rag_system.initialize():
-                    logging.info("✅ RAG system initialized successfully")
+                rag_registry = CorpusRegistry(watch_interval=RAG_WATCH_INTERVAL)
+                if rag_registry.initialize():
+                    logging.info(f"✅ RAG system initialized successfully ({len(rag_registry.names)} corpora)")
                 else:
                     logging.warning("⚠️ RAG system initialization failed - continuing without RAG")
-                    rag_system = None
+                    rag_registry.stop()
+                    rag_registry = None
             except Exception as e:
                 logging.warning(f"⚠️ RAG system not available: {e} - continuing without RAG")
-                rag_system = None
+                rag_registry = None
+            
+            # Semantic cache of generated content (opt-in; embeds descriptions with the RAG embedding model)
+            semantic_cache = None
+            if SEMANTIC_CACHE_ENABLED:
+                if rag_registry:
+                    semantic_cache = SemanticContentCache(
+                        rag_registry.embed_query,
+                        threshold=float(os.environ.get('SEMANTIC_CACHE_THRESHOLD', '0.92')),
+                        ttl_seconds=float(os.environ.get('SEMANTIC_CACHE_TTL', '86400')),
+                        max_entries=int(os.environ.get('SEMANTIC_CACHE_MAX_ENTRIES', '1000'))
+                    )
+                    logging.info(f"✅ Semantic content cache enabled (threshold {semantic_cache.threshold})")
+                else:
+                    logging.warning("⚠️ Semantic cache needs the RAG embedder - continuing without it")
+            
+            # Searchable history of generated posts (opt-in; endpoints need the admin token)
+            if GENERATION_HISTORY_ENABLED and generation_history is None:
+                try:
+                    generation_history = HistoryStore(
+                        os.environ.get('GENERATION_HISTORY_DIR', 'generation_history'),
+                        embed=embed_history_text,
+                        dimensions=GENERATION_HISTORY_DIMENSIONS
+                    )
+                    logging.info(f"✅ Generation history loaded ({generation_history.get_stats()['entries']} entries)")
+                except Exception as e:
+                    logging.warning(f"⚠️ Generation history not available: {e} - continuing without it")
+                    generation_history = None
             
             logging.info("✅ New JSON-based systems initialized successfully")
             return True
@@ -354,15 +417,35 @@ def api_generate_content():
         
         results = {}
         metrics = {}
+        memo = RequestMemo()
         
         # Process each platform
         for platform in platforms:
             try:
                 if prompt_library and prompt_library.is_loaded():
                     # Use new JSON-based system
-                    result, platform_metrics, engagement_package = generate_content_with_json_system(description, platform)
+                    trace = {}
+                    result, platform_metrics, engagement_package = generate_content_with_json_system(
+                        description, platform, memo, use_cache=not data.get('skip_cache', False), trace=trace)
                     metrics[platform] = platform_metrics
                     
+                    # Queue the post for the history writer (never blocks the request)
+                    if generation_history:
+                        history_id = generation_history.record({
+                            "topic": topic,
+                            "description": description,
+                            "platform": platform,
+                            "platforms": platforms,
+                            "prompt": trace.get('prompt'),
+                            "output": trace.get('content'),
+                            "tokens_used": trace.get('tokens_used', 0),
+                            "cached": trace.get('cached', False),
+                            "metrics": platform_metrics,
+                            "engagement": engagement_package or None
+                        })
+                        if history_id:
+                            metrics[platform] = dict(platform_metrics, history_id=history_id)
+                    
                     # Always structure the result as an object for consistency
                     results[platform] = {
                         'main_content': result,
@@ -400,8 +483,83 @@ def api_generate_content():
         logging.error(f"❌ Error in content generation: {e}")
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
-def generate_content_with_json_system(description: str, platform: str) -> tuple:
-    """Generate content using the new JSON-based system"""
+def generate_platform_content(description: str, platform: str, keywords: dict, memo: RequestMemo) -> tuple:
+    """Build the prompt (with RAG context) and generate content with GPT-4
+    
+    Returns (content, total tokens used by the completion, prompt).
+    """
+    # Get RAG context if available
+    rag_context = ""
+    if rag_registry and rag_registry.is_loaded:
+        try:
+            rag_filters = {"platform": platform}
+            rag_budget = context_budget(platform, prompt_library.get_platform_config(platform))
+            # Retrieval is shared across the request; only the packing depends on the platform budget
+            candidates = memo.get_or_compute(
+                ("rag_candidates", description, 3, 0.3, rag_registry.canonical_filters(rag_filters)),
+                lambda: rag_registry.context_candidates(description, top_k=3, min_score=0.3, filters=rag_filters)
+            )
+            rag_context = memo.get_or_compute(
+                ("rag_context", description, 3, 0.3, rag_registry.canonical_filters(rag_filters), rag_budget),
+                lambda: rag_registry.pack_context(description, candidates, rag_budget)
+            )
+            if rag_context:
+                logging.info(f"🔍 Retrieved RAG context for {platform}: {len(rag_context)} characters")
+            else:
+                logging.info(f"ℹ️ No relevant RAG context found for {platform}")
+        except Exception as e:
+            logging.warning(f"⚠️ RAG context retrieval failed: {e}")
+            rag_context = ""
+    
+    # Build prompt with optional RAG context
+    prompt = prompt_library.build_prompt(
+        description=description,
+        platform=platform,
+        primary_keywords=keywords['primary'],
+        secondary_keywords=keywords['secondary'],
+        rag_context=rag_context
+    )
+    
+    # Log the prompt being sent (for debugging)
+    logging.info(f"🔍 Prompt being sent to OpenAI for {platform}:")
+    logging.info(f"📝 Prompt length: {len(prompt)} characters")
+    logging.info(f"📝 Prompt preview: {prompt[:500]}...")
+    
+    # Generate content with OpenAI
+    response = client.chat.completions.create(
+        model="gpt-4",
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=1000,
+        temperature=0.7
+    )
+    
+    content = response.choices[0].message.content
+    tokens_used = response.usage.total_tokens if getattr(response, 'usage', None) else 0
+    
+    # Apply LinkedIn-specific optimizations if applicable
+    if platform in ['linkedin', 'linkedin_quick']:
+        try:
+            optimized_content = prompt_library.apply_linkedin_optimizations(content, description, platform)
+            if optimized_content != content:
+                logging.info(f"🔧 Applied LinkedIn optimizations for {platform}")
+                content = optimized_content
+        except Exception as e:
+            logging.warning(f"⚠️ LinkedIn optimization failed for {platform}: {e}")
+            # Continue with original content if optimization fails
+    
+    return content, tokens_used, prompt
+
+def generate_content_with_json_system(description: str, platform: str, memo: RequestMemo = None,
+                                      use_cache: bool = True, trace: dict = None) -> tuple:
+    """Generate content using the new JSON-based system
+    
+    Description-derived artifacts (RAG context) are computed once per request
+    through `memo` and shared by every platform in that request. With the
+    semantic cache enabled, a reworded description of an earlier request is
+    served from the cache unless `use_cache` is False. When `trace` is given
+    it receives the prompt, raw content and token usage for the history.
+    """
+    memo = memo or RequestMemo()
     try:
         # Validate input
         input_validation = validator.validate_input(description, platform)
@@ -411,53 +569,23 @@ def generate_content_with_json_system(description: str, platform: str) -> tuple:
         # Get optimized keywords
         keywords = seo_manager.get_platform_optimized_keywords(platform, "general")
         
-        # Get RAG context if available
-        rag_context = ""
-        if rag_system and rag_system.is_loaded:
-            try:
-                rag_context = rag_system.get_context(description, top_k=3, min_score=0.3)
-                if rag_context:
-                    logging.info(f"🔍 Retrieved RAG context for {platform}: {len(rag_context)} characters")
-                else:
-                    logging.info(f"ℹ️ No relevant RAG context found for {platform}")
-            except Exception as e:
-                logging.warning(f"⚠️ RAG context retrieval failed: {e}")
-                rag_context = ""
-        
-        # Build prompt with optional RAG context
-        prompt = prompt_library.build_prompt(
-            description=description,
-            platform=platform,
-            primary_keywords=keywords['primary'],
-            secondary_keywords=keywords['secondary'],
-            rag_context=rag_context
-        )
-        
-        # Log the prompt being sent (for debugging)
-        logging.info(f"🔍 Prompt being sent to OpenAI for {platform}:")
-        logging.info(f"📝 Prompt length: {len(prompt)} characters")
-        logging.info(f"📝 Prompt preview: {prompt[:500]}...")
-        
-        # Generate content with OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=1000,
-            temperature=0.7
-        )
+        # A similar earlier description on this platform is served from the semantic cache
+        # (only for the same prompt library version and rotated keywords)
+        cache_variant = '|'.join([str(prompt_library.library.get('version', '')),
+                                  ','.join(sorted(keywords['primary'])), ','.join(sorted(keywords['secondary']))])
+        cached = None
+        if semantic_cache and use_cache:
+            cached = semantic_cache.lookup(description, platform, cache_variant)
+        if cached:
+            content = cached['value']
+            prompt, tokens_used = None, 0
+            logging.info(f"♻️ Semantic cache hit for {platform} (similarity {cached['similarity']}): "
+                         f"'{cached['description'][:50]}'")
+        else:
+            content, tokens_used, prompt = generate_platform_content(description, platform, keywords, memo)
         
-        content = response.choices[0].message.content
-        
-        # Apply LinkedIn-specific optimizations if applicable
-        if platform in ['linkedin', 'linkedin_quick']:
-            try:
-                optimized_content = prompt_library.apply_linkedin_optimizations(content, description, platform)
-                if optimized_content != content:
-                    logging.info(f"🔧 Applied LinkedIn optimizations for {platform}")
-                    content = optimized_content
-            except Exception as e:
-                logging.warning(f"⚠️ LinkedIn optimization failed for {platform}: {e}")
-                # Continue with original content if optimization fails
+        if trace is not None:
+            trace.update(prompt=prompt, content=content, tokens_used=tokens_used, cached=bool(cached))
         
         # Validate output
         output_validation = validator.validate_output(content, platform)
@@ -465,10 +593,30 @@ def generate_content_with_json_system(description: str, platform: str) -> tuple:
         # Log validation results
         if not output_validation['valid']:
             logging.warning(f"⚠️ Content validation issues for {platform}: {output_validation['issues']}")
+        elif semantic_cache and not cached:
+            # Only content that passed validation is served to later requests
+            semantic_cache.store(description, platform, content, tokens=tokens_used, variant=cache_variant)
         
         # Return all metrics including platform-specific ones
         platform_metrics = output_validation['metrics']
         
+        # Trace each sentence back to the corpus chunks it overlaps (shingle index, no LLM calls)
+        if PROVENANCE_ENABLED and rag_registry and rag_registry.is_loaded:
+            try:
+                provenance = rag_registry.trace_provenance(content)
+                platform_metrics = dict(platform_metrics, provenance=provenance)
+                logging.info(f"🔍 Provenance for {platform}: {provenance['supported_sentences']}/"
+                             f"{provenance['checked_sentences']} sentences supported by the corpus "
+                             f"({provenance['elapsed_ms']}ms)")
+            except Exception as e:
+                logging.warning(f"⚠️ Provenance tracing failed for {platform}: {e}")
+        if cached and SEMANTIC_CACHE_MARK_HITS:
+            platform_metrics = dict(platform_metrics, semantic_cache={
+                "hit": True,
+                "similarity": cached['similarity'],
+                "cached_description": cached['description']
+            })
+        
         # Generate engagement package for social media platforms
         engagement_package = {}
         if prompt_library.is_engagement_enabled_for_platform(platform):
@@ -491,6 +639,8 @@ def generate_content_with_json_system(description: str, platform: str) -> tuple:
         
         if output_validation['suggestions']:
             enhanced_content += f"• Suggestions: {'; '.join(output_validation['suggestions'])}\n"
+        if cached and SEMANTIC_CACHE_MARK_HITS:
+            enhanced_content += f"• Served from cache (similar description, similarity {cached['similarity']})\n"
         
         return enhanced_content, platform_metrics, engagement_package
         
@@ -574,13 +724,21 @@ def api_system_info():
         "version": "2.0.0",
         "json_library_version": prompt_library.library.get('version') if prompt_library else None,
         "available_platforms": prompt_library.get_available_platforms() if prompt_library else [],
-        "rag_system": rag_system.get_stats() if rag_system else {"is_loaded": False},
+        "rag_system": rag_registry.get_stats() if rag_registry else {"is_loaded": False},
+        "industry_classifier": prompt_library.get_industry_classifier().get_stats() if prompt_library else None,
+        "engagement_uniqueness": prompt_library.get_uniqueness_index().get_stats() if prompt_library and prompt_library.comments_engine else None,
+        "phrase_reuse": prompt_library.get_phrase_store().get_stats() if prompt_library and prompt_library.comments_engine else None,
+        "rollout_scheduler": rollout_scheduler.get_stats() if rollout_scheduler else None,
+        "semantic_cache": semantic_cache.get_stats() if semantic_cache else None,
+        "generation_history": generation_history.get_stats() if generation_history else None,
         "features": {
             "validation": validator is not None,
             "seo_management": seo_manager is not None,
             "keyword_rotation": seo_manager is not None,
             "quality_control": validator is not None,
-            "rag_enhancement": rag_system is not None and rag_system.is_loaded
+            "rag_enhancement": rag_registry is not None and rag_registry.is_loaded,
+            "semantic_cache": semantic_cache is not None,
+            "generation_history": generation_history is not None
         }
     }
     
@@ -628,6 +786,171 @@ def api_generate_engagement_package():
         logging.error(f"❌ Error generating engagement package: {e}")
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
+# Admin token check (admin, rollout and generation history endpoints)
+def admin_auth_error():
+    """Error response unless the request carries the configured admin token
+    
+    Admin endpoints stay closed (403) while ADMIN_TOKEN is not configured.
+    """
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Admin endpoints are disabled (ADMIN_TOKEN not configured)"}), 403
+    
+    token = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8')):
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    return None
+
+# Engagement rollout scheduling endpoints
+@app.route('/api/rollouts', methods=['POST'])
+def api_schedule_rollout():
+    """Schedule an engagement package as timestamped comment releases (needs the admin token)"""
+    auth_error = admin_auth_error()
+    if auth_error:
+        return auth_error
+    
+    try:
+        data = request.json
+        if not data:
+            return jsonify({"error": "No JSON data provided"}), 400
+        
+        platform = data.get('platform')
+        engagement_package = data.get('engagement_package')
+        
+        if not platform or not engagement_package or not engagement_package.get('comments'):
+            return jsonify({"error": "Missing required data: platform or engagement_package with comments"}), 400
+        
+        start_at = data.get('start_at')
+        if start_at is not None:
+            try:
+                start_at = float(start_at)
+            except (TypeError, ValueError):
+                start_at = math.nan
+            if not math.isfinite(start_at):
+                return jsonify({"error": "start_at must be a Unix timestamp"}), 400
+        
+        if not rollout_scheduler:
+            return jsonify({"error": "Rollout scheduler not available"}), 500
+        
+        try:
+            rollout = rollout_scheduler.schedule_cluster(
+                engagement_package, platform,
+                post_id=data.get('post_id'),
+                start_at=start_at
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        logging.info(f"✅ Scheduled rollout {rollout['post_id']} for {platform}: {len(rollout['events'])} releases")
+        return jsonify({"success": True, "rollout": rollout})
+        
+    except Exception as e:
+        logging.error(f"❌ Error scheduling rollout: {e}")
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+@app.route('/api/rollouts/due', methods=['POST'])
+def api_due_rollout_events():
+    """Pop releases that are due now and hand them to the rollout sink (needs the admin token)"""
+    auth_error = admin_auth_error()
+    if auth_error:
+        return auth_error
+    
+    if not rollout_scheduler:
+        return jsonify({"error": "Rollout scheduler not available"}), 500
+    
+    due = rollout_scheduler.dispatch_due()
+    return jsonify({"events": [event.to_dict() for event in due]})
+
+@app.route('/api/rollouts/<post_id>', methods=['DELETE'])
+def api_cancel_rollout(post_id):
+    """Stop releasing comments for a post (needs the admin token)"""
+    auth_error = admin_auth_error()
+    if auth_error:
+        return auth_error
+    
+    if not rollout_scheduler:
+        return jsonify({"error": "Rollout scheduler not available"}), 500
+    
+    if not rollout_scheduler.cancel_post(post_id):
+        return jsonify({"error": f"Unknown rollout: {post_id}"}), 404
+    
+    return jsonify({"success": True, "post_id": post_id})
+
+# Generation history endpoints (they expose prompts and outputs, so they need the admin token)
+@app.route('/api/history/search')
+def api_search_history():
+    """Search earlier generated posts by keywords and output similarity
+    
+    Query parameters: q (empty: most recent), mode (keyword, vector, hybrid),
+    platform, since (ISO timestamp) and top_k.
+    """
+    auth_error = admin_auth_error()
+    if auth_error:
+        return auth_error
+    
+    if not generation_history:
+        return jsonify({"error": "Generation history not available"}), 500
+    
+    try:
+        top_k = int(request.args.get('top_k', 10))
+    except ValueError:
+        return jsonify({"error": "top_k must be an integer"}), 400
+    if top_k < 1:
+        return jsonify({"error": "top_k must be at least 1"}), 400
+    
+    try:
+        results = generation_history.search(
+            request.args.get('q', ''),
+            top_k=min(top_k, 100),
+            mode=request.args.get('mode', 'hybrid'),
+            platform=request.args.get('platform'),
+            since=request.args.get('since')
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({"results": results, "count": len(results)})
+
+@app.route('/api/history/<entry_id>')
+def api_get_history_entry(entry_id):
+    """Full history entry, including its prompt and engagement cluster"""
+    auth_error = admin_auth_error()
+    if auth_error:
+        return auth_error
+    
+    if not generation_history:
+        return jsonify({"error": "Generation history not available"}), 500
+    
+    entry = generation_history.get(entry_id)
+    if not entry:
+        return jsonify({"error": f"Unknown history entry: {entry_id}"}), 404
+    
+    entry.pop('vector_row', None)
+    entry.pop('vector_dimensions', None)
+    return jsonify(entry)
+
+# Admin endpoints
+@app.route('/api/admin/rag/reload', methods=['POST'])
+def api_reload_rag():
+    """Rebuild RAG indices in the background and swap them in when ready
+    
+    Pass ?corpus=<name> to rebuild one corpus without touching the others.
+    """
+    auth_error = admin_auth_error()
+    if auth_error:
+        return auth_error
+    
+    if not rag_registry:
+        return jsonify({"error": "RAG system not available"}), 500
+    
+    corpus = request.args.get('corpus')
+    if corpus and corpus not in rag_registry.names:
+        return jsonify({"error": f"Unknown corpus: {corpus}", "corpora": rag_registry.names}), 404
+    
+    rag_registry.reload_corpus(corpus, background=True)
+    return jsonify({"success": True, "reloading": True, "corpus": corpus,
+                    "rag_system": rag_registry.get_stats()}), 202
+
 if __name__ == '__main__':
     print("🚀 Starting AI Content Agent v2.0")
     print(f"📊 JSON Library: {'✅ Enabled' if prompt_library else '❌ Disabled'}")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Measure corpus loading time and memory: list of dicts vs columnar store
+
+Writes a synthetic JSONL corpus shaped like barrana_rag_corpus.jsonl and
+compares json.loads into a list of dicts (the old load_corpus) against
+CorpusStore.from_jsonl and reopening the saved columns memory-mapped.
+Memory is the tracemalloc peak of each load; it is measured in a separate
+pass so it doesn't distort the timings. Also times building one retrieval
+result (dict copy vs ChunkView).
+
+Usage: python benchmark_corpus_store.py [--n 200000]
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from corpus_store import CorpusStore
+
+SOURCES = ["Barrana Overview", "Barrana Services", "Barrana Benefits", "Added Authority", "Case Studies"]
+SECTIONS = ["Company Mission", "Services Questions", "About the Founder", "Pricing", "Technical & Implementation Questions"]
+TAGS = ["automation", "ai", "workflow", "crm", "reporting", "founder", "pricing", "integration", "schools", "smb"]
+WORDS = ("automation workflow client reporting integration invoice onboarding dashboard agent pipeline "
+         "schedule approval compliance payroll inventory support ticket email summary forecast").split()
+
+
+def write_synthetic_corpus(path: str, n: int) -> None:
+    rng = random.Random(7)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            source = rng.choice(SOURCES)
+            f.write(json.dumps({
+                "id": f"chunk_{i}", "source": source, "source_title": f"{source} Guide",
+                "section": rng.choice(SECTIONS), "chunk_index": i % 40,
+                "text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(25, 60))).capitalize() + ".",
+                "tags": rng.sample(TAGS, 3),
+            }) + "\n")
+
+
+def load_dicts(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def measure(label: str, load, size: int) -> object:
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    del result
+
+    tracemalloc.start()
+    result = load()
+    _, peak = tracemalloc.get_traced_memory()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"   {label:<30} {elapsed:8.2f}s {current / 2**20:10.1f} MB {current / size:10,.0f} {peak / 2**20:10.1f} MB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark columnar corpus storage")
+    parser.add_argument("--n", type=int, default=200000, help="Synthetic corpus size")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        write_synthetic_corpus(corpus, args.n)
+        print(f"📊 {args.n:,} chunks, {os.path.getsize(corpus) / 2**20:.1f} MB JSONL")
+        print(f"   {'layout':<30} {'load':>9} {'retained':>13} {'B/chunk':>10} {'peak':>13}")
+
+        dicts = measure("list of dicts (json)", lambda: load_dicts(corpus), args.n)
+        store = measure("CorpusStore.from_jsonl", lambda: CorpusStore.from_jsonl(corpus), args.n)
+        store.save(os.path.join(tmp, "columns"))
+        mapped = measure("CorpusStore.open (mmap)", lambda: CorpusStore.open(os.path.join(tmp, "columns")), args.n)
+        print(f"   columns on disk: {store.nbytes / 2**20:.1f} MB ({store.nbytes / args.n:,.0f} B/chunk)")
+
+        positions = [random.randrange(args.n) for _ in range(100000)]
+        for label, chunks in (("dict.copy()", dicts), ("ChunkView (memory)", store), ("ChunkView (mmap)", mapped)):
+            start = time.perf_counter()
+            for pos in positions:
+                chunk = chunks[pos]
+                chunk = chunk.copy() if isinstance(chunk, dict) else chunk
+                chunk["similarity_score"] = 0.5
+                chunk["rank"] = 1
+            per_hit = (time.perf_counter() - start) / len(positions)
+            print(f"   result from {label:<20} {per_hit * 1e6:6.2f} µs/hit")
+
+        start = time.perf_counter()
+        for pos in positions[:20000]:
+            mapped[pos]["text"]
+        print(f"   text access via mmap view    {(time.perf_counter() - start) / 20000 * 1e6:6.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
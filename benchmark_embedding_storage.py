@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Measure memory per chunk and retrieval quality of compact embedding storage
+
+Offline mode compares storage/index options on clustered synthetic vectors:
+recall@k against exact float32 search, plus bytes per chunk (the old layout
+kept a float64 matrix next to the float32 index).
+
+--live also embeds the real corpus with reduced `dimensions` through the
+OpenAI API and reports top-k overlap with the full-size embeddings.
+
+Usage: python benchmark_embedding_storage.py [--n 20000] [--dim 3072] [--live]
+"""
+
+import argparse
+import json
+import os
+
+import faiss
+import numpy as np
+
+from ann_index import build_ann_index, estimate_index_bytes, resolve_params
+from benchmark_rag_index import synthetic_vectors
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(np.mean([len(set(found[i]) & set(truth[i])) / k for i in range(len(truth))]))
+
+
+def offline(n: int, dim: int, k: int, queries: int) -> None:
+    rng = np.random.default_rng(7)
+    vectors = synthetic_vectors(n, dim, rng)
+    ids = np.arange(n, dtype="int64")
+    query_vectors = vectors[rng.integers(0, n, queries)] + 0.05 * rng.standard_normal((queries, dim)).astype("float32")
+    faiss.normalize_L2(query_vectors)
+
+    exact = build_ann_index(vectors, ids, resolve_params("flat", None, n, dim))
+    _, truth = exact.search(query_vectors, k)
+
+    print(f"📊 {n:,} synthetic chunks x {dim} dims, recall@{k} vs exact float32")
+    print(f"   {'layout':<34} {'bytes/chunk':>12} {'recall':>8}")
+    legacy = n * dim * 8 + estimate_index_bytes(exact)
+    print(f"   {'float64 matrix + flat index (old)':<34} {legacy / n:12,.0f} {1.0:8.3f}")
+    print(f"   {'flat index only (float32)':<34} {estimate_index_bytes(exact) / n:12,.0f} {1.0:8.3f}")
+    del exact
+
+    # Vectors that went through float16 storage and back (e.g. a rebuild from float16 artifacts)
+    half = vectors.astype("float16")
+    rebuilt = build_ann_index(half.astype("float32"), ids, resolve_params("flat", None, n, dim))
+    _, found = rebuilt.search(query_vectors, k)
+    print(f"   {'flat index from float16 storage':<34} {estimate_index_bytes(rebuilt) / n:12,.0f} {recall_at_k(found, truth):8.3f}")
+    del rebuilt, half
+
+    for index_type, label in (("sq_fp16", "sq_fp16 index"), ("sq8", "sq8 index"), ("ivf_pq", "ivf_pq index (nprobe=32)")):
+        params = resolve_params(index_type, {"nprobe": 32}, n, dim)
+        index = build_ann_index(vectors, ids, params)
+        _, found = index.search(query_vectors, k)
+        print(f"   {label:<34} {estimate_index_bytes(index) / n:12,.0f} {recall_at_k(found, truth):8.3f}")
+        del index
+
+
+def live(k: int) -> None:
+    from openai import OpenAI
+
+    client = OpenAI()
+    with open("barrana_rag_corpus.jsonl", encoding="utf-8") as f:
+        chunks = [json.loads(line) for line in f if line.strip()]
+    texts = [chunk["text"] for chunk in chunks]
+    queries = [f"{chunk.get('source_title', '')} {chunk.get('section', '')}" for chunk in chunks]
+    k = min(k, len(texts))
+
+    def embed(items, dimensions=None):
+        kwargs = {"dimensions": dimensions} if dimensions else {}
+        response = client.embeddings.create(model="text-embedding-3-large", input=items, **kwargs)
+        matrix = np.array([data.embedding for data in response.data], dtype="float32")
+        faiss.normalize_L2(matrix)
+        return matrix
+
+    full_docs, full_queries = embed(texts), embed(queries)
+    truth = np.argsort(-full_queries @ full_docs.T, axis=1)[:, :k]
+    print(f"\n📊 Live corpus ({len(texts)} chunks), top-{k} overlap with 3072-dim embeddings")
+    for dimensions in (1536, 1024, 512, 256):
+        docs, qs = embed(texts, dimensions), embed(queries, dimensions)
+        found = np.argsort(-qs @ docs.T, axis=1)[:, :k]
+        print(f"   dimensions={dimensions:<5} {dimensions * 4:>6} bytes/chunk   overlap {recall_at_k(found, truth):.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compact RAG embedding storage")
+    parser.add_argument("--n", type=int, default=20000, help="Synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=3072, help="Synthetic vector dimension")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query")
+    parser.add_argument("--queries", type=int, default=200, help="Number of synthetic queries")
+    parser.add_argument("--live", action="store_true", help="Also measure reduced API dimensions on the real corpus")
+    args = parser.parse_args()
+
+    offline(args.n, args.dim, args.k, args.queries)
+    if args.live:
+        if not os.environ.get("OPENAI_API_KEY"):
+            print("❌ --live needs OPENAI_API_KEY")
+            return
+        live(args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Benchmark prompt building: precompiled platform templates vs rendering every section per call
+
+Usage: python benchmark_prompt_library.py [calls_per_platform]
+"""
+
+import logging
+import sys
+import time
+
+from prompt_library import BarranaPromptLibrary
+
+DESCRIPTIONS = [
+    "How dental clinics cut appointment no-shows with automated SMS reminders",
+    "Why small law firms should automate client intake before hiring another paralegal",
+    "Inventory forecasting for independent bakeries without a data team",
+]
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    logging.disable(logging.INFO)
+    library = BarranaPromptLibrary()
+    primary = library.library['seo']['primary_keywords']
+    secondary = library.library['seo']['secondary_keywords']
+    platforms = library.get_available_platforms()
+
+    print(f"📊 Building {calls:,} prompts for each of {len(platforms)} platforms...")
+    for label, build in [
+        ("Per-call render", lambda description, platform: library._render_prompt(
+            library.get_platform_config(platform), platform, description,
+            ', '.join(primary), ', '.join(secondary), str(len(primary)))),
+        ("Compiled template", lambda description, platform: library.build_prompt(
+            description, platform, primary, secondary)),
+    ]:
+        start = time.perf_counter()
+        for platform in platforms:
+            for i in range(calls):
+                build(DESCRIPTIONS[i % len(DESCRIPTIONS)], platform)
+        elapsed = time.perf_counter() - start
+        print(f"   {label}: {elapsed * 1e6 / (calls * len(platforms)):.1f} µs per prompt")
+
+    start = time.perf_counter()
+    library.reload_library()
+    print(f"   Reload with recompilation: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark RAG retrieval throughput with and without query micro-batching
+
+Simulates an embeddings API with a fixed round-trip latency and a cap on
+concurrent connections (as with a pooled HTTP client or per-key rate limits),
+so the gain comes from fewer round trips and batched index searches.
+
+Usage: python benchmark_query_batching.py [concurrent_clients] [queries_per_client]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from testing_helpers import CORPUS_PATH, FakeEmbeddingClient, make_rag
+
+
+class SlowEmbeddingClient(FakeEmbeddingClient):
+    """Fake embeddings with a fixed round-trip latency and limited concurrent connections"""
+
+    def __init__(self, latency: float = 0.02, connections: int = 8):
+        super().__init__(dimension=256)
+        self.latency = latency
+        self.connections = threading.Semaphore(connections)
+        self.lock = threading.Lock()
+
+    def create(self, model, input, **kwargs):
+        with self.connections:
+            time.sleep(self.latency)
+        with self.lock:
+            return super().create(model, input, **kwargs)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(rag, clients: int, per_client: int, offset: int) -> dict:
+    latencies = []
+    lock = threading.Lock()
+
+    def client_loop(n):
+        for i in range(per_client):
+            start = time.perf_counter()
+            rag.retrieve(f"automation question {offset}-{n}-{i}", top_k=3, min_score=0.0)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    rag.client.calls = 0
+    threads = [threading.Thread(target=client_loop, args=(n,)) for n in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "qps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "api_calls": rag.client.calls,
+    }
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    per_client = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rag = make_rag(CORPUS_PATH, tmp, SlowEmbeddingClient())
+        rag.initialize()
+
+        print(f"📊 {clients} concurrent clients x {per_client} uncached queries, 20 ms embedding latency, 8 connections")
+        unbatched = run(rag, clients, per_client, offset=0)
+        rag.enable_query_batching(window_ms=5, max_batch=64)
+        batched = run(rag, clients, per_client, offset=1)
+        rag.disable_query_batching()
+
+        for label, result in (("unbatched", unbatched), ("batched (5 ms)", batched)):
+            print(f"   {label:<15} {result['qps']:8.1f} q/s   p50 {result['p50_ms']:6.1f} ms   "
+                  f"p99 {result['p99_ms']:6.1f} ms   embedding calls {result['api_calls']}")
+        print(f"✅ Throughput gain: {batched['qps'] / unbatched['qps']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark the rollout scheduler: scheduling throughput and release accuracy
+
+Usage: python benchmark_rollout_scheduler.py [concurrent_posts]
+"""
+
+import json
+import random
+import sys
+import time
+
+from rollout_scheduler import RolloutScheduler, RolloutSink
+
+PERSONAS = ["Person A", "Person B", "Person C", "Person D", "Person E"]
+
+
+class CollectingSink(RolloutSink):
+    def __init__(self, clock):
+        self.clock = clock
+        self.lateness = []
+
+    def dispatch(self, event):
+        self.lateness.append(self.clock[0] - event.due_at)
+
+
+def synthetic_cluster(rng: random.Random, size: int = 18) -> dict:
+    comments = []
+    for i in range(1, size + 1):
+        parent = f"c{rng.randint(1, i - 1)}" if i > 2 and rng.random() < 0.55 else None
+        speaker = "Barrana" if parent and rng.random() < 0.5 else rng.choice(PERSONAS)
+        comments.append({"id": f"c{i}", "speaker": speaker, "reply_to": parent, "text": f"comment {i}"})
+    return {"comments": comments}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    posts = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with open("comments-engine.json", encoding="utf-8") as f:
+        timing = json.load(f)["timing_and_cadence"]
+
+    rng = random.Random(42)
+    clock = [1_700_000_000.0]
+    sink = CollectingSink(clock)
+    scheduler = RolloutScheduler(timing, sink=sink, clock=lambda: clock[0])
+    platforms = list(timing)
+    clusters = [synthetic_cluster(rng) for _ in range(posts)]
+
+    print(f"📊 Scheduling {posts:,} concurrent post rollouts...")
+    start = time.perf_counter()
+    for i, cluster in enumerate(clusters):
+        # Posts go live over the first ten minutes
+        scheduler.schedule_cluster(cluster, platforms[i % len(platforms)], post_id=f"post-{i}",
+                                   start_at=clock[0] + rng.uniform(0, 600), rng=rng)
+    elapsed = time.perf_counter() - start
+    total = scheduler.get_stats()["scheduled"]
+    print(f"   Scheduled {total:,} releases in {elapsed:.2f}s ({total / elapsed:,.0f} events/s)")
+
+    # Poll once per simulated second until every release has gone out
+    start = time.perf_counter()
+    polls = 0
+    while scheduler.get_stats()["pending_events"]:
+        clock[0] += 1.0
+        scheduler.dispatch_due()
+        polls += 1
+    elapsed = time.perf_counter() - start
+    print(f"   Dispatched {len(sink.lateness):,} releases over {polls:,} simulated seconds in {elapsed:.2f}s "
+          f"({len(sink.lateness) / elapsed:,.0f} events/s)")
+    print(f"   Release lateness: p50 {percentile(sink.lateness, 50):.3f}s, "
+          f"p99 {percentile(sink.lateness, 99):.3f}s, max {max(sink.lateness):.3f}s, "
+          f"early {sum(1 for x in sink.lateness if x < 0)}")
+
+
+if __name__ == "__main__":
+    main()
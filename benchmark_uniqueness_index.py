@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark the engagement uniqueness index at large sizes
+
+Usage: python benchmark_uniqueness_index.py [stored_comments]
+"""
+
+import random
+import sys
+import time
+
+from uniqueness_index import EngagementUniquenessIndex
+
+TOPIC_WORDS = ("clinic restaurant booking reminder automation chatbot invoice patient menu staff admin "
+               "schedule lead follow-up whatsapp intake workflow report dashboard onboarding pricing "
+               "integration security data team owner weekend orders calls emails hours weeks").split()
+# Synthetic long-tail vocabulary so unrelated comments overlap roughly as much as real ones do
+WORDS = TOPIC_WORDS + [f"{a}{b}" for a in ("re", "un", "pre", "over", "co", "sub") for b in
+                       ("sync", "view", "load", "post", "book", "bill", "rate", "plan", "form", "mail",
+                        "chat", "ship", "stock", "shift", "lead", "list", "call", "note", "task", "link")]
+
+
+def synthetic_comment(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 25)))
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    rng = random.Random(42)
+
+    print(f"📊 Building index with {size:,} comments...")
+    index = EngagementUniquenessIndex(index_dir=None)
+    start = time.perf_counter()
+    batch = []
+    for i in range(size):
+        batch.append({"text": synthetic_comment(rng)})
+        if len(batch) == 1000:
+            index.add_cluster(batch, "linkedin")
+            batch = []
+    if batch:
+        index.add_cluster(batch, "linkedin")
+    print(f"   Insert: {(time.perf_counter() - start):.1f}s total")
+
+    queries = [synthetic_comment(rng) for _ in range(2000)]
+    start = time.perf_counter()
+    for query in queries:
+        index.query(query)
+    elapsed = time.perf_counter() - start
+    print(f"   Query (fresh text): {elapsed * 1000 / len(queries):.3f} ms per comment")
+
+    stored = [index._meta[rng.randrange(size)]["text"] for _ in range(500)]
+    start = time.perf_counter()
+    hits = sum(1 for text in stored if index.query(text + " again"))
+    elapsed = time.perf_counter() - start
+    print(f"   Query (near-duplicate): {elapsed * 1000 / len(stored):.3f} ms per comment, recall {hits / len(stored):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:['\-][a-z0-9]+)*")
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between both
+but by can could did do does doing down during each few for from further had has have having he her here hers
+herself him himself his how i if in into is it its itself just me more most my myself no nor not now of off on
+once only or other our ours ourselves out over own same she should so some such than that the their theirs them
+themselves then there these they this those through to too under until up very was we were what when where
+which while who whom why will with would you your yours yourself yourselves
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords"""
+    return [token for token in TOKEN_PATTERN.findall((text or "").lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    In-process BM25 inverted index over corpus chunks.
+
+    Each posting stores its precomputed BM25 contribution, so a query is a
+    sum over the postings of its terms with no network calls and no pass
+    over the whole corpus.
+    """
+
+    def __init__(self, chunks: List[Dict[str, Any]], k1: float = 1.5, b: float = 0.75,
+                 fields: Tuple[str, ...] = ("text", "section", "source_title")):
+        """
+        Build the index.
+
+        Args:
+            chunks: Chunks in index position order
+            k1: Term frequency saturation
+            b: Length normalization
+            fields: Chunk fields indexed (section and title add weak context)
+        """
+        self.size = len(chunks)
+        self.k1 = k1
+        self.b = b
+
+        documents = [tokenize(" ".join(str(chunk.get(field) or "") for field in fields)) for chunk in chunks]
+        lengths = np.array([len(tokens) for tokens in documents], dtype="float32")
+        avg_length = float(lengths.mean()) if self.size else 0.0
+
+        term_frequencies: Dict[str, Dict[int, int]] = {}
+        for pos, tokens in enumerate(documents):
+            for token in tokens:
+                postings = term_frequencies.setdefault(token, {})
+                postings[pos] = postings.get(pos, 0) + 1
+
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for term, postings in term_frequencies.items():
+            positions = np.fromiter(postings.keys(), dtype="int32", count=len(postings))
+            tf = np.fromiter(postings.values(), dtype="float32", count=len(postings))
+            idf = math.log(1.0 + (self.size - len(postings) + 0.5) / (len(postings) + 0.5))
+            norm = k1 * (1.0 - b + b * lengths[positions] / max(avg_length, 1e-9))
+            self._postings[term] = (positions, (idf * tf * (k1 + 1.0) / (tf + norm)).astype("float32"))
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._postings)
+
+    def search(self, query: str, top_k: int = 3, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Rank chunks for a query.
+
+        Args:
+            query: Search query
+            top_k: Number of results
+            mask: Optional boolean array over chunk positions (metadata filter)
+
+        Returns:
+            (chunk position, BM25 score) pairs, best first
+        """
+        postings = [self._postings[term] for term in set(tokenize(query)) if term in self._postings]
+        if not postings or top_k <= 0:
+            return []
+
+        positions = np.concatenate([p for p, _ in postings])
+        weights = np.concatenate([w for _, w in postings])
+        candidates, inverse = np.unique(positions, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+
+        if mask is not None:
+            keep = mask[candidates]
+            candidates, scores = candidates[keep], scores[keep]
+            if not len(candidates):
+                return []
+
+        if len(candidates) > top_k:
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            best = np.arange(len(candidates))
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(int(candidates[i]), float(scores[i])) for i in best]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "documents": self.size,
+            "vocabulary": self.vocabulary_size,
+            "postings": int(sum(len(p) for p, _ in self._postings.values())),
+        }
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """
+    Fuse ranked lists of chunk positions with reciprocal rank fusion.
+
+    Args:
+        rankings: Ranked position lists (best first)
+        k: RRF damping constant
+
+    Returns:
+        (position, fused score) pairs, best first
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, pos in enumerate(ranking):
+            fused[pos] = fused.get(pos, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
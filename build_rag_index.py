@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Prebuild RAG artifacts (embeddings + FAISS index) for the current corpus
+
+Run this at build/deploy time so the server starts without embedding calls:
+    python build_rag_index.py [--corpus barrana_rag_corpus.jsonl] [--force]
+"""
+
+import argparse
+import logging
+import shutil
+import sys
+
+from dotenv import load_dotenv
+
+from ann_index import INDEX_TYPES
+from rag_system import BarranaRAGSystem
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prebuild RAG embeddings and FAISS index")
+    parser.add_argument("--corpus", default="barrana_rag_corpus.jsonl", help="Path to the JSONL corpus")
+    parser.add_argument("--model", default="text-embedding-3-large", help="OpenAI embedding model")
+    parser.add_argument("--artifact-dir", default=None, help="Artifact directory (default: $RAG_ARTIFACT_DIR or rag_artifacts)")
+    parser.add_argument("--index-type", default=None, choices=INDEX_TYPES,
+                        help="ANN index type (default: $RAG_INDEX_TYPE or flat)")
+    parser.add_argument("--force", action="store_true", help="Re-embed the whole corpus even if matching or earlier artifacts exist")
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    rag_system = BarranaRAGSystem(corpus_path=args.corpus, embedding_model=args.model,
+                                  artifact_dir=args.artifact_dir, index_type=args.index_type)
+
+    if args.force:
+        rag_system.incremental = False
+        fingerprint = rag_system.compute_fingerprint()
+        if fingerprint:
+            shutil.rmtree(rag_system._artifact_path(fingerprint), ignore_errors=True)
+
+    if not rag_system.initialize():
+        print("❌ Failed to build RAG artifacts")
+        return 1
+
+    stats = rag_system.get_stats()
+    source = "reused existing artifacts" if stats["loaded_from_artifacts"] else "built new artifacts"
+    print(f"✅ RAG artifacts ready ({source}): {stats['fingerprint']} - {stats['index_size']} vectors "
+          f"({stats['index']['type']} index)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+"""
+pytest configuration: the shared fixtures live in testing_helpers
+"""
+
+from testing_helpers import (CORPUS_PATH, SECTIONS, FakeEmbeddingClient, SlowEmbeddingClient, base_chunks,
+                             case_study_chunks, filtered_corpus, make_rag, make_registry, write_corpus)
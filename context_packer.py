@@ -0,0 +1,200 @@
+import math
+import re
+import zlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from bm25_index import tokenize
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    # tiktoken is optional here; ~4 characters per token is close enough for budgeting
+    _ENCODING = None
+
+# RAG context token budget per platform. Short-form platforms get a few facts,
+# long-form ones room for several sources. A platform config may override this
+# with a 'context_tokens' entry.
+PLATFORM_CONTEXT_BUDGETS = {
+    "twitter_quick": 120,
+    "tiktok": 150,
+    "linkedin_quick": 150,
+    "instagram": 150,
+    "facebook": 150,
+    "pinterest": 150,
+    "crunchbase": 200,
+    "twitter": 250,
+    "substack_quick": 250,
+    "product_hunt": 250,
+    "linkedin": 300,
+    "skool": 300,
+    "stackoverflow": 350,
+    "reddit": 400,
+    "quora": 400,
+    "slideshare": 400,
+    "dev_to": 500,
+    "ikramrana_blog": 600,
+    "medium": 700,
+    "substack": 700,
+    "barrana_blog": 900,
+}
+DEFAULT_CONTEXT_BUDGET = 400
+
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+TERM_VECTOR_DIMENSION = 1024
+
+
+def count_tokens(text: str) -> int:
+    """Prompt tokens of a text (tiktoken cl100k_base when installed, else ~4 characters per token)"""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def context_budget(platform: Optional[str], config: Optional[Dict[str, Any]] = None) -> int:
+    """Context token budget for a platform"""
+    if config and config.get("context_tokens"):
+        return int(config["context_tokens"])
+    return PLATFORM_CONTEXT_BUDGETS.get(platform, DEFAULT_CONTEXT_BUDGET)
+
+
+def chunk_header(chunk: Dict[str, Any]) -> str:
+    return f"[Source: {chunk.get('source_title', 'Unknown')} - {chunk.get('section', 'Unknown Section')}]"
+
+
+def format_chunk(chunk: Dict[str, Any], text: Optional[str] = None) -> str:
+    """Context block for a chunk, as it appears in the prompt"""
+    return f"{chunk_header(chunk)}\n{chunk['text'] if text is None else text}"
+
+
+def _term_vector(text: str) -> np.ndarray:
+    """L2-normalized hashed term-frequency vector used to measure redundancy"""
+    vector = np.zeros(TERM_VECTOR_DIMENSION, dtype="float32")
+    for token in tokenize(text):
+        vector[zlib.crc32(token.encode("utf-8")) % TERM_VECTOR_DIMENSION] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _relevance(chunks: List[Dict[str, Any]]) -> List[float]:
+    """Retrieval scores scaled to [0, 1], falling back to rank order"""
+    for field in ("similarity_score", "rrf_score", "lexical_score"):
+        scores = [chunk.get(field) for chunk in chunks]
+        if all(score is not None for score in scores):
+            low, high = min(scores), max(scores)
+            if high > low:
+                return [0.2 + 0.8 * (score - low) / (high - low) for score in scores]
+            break
+    return [1.0 / (1.0 + 0.25 * i) for i in range(len(chunks))]
+
+
+class ContextPacker:
+    """
+    Packs retrieved chunks into a token budget by maximal marginal relevance.
+
+    Candidates are picked greedily by relevance minus similarity to what is
+    already packed, so overlapping chunks don't spend the budget twice. A
+    chunk that does not fit whole is split into sentences, which compete on
+    their own and share the chunk's source header.
+    """
+
+    def __init__(self, diversity: float = 0.3, duplicate_threshold: float = 0.85):
+        """
+        Initialize the packer.
+
+        Args:
+            diversity: Weight of redundancy against relevance (0 keeps the retrieval order)
+            duplicate_threshold: Term-vector similarity above which a candidate is dropped as a near-duplicate
+        """
+        self.diversity = diversity
+        self.duplicate_threshold = duplicate_threshold
+
+    def pack(self, query: str, chunks: List[Dict[str, Any]], budget: int) -> Dict[str, Any]:
+        """
+        Select and format context within a token budget.
+
+        Args:
+            query: Retrieval query (sentences mentioning its terms are preferred)
+            chunks: Retrieved chunks, best first ('context_tokens' is used when precomputed)
+            budget: Maximum context tokens
+
+        Returns:
+            Dictionary with the context string, tokens used and candidate tokens
+        """
+        token_counts = [chunk.get("context_tokens") or count_tokens(format_chunk(chunk)) for chunk in chunks]
+        candidate_tokens = int(sum(token_counts))
+        query_terms = set(tokenize(query))
+        relevance = _relevance(chunks)
+
+        # Units: whole chunks first; sentences are added when a chunk doesn't fit.
+        # Every block also pays one token for the blank line separating it from the next.
+        units = [{"chunk": i, "text": chunk["text"], "tokens": int(token_counts[i]) + 1, "whole": True,
+                  "relevance": relevance[i], "vector": _term_vector(chunk["text"])}
+                 for i, chunk in enumerate(chunks)]
+        paid_headers = set()
+        selected = []
+        used = 0
+
+        while units:
+            best, best_score = None, -math.inf
+            for unit in units:
+                redundancy = max((float(unit["vector"] @ other["vector"]) for other in selected), default=0.0)
+                unit["redundancy"] = redundancy
+                score = (1.0 - self.diversity) * unit["relevance"] - self.diversity * redundancy
+                if score > best_score:
+                    best, best_score = unit, score
+            units.remove(best)
+
+            if best["redundancy"] >= self.duplicate_threshold:
+                continue
+            chunk = best["chunk"]
+            cost = best["tokens"]
+            if not best["whole"] and chunk not in paid_headers:
+                cost += count_tokens(chunk_header(chunks[chunk])) + 1
+            if used + cost <= budget:
+                selected.append(best)
+                used += cost
+                if not best["whole"]:
+                    paid_headers.add(chunk)
+                continue
+            if not best["whole"]:
+                continue
+
+            for position, sentence in enumerate(SENTENCE_PATTERN.split(best["text"].strip())):
+                if not sentence:
+                    continue
+                overlap = len(query_terms & set(tokenize(sentence))) / len(query_terms) if query_terms else 0.0
+                units.append({"chunk": chunk, "position": position, "text": sentence,
+                              "tokens": count_tokens(sentence) + 1, "whole": False,
+                              "relevance": best["relevance"] * (0.5 + 0.5 * overlap),
+                              "vector": _term_vector(sentence)})
+
+        # Whole chunks in selection order; sentences regrouped under their chunk in text order
+        blocks, order = {}, []
+        for unit in selected:
+            chunk = unit["chunk"]
+            if chunk not in blocks:
+                blocks[chunk] = []
+                order.append(chunk)
+            blocks[chunk].append(unit)
+        context_parts = []
+        for chunk in order:
+            parts = blocks[chunk]
+            if parts[0]["whole"]:
+                context_parts.append(format_chunk(chunks[chunk]))
+            else:
+                text = " ".join(unit["text"] for unit in sorted(parts, key=lambda unit: unit["position"]))
+                context_parts.append(format_chunk(chunks[chunk], text))
+
+        return {
+            "context": "\n\n".join(context_parts),
+            "tokens": used,
+            "budget": budget,
+            "candidate_tokens": candidate_tokens,
+            "chunks": len(order),
+            "partial_chunks": sum(1 for chunk in order if not blocks[chunk][0]["whole"]),
+        }
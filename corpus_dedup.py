@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate chunk removal for the RAG corpus
+
+Chunks are compared by MinHash over character shingles (the same hasher
+as the engagement uniqueness index) with LSH banding, so only chunks that
+share a band are compared. Each cluster of near-duplicates keeps one
+canonical chunk, which records the merged chunks as provenance.
+
+Usage: python corpus_dedup.py CORPUS [--output CORPUS] [--threshold 0.8] [--report report.json]
+"""
+
+import argparse
+import json
+import logging
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from bm25_index import BM25Index
+from uniqueness_index import MinHasher
+
+DEFAULT_THRESHOLD = 0.8
+
+
+def _signatures(texts: List[str], hasher: MinHasher) -> np.ndarray:
+    signatures = np.empty((len(texts), hasher.num_perm), dtype=np.uint32)
+    for i, text in enumerate(texts):
+        signatures[i] = hasher.signature(text)
+    return signatures
+
+
+def _candidate_pairs(signatures: np.ndarray, bands: int) -> np.ndarray:
+    """Pairs (i < j) of rows whose signatures hash to the same key in at least one band"""
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    rng = np.random.RandomState(11)
+    mix = rng.randint(1, 2 ** 62, size=(bands, rows), dtype=np.uint64) | np.uint64(1)
+    keys = (signatures.reshape(n, bands, rows).astype(np.uint64) * mix).sum(axis=2)
+
+    pairs = set()
+    for band in range(bands):
+        order = np.argsort(keys[:, band], kind="stable")
+        sorted_keys = keys[order, band]
+        boundaries = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+        for group in np.split(order, boundaries):
+            if len(group) > 1:
+                group = np.sort(group).tolist()
+                pairs.update((a, b) for k, a in enumerate(group) for b in group[k + 1:])
+    return np.array(sorted(pairs), dtype=np.int64).reshape(-1, 2)
+
+
+def find_duplicate_clusters(texts: List[str], threshold: float = DEFAULT_THRESHOLD, num_perm: int = 128,
+                            bands: int = 32) -> List[Dict[str, Any]]:
+    """
+    Group near-duplicate texts.
+
+    Args:
+        texts: Chunk texts
+        threshold: Estimated Jaccard similarity at which two chunks are near-duplicates
+        num_perm: MinHash permutations
+        bands: LSH bands (num_perm must be divisible by bands)
+
+    Returns:
+        Clusters with 'members' (positions) and 'similarity' (each member's closest match in the cluster)
+    """
+    if num_perm % bands:
+        raise ValueError("num_perm must be divisible by bands")
+    signatures = _signatures(texts, MinHasher(num_perm=num_perm))
+    pairs = _candidate_pairs(signatures, bands)
+
+    parent = list(range(len(texts)))
+
+    def root(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    best = {}
+    if len(pairs):
+        similarities = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+        for (a, b), similarity in zip(pairs.tolist(), similarities.tolist()):
+            if similarity >= threshold:
+                parent[root(b)] = root(a)
+                best[a] = max(best.get(a, 0.0), similarity)
+                best[b] = max(best.get(b, 0.0), similarity)
+
+    groups = {}
+    for i in range(len(texts)):
+        groups.setdefault(root(i), []).append(i)
+    return [{"members": members, "similarity": {i: round(best.get(i, 1.0), 3) for i in members}}
+            for members in groups.values() if len(members) > 1]
+
+
+def _merge_lists(values: List[Optional[List[str]]]) -> List[str]:
+    merged = []
+    for value in values:
+        for item in value or []:
+            if item not in merged:
+                merged.append(item)
+    return merged
+
+
+def deduplicate_positions(chunks: List[Dict[str, Any]], threshold: float = DEFAULT_THRESHOLD
+                          ) -> Tuple[List[Optional[Dict[str, Any]]], Dict[str, Any]]:
+    """
+    Remove near-duplicate chunks, keeping one canonical chunk per cluster.
+
+    See deduplicate_chunks. The result is aligned with the input: the chunk
+    kept at each position (merged for canonical chunks) or None for a
+    removed duplicate, so callers can put chunks back without relying on ids.
+
+    Returns:
+        (chunk or None per input position, report)
+    """
+    clusters = find_duplicate_clusters([chunk.get("text", "") for chunk in chunks], threshold)
+    removed = set()
+    replacements = {}
+    report_clusters = []
+
+    for cluster in clusters:
+        members = cluster["members"]
+        canonical = max(members, key=lambda i: (len(chunks[i].get("text", "")), -i))
+        duplicates = [i for i in members if i != canonical]
+        merged = dict(chunks[canonical])
+        merged["merged_from"] = list(merged.get("merged_from") or []) + [{
+            "id": chunks[i].get("id"), "source": chunks[i].get("source"),
+            "source_title": chunks[i].get("source_title"), "section": chunks[i].get("section"),
+            "similarity": cluster["similarity"][i],
+        } for i in duplicates]
+        tags = _merge_lists([chunks[i].get("tags") for i in [canonical] + duplicates])
+        if tags:
+            merged["tags"] = tags
+        if all(chunks[i].get("platforms") for i in members):
+            merged["platforms"] = _merge_lists([chunks[i].get("platforms") for i in members])
+        else:
+            merged.pop("platforms", None)
+        replacements[canonical] = merged
+        removed.update(duplicates)
+        report_clusters.append({"canonical": chunks[canonical].get("id"),
+                                "removed": [chunks[i].get("id") for i in duplicates]})
+
+    positions = [None if i in removed else replacements.get(i, chunk) for i, chunk in enumerate(chunks)]
+    report = {
+        "threshold": threshold,
+        "input_chunks": len(chunks),
+        "kept_chunks": len(chunks) - len(removed),
+        "removed_chunks": len(removed),
+        "clusters": report_clusters,
+    }
+    return positions, report
+
+
+def deduplicate_chunks(chunks: List[Dict[str, Any]], threshold: float = DEFAULT_THRESHOLD
+                       ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Remove near-duplicate chunks, keeping one canonical chunk per cluster.
+
+    The canonical chunk is the longest member (the earliest on ties). It
+    gets the union of the cluster's tags and a 'merged_from' list with the
+    id, source, section and similarity of every removed chunk. A platform
+    allow-list survives only if every member had one.
+
+    Args:
+        chunks: Corpus chunks
+        threshold: Near-duplicate similarity threshold
+
+    Returns:
+        (kept chunks in corpus order, report)
+    """
+    positions, report = deduplicate_positions(chunks, threshold)
+    return [chunk for chunk in positions if chunk is not None], report
+
+
+def retrieval_redundancy(chunks: List[Dict[str, Any]], queries: List[str], top_k: int = 5,
+                         threshold: float = DEFAULT_THRESHOLD) -> float:
+    """
+    Share of top-k BM25 results that are near-duplicates of a higher-ranked result.
+
+    Lexical retrieval keeps this measurement free of embedding calls; the
+    duplicate clusters crowd vector top-k in the same way.
+    """
+    cluster_of = {}
+    for number, cluster in enumerate(find_duplicate_clusters([chunk.get("text", "") for chunk in chunks], threshold)):
+        for member in cluster["members"]:
+            cluster_of[member] = number
+    index = BM25Index(chunks)
+    redundant = total = 0
+    for query in queries:
+        seen = set()
+        for pos, _ in index.search(query, top_k):
+            group = cluster_of.get(pos, ("single", pos))
+            redundant += group in seen
+            seen.add(group)
+            total += 1
+    return redundant / total if total else 0.0
+
+
+def dedup_report(before: List[Dict[str, Any]], after: List[Dict[str, Any]], report: Dict[str, Any],
+                 dimension: int = 3072, top_k: int = 5) -> Dict[str, Any]:
+    """
+    Add index-size and retrieval-diversity figures to a dedup report.
+
+    Probe queries are the section titles and opening sentences of the input chunks.
+
+    Args:
+        before: Chunks before deduplication
+        after: Chunks after deduplication
+        report: Report from deduplicate_chunks
+        dimension: Embedding dimension used to size the float32 index
+        top_k: Results per probe query
+    """
+    queries = sorted({chunk.get("section") or "" for chunk in before} |
+                     {(chunk.get("text") or "").split(".")[0] for chunk in before} - {""})
+    threshold = report["threshold"]
+    report = dict(report)
+    report.update({
+        "index_bytes_before": len(before) * dimension * 4,
+        "index_bytes_after": len(after) * dimension * 4,
+        "redundant_top_k_before": round(retrieval_redundancy(before, queries, top_k, threshold), 4),
+        "redundant_top_k_after": round(retrieval_redundancy(after, queries, top_k, threshold), 4),
+        "probe_queries": len(queries),
+    })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove near-duplicate chunks from a RAG corpus")
+    parser.add_argument("corpus", help="JSONL corpus")
+    parser.add_argument("--output", default=None, help="Deduplicated corpus (default: overwrite the input)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Near-duplicate similarity threshold")
+    parser.add_argument("--report", default=None, help="Write the JSON report here")
+    parser.add_argument("--dry-run", action="store_true", help="Only report, don't write the corpus")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    from rag_ingest import write_atomic
+
+    with open(args.corpus, "r", encoding="utf-8") as f:
+        chunks = [json.loads(line) for line in f if line.strip()]
+    kept, report = deduplicate_chunks(chunks, args.threshold)
+    report = dedup_report(chunks, kept, report)
+
+    print(f"📊 {report['input_chunks']} chunks -> {report['kept_chunks']} "
+          f"({report['removed_chunks']} near-duplicates in {len(report['clusters'])} clusters)")
+    print(f"   index size: {report['index_bytes_before'] / 2**20:.1f} MB -> {report['index_bytes_after'] / 2**20:.1f} MB")
+    print(f"   redundant top-5 results: {report['redundant_top_k_before']:.1%} -> {report['redundant_top_k_after']:.1%}")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if not args.dry_run and report["removed_chunks"]:
+        write_atomic(args.output or args.corpus,
+                      lambda f: f.writelines(json.dumps(chunk, ensure_ascii=False) + "\n" for chunk in kept))
+        print(f"✅ Wrote {len(kept)} chunks to {args.output or args.corpus}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,376 @@
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from context_packer import ContextPacker, format_chunk
+from provenance import summarize_provenance
+from query_cache import QueryEmbeddingCache
+from rag_system import BarranaRAGSystem
+
+DEFAULT_CORPORA = {"barrana": {"path": "barrana_rag_corpus.jsonl"}}
+
+# Options of a corpus entry that are passed to its BarranaRAGSystem
+SYSTEM_OPTIONS = ("embedding_model", "index_type", "index_params", "embedding_dimensions",
+                  "embedding_dtype", "retrieval_mode")
+
+
+def load_corpora_config(value: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Parse the corpus registry configuration.
+
+    Args:
+        value: JSON object, or the path of a JSON file, mapping corpus names to a
+            corpus path or to options: path, watch_interval (seconds, 0 disables
+            watching) and any of SYSTEM_OPTIONS (default: RAG_CORPORA, or the
+            single Barrana corpus)
+
+    Returns:
+        Corpus name -> options with at least 'path'
+    """
+    value = value if value is not None else os.environ.get("RAG_CORPORA", "")
+    if not value.strip():
+        return {name: dict(spec) for name, spec in DEFAULT_CORPORA.items()}
+    if not value.lstrip().startswith("{"):
+        with open(value, "r", encoding="utf-8") as f:
+            value = f.read()
+    corpora = {}
+    for name, spec in json.loads(value).items():
+        spec = {"path": spec} if isinstance(spec, str) else dict(spec)
+        if not spec.get("path"):
+            raise ValueError(f"Corpus '{name}' has no path")
+        corpora[name] = spec
+    return corpora
+
+
+class CorpusRegistry:
+    """
+    Named RAG corpora searched together.
+
+    Each corpus is its own BarranaRAGSystem with its own snapshot, artifacts,
+    reloads and watcher, so one knowledge base can be rebuilt without
+    touching the others. Queries fan out to the selected corpora in parallel
+    and the results are merged by normalized score.
+    """
+
+    def __init__(self, corpora: Optional[Dict[str, Dict[str, Any]]] = None, artifact_dir: Optional[str] = None,
+                 watch_interval: float = 0.0):
+        """
+        Initialize the registry.
+
+        Args:
+            corpora: Corpus name -> options (default: load_corpora_config())
+            artifact_dir: Artifact directory shared by all corpora (artifacts are keyed by corpus path)
+            watch_interval: Default seconds between corpus file checks for corpora without their own
+        """
+        self.specs = corpora if corpora is not None else load_corpora_config()
+        self.watch_interval = watch_interval
+        # One query-embedding cache, so a federated query is embedded once for all corpora
+        self.query_cache = QueryEmbeddingCache(max_entries=int(os.environ.get("RAG_QUERY_CACHE_SIZE", "2048")))
+        self.systems: Dict[str, BarranaRAGSystem] = {}
+        for name, spec in self.specs.items():
+            options = {key: spec[key] for key in SYSTEM_OPTIONS if key in spec}
+            self.systems[name] = BarranaRAGSystem(corpus_path=spec["path"], artifact_dir=artifact_dir,
+                                                  query_cache=self.query_cache, **options)
+        self.context_packer = ContextPacker()
+        self.packing_stats = {"packed": 0, "candidate_tokens": 0, "context_tokens": 0}
+        self.query_stats = {"queries": 0, "corpora_searched": 0}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.systems)), thread_name_prefix="rag-corpus")
+
+        logging.info(f"🔧 Corpus registry with {len(self.systems)} corpora: {', '.join(self.systems)}")
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.systems)
+
+    def get(self, name: str) -> Optional[BarranaRAGSystem]:
+        return self.systems.get(name)
+
+    @property
+    def is_loaded(self) -> bool:
+        """True once any corpus has a published snapshot"""
+        return any(system.is_loaded for system in self.systems.values())
+
+    def initialize(self) -> bool:
+        """
+        Initialize every corpus in parallel.
+
+        Returns:
+            bool: True if at least one corpus is ready; failed corpora are logged and skipped
+        """
+        names = self.names
+        results = list(self._executor.map(lambda name: self.systems[name].initialize(), names))
+        for name, ok in zip(names, results):
+            if ok:
+                self._start_watch(name)
+            else:
+                logging.warning(f"⚠️ RAG corpus '{name}' failed to initialize - searching the others without it")
+        return any(results)
+
+    def _start_watch(self, name: str) -> None:
+        interval = float(self.specs[name].get("watch_interval", self.watch_interval) or 0)
+        if interval > 0:
+            self.systems[name].start_corpus_watch(interval)
+
+    def stop(self) -> None:
+        """Stop corpus watchers and the search pool"""
+        for system in self.systems.values():
+            system.stop_corpus_watch()
+        self._executor.shutdown(wait=False)
+
+    def reload_corpus(self, name: Optional[str] = None, background: bool = False) -> bool:
+        """
+        Reload one corpus, or all of them.
+
+        Args:
+            name: Corpus to reload (default: every corpus)
+            background: Build in background threads and return immediately
+
+        Returns:
+            bool: True if every requested reload succeeded (or was started)
+        """
+        if name is not None and name not in self.systems:
+            raise KeyError(name)
+        names = [name] if name is not None else self.names
+        return all([self.systems[n].reload_corpus(background=background) for n in names])
+
+    def _selected(self, corpora: Optional[List[str]]) -> List[str]:
+        if corpora is None:
+            return [name for name, system in self.systems.items() if system.is_loaded]
+        unknown = [name for name in corpora if name not in self.systems]
+        if unknown:
+            raise KeyError(f"Unknown corpora: {', '.join(unknown)}")
+        return [name for name in corpora if self.systems[name].is_loaded]
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        Normalized embedding of a query with the RAG embedding model, cached across corpora.
+
+        Raises:
+            RuntimeError: If the registry has no corpora
+        """
+        systems = sorted(self.systems.values(), key=lambda system: not system.is_loaded)
+        if not systems:
+            raise RuntimeError("No RAG corpus configured")
+        return systems[0].embed_query(query)
+
+    def canonical_filters(self, filters: Optional[Dict[str, Any]], corpora: Optional[List[str]] = None) -> tuple:
+        """Hashable key for retrieval filters over the selected corpora, e.g. for memoizing context"""
+        return tuple((name, self.systems[name].canonical_filters(filters)) for name in self._selected(corpora))
+
+    def _warm_query_embedding(self, query: str, names: List[str], mode: Optional[str]) -> None:
+        """Embed the query once up front so the parallel corpus searches hit the shared cache"""
+        warmed = set()
+        for name in names:
+            system = self.systems[name]
+            if (mode or system.retrieval_mode) == "lexical" or system.embedding_key in warmed:
+                continue
+            warmed.add(system.embedding_key)
+            try:
+                system.embed_queries([query])
+            except Exception as e:
+                # Each corpus handles the failure itself (lexical fallback or no results)
+                logging.warning(f"⚠️ Could not embed federated query: {e}")
+
+    @staticmethod
+    def normalize_scores(results_by_corpus: Dict[str, List[Dict]]) -> None:
+        """
+        Give every result a 'normalized_score' in [0, 1] comparable across corpora.
+
+        Cosine similarity is already comparable (all corpora use the same
+        embedding model). BM25 scores depend on each corpus's statistics, so
+        they are divided by the best BM25 score among all results. Hybrid
+        results average the two, counting a missing signal as 0.
+        """
+        lexical_max = max((chunk.get('lexical_score') or 0.0 for results in results_by_corpus.values()
+                           for chunk in results), default=0.0)
+        for results in results_by_corpus.values():
+            for chunk in results:
+                similarity = max(chunk.get('similarity_score') or 0.0, 0.0)
+                lexical = (chunk.get('lexical_score') or 0.0) / lexical_max if lexical_max > 0 else 0.0
+                mode = chunk.get('retrieval_mode')
+                if mode == "vector":
+                    score = similarity
+                elif mode == "lexical":
+                    score = lexical
+                else:
+                    score = (similarity + lexical) / 2
+                chunk['normalized_score'] = round(score, 6)
+
+    def retrieve(self, query: str, top_k: int = 3, min_score: float = 0.7,
+                 filters: Optional[Dict[str, Any]] = None, mode: Optional[str] = None,
+                 corpora: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Retrieve the most relevant chunks across corpora.
+
+        Args:
+            query: Search query
+            top_k: Number of results after merging
+            min_score: Minimum similarity score threshold (vector results only), per corpus
+            filters: Metadata filters (see BarranaRAGSystem.retrieve)
+            mode: vector, lexical or hybrid (default: each corpus's retrieval_mode)
+            corpora: Names of the corpora to search (default: all loaded corpora)
+
+        Returns:
+            Chunks ordered by normalized score, each with its 'corpus' and per-corpus 'corpus_rank'
+        """
+        names = self._selected(corpora)
+        if not names:
+            logging.warning("⚠️ No RAG corpus loaded. Returning empty results.")
+            return []
+        self.query_stats["queries"] += 1
+        self.query_stats["corpora_searched"] += len(names)
+
+        if len(names) > 1:
+            self._warm_query_embedding(query, names, mode)
+        def search(name: str) -> List[Dict]:
+            return self.systems[name].retrieve(query, top_k, min_score, filters, mode)
+
+        if len(names) == 1:
+            results_by_corpus = {names[0]: search(names[0])}
+        else:
+            results_by_corpus = dict(zip(names, self._executor.map(search, names)))
+
+        self.normalize_scores(results_by_corpus)
+        merged = []
+        for order, name in enumerate(names):
+            for chunk in results_by_corpus[name]:
+                chunk['corpus'] = name
+                chunk['corpus_rank'] = chunk.get('rank')
+                merged.append((-chunk['normalized_score'], chunk['corpus_rank'] or 0, order, chunk))
+        merged.sort(key=lambda item: item[:3])
+
+        results = []
+        for i, (_, _, _, chunk) in enumerate(merged[:top_k]):
+            chunk['rank'] = i + 1
+            results.append(chunk)
+        logging.info(f"🔍 Federated retrieval over {len(names)} corpora returned {len(results)} chunks")
+        return results
+
+    def get_context(self, query: str, top_k: int = 3, min_score: float = 0.7,
+                    filters: Optional[Dict[str, Any]] = None, mode: Optional[str] = None,
+                    token_budget: Optional[int] = None, corpora: Optional[List[str]] = None) -> str:
+        """
+        Get formatted context from the merged results of the selected corpora.
+
+        Args:
+            query: Search query
+            top_k: Number of top results to return (without a budget)
+            min_score: Minimum similarity score threshold
+            filters: Metadata filters (see BarranaRAGSystem.retrieve)
+            mode: vector, lexical or hybrid
+            token_budget: Maximum context tokens (see BarranaRAGSystem.get_context)
+            corpora: Names of the corpora to search (default: all loaded corpora)
+
+        Returns:
+            Formatted context string
+        """
+        if token_budget is None:
+            chunks = self.retrieve(query, top_k, min_score, filters, mode, corpora)
+            return "\n\n".join(format_chunk(chunk) for chunk in chunks)
+
+        chunks = self.context_candidates(query, top_k, min_score, filters, mode, corpora)
+        return self.pack_context(query, chunks, token_budget)
+
+    def context_candidates(self, query: str, top_k: int = 3, min_score: float = 0.7,
+                           filters: Optional[Dict[str, Any]] = None, mode: Optional[str] = None,
+                           corpora: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Retrieve the candidate chunks that a budgeted context is packed from.
+
+        The candidates do not depend on the token budget, so one retrieval can be
+        packed into several budgets (one per platform) with pack_context.
+
+        Args:
+            query: Search query
+            top_k: Number of chunks a context would hold without a budget
+            min_score: Minimum similarity score threshold
+            filters: Metadata filters (see BarranaRAGSystem.retrieve)
+            mode: vector, lexical or hybrid
+            corpora: Names of the corpora to search (default: all loaded corpora)
+
+        Returns:
+            Merged candidate chunks, as retrieve
+        """
+        return self.retrieve(query, max(top_k * 3, top_k + 5), min_score, filters, mode, corpora)
+
+    def pack_context(self, query: str, chunks: List[Dict], token_budget: int) -> str:
+        """
+        Pack candidate chunks into a context of at most token_budget tokens.
+
+        Args:
+            query: Search query the candidates were retrieved for
+            chunks: Candidates from context_candidates
+            token_budget: Maximum context tokens
+
+        Returns:
+            Formatted context string
+        """
+        if not chunks:
+            return ""
+
+        packed = self.context_packer.pack(query, chunks, token_budget)
+        self.packing_stats["packed"] += 1
+        self.packing_stats["candidate_tokens"] += packed["candidate_tokens"]
+        self.packing_stats["context_tokens"] += packed["tokens"]
+        logging.info(f"📦 Packed {packed['chunks']} chunks from {len({c['corpus'] for c in chunks})} corpora into "
+                     f"{packed['tokens']}/{token_budget} context tokens")
+        return packed["context"]
+
+    def trace_provenance(self, text: str, max_chunks: int = 3, min_overlap: float = 0.4,
+                         corpora: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Map each sentence of generated content to its best supporting chunks across corpora.
+
+        Args:
+            text: Generated content
+            max_chunks: Maximum supporting chunks per sentence
+            min_overlap: Minimum shingle overlap for a sentence to count as supported
+            corpora: Names of the corpora to trace against (default: all loaded corpora)
+
+        Returns:
+            Provenance as BarranaRAGSystem.trace_provenance, chunks tagged with their corpus
+        """
+        start_time = time.perf_counter()
+        sentences = None
+        for name in self._selected(corpora):
+            traced = self.systems[name].trace_provenance(text, max_chunks, min_overlap)["sentences"]
+            if sentences is None:
+                sentences = traced
+                for sentence in sentences:
+                    sentence["chunks"] = [dict(chunk, corpus=name) for chunk in sentence["chunks"]]
+                continue
+            # Every corpus splits the same text into the same sentences
+            for sentence, other in zip(sentences, traced):
+                merged = sentence["chunks"] + [dict(chunk, corpus=name) for chunk in other["chunks"]]
+                sentence["chunks"] = sorted(merged, key=lambda chunk: chunk["overlap"], reverse=True)[:max_chunks]
+        provenance = summarize_provenance(sentences or [], min_overlap)
+        provenance["elapsed_ms"] = round((time.perf_counter() - start_time) * 1000, 3)
+        return provenance
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get registry statistics.
+
+        Returns:
+            Dictionary with totals and the full stats of each corpus under 'corpora'
+        """
+        corpora = {name: system.get_stats() for name, system in self.systems.items()}
+        for name, stats in corpora.items():
+            stats["watch_interval"] = float(self.specs[name].get("watch_interval", self.watch_interval) or 0)
+        return {
+            "is_loaded": self.is_loaded,
+            "corpora_count": len(corpora),
+            "loaded_corpora": [name for name, stats in corpora.items() if stats["is_loaded"]],
+            "chunks_count": sum(stats["chunks_count"] for stats in corpora.values()),
+            "index_size": sum(stats["index_size"] for stats in corpora.values()),
+            "reloading": [name for name, stats in corpora.items() if stats["reloading"]],
+            "query_cache": self.query_cache.get_stats(),
+            "federated_queries": dict(self.query_stats),
+            "context_packing": dict(self.packing_stats),
+            "corpora": corpora
+        }
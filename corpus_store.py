@@ -0,0 +1,334 @@
+import json
+import logging
+import os
+from array import array
+from collections.abc import MutableMapping, Sequence
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    # orjson is optional; the standard library parser is ~3x slower on large corpora
+    _loads = json.loads
+
+# Low-cardinality string fields stored as int32 codes into a vocabulary (-1: missing)
+CATEGORICAL_FIELDS = ("source", "source_title", "section")
+# List-of-string fields stored as interned codes with per-row offsets
+LIST_FIELDS = ("tags", "platforms")
+# Field order of a reconstructed chunk; anything else goes to the per-row extras
+CORE_FIELDS = ("id",) + CATEGORICAL_FIELDS + ("chunk_index", "text") + LIST_FIELDS
+
+MISSING_INDEX = np.iinfo("int64").min
+
+
+class ChunkView(MutableMapping):
+    """
+    Lightweight read view of one stored chunk.
+
+    Behaves like the chunk dict: fields are decoded from the store on access.
+    Assignments (e.g. retrieval scores) go to a small per-view overlay and
+    never touch the shared store. copy() returns a plain dict.
+    """
+
+    __slots__ = ("_store", "_row", "_overlay")
+
+    def __init__(self, store: "CorpusStore", row: int):
+        self._store = store
+        self._row = row
+        self._overlay = None
+
+    @property
+    def row(self) -> int:
+        """Position of the chunk in its store"""
+        return self._row
+
+    def __getitem__(self, key: str) -> Any:
+        if self._overlay and key in self._overlay:
+            return self._overlay[key]
+        return self._store.field(self._row, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if self._overlay is None:
+            self._overlay = {}
+        self._overlay[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if self._overlay and key in self._overlay:
+            del self._overlay[key]
+        else:
+            raise TypeError(f"Stored chunk field '{key}' is read-only")
+
+    def __iter__(self) -> Iterator[str]:
+        fields = self._store.fields(self._row)
+        yield from fields
+        for key in self._overlay or ():
+            if key not in fields:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key: object) -> bool:
+        return bool(self._overlay and key in self._overlay) or key in self._store.fields(self._row)
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return f"ChunkView({self.copy()!r})"
+
+
+class CorpusStore(Sequence):
+    """
+    Columnar, optionally memory-mapped storage for corpus chunks.
+
+    Texts and ids live in single UTF-8 buffers addressed by offsets;
+    source, title and section are interned int32 codes; tags and platforms
+    are interned code lists. Fields outside that schema are kept as sparse
+    per-row JSON. Indexing returns ChunkView objects instead of dicts.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], vocabularies: Dict[str, List[str]],
+                 memory_mapped: bool = False):
+        self._columns = columns
+        self._memory_mapped = memory_mapped
+        self._vocabularies = {name: list(values) for name, values in vocabularies.items()}
+        self._size = len(columns["text_offsets"]) - 1
+        self._extra_rows = columns["extra_rows"]
+
+    @classmethod
+    def from_jsonl(cls, path: str) -> "CorpusStore":
+        """
+        Stream a JSONL corpus into columns without materializing chunk dicts.
+
+        Args:
+            path: Corpus file (one JSON object per line; malformed lines are logged and skipped)
+
+        Returns:
+            CorpusStore
+        """
+        text_data, text_offsets = bytearray(), array("q", [0])
+        id_data, id_offsets = bytearray(), array("q", [0])
+        extra_data, extra_offsets = bytearray(), array("q", [0])
+        # value -> code; dicts keep insertion order, so their keys are the vocabularies
+        vocabularies = {field: {} for field in CATEGORICAL_FIELDS + LIST_FIELDS}
+        codes = {field: array("i") for field in CATEGORICAL_FIELDS}
+        list_codes = {field: array("i") for field in LIST_FIELDS}
+        list_offsets = {field: array("q", [0]) for field in LIST_FIELDS}
+        list_present = {field: bytearray() for field in LIST_FIELDS}
+        chunk_index = array("q")
+        has_id = bytearray()
+        extra_rows = array("q")
+        core_fields = frozenset(CORE_FIELDS)
+        row = 0
+
+        with open(path, "rb") as f:
+            for line_num, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    chunk = _loads(line)
+                except ValueError as e:
+                    logging.error(f"❌ JSON decode error on line {line_num}: {e}")
+                    continue
+                if not isinstance(chunk, dict):
+                    logging.error(f"❌ Line {line_num} is not a JSON object")
+                    continue
+
+                # Values that don't fit a column's type are kept as extras
+                extra = {} if core_fields.issuperset(chunk) else \
+                    {key: value for key, value in chunk.items() if key not in core_fields}
+
+                text = chunk.get("text")
+                text_data += (text if type(text) is str else "" if text is None else str(text)).encode("utf-8")
+                text_offsets.append(len(text_data))
+
+                chunk_id = chunk.get("id")
+                if type(chunk_id) is str:
+                    has_id.append(1)
+                    id_data += chunk_id.encode("utf-8")
+                else:
+                    has_id.append(0)
+                    if chunk_id is not None:
+                        extra["id"] = chunk_id
+                id_offsets.append(len(id_data))
+
+                for field in CATEGORICAL_FIELDS:
+                    value = chunk.get(field)
+                    if type(value) is str:
+                        vocabulary = vocabularies[field]
+                        codes[field].append(vocabulary.setdefault(value, len(vocabulary)))
+                    else:
+                        codes[field].append(-1)
+                        if value is not None:
+                            extra[field] = value
+
+                value = chunk.get("chunk_index")
+                if type(value) is int and -2 ** 63 < value < 2 ** 63:
+                    chunk_index.append(value)
+                else:
+                    chunk_index.append(MISSING_INDEX)
+                    if value is not None:
+                        extra["chunk_index"] = value
+
+                for field in LIST_FIELDS:
+                    value = chunk.get(field)
+                    vocabulary = vocabularies[field]
+                    if type(value) is list and all(type(item) is str for item in value):
+                        list_present[field].append(1)
+                        list_codes[field].extend([vocabulary.setdefault(item, len(vocabulary)) for item in value])
+                    else:
+                        list_present[field].append(0)
+                        if value is not None:
+                            extra[field] = value
+                    list_offsets[field].append(len(list_codes[field]))
+
+                if extra:
+                    extra_rows.append(row)
+                    extra_data += json.dumps(extra, ensure_ascii=False).encode("utf-8")
+                    extra_offsets.append(len(extra_data))
+                row += 1
+
+        columns = {
+            "text_data": np.frombuffer(text_data, dtype="uint8"),
+            "text_offsets": np.frombuffer(text_offsets, dtype="int64"),
+            "id_data": np.frombuffer(id_data, dtype="uint8"),
+            "id_offsets": np.frombuffer(id_offsets, dtype="int64"),
+            "has_id": np.frombuffer(has_id, dtype="bool"),
+            "chunk_index": np.frombuffer(chunk_index, dtype="int64"),
+            "extra_rows": np.frombuffer(extra_rows, dtype="int64"),
+            "extra_data": np.frombuffer(extra_data, dtype="uint8"),
+            "extra_offsets": np.frombuffer(extra_offsets, dtype="int64"),
+        }
+        for field in CATEGORICAL_FIELDS:
+            columns[f"{field}_codes"] = np.frombuffer(codes[field], dtype="int32")
+        for field in LIST_FIELDS:
+            columns[f"{field}_codes"] = np.frombuffer(list_codes[field], dtype="int32")
+            columns[f"{field}_offsets"] = np.frombuffer(list_offsets[field], dtype="int64")
+            columns[f"{field}_present"] = np.frombuffer(list_present[field], dtype="bool")
+        return cls(columns, {field: list(vocabulary) for field, vocabulary in vocabularies.items()})
+
+    def save(self, directory: str) -> None:
+        """Write the columns as .npy files (plus vocabularies) for memory-mapped reopening"""
+        os.makedirs(directory, exist_ok=True)
+        for name, column in self._columns.items():
+            np.save(os.path.join(directory, f"{name}.npy"), column)
+        with open(os.path.join(directory, "vocabularies.json"), "w", encoding="utf-8") as f:
+            json.dump({"size": self._size, "vocabularies": self._vocabularies}, f, ensure_ascii=False)
+
+    @classmethod
+    def open(cls, directory: str, mmap: bool = True) -> "CorpusStore":
+        """
+        Open a saved store.
+
+        Args:
+            directory: Directory written by save()
+            mmap: Memory-map the columns instead of reading them into memory
+
+        Returns:
+            CorpusStore
+        """
+        with open(os.path.join(directory, "vocabularies.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        columns = {}
+        for filename in os.listdir(directory):
+            if filename.endswith(".npy"):
+                column = np.load(os.path.join(directory, filename), mmap_mode="r" if mmap else None)
+                # Plain ndarray views of the mapping: slicing np.memmap objects is several times slower
+                columns[filename[:-4]] = column.view(np.ndarray)
+        store = cls(columns, meta["vocabularies"], memory_mapped=mmap)
+        if len(store) != meta["size"]:
+            raise ValueError(f"Corpus store at {directory} is incomplete")
+        return store
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [ChunkView(self, i) for i in range(*row.indices(self._size))]
+        if row < 0:
+            row += self._size
+        if not 0 <= row < self._size:
+            raise IndexError("chunk position out of range")
+        return ChunkView(self, row)
+
+    def __iter__(self) -> Iterator[ChunkView]:
+        for row in range(self._size):
+            yield ChunkView(self, row)
+
+    def _string(self, name: str, row: int) -> str:
+        offsets = self._columns[f"{name}_offsets"]
+        return self._columns[f"{name}_data"][offsets[row]:offsets[row + 1]].tobytes().decode("utf-8")
+
+    def _extras(self, row: int) -> Dict[str, Any]:
+        if not len(self._extra_rows):
+            return {}
+        i = int(np.searchsorted(self._extra_rows, row))
+        if i == len(self._extra_rows) or self._extra_rows[i] != row:
+            return {}
+        return json.loads(self._string("extra", i))
+
+    def text(self, row: int) -> str:
+        """Chunk text without building a view"""
+        return self._string("text", row)
+
+    def field(self, row: int, name: str) -> Any:
+        """Decode one field of a chunk (KeyError if the chunk doesn't have it)"""
+        if name == "text":
+            return self._string("text", row)
+        if name == "id" and self._columns["has_id"][row]:
+            return self._string("id", row)
+        if name in CATEGORICAL_FIELDS:
+            code = int(self._columns[f"{name}_codes"][row])
+            if code >= 0:
+                return self._vocabularies[name][code]
+        elif name in LIST_FIELDS:
+            if self._columns[f"{name}_present"][row]:
+                offsets = self._columns[f"{name}_offsets"]
+                vocabulary = self._vocabularies[name]
+                return [vocabulary[code] for code in self._columns[f"{name}_codes"][offsets[row]:offsets[row + 1]]]
+        elif name == "chunk_index":
+            value = int(self._columns["chunk_index"][row])
+            if value != MISSING_INDEX:
+                return value
+        extras = self._extras(row)
+        if name in extras:
+            return extras[name]
+        raise KeyError(name)
+
+    def fields(self, row: int) -> List[str]:
+        """Field names present on a chunk"""
+        columns = self._columns
+        present = []
+        if columns["has_id"][row]:
+            present.append("id")
+        present.extend(field for field in CATEGORICAL_FIELDS if columns[f"{field}_codes"][row] >= 0)
+        if columns["chunk_index"][row] != MISSING_INDEX:
+            present.append("chunk_index")
+        present.append("text")
+        present.extend(field for field in LIST_FIELDS if columns[f"{field}_present"][row])
+        present.extend(key for key in self._extras(row) if key not in present)
+        return present
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the columns (memory-mapped columns are disk-backed)"""
+        return int(sum(column.nbytes for column in self._columns.values()))
+
+    @property
+    def memory_mapped(self) -> bool:
+        return self._memory_mapped
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "chunks": self._size,
+            "bytes": self.nbytes,
+            "text_bytes": int(self._columns["text_data"].nbytes),
+            "memory_mapped": self.memory_mapped,
+            "vocabularies": {field: len(values) for field, values in self._vocabularies.items()},
+            "rows_with_extra_fields": int(len(self._extra_rows)),
+        }
@@ -0,0 +1,392 @@
+import json
+import logging
+import math
+import os
+import queue
+import threading
+import time
+import uuid
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import faiss
+import numpy as np
+
+from bm25_index import reciprocal_rank_fusion, tokenize
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+SEARCH_MODES = ("keyword", "vector", "hybrid")
+# Fields the keyword index covers
+KEYWORD_FIELDS = ("topic", "description", "output")
+
+
+def parse_timestamp(value: str) -> float:
+    """POSIX time of an ISO timestamp (naive timestamps are UTC); ValueError if invalid"""
+    created = datetime.fromisoformat(value)
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    return created.timestamp()
+
+
+class HistoryStore:
+    """
+    Append-only history of generated content with keyword and vector search.
+
+    Entries (request, prompt, output, metrics, engagement cluster) are
+    appended to a JSONL file by a background writer, so recording never
+    blocks the request thread. Output embeddings are appended to a raw
+    float32 file next to it and reloaded at startup without re-embedding.
+
+    Entries stay on disk; memory holds their file offsets, the filter
+    fields (platform, creation time), an incremental BM25 inverted index
+    over topic, description and output, and an inner-product index over
+    output embeddings truncated to `dimensions` (text-embedding-3 embeddings
+    stay meaningful when truncated and renormalized, and 256 dimensions keep
+    tens of thousands of posts in a few tens of MB).
+    """
+
+    def __init__(self, history_dir: str = "generation_history", embed: Optional[Callable[[str], np.ndarray]] = None,
+                 dimensions: int = 256, max_pending: int = 1000, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize the store and load earlier history.
+
+        Args:
+            history_dir: Directory for history.jsonl and the embedding file
+            embed: Embedding of a text; None: keyword search only
+            dimensions: Stored embedding size (longer embeddings are truncated, shorter padded)
+            max_pending: Entries queued for the writer before new ones are dropped
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+        """
+        self.history_dir = history_dir
+        self.path = os.path.join(history_dir, "history.jsonl")
+        self.vectors_path = os.path.join(history_dir, f"vectors-{dimensions}.f32")
+        self.embed = embed
+        self.dimensions = dimensions
+        self.k1 = k1
+        self.b = b
+
+        # Per entry position: line offset and size in history.jsonl, platform code and creation time
+        self._offsets = array("q")
+        self._sizes = array("i")
+        self._platforms = array("i")
+        self._created = array("d")
+        self._platform_codes: Dict[str, int] = {}
+        self._positions: Dict[str, int] = {}
+        self._postings: Dict[str, tuple] = {}
+        self._lengths = array("f")
+        self._total_length = 0.0
+        self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(dimensions))
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._stats = {"recorded": 0, "written": 0, "dropped": 0, "write_errors": 0, "embedding_errors": 0}
+
+        os.makedirs(history_dir, exist_ok=True)
+        self._load()
+        self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._writer.start()
+
+    def _load(self) -> None:
+        """Rebuild the in-memory indexes from the history files"""
+        if not os.path.exists(self.path):
+            return
+        start_time = time.time()
+        rows = 0
+        vectors = None
+        if os.path.exists(self.vectors_path):
+            rows = os.path.getsize(self.vectors_path) // (4 * self.dimensions)
+            vectors = np.fromfile(self.vectors_path, dtype="float32", count=rows * self.dimensions)
+            vectors = vectors.reshape(rows, self.dimensions)
+
+        positions, rows_used = [], []
+        with open(self.path, "rb+") as f:
+            offset = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # A crash mid-append leaves a partial last line; drop it so the next append starts clean
+                    logging.warning(f"⚠️ Dropping a partial history entry at the end of {self.path}")
+                    f.truncate(offset)
+                    break
+                line_offset, offset = offset, offset + len(line)
+                if not line.strip():
+                    continue
+                try:
+                    entry = _loads(line)
+                except ValueError:
+                    logging.warning("⚠️ Skipping an unreadable history entry")
+                    continue
+                position = self._add_entry(entry, line_offset, len(line))
+                row = entry.get("vector_row")
+                # Rows embedded at another size live in another file
+                if row is not None and row < rows and entry.get("vector_dimensions") == self.dimensions:
+                    positions.append(position)
+                    rows_used.append(row)
+
+        if positions:
+            self._index.add_with_ids(np.ascontiguousarray(vectors[rows_used]), np.array(positions, dtype="int64"))
+        logging.info(f"📦 Loaded {len(self._offsets)} history entries ({len(positions)} embedded) "
+                     f"in {time.time() - start_time:.2f}s")
+
+    def _add_entry(self, entry: Dict[str, Any], offset: int, size: int) -> int:
+        """Add an entry's location, filter fields and keywords (caller holds the lock or is still loading)"""
+        position = len(self._offsets)
+        self._offsets.append(offset)
+        self._sizes.append(size)
+        platform = str(entry.get("platform") or "")
+        self._platforms.append(self._platform_codes.setdefault(platform, len(self._platform_codes)))
+        try:
+            self._created.append(parse_timestamp(entry.get("created_at") or ""))
+        except ValueError:
+            self._created.append(0.0)
+        self._positions[entry["id"]] = position
+
+        counts: Dict[str, int] = {}
+        tokens = tokenize(" ".join(str(entry.get(field) or "") for field in KEYWORD_FIELDS))
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for term, count in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("i"), array("f"))
+            postings[0].append(position)
+            postings[1].append(count)
+        self._lengths.append(len(tokens))
+        self._total_length += len(tokens)
+        return position
+
+    def _vector(self, text: str) -> Optional[np.ndarray]:
+        """Normalized embedding truncated or padded to the stored size, or None"""
+        if not self.embed or not text:
+            return None
+        try:
+            vector = np.asarray(self.embed(text), dtype="float32").ravel()[:self.dimensions]
+        except Exception as e:
+            logging.warning(f"⚠️ History embedding failed: {e}")
+            with self._lock:
+                self._stats["embedding_errors"] += 1
+            return None
+        norm = float(np.linalg.norm(vector))
+        if not norm:
+            return None
+        padded = np.zeros((1, self.dimensions), dtype="float32")
+        padded[0, :len(vector)] = vector / norm
+        return padded
+
+    def record(self, entry: Dict[str, Any]) -> Optional[str]:
+        """
+        Queue an entry for the background writer.
+
+        Args:
+            entry: Request, prompt, output, metrics and engagement of one generated post
+
+        Returns:
+            The entry id, or None if the writer is backed up and the entry was dropped
+        """
+        entry = dict(entry)
+        entry.setdefault("id", uuid.uuid4().hex)
+        entry.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            logging.warning(f"⚠️ History writer backed up - dropping entry {entry['id']}")
+            with self._lock:
+                self._stats["dropped"] += 1
+            return None
+        with self._lock:
+            self._stats["recorded"] += 1
+        return entry["id"]
+
+    def _write_loop(self) -> None:
+        while True:
+            entry = self._queue.get()
+            try:
+                if entry is None:
+                    return
+                self._write(entry)
+            except Exception as e:
+                logging.error(f"❌ Failed to write history entry: {e}")
+                with self._lock:
+                    self._stats["write_errors"] += 1
+            finally:
+                self._queue.task_done()
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        """Embed the output, append the entry and index it (writer thread only)"""
+        vector = self._vector(entry.get("output") or "")
+        entry["vector_row"] = None
+        entry["vector_dimensions"] = self.dimensions
+        if vector is not None:
+            with open(self.vectors_path, "ab") as f:
+                # Rows are fixed-size, so the row number is the file offset
+                entry["vector_row"] = f.tell() // (4 * self.dimensions)
+                f.write(vector.tobytes())
+        line = (json.dumps(entry, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+        with open(self.path, "ab") as f:
+            offset = f.tell()
+            f.write(line)
+
+        with self._lock:
+            position = self._add_entry(entry, offset, len(line))
+            if vector is not None:
+                self._index.add_with_ids(vector, np.array([position], dtype="int64"))
+            self._stats["written"] += 1
+
+    def flush(self) -> None:
+        """Block until every queued entry is written"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write queued entries and stop the writer"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+    def _read_entries(self, locations: List[tuple]) -> List[Dict[str, Any]]:
+        """Entries at (offset, size) locations in history.jsonl"""
+        entries = []
+        if not locations:
+            return entries
+        with open(self.path, "rb") as f:
+            for offset, size in locations:
+                f.seek(offset)
+                entries.append(_loads(f.read(size)))
+        return entries
+
+    def get(self, entry_id: str) -> Optional[Dict[str, Any]]:
+        """Full history entry by id, or None"""
+        with self._lock:
+            position = self._positions.get(entry_id)
+            if position is None:
+                return None
+            location = (self._offsets[position], self._sizes[position])
+        return self._read_entries([location])[0]
+
+    def _filter_mask(self, platform: Optional[str], since: Optional[float]) -> Optional[np.ndarray]:
+        """Entry positions passing the filters, or None without filters (caller holds the lock)"""
+        if not platform and since is None:
+            return None
+        mask = np.ones(len(self._offsets), dtype=bool)
+        if platform:
+            code = self._platform_codes.get(platform)
+            if code is None:
+                return np.zeros(len(self._offsets), dtype=bool)
+            mask &= np.frombuffer(self._platforms, dtype="int32") == code
+        if since is not None:
+            mask &= np.frombuffer(self._created, dtype="float64") >= since
+        return mask
+
+    def _keyword_ranking(self, query: str, limit: int, mask: Optional[np.ndarray]) -> List[int]:
+        """Entry positions by BM25 score over the keyword index (caller holds the lock)"""
+        size = len(self._offsets)
+        terms = set(tokenize(query))
+        if not size or not terms:
+            return []
+        lengths = np.frombuffer(self._lengths, dtype="float32")
+        norms = self.k1 * (1 - self.b + self.b * lengths / (self._total_length / size or 1.0))
+        scores = np.zeros(size, dtype="float32")
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            positions = np.frombuffer(postings[0], dtype="int32")
+            frequencies = np.frombuffer(postings[1], dtype="float32")
+            idf = math.log(1 + (size - len(positions) + 0.5) / (len(positions) + 0.5))
+            scores[positions] += idf * frequencies * (self.k1 + 1) / (frequencies + norms[positions])
+        if mask is not None:
+            scores[~mask] = 0
+        matched = np.flatnonzero(scores)
+        if len(matched) > limit:
+            matched = matched[np.argpartition(-scores[matched], limit - 1)[:limit]]
+        return matched[np.argsort(-scores[matched], kind="stable")].tolist()
+
+    def _vector_ranking(self, vector: np.ndarray, limit: int, mask: Optional[np.ndarray]) -> List[int]:
+        """Entry positions by output similarity (caller holds the lock)"""
+        if not self._index.ntotal:
+            return []
+        if mask is None:
+            _, ids = self._index.search(vector, min(limit, self._index.ntotal))
+        else:
+            allowed = np.flatnonzero(mask).astype("int64")
+            if not len(allowed):
+                return []
+            params = faiss.SearchParameters()
+            # The ID map translates the selector to entry positions
+            selector = faiss.IDSelectorBatch(allowed)
+            params.sel = selector
+            _, ids = self._index.search(vector, min(limit, len(allowed), self._index.ntotal), params=params)
+        return [int(position) for position in ids[0] if position >= 0]
+
+    def search(self, query: str = "", top_k: int = 10, mode: str = "hybrid", platform: Optional[str] = None,
+               since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Find earlier posts by keywords and by output similarity.
+
+        Args:
+            query: Search text (empty: most recent entries)
+            top_k: Maximum number of results
+            mode: "keyword", "vector" or "hybrid" (reciprocal rank fusion of both)
+            platform: Only entries for this platform
+            since: Only entries created at or after this ISO timestamp
+
+        Returns:
+            Matching entries (without prompt and engagement) with 'score' and 'rank', best first
+
+        Raises:
+            ValueError: Unknown mode, top_k below 1 or an invalid since timestamp
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        if top_k < 1:
+            raise ValueError("top_k must be at least 1")
+        since_timestamp = parse_timestamp(since) if since else None
+        # No embedding call while nothing is embedded yet
+        vector = self._vector(query) if query and mode != "keyword" and self._index.ntotal else None
+
+        with self._lock:
+            # Filters narrow the candidates before ranking, so rare matches are never cut off
+            mask = self._filter_mask(platform, since_timestamp)
+            if not query:
+                candidates = np.arange(len(self._offsets)) if mask is None else np.flatnonzero(mask)
+                ranked = [(int(position), 0.0) for position in candidates[::-1][:top_k]]
+            else:
+                rankings = []
+                if mode != "vector" or vector is None:
+                    # Keyword search is also the fallback when the query can't be embedded
+                    rankings.append(self._keyword_ranking(query, top_k, mask))
+                if vector is not None:
+                    rankings.append(self._vector_ranking(vector, top_k, mask))
+                ranked = reciprocal_rank_fusion(rankings)[:top_k]
+            locations = [(self._offsets[position], self._sizes[position]) for position, _ in ranked]
+
+        results = []
+        for entry, (_, score) in zip(self._read_entries(locations), ranked):
+            result = {key: value for key, value in entry.items()
+                      if key not in ("prompt", "engagement", "vector_row", "vector_dimensions")}
+            result["score"] = round(score, 6)
+            result["rank"] = len(results) + 1
+            results.append(result)
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get history statistics.
+
+        Returns:
+            Dictionary with entry, term and vector counts and writer status
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._offsets)
+            stats["embedded_entries"] = self._index.ntotal
+            stats["terms"] = len(self._postings)
+        stats["pending"] = self._queue.qsize()
+        stats["dimensions"] = self.dimensions
+        stats["history_bytes"] = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        stats["writer_alive"] = self._writer.is_alive()
+        return stats
@@ -0,0 +1,241 @@
+import logging
+import math
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Any
+
+# Keyword lexicon for each industry in engagement_system.industry_detection.common_industries.
+# Multi-word entries are matched as phrases; single words are matched as whole tokens.
+# Generic business words ('platform', 'clients', 'members', 'health') are left out: they show up in
+# descriptions from any industry and would outvote the specific terms.
+INDUSTRY_KEYWORDS = {
+    'restaurant': ['restaurant', 'restaurants', 'cafe', 'diner', 'menu', 'chef', 'kitchen', 'food',
+                   'dining', 'takeout', 'delivery', 'bistro', 'bar', 'catering', 'reservations', 'pos'],
+    'retail': ['retail', 'store', 'stores', 'shop', 'boutique', 'inventory', 'merchandise', 'in-store',
+               'foot traffic', 'checkout', 'shoppers', 'point of sale'],
+    'e-commerce': ['e-commerce', 'ecommerce', 'online store', 'shopify', 'woocommerce', 'cart',
+                   'abandoned cart', 'dropshipping', 'amazon seller', 'online shop', 'fulfillment', 'd2c'],
+    'consulting': ['consulting', 'consultant', 'consultants', 'consultancy', 'advisory', 'advisor',
+                   'engagements', 'strategy firm'],
+    'healthcare': ['healthcare', 'clinic', 'clinics', 'patient', 'patients', 'medical',
+                   'doctor', 'doctors', 'dental', 'dentist', 'hospital', 'no-show', 'no-shows', 'hipaa',
+                   'therapy', 'pharmacy', 'appointments'],
+    'real_estate': ['real estate', 'realtor', 'realtors', 'property', 'properties', 'listing', 'listings',
+                    'broker', 'brokerage', 'mortgage', 'tenants', 'landlord', 'leasing', 'open house'],
+    'fitness': ['fitness', 'gym', 'gyms', 'workout', 'personal trainer', 'trainer', 'yoga', 'pilates',
+                'crossfit', 'membership', 'class bookings'],
+    'beauty': ['beauty', 'salon', 'salons', 'spa', 'barber', 'barbershop', 'cosmetics', 'skincare',
+               'nail', 'nails', 'hair', 'stylist', 'esthetician', 'makeup'],
+    'automotive': ['automotive', 'car', 'cars', 'dealership', 'dealerships', 'auto repair', 'mechanic',
+                   'garage', 'vehicle', 'vehicles', 'body shop', 'tires'],
+    'technology': ['technology', 'software', 'saas', 'startup', 'developers', 'api', 'cloud', 'it services',
+                   'tech', 'app development', 'devops'],
+    'finance': ['finance', 'financial', 'accounting', 'accountant', 'accountants', 'bookkeeping', 'tax',
+                'bank', 'banking', 'fintech', 'invoicing', 'insurance', 'loans', 'wealth management'],
+    'education': ['education', 'school', 'schools', 'teacher', 'teachers', 'students', 'student',
+                  'tutoring', 'university', 'college', 'classroom', 'curriculum', 'edtech', 'academy'],
+    'manufacturing': ['manufacturing', 'manufacturer', 'factory', 'factories', 'production line',
+                      'supply chain', 'assembly', 'plant', 'machinery', 'warehouse', 'logistics'],
+    'construction': ['construction', 'contractor', 'contractors', 'builder', 'builders', 'renovation',
+                     'job site', 'subcontractors', 'plumbing', 'electrician', 'roofing', 'hvac'],
+    'hospitality': ['hospitality', 'hotel', 'hotels', 'guest', 'guests', 'booking', 'bookings', 'resort',
+                    'airbnb', 'vacation rental', 'travel', 'tourism', 'front desk'],
+    'professional_services': ['professional services', 'law firm', 'lawyer', 'lawyers', 'legal', 'attorney',
+                              'agency', 'agencies', 'marketing agency', 'architects',
+                              'billable hours', 'firm', 'firms'],
+}
+
+GENERAL_BUSINESS = "general_business"
+
+
+class IndustryClassifier:
+    """
+    Local-first industry classifier with memoization and an optional LLM fallback.
+
+    Descriptions are scored against a keyword lexicon per industry using
+    IDF-weighted term matches. Confident matches are answered locally; ambiguous
+    inputs are delegated to the fallback callable. Results are cached by the
+    normalized description so repeated platforms in one request reuse them,
+    and concurrent fallback lookups of the same description share one call.
+    """
+
+    def __init__(self, industries: List[str], llm_fallback: Optional[Callable[[str], str]] = None,
+                 min_score: float = 1.5, min_margin: float = 1.25, cache_size: int = 1024):
+        """
+        Initialize the classifier.
+
+        Args:
+            industries: Allowed industry labels
+            llm_fallback: Callable used for ambiguous descriptions
+            min_score: Minimum weighted score for a confident local match
+            min_margin: Required ratio between the best and second-best score
+            cache_size: Maximum number of memoized descriptions
+        """
+        self.industries = list(industries)
+        self.llm_fallback = llm_fallback
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.cache_size = cache_size
+
+        self._cache = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "local_hits": 0,
+            "cache_hits": 0,
+            "llm_calls": 0,
+            "coalesced_llm_calls": 0,
+            "unclassified": 0,
+        }
+
+        self._build_lexicon()
+
+    def _build_lexicon(self) -> None:
+        """Precompile keyword patterns and IDF weights for the configured industries"""
+        lexicon = {industry: INDUSTRY_KEYWORDS.get(industry, [industry.replace('_', ' ')])
+                   for industry in self.industries}
+
+        # Keywords shared by several industries carry less signal
+        document_frequency = {}
+        for keywords in lexicon.values():
+            for keyword in set(keywords):
+                document_frequency[keyword] = document_frequency.get(keyword, 0) + 1
+
+        total = max(len(lexicon), 1)
+        self._patterns = {}
+        for industry, keywords in lexicon.items():
+            self._patterns[industry] = [
+                (re.compile(r'(?<![\w-])' + re.escape(keyword) + r'(?![\w-])'),
+                 math.log(1 + total / document_frequency[keyword]) * (1.5 if ' ' in keyword else 1.0))
+                for keyword in keywords
+            ]
+
+    @staticmethod
+    def normalize(description: str) -> str:
+        """Normalize a description for scoring and cache lookups"""
+        return re.sub(r'\s+', ' ', (description or '').lower()).strip()
+
+    def score(self, description: str) -> Dict[str, float]:
+        """
+        Score a description against every industry.
+
+        Args:
+            description: Content description
+
+        Returns:
+            Mapping of industry to weighted keyword score (zero scores omitted)
+        """
+        text = self.normalize(description)
+        scores = {}
+        for industry, patterns in self._patterns.items():
+            total = 0.0
+            for pattern, weight in patterns:
+                matches = len(pattern.findall(text))
+                if matches:
+                    # Sub-linear term frequency so one repeated word does not dominate
+                    total += weight * (1 + math.log(matches))
+            if total > 0:
+                scores[industry] = total
+        return scores
+
+    def classify_locally(self, description: str) -> Optional[str]:
+        """
+        Classify without any network call.
+
+        Returns:
+            Industry name when the match is confident, otherwise None
+        """
+        scores = self.score(description)
+        if not scores:
+            return None
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        best_industry, best_score = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+
+        if best_score >= self.min_score and best_score >= runner_up * self.min_margin:
+            return best_industry
+        return None
+
+    def classify(self, description: str) -> str:
+        """
+        Classify a description, using the cache, the local scorer and finally the LLM.
+
+        Args:
+            description: Content description
+
+        Returns:
+            Industry name or "general_business"
+        """
+        key = self.normalize(description)
+
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self._stats["cache_hits"] += 1
+                return self._cache[key]
+
+        industry = self.classify_locally(key)
+        if industry or not self.llm_fallback:
+            with self._lock:
+                if industry:
+                    self._stats["local_hits"] += 1
+                else:
+                    self._stats["unclassified"] += 1
+                    industry = GENERAL_BUSINESS
+                self._remember(key, industry)
+            return industry
+
+        # One LLM call per description: concurrent callers wait for the call already in flight
+        with self._lock:
+            if key in self._cache:
+                self._stats["cache_hits"] += 1
+                return self._cache[key]
+            pending = self._pending.get(key)
+            waiting = pending is not None
+            if waiting:
+                self._stats["coalesced_llm_calls"] += 1
+            else:
+                pending = self._pending[key] = Future()
+                self._stats["llm_calls"] += 1
+        if waiting:
+            return pending.result()
+
+        try:
+            industry = self.llm_fallback(description)
+            if industry not in self.industries:
+                industry = GENERAL_BUSINESS
+            cache = True
+        except Exception as e:
+            # Don't cache transient failures; the next call retries the LLM
+            logging.warning(f"Industry LLM fallback failed: {e}")
+            industry, cache = GENERAL_BUSINESS, False
+
+        with self._lock:
+            if cache:
+                self._remember(key, industry)
+            del self._pending[key]
+        pending.set_result(industry)
+        return industry
+
+    def _remember(self, key: str, industry: str) -> None:
+        """Cache a classification (caller holds the lock)"""
+        self._cache[key] = industry
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get classifier statistics.
+
+        Returns:
+            Dictionary with hit counters and the number of LLM calls avoided
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cache_size"] = len(self._cache)
+        stats["llm_calls_avoided"] = stats["local_hits"] + stats["cache_hits"] + stats["coalesced_llm_calls"]
+        return stats
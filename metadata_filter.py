@@ -0,0 +1,177 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+# Per-platform retrieval rules, merged into the filters when a request names a platform.
+# Developer Q&A platforms should answer the technical question, not quote the founder bio.
+PLATFORM_FILTERS = {
+    "stackoverflow": {"exclude_sections": ["About the Founder"], "exclude_tags": ["founder", "bio"]},
+    "dev_to": {"exclude_sections": ["About the Founder"], "exclude_tags": ["founder", "bio"]},
+}
+
+# Chunk fields with precomputed bitmaps. Chunks may carry a 'platforms' allow-list;
+# chunks without one are available to every platform.
+INDEXED_FIELDS = ("tags", "source", "source_title", "section", "platforms")
+ANY_PLATFORM = "*"
+
+# Filter keys: include keys keep chunks matching any listed value, exclude keys drop them
+INCLUDE_FILTERS = {"tags": "tags", "source": "source", "source_title": "source_title", "section": "section"}
+EXCLUDE_FILTERS = {"exclude_tags": "tags", "exclude_sources": "source", "exclude_sections": "section"}
+
+
+def _as_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return [str(item) for item in value]
+    return [str(value)]
+
+
+class MetadataIndex:
+    """
+    Precomputed bitmaps over chunk metadata for filtered retrieval.
+
+    Every (field, value) pair gets a packed bitset over chunk positions.
+    Filters are evaluated with bitwise AND/OR/NOT and turned into a FAISS
+    ID selector, so filtering happens inside the index search instead of by
+    over-fetching and post-filtering. Selectors are cached per filter.
+    """
+
+    def __init__(self, chunks: List[Dict[str, Any]], faiss_ids: np.ndarray, selector_cache_size: int = 256):
+        """
+        Build bitmaps for a corpus snapshot.
+
+        Args:
+            chunks: Chunks in index position order
+            faiss_ids: FAISS id of each chunk position
+            selector_cache_size: Maximum cached filter selectors
+        """
+        self.size = len(chunks)
+        self.faiss_ids = np.asarray(faiss_ids, dtype="int64")
+        self.selector_cache_size = selector_cache_size
+        self._bitmaps = {field: {} for field in INDEXED_FIELDS}
+        self._all = np.packbits(np.ones(self.size, dtype=bool), bitorder="little")
+        self._has_platforms = any(chunk.get("platforms") for chunk in chunks)
+        self._selectors = OrderedDict()
+        self._lock = threading.Lock()
+
+        positions = {field: {} for field in INDEXED_FIELDS}
+        for pos, chunk in enumerate(chunks):
+            for field in INDEXED_FIELDS:
+                values = _as_list(chunk.get(field))
+                if field == "platforms" and not values:
+                    values = [ANY_PLATFORM]
+                for value in values:
+                    positions[field].setdefault(value, []).append(pos)
+
+        for field, by_value in positions.items():
+            for value, members in by_value.items():
+                bits = np.zeros(self.size, dtype=bool)
+                bits[members] = True
+                self._bitmaps[field][value] = np.packbits(bits, bitorder="little")
+
+    def values(self, field: str) -> List[str]:
+        """Distinct values of an indexed field"""
+        return sorted(self._bitmaps.get(field, {}))
+
+    def _union(self, field: str, values: Iterable[str]) -> np.ndarray:
+        result = np.zeros_like(self._all)
+        for value in values:
+            bitmap = self._bitmaps[field].get(value)
+            if bitmap is not None:
+                result |= bitmap
+        return result
+
+    def canonical(self, filters: Optional[Dict[str, Any]]) -> Tuple:
+        """
+        Resolve platform rules and normalize filters into a hashable key.
+
+        Two requests whose filters select the same rules get the same key, so
+        platforms without special rules share cached selectors and context.
+        """
+        if not filters:
+            return ()
+        merged = {}
+        platform = filters.get("platform")
+        for source in (PLATFORM_FILTERS.get(platform, {}), filters):
+            for key, value in source.items():
+                if key == "platform":
+                    continue
+                if key not in INCLUDE_FILTERS and key not in EXCLUDE_FILTERS:
+                    logging.warning(f"⚠️ Ignoring unknown RAG filter: {key}")
+                    continue
+                merged.setdefault(key, set()).update(_as_list(value))
+        if platform and self._has_platforms:
+            # Platforms no chunk is restricted to only see unrestricted chunks, so they share a key
+            merged["platform"] = {str(platform) if str(platform) in self._bitmaps["platforms"] else ANY_PLATFORM}
+        return tuple(sorted((key, tuple(sorted(values))) for key, values in merged.items()))
+
+    def evaluate(self, key: Tuple) -> Optional[np.ndarray]:
+        """
+        Packed bitmap of chunk positions matching a canonical filter key.
+
+        Returns:
+            Packed bitmap, or None when the filter keeps every chunk
+        """
+        if not key:
+            return None
+        result = self._all.copy()
+        for name, values in key:
+            if name in INCLUDE_FILTERS:
+                result &= self._union(INCLUDE_FILTERS[name], values)
+            elif name in EXCLUDE_FILTERS:
+                result &= ~self._union(EXCLUDE_FILTERS[name], values)
+            elif name == "platform":
+                result &= self._union("platforms", list(values) + [ANY_PLATFORM])
+        return result
+
+    def positions(self, bitmap: np.ndarray) -> np.ndarray:
+        """Chunk positions set in a packed bitmap"""
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.size, bitorder="little"))
+
+    def _resolve(self, key: Tuple) -> Tuple[Optional[faiss.IDSelector], int, Optional[np.ndarray]]:
+        """Cached (selector, match_count, boolean mask) for a canonical filter key"""
+        if not key:
+            return None, self.size, None
+        with self._lock:
+            cached = self._selectors.get(key)
+            if cached is not None:
+                self._selectors.move_to_end(key)
+                return cached
+        mask = np.unpackbits(self.evaluate(key), count=self.size, bitorder="little").astype(bool)
+        members = np.flatnonzero(mask)
+        if len(members) == self.size:
+            entry = (None, self.size, None)
+        else:
+            ids = np.ascontiguousarray(self.faiss_ids[members])
+            entry = (faiss.IDSelectorBatch(ids), len(members), mask)
+        with self._lock:
+            self._selectors[key] = entry
+            while len(self._selectors) > self.selector_cache_size:
+                self._selectors.popitem(last=False)
+        return entry
+
+    def selector(self, key: Tuple) -> Tuple[Optional[faiss.IDSelector], int]:
+        """
+        FAISS ID selector for a canonical filter key (cached).
+
+        Returns:
+            (selector, match_count); selector is None when nothing is filtered out
+        """
+        selector, matches, _ = self._resolve(key)
+        return selector, matches
+
+    def mask(self, key: Tuple) -> Optional[np.ndarray]:
+        """Boolean mask over chunk positions for a canonical filter key (None keeps every chunk)"""
+        return self._resolve(key)[2]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "fields": {field: len(values) for field, values in self._bitmaps.items()},
+            "bitmap_bytes": int(sum(bitmap.nbytes for values in self._bitmaps.values() for bitmap in values.values())),
+            "cached_selectors": len(self._selectors),
+        }
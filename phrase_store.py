@@ -0,0 +1,343 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+import numpy as np
+
+from bm25_index import STOPWORDS
+from uniqueness_index import normalize_text
+
+# Courtesy words every engagement thread uses ("thanks for sharing", "let us know");
+# n-grams made only of these and stopwords say nothing about repetition
+FILLER_WORDS = STOPWORDS | frozenset("""
+thanks thank sharing share shared great good nice post love agree agreed totally really definitely let us know
+sure glad happy appreciate point question questions interesting insight insights helpful awesome
+""".split())
+
+
+class SpaceSavingCounter:
+    """
+    Bounded heavy-hitter counter (Space-Saving algorithm).
+
+    Keeps at most `capacity` items; when full, the least frequent item is
+    replaced and the newcomer inherits its count as an overestimate.
+    """
+
+    def __init__(self, capacity: int, counts: Optional[Dict[str, int]] = None):
+        self.capacity = capacity
+        self.counts = dict(counts or {})
+
+    def add(self, item: str, count: int = 1) -> None:
+        if item in self.counts:
+            self.counts[item] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = count
+        else:
+            victim = min(self.counts, key=self.counts.get)
+            self.counts[item] = self.counts.pop(victim) + count
+
+    def top(self, n: int) -> List[Tuple[str, int]]:
+        return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:n]
+
+
+class PhraseReuseStore:
+    """
+    Compact, disk-backed phrase frequency store for engagement comments.
+
+    Word n-grams (except generic ones made only of stopwords and courtesy
+    filler), Barrana/persona openers and question structures are hashed
+    into a memory-mapped count-min sketch, so memory stays fixed no matter how
+    many packages are recorded. Small Space-Saving tables keep the text of the
+    most frequent phrases and openers per persona for reporting.
+
+    A key counts as over-used once its count reaches max_phrase_reuse: the
+    allowed uses are spent, so using it again would exceed the limit.
+    """
+
+    def __init__(self, store_dir: Optional[str] = None, ngram_sizes: Tuple[int, ...] = (3, 4),
+                 depth: int = 4, width: int = 1 << 20, max_phrase_reuse: int = 2,
+                 heavy_hitters: int = 256, flush_every: int = 20):
+        """
+        Initialize the store.
+
+        Args:
+            store_dir: Directory for the count table and sidecar metadata (None for in-memory only)
+            ngram_sizes: Word n-gram lengths to count
+            depth: Number of hash rows in the count-min sketch
+            width: Counters per row
+            max_phrase_reuse: Uses allowed before a phrase counts as over-used
+            heavy_hitters: Capacity of each heavy-hitter table
+            flush_every: Recorded clusters between flushes to disk (close() flushes the rest)
+
+        Raises:
+            ValueError: If an existing count table has a different depth or width
+        """
+        self.store_dir = store_dir
+        self.ngram_sizes = ngram_sizes
+        self.depth = depth
+        self.width = width
+        self.max_phrase_reuse = max_phrase_reuse
+        self.heavy_hitters = heavy_hitters
+        self.flush_every = flush_every
+        self._unflushed = 0
+        self._lock = threading.Lock()
+
+        sidecar = {}
+        if store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+            table_path = os.path.join(store_dir, "phrase_counts.u32")
+            exists = os.path.exists(table_path)
+            sidecar_path = self._sidecar_path()
+            if exists and os.path.exists(sidecar_path):
+                try:
+                    with open(sidecar_path, "r", encoding="utf-8") as f:
+                        sidecar = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    logging.warning(f"⚠️ Could not read phrase store metadata: {e}")
+            if exists:
+                # Hash columns depend on the shape, so a table of another shape can't be reused
+                shape = (sidecar.get("depth", depth), sidecar.get("width", width))
+                if shape != (depth, width) or os.path.getsize(table_path) != 4 * depth * width:
+                    raise ValueError(f"Phrase count table {table_path} has shape {shape} "
+                                     f"({os.path.getsize(table_path)} bytes), expected ({depth}, {width})")
+            self._table = np.memmap(table_path, dtype=np.uint32, mode="r+" if exists else "w+", shape=(depth, width))
+        else:
+            self._table = np.zeros((depth, width), dtype=np.uint32)
+
+        self.packages_recorded = sidecar.get("packages_recorded", 0)
+        self._top_phrases = SpaceSavingCounter(heavy_hitters, sidecar.get("top_phrases"))
+        self._openers = {persona: SpaceSavingCounter(heavy_hitters, counts)
+                         for persona, counts in sidecar.get("openers", {}).items()}
+        self._dominant_personas = Counter(sidecar.get("dominant_personas", {}))
+        if store_dir:
+            if not sidecar:
+                # Record the table shape right away so reopening with other settings is caught
+                self._flush()
+            atexit.register(self.close)
+
+    def _sidecar_path(self) -> str:
+        return os.path.join(self.store_dir, "phrase_store.json")
+
+    # ------------------------------------------------------------------
+    # Key extraction
+    # ------------------------------------------------------------------
+    def phrases(self, text: str) -> List[str]:
+        """Word n-grams of a comment, skipping those made only of stopwords and filler words"""
+        words = normalize_text(text).split()
+        grams = []
+        for n in self.ngram_sizes:
+            grams.extend(" ".join(words[i:i + n]) for i in range(len(words) - n + 1)
+                         if not FILLER_WORDS.issuperset(words[i:i + n]))
+        return grams
+
+    @staticmethod
+    def opener(text: str, words: int = 3) -> str:
+        """First few words of a comment (how a persona or Barrana opens)"""
+        return " ".join(normalize_text(text).split()[:words])
+
+    @staticmethod
+    def question_structures(text: str) -> List[str]:
+        """Leading words of each question, e.g. 'how would this'"""
+        structures = []
+        for sentence in re.findall(r"[^.!?]*\?", text or ""):
+            words = normalize_text(sentence).split()
+            if words:
+                structures.append(" ".join(words[:3]))
+        return structures
+
+    def _overused(self, count: int) -> bool:
+        return count >= self.max_phrase_reuse
+
+    def _keys(self, comment: Dict[str, Any]) -> List[str]:
+        text = comment.get("text", "")
+        persona = comment.get("speaker") or "unknown"
+        keys = [f"p|{phrase}" for phrase in self.phrases(text)]
+        opener = self.opener(text)
+        if opener:
+            keys.append(f"o|{persona}|{opener}")
+        keys.extend(f"q|{structure}" for structure in self.question_structures(text))
+        return keys
+
+    def _hash(self, keys: Iterable[str]) -> np.ndarray:
+        """Hash keys to one column per sketch row (shape: n x depth)"""
+        digests = b"".join(hashlib.blake2b(key.encode("utf-8"), digest_size=4 * self.depth).digest()
+                           for key in keys)
+        hashed = np.frombuffer(digests, dtype=np.uint32).reshape(-1, self.depth)
+        return (hashed % self.width).astype(np.int64)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def counts(self, keys: List[str]) -> np.ndarray:
+        """Estimated counts for raw store keys"""
+        if not keys:
+            return np.empty(0, dtype=np.uint32)
+        columns = self._hash(keys)
+        rows = np.arange(self.depth)
+        return self._table[rows, columns].min(axis=1)
+
+    def phrase_count(self, phrase: str) -> int:
+        """Estimated number of times a phrase has been used"""
+        return int(self.counts([f"p|{normalize_text(phrase)}"])[0])
+
+    def opener_count(self, persona: str, text: str) -> int:
+        """Estimated number of times a persona opened with the same words as text"""
+        return int(self.counts([f"o|{persona}|{self.opener(text)}"])[0])
+
+    def report_cluster(self, comments: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Report phrases, openers and question structures in a cluster that are already over-used.
+
+        Args:
+            comments: Cluster comments (dicts with 'text' and 'speaker')
+
+        Returns:
+            Dictionary with over-used phrases, persona openers and question structures
+        """
+        overused_phrases = {}
+        overused_openers = []
+        repeated_questions = {}
+
+        for comment in comments:
+            text = comment.get("text", "")
+            if not text:
+                continue
+            keys = self._keys(comment)
+            for key, count in zip(keys, self.counts(keys).tolist()):
+                if not self._overused(count):
+                    continue
+                kind, _, value = key.partition("|")
+                if kind == "p":
+                    overused_phrases[value] = count
+                elif kind == "o":
+                    persona, _, opener = value.partition("|")
+                    overused_openers.append({"id": comment.get("id"), "persona": persona,
+                                             "opener": opener, "count": count})
+                elif kind == "q":
+                    repeated_questions[value] = count
+
+        return {
+            "max_phrase_reuse": self.max_phrase_reuse,
+            "overused_phrases": dict(sorted(overused_phrases.items(), key=lambda item: item[1], reverse=True)[:20]),
+            "overused_openers": overused_openers,
+            "repeated_question_structures": repeated_questions,
+        }
+
+    def record_cluster(self, comments: List[Dict[str, Any]]) -> None:
+        """
+        Add a cluster's phrases, openers and question structures to the store.
+
+        Args:
+            comments: Cluster comments (dicts with 'text' and 'speaker')
+        """
+        keys = []
+        for comment in comments:
+            if comment.get("text"):
+                keys.extend(self._keys(comment))
+        if not keys:
+            return
+
+        columns = self._hash(keys)
+        speakers = Counter(c.get("speaker") for c in comments if c.get("speaker") and c.get("speaker") != "Barrana")
+
+        with self._lock:
+            for row in range(self.depth):
+                np.add.at(self._table[row], columns[:, row], 1)
+
+            for key in keys:
+                kind, _, value = key.partition("|")
+                if kind == "p":
+                    self._top_phrases.add(value)
+                elif kind == "o":
+                    persona, _, opener = value.partition("|")
+                    self._openers.setdefault(persona, SpaceSavingCounter(self.heavy_hitters)).add(opener)
+
+            if speakers:
+                self._dominant_personas[speakers.most_common(1)[0][0]] += 1
+            self.packages_recorded += 1
+            self._unflushed += 1
+            if self._unflushed >= self.flush_every:
+                self._flush()
+
+    def flush(self) -> None:
+        """Persist the count table and sidecar metadata now"""
+        with self._lock:
+            self._flush()
+
+    def close(self) -> None:
+        """Flush pending counts (also runs at interpreter exit)"""
+        self.flush()
+        atexit.unregister(self.close)
+
+    def _flush(self) -> None:
+        """Persist the count table and sidecar metadata (caller holds the lock or is still initializing)"""
+        if not self.store_dir:
+            return
+        try:
+            self._table.flush()
+            sidecar = {
+                "depth": self.depth,
+                "width": self.width,
+                "packages_recorded": self.packages_recorded,
+                "top_phrases": self._top_phrases.counts,
+                "openers": {persona: counter.counts for persona, counter in self._openers.items()},
+                "dominant_personas": dict(self._dominant_personas),
+                "updated_at": datetime.now().isoformat(),
+            }
+            tmp_path = self._sidecar_path() + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(sidecar, f, ensure_ascii=False)
+            os.replace(tmp_path, self._sidecar_path())
+            self._unflushed = 0
+        except Exception as e:
+            logging.error(f"❌ Error persisting phrase store: {e}")
+
+    def top_phrases(self, n: int = 20) -> List[Tuple[str, int]]:
+        """Most frequent phrases across all recorded packages"""
+        with self._lock:
+            return self._top_phrases.top(n)
+
+    def overused_openers(self, persona: Optional[str] = None, n: int = 10) -> Dict[str, List[Tuple[str, int]]]:
+        """
+        Over-used openers (count reached max_phrase_reuse), per persona.
+
+        Args:
+            persona: Restrict the report to one persona (optional)
+            n: Maximum openers per persona
+
+        Returns:
+            Mapping of persona to (opener, count) pairs
+        """
+        with self._lock:
+            personas = [persona] if persona else list(self._openers)
+            return {
+                p: [(opener, count) for opener, count in self._openers[p].top(n) if self._overused(count)]
+                for p in personas if p in self._openers
+            }
+
+    def dominant_persona_counts(self) -> Dict[str, int]:
+        """How often each persona led a thread, for checking persona rotation"""
+        with self._lock:
+            return dict(self._dominant_personas)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get store statistics.
+
+        Returns:
+            Dictionary with store stats
+        """
+        return {
+            "packages_recorded": self.packages_recorded,
+            "table_bytes": int(self._table.nbytes),
+            "max_phrase_reuse": self.max_phrase_reuse,
+            "dominant_personas": self.dominant_persona_counts(),
+            "store_dir": self.store_dir,
+        }
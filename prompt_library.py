@@ -4,6 +4,21 @@ import re
 from typing import Dict, List, Optional, Any
 import os
 from datetime import datetime
+from industry_classifier import IndustryClassifier
+from uniqueness_index import EngagementUniquenessIndex
+from phrase_store import PhraseReuseStore
+from rollout_scheduler import plan_cluster_rollout
+
+# Request-specific slots of a compiled platform prompt; everything else is rendered once per library load
+PROMPT_SLOTS = ("description", "primary_keywords", "secondary_keywords", "primary_count")
+PROMPT_SLOT_MARKER = "\x00{}\x00"
+PROMPT_SLOT_PATTERN = re.compile("\x00(" + "|".join(PROMPT_SLOTS) + ")\x00")
+
+
+def engagement_index_dir() -> str:
+    """Directory for the persisted engagement indexes: ENGAGEMENT_INDEX_DIR, else the user data directory"""
+    data_home = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.environ.get('ENGAGEMENT_INDEX_DIR') or os.path.join(data_home, 'barrana', 'engagement_index')
 
 class BarranaPromptLibrary:
     """
@@ -16,6 +31,10 @@ class BarranaPromptLibrary:
         self.comments_engine_path = comments_engine_path
         self.library = None
         self.comments_engine = None
+        self.industry_classifier = None
+        self.uniqueness_index = None
+        self.phrase_store = None
+        self._compiled_prompts = {}
         self.load_library()
         self.load_comments_engine()
     
@@ -33,6 +52,9 @@ class BarranaPromptLibrary:
             # Validate library structure
             self._validate_library_structure()
             
+            # Precompile platform templates (replaces any compiled from the previous version)
+            self._compile_prompts()
+            
         except json.JSONDecodeError as e:
             logging.error(f"Invalid JSON in prompt library: {e}")
             raise
@@ -131,60 +153,141 @@ class BarranaPromptLibrary:
         if not self.library:
             raise RuntimeError("Prompt library not loaded")
         
-        # Get platform configuration
-        config = self.get_platform_config(platform)
-        
         # Get keywords from SEO config if not provided
         if primary_keywords is None:
             primary_keywords = self.library['seo']['primary_keywords']
         if secondary_keywords is None:
             secondary_keywords = self.library['seo']['secondary_keywords']
         
-        # Build the prompt with variable injection
-        try:
-            # Handle different JSON structures
-            if 'meta' in self.library:
-                # v3.1 structure
-                cta = self.library['globals']['cta']
-            else:
-                # v3.0 structure
-                cta = self.library['globals']['cta']
+        # Fill the platform's precompiled template; only these slots vary per request
+        parts = self._compiled_prompts.get(platform) or self._compile_prompt(platform)
+        values = {
+            "description": str(description),
+            "primary_keywords": ', '.join(primary_keywords),
+            "secondary_keywords": ', '.join(secondary_keywords),
+            "primary_count": str(len(primary_keywords))
+        }
+        prompt = "".join(values[part] if i % 2 else part for i, part in enumerate(parts))
+        
+        # Add RAG context if provided
+        if rag_context and rag_context.strip():
+            enhanced_prompt = f"""
+Use the following Barrana context to ensure accuracy, brand consistency, and factual grounding:
+
+{rag_context}
+
+---
+
+Now, following the platform-specific template below, generate content that incorporates the relevant information from the context above:
+
+{prompt}
+
+IMPORTANT: 
+- Use the Barrana context to inform your content with accurate, company-specific information
+- Maintain the platform-specific format and style requirements
+- Ensure all facts and claims are grounded in the provided context
+- Keep the brand voice and messaging consistent with Barrana's identity
+"""
+            logging.info(f"Built RAG-enhanced prompt for platform: {platform}")
+            return enhanced_prompt
+        else:
+            logging.info(f"Built standard prompt for platform: {platform}")
+            return prompt
+    
+    def _compile_prompt(self, platform: str) -> List[str]:
+        """
+        Compile a platform's static prompt skeleton into a fillable template.
+        
+        The skeleton is rendered once with marker values in the variable slots
+        and split on the markers, so the result alternates static text (even
+        indices) and slot names (odd indices).
+        
+        Args:
+            platform: Target platform
             
-            prompt = config['prompt_template'].format(
-                description=description,
-                primary_keywords=', '.join(primary_keywords),
-                secondary_keywords=', '.join(secondary_keywords),
-                cta=cta,
-                word_count_min=config['word_count']['min'],
-                word_count_max=config['word_count']['max']
-            )
+        Returns:
+            Template parts, also cached until the library is reloaded
+        """
+        config = self.get_platform_config(platform)
+        try:
+            skeleton = self._render_prompt(config, platform, *(PROMPT_SLOT_MARKER.format(slot) for slot in PROMPT_SLOTS))
+        except KeyError as e:
+            raise ValueError(f"Missing required variable in prompt template: {e}")
+        except Exception as e:
+            raise RuntimeError(f"Failed to build prompt: {e}")
+        
+        parts = PROMPT_SLOT_PATTERN.split(skeleton)
+        self._compiled_prompts[platform] = parts
+        return parts
+    
+    def _compile_prompts(self) -> None:
+        """Compile every platform's template (invalid platforms fail again on use)"""
+        self._compiled_prompts = {}
+        for platform in self.library['platforms']:
+            try:
+                self._compile_prompt(platform)
+            except Exception as e:
+                logging.warning(f"Could not precompile prompt template for {platform}: {e}")
+    
+    def _render_prompt(self, config: Dict[str, Any], platform: str, description: str,
+                       primary_keywords: str, secondary_keywords: str, primary_count: str) -> str:
+        """
+        Render the full platform prompt (without RAG context).
+        
+        Args:
+            config: Platform configuration
+            platform: Target platform
+            description: Content description
+            primary_keywords: Comma-separated primary keywords
+            secondary_keywords: Comma-separated secondary keywords
+            primary_count: Number of primary keywords
             
-            # Add explicit keyword inclusion requirements
-            prompt += f"""
+        Returns:
+            Prompt text
+        """
+        # Handle different JSON structures
+        if 'meta' in self.library:
+            # v3.1 structure
+            cta = self.library['globals']['cta']
+        else:
+            # v3.0 structure
+            cta = self.library['globals']['cta']
+        
+        prompt = config['prompt_template'].format(
+            description=description,
+            primary_keywords=primary_keywords,
+            secondary_keywords=secondary_keywords,
+            cta=cta,
+            word_count_min=config['word_count']['min'],
+            word_count_max=config['word_count']['max']
+        )
+        
+        # Add explicit keyword inclusion requirements
+        prompt += f"""
 
 MANDATORY KEYWORD INCLUSION:
 - You MUST include these EXACT keyword phrases naturally in your content:
-- Primary keywords: {', '.join(primary_keywords)}
-- Secondary keywords: {', '.join(secondary_keywords)}
+- Primary keywords: {primary_keywords}
+- Secondary keywords: {secondary_keywords}
 - Use each keyword phrase at least once in the content
 - Integrate keywords naturally, not as a list
 - Keywords must appear as complete phrases, not just individual words
-- CRITICAL: Include ALL {len(primary_keywords)} primary keywords for SEO compliance
+- CRITICAL: Include ALL {primary_count} primary keywords for SEO compliance
 - Distribute keywords throughout the content (title, intro, body, conclusion)
 - Ensure keyword density is between 2-5% for optimal SEO
 - SPECIAL NOTE: Include \"AI chatbots for SMB\" in your content as it's a key automation solution"""
-            
-            # Add comprehensive platform-specific enhancements
-            style = config.get('style', '')
-            structure = config.get('structure', [])
-            visuals = config.get('visuals', [])
-            seo_requirements = config.get('seo_requirements', {})
-            special_rules = config.get('special_rules', '')
-            rules = config.get('rules', {})
-            
-            # Add voice and brand guidelines
-            voice = config.get('voice', 'Flexible')
-            prompt += f"""
+        
+        # Add comprehensive platform-specific enhancements
+        style = config.get('style', '')
+        structure = config.get('structure', [])
+        visuals = config.get('visuals', [])
+        seo_requirements = config.get('seo_requirements', {})
+        special_rules = config.get('special_rules', '')
+        rules = config.get('rules', {})
+        
+        # Add voice and brand guidelines
+        voice = config.get('voice', 'Flexible')
+        prompt += f"""
 
 VOICE & BRAND GUIDELINES:
 - Voice: {voice}
@@ -192,10 +295,10 @@ VOICE & BRAND GUIDELINES:
 - Website: {self.library['globals']['brand']['website']}
 - Tone: {self.library['globals']['tone']}
 - Regions: {', '.join(self.library['globals']['brand']['regions'])}"""
-            
-            # Add content framework
-            content_framework = self.library['globals']['content_framework']
-            prompt += f"""
+        
+        # Add content framework
+        content_framework = self.library['globals']['content_framework']
+        prompt += f"""
 
 CONTENT FRAMEWORK:
 - Follow this exact structure: {' → '.join(content_framework)}
@@ -203,122 +306,122 @@ CONTENT FRAMEWORK:
 - Use evidence (WSJ/NFX/Reddit insights)
 - Present solution approach
 - End with clear CTA"""
-            
-            # Add evidence sources requirement
-            evidence_sources = self.library['globals']['evidence_sources']
-            prompt += f"""
+        
+        # Add evidence sources requirement
+        evidence_sources = self.library['globals']['evidence_sources']
+        prompt += f"""
 
 EVIDENCE REQUIREMENTS:
 - Reference these sources when relevant: {', '.join(evidence_sources)}
 - Use evidence naturally in content
 - Support claims with credible sources"""
-            
-            # Add style requirement
-            if style:
-                prompt += f"""
+        
+        # Add style requirement
+        if style:
+            prompt += f"""
 
 STYLE REQUIREMENT:
 - Platform style: {style}
 - Ensure content matches this specific style throughout"""
-            
-            # Add structure requirements
-            if structure:
-                if isinstance(structure, list):
-                    structure_text = " → ".join(structure)
-                else:
-                    structure_text = structure
-                prompt += f"""
+        
+        # Add structure requirements
+        if structure:
+            if isinstance(structure, list):
+                structure_text = " → ".join(structure)
+            else:
+                structure_text = structure
+            prompt += f"""
 
 STRUCTURE REQUIREMENT:
 - Follow this exact structure: {structure_text}
 - Ensure all structure elements are included"""
-            
-            # Add visual requirements
-            if visuals:
-                visuals_text = ", ".join(visuals)
-                prompt += f"""
+        
+        # Add visual requirements
+        if visuals:
+            visuals_text = ", ".join(visuals)
+            prompt += f"""
 
 VISUAL REQUIREMENTS:
 - Include these visual elements: {visuals_text}
 - Specify visual concepts and placeholders"""
-            
-            # Add SEO requirements
-            if seo_requirements:
-                seo_items = []
-                for key, value in seo_requirements.items():
-                    seo_items.append(f"{key}: {value}")
-                seo_text = ", ".join(seo_items)
-                prompt += f"""
+        
+        # Add SEO requirements
+        if seo_requirements:
+            seo_items = []
+            for key, value in seo_requirements.items():
+                seo_items.append(f"{key}: {value}")
+            seo_text = ", ".join(seo_items)
+            prompt += f"""
 
 SEO REQUIREMENTS:
 - {seo_text}
 - Ensure SEO optimization throughout content"""
-            
-            # Add special rules
-            if special_rules:
-                prompt += f"""
+        
+        # Add special rules
+        if special_rules:
+            prompt += f"""
 
 SPECIAL RULES:
 - {special_rules}
 - Follow these platform-specific constraints"""
-            
-            # Get word count limits early
-            word_min = config.get('word_count', {}).get('min', 0)
-            word_max = config.get('word_count', {}).get('max', 1000)
-            
-            # Get hashtag count and CTA type for constraints
-            hashtag_count = config.get('hashtags', {}).get('count', '3-5')
-            cta_type = "standard" if platform != 'stackoverflow' else "none"
-            
-            # Add CRITICAL CONSTRAINTS section for platform-specific limits
-            prompt += f"""
+        
+        # Get word count limits early
+        word_min = config.get('word_count', {}).get('min', 0)
+        word_max = config.get('word_count', {}).get('max', 1000)
+        
+        # Get hashtag count and CTA type for constraints
+        hashtag_count = config.get('hashtags', {}).get('count', '3-5')
+        cta_type = "standard" if platform != 'stackoverflow' else "none"
+        
+        # Add CRITICAL CONSTRAINTS section for platform-specific limits
+        prompt += f"""
 
 🚨 CRITICAL CONSTRAINTS - MANDATORY COMPLIANCE:
 - Word Count: EXACTLY {word_min}-{word_max} words (NO EXCEPTIONS)
-- Keywords: Use EXACTLY {len(primary_keywords)} primary keywords (NO MORE, NO LESS)
+- Keywords: Use EXACTLY {primary_count} primary keywords (NO MORE, NO LESS)
 - Hashtags: Use EXACTLY {hashtag_count} hashtags (NO MORE, NO LESS)
 - Structure: Follow EXACTLY {len(structure) if structure else 3} structural elements
 - Voice: Use "{voice}" voice consistently throughout
 - CTA: Include {cta_type} call-to-action
 
 ⚠️ WARNING: Content will be REJECTED if these constraints are not met exactly!"""
-            
-            # Add general rules
-            if rules:
-                rules_items = []
-                for key, value in rules.items():
-                    rules_items.append(f"{key}: {value}")
-                rules_text = ", ".join(rules_items)
-                prompt += f"""
+        
+        # Add general rules
+        if rules:
+            rules_items = []
+            for key, value in rules.items():
+                rules_items.append(f"{key}: {value}")
+            rules_text = ", ".join(rules_items)
+            prompt += f"""
 
 PLATFORM RULES:
 - {rules_text}
 - Adhere to these specific platform requirements"""
+        
+        # Add guardrails and validation rules
+        guardrails = self.library.get('guardrails', {})
+        if guardrails:
+            dos = guardrails.get('dos', [])
+            donts = guardrails.get('donts', [])
             
-            # Add guardrails and validation rules
-            guardrails = self.library.get('guardrails', {})
-            if guardrails:
-                dos = guardrails.get('dos', [])
-                donts = guardrails.get('donts', [])
-                
-                if dos:
-                    dos_text = "\n- ".join(dos)
-                    prompt += f"""
+            if dos:
+                dos_text = "\n- ".join(dos)
+                prompt += f"""
 
 GUARDRAILS - DO:
 - {dos_text}"""
-                
-                if donts:
-                    donts_text = "\n- ".join(donts)
-                    prompt += f"""
+            
+            if donts:
+                donts_text = "\n- ".join(donts)
+                prompt += f"""
 
 GUARDRAILS - DON'T:
 - {donts_text}"""
-            
-            # Add SEO rules and keyword requirements
-            seo_rules = self.library.get('seo', {}).get('rules', {})
-            if seo_rules:
-                prompt += f"""
+        
+        # Add SEO rules and keyword requirements
+        seo_rules = self.library.get('seo', {}).get('rules', {})
+        if seo_rules:
+            prompt += f"""
 
 SEO REQUIREMENTS:
 - Natural placement only: {seo_rules.get('natural_placement_only', True)}
@@ -327,22 +430,22 @@ SEO REQUIREMENTS:
 - MANDATORY: Include primary keywords naturally throughout content
 - MANDATORY: Achieve minimum 2% keyword density
 - MANDATORY: Use keywords in title, introduction, and subheadings"""
-            
-            # Add publishing defaults
-            publishing_defaults = self.library['globals'].get('publishing_defaults', {})
-            if publishing_defaults:
-                brand_hashtags = publishing_defaults.get('brand_hashtags', [])
-                if brand_hashtags:
-                    prompt += f"""
+        
+        # Add publishing defaults
+        publishing_defaults = self.library['globals'].get('publishing_defaults', {})
+        if publishing_defaults:
+            brand_hashtags = publishing_defaults.get('brand_hashtags', [])
+            if brand_hashtags:
+                prompt += f"""
 
 BRAND HASHTAGS:
 - Include these brand hashtags when appropriate: {', '.join(brand_hashtags)}
 - Use brand hashtags naturally, not spam"""
-            
-            # Add post-processor requirements
-            post_processors = self.library.get('runtime', {}).get('post_processors', [])
-            if post_processors:
-                prompt += f"""
+        
+        # Add post-processor requirements
+        post_processors = self.library.get('runtime', {}).get('post_processors', [])
+        if post_processors:
+            prompt += f"""
 
 POST-PROCESSING REQUIREMENTS:
 - Ensure CTA is included (except StackOverflow)
@@ -352,10 +455,10 @@ POST-PROCESSING REQUIREMENTS:
 - Add FAQs for long-form content (1000+ words)
 - Validate voice consistency
 - Check evidence citations"""
-            
-            # Add FAQ requirements for long-form content
-            if word_min >= 800:  # Long-form content
-                prompt += f"""
+        
+        # Add FAQ requirements for long-form content
+        if word_min >= 800:  # Long-form content
+            prompt += f"""
 
 FAQ REQUIREMENTS:
 - MANDATORY: Include FAQ section for content {word_min}+ words
@@ -363,10 +466,10 @@ FAQ REQUIREMENTS:
 - Questions should address common concerns about the topic
 - Answers should provide valuable insights and solutions
 - FAQ section should be comprehensive and helpful"""
-            
-            # Add platform-specific enforcement
-            if platform in ['twitter', 'twitter_quick']:
-                prompt += f"""
+        
+        # Add platform-specific enforcement
+        if platform in ['twitter', 'twitter_quick']:
+            prompt += f"""
 
 CRITICAL REQUIREMENTS:
 - Each tweet MUST be 280 characters or less
@@ -375,15 +478,15 @@ CRITICAL REQUIREMENTS:
 - Include exactly {config['word_count']['min']}-{config['word_count']['max']} tweets total
 - Each tweet should be on a separate line
 - Do NOT exceed character limits under any circumstances"""
-                
-                if platform == 'twitter_quick':
-                    prompt += f"""
+            
+            if platform == 'twitter_quick':
+                prompt += f"""
 - MUST include CTA in the final tweet (Tweet 3)
 - End with explicit call to action: "Contact us via www.barrana.ai or book a consultation"
 - Use numbered format: 1/3, 2/3, 3/3"""
-            
-            elif platform in ['linkedin', 'medium', 'substack', 'barrana_blog', 'ikramrana_blog']:
-                prompt += f"""
+        
+        elif platform in ['linkedin', 'medium', 'substack', 'barrana_blog', 'ikramrana_blog']:
+            prompt += f"""
 
 CRITICAL WORD COUNT REQUIREMENTS:
 - Generate EXACTLY {word_min}-{word_max} words
@@ -396,10 +499,10 @@ CRITICAL WORD COUNT REQUIREMENTS:
 - MANDATORY: Content must be at least {word_min} words to pass validation
 - Include detailed examples, case studies, and comprehensive explanations
 - Expand on each point with supporting evidence and actionable advice"""
-                
-                # Add LinkedIn-specific optimizations
-                if platform in ['linkedin', 'linkedin_quick']:
-                    prompt += f"""
+            
+            # Add LinkedIn-specific optimizations
+            if platform in ['linkedin', 'linkedin_quick']:
+                prompt += f"""
 
 LINKEDIN-SPECIFIC OPTIMIZATIONS:
 - VOICE CONSISTENCY: Use "I (Ikram)" voice consistently throughout - NEVER use "we" or "our"
@@ -410,9 +513,9 @@ LINKEDIN-SPECIFIC OPTIMIZATIONS:
 - HOOK OPTIMIZATION: Start with a bold contrarian statement or surprising insight
 - EVIDENCE INTEGRATION: Reference WSJ/NFX/Reddit insights naturally in the content
 - PERSONAL BRANDING: Emphasize Ikram's individual expertise and client experience"""
-                    
-                    if platform == 'linkedin_quick':
-                        prompt += f"""
+                
+                if platform == 'linkedin_quick':
+                    prompt += f"""
 
 LINKEDIN QUICK SPECIFIC REQUIREMENTS:
 - CHARACTER OPTIMIZATION: Maximize impact within 80-150 word limit
@@ -421,52 +524,24 @@ LINKEDIN QUICK SPECIFIC REQUIREMENTS:
 - ENGAGEMENT QUESTIONS: End with simple, direct questions
 - HASHTAG LIMIT: Use maximum 2-3 hashtags only
 - QUICK IMPACT: Focus on one key insight or challenge"""
-            
-            elif platform in ['tiktok']:
-                prompt += f"""
+        
+        elif platform in ['tiktok']:
+            prompt += f"""
 
 CRITICAL REQUIREMENTS:
 - Video script: {config['word_count']['min']}-{config['word_count']['max']} seconds duration
 - Caption: {config['caption_length']['min']}-{config['caption_length']['max']} words
 - Structure: Video script + caption format required"""
-            
-            elif platform in ['instagram']:
-                prompt += f"""
+        
+        elif platform in ['instagram']:
+            prompt += f"""
 
 CRITICAL REQUIREMENTS:
 - Caption: EXACTLY {config['word_count']['min']}-{config['word_count']['max']} words
 - Structure: Visual concept + caption format required
 - Count caption words carefully"""
-
-            # Add RAG context if provided
-            if rag_context and rag_context.strip():
-                enhanced_prompt = f"""
-Use the following Barrana context to ensure accuracy, brand consistency, and factual grounding:
-
-{rag_context}
-
----
-
-Now, following the platform-specific template below, generate content that incorporates the relevant information from the context above:
-
-{prompt}
-
-IMPORTANT: 
-- Use the Barrana context to inform your content with accurate, company-specific information
-- Maintain the platform-specific format and style requirements
-- Ensure all facts and claims are grounded in the provided context
-- Keep the brand voice and messaging consistent with Barrana's identity
-"""
-                logging.info(f"Built RAG-enhanced prompt for platform: {platform}")
-                return enhanced_prompt
-            else:
-                logging.info(f"Built standard prompt for platform: {platform}")
-                return prompt
-            
-        except KeyError as e:
-            raise ValueError(f"Missing required variable in prompt template: {e}")
-        except Exception as e:
-            raise RuntimeError(f"Failed to build prompt: {e}")
+        
+        return prompt
     
     def get_global_cta(self) -> str:
         """Get the global CTA text"""
@@ -547,6 +622,7 @@ IMPORTANT:
         """Reload the library from file (useful for updates)"""
         logging.info("Reloading prompt library...")
         self.load_library()
+        self.industry_classifier = None
     
     def is_loaded(self) -> bool:
         """Check if library is loaded"""
@@ -902,52 +978,65 @@ IMPORTANT:
         enabled_platforms = engagement_config.get('enabled_platforms', [])
         return platform in enabled_platforms
     
+    def get_industry_classifier(self) -> IndustryClassifier:
+        """
+        Get the local-first industry classifier, creating it on first use
+
+        Returns:
+            Industry classifier bound to the library's common industries
+        """
+        if self.industry_classifier is None:
+            engagement_config = self.get_engagement_config()
+            known_industries = engagement_config.get('industry_detection', {}).get('common_industries', [])
+            self.industry_classifier = IndustryClassifier(
+                known_industries,
+                llm_fallback=self._classify_industry_with_llm
+            )
+        return self.industry_classifier
+
     def extract_industry_context(self, description: str) -> str:
         """
         Extract industry context from content description
-        
+
+        Confident matches are resolved locally from the industry keyword
+        lexicon; only ambiguous descriptions are sent to GPT-4.
+
         Args:
             description: The content description
-        
+
         Returns:
             Detected industry name
         """
         try:
-            from openai import OpenAI
-            import os
-            
-            client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-            
-            industry_prompt = f"""
-            Analyze this business description and identify the primary industry:
-            "{description}"
-            
-            Return only the industry name from this list: restaurant, retail, e-commerce, consulting, healthcare, real_estate, fitness, beauty, automotive, technology, finance, education, manufacturing, construction, hospitality, professional_services.
-            
-            If the industry is not clearly identifiable, return "general_business".
-            """
-            
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": industry_prompt}],
-                max_tokens=50,
-                temperature=0.3
-            )
-            
-            industry = response.choices[0].message.content.strip().lower()
-            
-            # Validate against known industries
-            engagement_config = self.get_engagement_config()
-            known_industries = engagement_config.get('industry_detection', {}).get('common_industries', [])
-            
-            if industry not in known_industries and industry != "general_business":
-                return "general_business"
-            
-            return industry
-            
+            return self.get_industry_classifier().classify(description)
         except Exception as e:
             logging.warning(f"Error extracting industry context: {e}")
             return "general_business"
+
+    def _classify_industry_with_llm(self, description: str) -> str:
+        """Ask GPT-4 for the industry of an ambiguous description"""
+        from openai import OpenAI
+        import os
+
+        client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+
+        industry_prompt = f"""
+        Analyze this business description and identify the primary industry:
+        "{description}"
+
+        Return only the industry name from this list: restaurant, retail, e-commerce, consulting, healthcare, real_estate, fitness, beauty, automotive, technology, finance, education, manufacturing, construction, hospitality, professional_services.
+
+        If the industry is not clearly identifiable, return "general_business".
+        """
+
+        response = client.chat.completions.create(
+            model="gpt-4",
+            messages=[{"role": "user", "content": industry_prompt}],
+            max_tokens=50,
+            temperature=0.3
+        )
+
+        return response.choices[0].message.content.strip().lower()
     
     def generate_authentic_comments(self, main_content: str, platform: str, description: str) -> List[str]:
         """
@@ -1097,7 +1186,103 @@ IMPORTANT:
         except Exception as e:
             logging.error(f"Error generating Barrana response: {e}")
             return "Thank you for your comment! I'd love to help you further. Feel free to reach out via www.barrana.ai for a consultation."
-    
+
+    def generate_barrana_responses_batch(self, comments: List[str], main_content: str, platform: str) -> List[str]:
+        """
+        Generate Barrana responses for several comments in a single completion
+
+        The post content is sent once and every comment is tagged with its
+        response strategy. Replies are mapped back to comments by index; any
+        comment without a usable reply falls back to generate_barrana_response.
+
+        Args:
+            comments: The comments to respond to
+            main_content: The main post content
+            platform: Target platform
+
+        Returns:
+            List of Barrana responses, one per comment and in the same order
+        """
+        if not comments:
+            return []
+
+        responses: List[Optional[str]] = [None] * len(comments)
+
+        try:
+            from openai import OpenAI
+            import os
+
+            client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+            engagement_config = self.get_engagement_config()
+            response_config = engagement_config.get('response_generation', {})
+
+            barrana_voice = response_config.get('barrana_voice', '')
+            response_guidelines = response_config.get('response_guidelines', [])
+
+            numbered_comments = []
+            for i, comment in enumerate(comments, 1):
+                response_strategy = self._determine_response_strategy(comment, response_config)
+                numbered_comments.append(f'{i}. Comment: "{comment}"\n   Response Strategy: {response_strategy}')
+
+            batch_prompt = f"""
+            {barrana_voice}
+
+            Guidelines:
+            {chr(10).join(f"- {guideline}" for guideline in response_guidelines)}
+
+            The original post was:
+            "{main_content}"
+
+            People left these comments, each with the response strategy to follow:
+            {chr(10).join(numbered_comments)}
+
+            Generate a professional, helpful response from Barrana to EACH comment. Keep each response 2-3 sentences and end with a question or call-to-action when appropriate. Do not reuse the same opening words across responses.
+
+            Return ONLY JSON in this format:
+            {{"responses": [{{"index": 1, "response": "..."}}]}}
+            """
+
+            response = client.chat.completions.create(
+                model="gpt-4",
+                messages=[{"role": "user", "content": batch_prompt}],
+                max_tokens=min(150 * len(comments) + 100, 3000),
+                temperature=0.7
+            )
+
+            batch_data = self._parse_json_response(response.choices[0].message.content)
+            items = batch_data.get('responses', []) if isinstance(batch_data, dict) else batch_data
+
+            for item in items or []:
+                try:
+                    index = int(item.get('index')) - 1
+                except (AttributeError, TypeError, ValueError):
+                    continue
+                text = str(item.get('response') or '').strip()
+                if 0 <= index < len(comments) and text:
+                    responses[index] = text
+
+        except Exception as e:
+            logging.error(f"Error generating batched Barrana responses: {e}")
+
+        missing = [i for i, text in enumerate(responses) if not text]
+        if missing:
+            logging.warning(f"Batched Barrana responses missing {len(missing)}/{len(comments)} items, falling back per comment")
+            for i in missing:
+                responses[i] = self.generate_barrana_response(comments[i], main_content, platform)
+
+        return responses
+
+    def _parse_json_response(self, response_text: str) -> Any:
+        """Parse JSON from a model response, stripping markdown code fences if present"""
+        response_text = (response_text or '').strip()
+
+        if "```json" in response_text:
+            response_text = response_text.split("```json")[1].split("```")[0].strip()
+        elif "```" in response_text:
+            response_text = response_text.split("```")[1].split("```")[0].strip()
+
+        return json.loads(response_text)
+
     def _determine_response_strategy(self, comment: str, response_config: Dict[str, Any]) -> str:
         """
         Determine the appropriate response strategy based on comment content
@@ -1153,10 +1338,10 @@ IMPORTANT:
             if not comments:
                 return {}
             
-            # Generate Barrana responses for each comment
+            # Generate Barrana responses for all comments in one completion
+            responses = self.generate_barrana_responses_batch(comments, main_content, platform)
             engagement_pairs = []
-            for comment in comments:
-                response = self.generate_barrana_response(comment, main_content, platform)
+            for comment, response in zip(comments, responses):
                 engagement_pairs.append({
                     'comment': comment,
                     'barrana_response': response
@@ -1233,21 +1418,17 @@ IMPORTANT:
             )
             
             # Parse the JSON response
-            response_text = response.choices[0].message.content.strip()
-            
-            # Extract JSON from markdown code blocks if present
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0].strip()
-            
+            response_text = response.choices[0].message.content
             try:
-                cluster_data = json.loads(response_text)
+                cluster_data = self._parse_json_response(response_text)
             except json.JSONDecodeError as e:
                 logging.error(f"Failed to parse GPT-4 response as JSON: {e}")
-                logging.error(f"Response text: {response_text[:500]}...")
+                logging.error(f"Response text: {(response_text or '')[:500]}...")
                 return {}
             
+            # Enforce uniqueness against past clusters and within this thread
+            cluster_data = self._enforce_comment_uniqueness(cluster_data, client, main_content, platform)
+            
             # Validate and enrich the cluster data
             enriched_cluster = self._enrich_comment_cluster(cluster_data, platform, timing_config)
             
@@ -1557,8 +1738,13 @@ Generate the complete JSON now:
             'generated_at': datetime.now().isoformat()
         })
         
-        # Add timing configuration
+        # Add timing configuration and concrete release offsets
         cluster_data['timing_guidelines'] = timing_config
+        if timing_config:
+            try:
+                cluster_data['rollout_plan'] = plan_cluster_rollout(cluster_data, timing_config)
+            except ValueError as e:
+                logging.warning(f"Could not plan rollout for {platform}: {e}")
         
         # Validate requirements
         warnings = []
@@ -1568,10 +1754,146 @@ Generate the complete JSON now:
             warnings.append(f"Only {cluster_data['meta']['percent_replies']}% replies (expected ≥50%)")
         if barrana_replies < 5:
             warnings.append(f"Only {barrana_replies} Barrana replies (expected at least 5)")
+        if cluster_data['meta'].get('uniqueness_violations'):
+            warnings.append(f"{len(cluster_data['meta']['uniqueness_violations'])} comments still violate uniqueness rules")
+        
+        # Report and record phrase reuse across past engagement packages
+        try:
+            phrase_store = self.get_phrase_store()
+            if phrase_store:
+                phrase_reuse = phrase_store.report_cluster(comments)
+                cluster_data['meta']['phrase_reuse'] = phrase_reuse
+                if phrase_reuse['overused_phrases'] or phrase_reuse['overused_openers']:
+                    warnings.append(f"{len(phrase_reuse['overused_phrases'])} phrases and "
+                                    f"{len(phrase_reuse['overused_openers'])} openers reached max_phrase_reuse")
+                phrase_store.record_cluster(comments)
+        except Exception as e:
+            logging.warning(f"Phrase reuse tracking failed for {platform}: {e}")
         
         if warnings:
             cluster_data['meta']['warnings'] = warnings
             for warning in warnings:
                 logging.warning(f"Comment cluster validation: {warning}")
         
-        return cluster_data
\ No newline at end of file
+        return cluster_data
+    
+    def get_uniqueness_index(self) -> Optional[EngagementUniquenessIndex]:
+        """
+        Get the persistent near-duplicate index, creating it on first use
+        
+        Returns:
+            Uniqueness index configured from comments-engine.json, or None without a comments engine
+        """
+        if self.uniqueness_index is None and self.comments_engine:
+            uniqueness_rules = self.comments_engine.get('uniqueness_enforcement', {})
+            self.uniqueness_index = EngagementUniquenessIndex(
+                index_dir=engagement_index_dir(),
+                similarity_threshold=uniqueness_rules.get('similarity_threshold', 0.7),
+                banned_phrases=uniqueness_rules.get('banned_repetitive_phrases', [])
+            )
+        return self.uniqueness_index
+    
+    def get_phrase_store(self) -> Optional[PhraseReuseStore]:
+        """
+        Get the disk-backed phrase reuse counter, creating it on first use
+        
+        Returns:
+            Phrase store configured from comments-engine.json, or None without a comments engine
+        """
+        if self.phrase_store is None and self.comments_engine:
+            uniqueness_rules = self.comments_engine.get('uniqueness_enforcement', {})
+            self.phrase_store = PhraseReuseStore(
+                store_dir=engagement_index_dir(),
+                max_phrase_reuse=uniqueness_rules.get('max_phrase_reuse', 2)
+            )
+        return self.phrase_store
+    
+    def _enforce_comment_uniqueness(self, cluster_data: Dict, client, main_content: str, platform: str) -> Dict:
+        """
+        Flag near-duplicate and banned-phrase comments, regenerate them once, and index the cluster
+        
+        Args:
+            cluster_data: Comment cluster parsed from the model response (not yet enriched)
+            client: OpenAI client used for targeted regeneration
+            main_content: The main post content
+            platform: Target platform
+        
+        Returns:
+            Cluster data with flagged comments rewritten and remaining violations in meta
+        """
+        try:
+            index = self.get_uniqueness_index()
+            if index is None:
+                return cluster_data
+            
+            comments = cluster_data.get('comments', [])
+            violations = index.check_cluster(comments)
+            
+            if violations:
+                logging.info(f"🔁 Regenerating {len(violations)} non-unique comments for {platform}")
+                try:
+                    self._regenerate_flagged_comments(client, comments, violations, main_content, platform)
+                    violations = index.check_cluster(comments)
+                except Exception as e:
+                    # Keep the original comments and their violations; the cluster is still indexed below
+                    logging.warning(f"Comment regeneration failed for {platform}: {e}")
+            
+            if violations:
+                cluster_data.setdefault('meta', {})['uniqueness_violations'] = [
+                    {'id': v['id'], 'speaker': v['speaker'], 'reasons': v['reasons']} for v in violations
+                ]
+            
+            index.add_cluster(comments, platform)
+            
+        except Exception as e:
+            logging.warning(f"Uniqueness enforcement failed for {platform}: {e}")
+        
+        return cluster_data
+    
+    def _regenerate_flagged_comments(self, client, comments: List[Dict], violations: List[Dict],
+                                     main_content: str, platform: str) -> None:
+        """Rewrite only the flagged comments in one request, updating them in place"""
+        reason_labels = {
+            'banned_phrase': 'uses a banned phrase',
+            'near_duplicate': 'is too similar to a comment used on an earlier post',
+            'in_thread_duplicate': 'repeats another comment in this thread'
+        }
+        
+        flagged = []
+        for violation in violations:
+            reasons = ', '.join(reason_labels.get(r['type'], r['type']) for r in violation['reasons'])
+            flagged.append(f'- id {violation["id"]} ({violation["speaker"]}): "{violation["text"]}" -> {reasons}')
+        
+        banned_phrases = self.comments_engine.get('uniqueness_enforcement', {}).get('banned_repetitive_phrases', [])
+        
+        rewrite_prompt = f"""
+Rewrite ONLY the flagged comments below from a {platform.upper()} comment thread.
+Keep each comment's speaker, intent, length and reference to the post, but use completely different wording and sentence structure.
+Never use these phrases: {', '.join(banned_phrases)}
+
+POST CONTENT:
+{main_content}
+
+FLAGGED COMMENTS:
+{chr(10).join(flagged)}
+
+Return ONLY JSON in this format:
+{{"comments": [{{"id": "c1", "text": "..."}}]}}
+"""
+        
+        response = client.chat.completions.create(
+            model="gpt-4",
+            messages=[{"role": "user", "content": rewrite_prompt}],
+            max_tokens=min(120 * len(violations) + 100, 2000),
+            temperature=0.9
+        )
+        
+        rewritten = self._parse_json_response(response.choices[0].message.content)
+        replacements = {str(item.get('id')): item.get('text') for item in rewritten.get('comments', [])
+                        if isinstance(item, dict) and item.get('text')}
+        
+        for comment in comments:
+            new_text = replacements.get(str(comment.get('id')))
+            if new_text:
+                comment['text'] = new_text.strip()
+                comment['regenerated'] = True
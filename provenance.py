@@ -0,0 +1,140 @@
+import re
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from bm25_index import tokenize
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences and standalone lines (bullets, hooks) of generated content"""
+    return [sentence.strip() for sentence in SENTENCE_BOUNDARY.split(text or "") if sentence.strip()]
+
+
+class ProvenanceIndex:
+    """
+    Word shingle index over corpus chunks for tracing generated sentences.
+
+    Chunk texts are reduced to shingles of `shingle_size` consecutive
+    content words (stopwords dropped), each encoded as an int64 over a
+    corpus vocabulary. The shingle -> chunk postings are stored sorted
+    (CSR), so matching a post is a few binary searches per sentence.
+    """
+
+    def __init__(self, chunks: Sequence[Dict[str, Any]], shingle_size: int = 2, field: str = "text"):
+        """
+        Build the index.
+
+        Args:
+            chunks: Chunks in index position order
+            shingle_size: Words per shingle
+            field: Chunk field indexed
+        """
+        self.shingle_size = shingle_size
+        self.size = len(chunks)
+        self._vocabulary: Dict[str, int] = {}
+
+        documents = [[self._vocabulary.setdefault(token, len(self._vocabulary))
+                      for token in tokenize(str(chunk.get(field) or ""))] for chunk in chunks]
+        # Shingle keys are base-V numbers of their token ids
+        self._base = max(len(self._vocabulary), 1)
+        if self._base ** shingle_size >= 2 ** 63:
+            raise ValueError(f"Vocabulary too large for {shingle_size}-word shingles")
+
+        keys, positions = [], []
+        for pos, ids in enumerate(documents):
+            shingles = self._shingles(ids)
+            keys.append(shingles)
+            positions.append(np.full(len(shingles), pos, dtype="int32"))
+        keys = np.concatenate(keys) if keys else np.zeros(0, dtype="int64")
+        positions = np.concatenate(positions) if positions else np.zeros(0, dtype="int32")
+
+        order = np.argsort(keys, kind="stable")
+        self._keys, starts = np.unique(keys[order], return_index=True)
+        self._offsets = np.append(starts, len(order)).astype("int64")
+        self._positions = positions[order]
+
+    def _shingles(self, ids: List[int]) -> np.ndarray:
+        """Distinct shingle keys of a token id sequence, -1 for each shingle with an unknown word"""
+        n = self.shingle_size
+        if len(ids) < n:
+            return np.zeros(0, dtype="int64")
+        ids = np.asarray(ids, dtype="int64")
+        keys = np.zeros(len(ids) - n + 1, dtype="int64")
+        unknown = np.zeros(len(keys), dtype=bool)
+        for offset in range(n):
+            window = ids[offset:offset + len(keys)]
+            keys = keys * self._base + window
+            unknown |= window < 0
+        # Shingles with a word the corpus never uses can't match but still count
+        return np.concatenate([np.unique(keys[~unknown]), np.full(int(unknown.sum()), -1, dtype="int64")])
+
+    def match(self, text: str, max_chunks: int = 3) -> List[Dict[str, Any]]:
+        """
+        Match each sentence of a text to the chunks sharing most of its shingles.
+
+        Args:
+            text: Generated content
+            max_chunks: Maximum supporting chunks per sentence
+
+        Returns:
+            One dict per sentence with its shingle count and (position, overlap) matches,
+            overlap being the fraction of the sentence's shingles found in the chunk
+        """
+        sentences = []
+        for sentence in split_sentences(text):
+            ids = [self._vocabulary.get(token, -1) for token in tokenize(sentence)]
+            shingles = self._shingles(ids)
+            matches = []
+            known = shingles[shingles >= 0]
+            if len(known) and len(self._keys):
+                slots = np.minimum(np.searchsorted(self._keys, known), len(self._keys) - 1)
+                slots = slots[self._keys[slots] == known]
+                if len(slots):
+                    postings = np.concatenate([self._positions[self._offsets[slot]:self._offsets[slot + 1]]
+                                               for slot in slots])
+                    counts = np.bincount(postings, minlength=self.size)
+                    best = np.argpartition(-counts, min(max_chunks, self.size) - 1)[:max_chunks]
+                    best = best[np.lexsort((best, -counts[best]))]
+                    matches = [(int(pos), round(float(counts[pos]) / len(shingles), 4)) for pos in best if counts[pos]]
+            sentences.append({"text": sentence, "shingles": int(len(shingles)), "matches": matches})
+        return sentences
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "documents": self.size,
+            "shingle_size": self.shingle_size,
+            "shingles": int(len(self._keys)),
+            "postings": int(len(self._positions)),
+        }
+
+
+def summarize_provenance(sentences: List[Dict[str, Any]], min_overlap: float = 0.4,
+                         min_shingles: int = 2) -> Dict[str, Any]:
+    """
+    Label sentences as supported and count coverage.
+
+    Args:
+        sentences: Sentences with 'shingles' and 'chunks' (dicts with 'overlap', best first)
+        min_overlap: Minimum overlap with one chunk for a sentence to count as supported
+        min_shingles: Shorter sentences (hooks, CTAs, hashtags) are not checked
+
+    Returns:
+        Provenance with per-sentence 'checked', 'overlap' and 'supported' and overall coverage
+    """
+    checked = supported = 0
+    for sentence in sentences:
+        sentence["checked"] = sentence["shingles"] >= min_shingles
+        sentence["overlap"] = sentence["chunks"][0]["overlap"] if sentence["chunks"] else 0.0
+        sentence["supported"] = sentence["checked"] and sentence["overlap"] >= min_overlap
+        checked += sentence["checked"]
+        supported += sentence["supported"]
+    return {
+        "sentences": sentences,
+        "checked_sentences": checked,
+        "supported_sentences": supported,
+        "coverage": round(supported / checked, 4) if checked else 0.0,
+        "min_overlap": min_overlap
+    }
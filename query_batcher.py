@@ -0,0 +1,141 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-item requests into small batches.
+
+    Callers block in submit(); a dispatcher thread takes the first pending
+    item, waits up to `window_ms` for more (or until `max_batch` items are
+    queued) and hands the whole batch to `process_batch`, which must return one
+    result per item in the same order. Up to `max_in_flight` batches are
+    processed at once so collection continues while a batch waits on the API.
+    """
+
+    def __init__(self, process_batch: Callable[[List[Any]], List[Any]], window_ms: float = 5.0,
+                 max_batch: int = 32, max_in_flight: int = 4, name: str = "micro-batcher"):
+        """
+        Initialize the batcher.
+
+        Args:
+            process_batch: Function turning a list of items into a list of results
+            window_ms: How long to wait for more items after the first one arrives
+            max_batch: Maximum items per batch
+            max_in_flight: Maximum batches processed concurrently
+            name: Dispatcher thread name
+        """
+        self.process_batch = process_batch
+        self.window = window_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self.max_in_flight = max(1, max_in_flight)
+        self.name = name
+        self._executor = None
+        self._in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stopped = False
+        self._stats_lock = threading.Lock()
+        self._stats = {"batches": 0, "items": 0, "max_batch_seen": 0, "errors": 0}
+
+    def submit(self, item: Any, timeout: Optional[float] = 30.0) -> Any:
+        """
+        Queue an item and wait for its result.
+
+        Args:
+            item: Item for process_batch
+            timeout: Maximum seconds to wait for the result
+
+        Returns:
+            The item's result (exceptions from process_batch are re-raised)
+        """
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future))
+        return future.result(timeout)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._stopped = False
+                self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight,
+                                                    thread_name_prefix=f"{self.name}-worker")
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> List[Any]:
+        """Block for the first item, then gather more until the window closes or the batch is full"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = [entry for entry in self._collect() if entry is not None]
+            if batch:
+                self._in_flight.acquire()
+                self._executor.submit(self._dispatch, batch)
+            if self._stopped and self._queue.empty():
+                self._executor.shutdown(wait=True)
+                return
+
+    def _dispatch(self, batch: List[Any]) -> None:
+        items = [item for item, _ in batch]
+        try:
+            results = self.process_batch(items)
+            if len(results) != len(items):
+                raise RuntimeError(f"Batch returned {len(results)} results for {len(items)} items")
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+        except Exception as e:
+            with self._stats_lock:
+                self._stats["errors"] += 1
+            logging.error(f"❌ Error processing batch of {len(items)} in {self.name}: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._in_flight.release()
+
+        with self._stats_lock:
+            self._stats["batches"] += 1
+            self._stats["items"] += len(items)
+            self._stats["max_batch_seen"] = max(self._stats["max_batch_seen"], len(items))
+
+    def close(self) -> None:
+        """Stop the dispatcher thread after it finishes queued items"""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stopped = True
+        self._queue.put(None)
+        thread.join(timeout=5)
+        self._thread = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get batching statistics.
+
+        Returns:
+            Dictionary with batch counts and average batch size
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["avg_batch_size"] = round(stats["items"] / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["window_ms"] = self.window * 1000.0
+        stats["max_batch"] = self.max_batch
+        stats["max_in_flight"] = self.max_in_flight
+        return stats
@@ -0,0 +1,140 @@
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normalize a query for cache lookups.
+
+    Only Unicode form and whitespace are normalized; case is kept because the
+    embedding models are case-sensitive.
+    """
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text or "")).strip()
+
+
+class QueryEmbeddingCache:
+    """
+    Process-wide LRU cache of query embeddings keyed by (model, normalized text).
+
+    Bounded by both entry count and total vector bytes. Cached vectors are
+    read-only so callers can't corrupt a shared entry.
+    """
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached queries
+            max_bytes: Maximum total size of cached vectors
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def key(model: str, text: str) -> Tuple[str, str]:
+        return (model, normalize_query(text))
+
+    def get(self, model: str, text: str) -> Optional[np.ndarray]:
+        """Cached embedding for a query, or None"""
+        key = self.key(model, text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return vector
+
+    def put(self, model: str, text: str, vector: np.ndarray) -> np.ndarray:
+        """
+        Store a query embedding.
+
+        Args:
+            model: Embedding model name
+            text: Query text
+            vector: Embedding
+
+        Returns:
+            The read-only cached vector
+        """
+        vector = np.array(vector, dtype="float32")
+        vector.setflags(write=False)
+        if vector.nbytes > self.max_bytes or self.max_entries <= 0:
+            return vector
+
+        key = self.key(model, text)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = vector
+            self._bytes += vector.nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self._stats["evictions"] += 1
+        return vector
+
+    def get_or_compute(self, model: str, text: str, compute: Callable[[str], np.ndarray]) -> np.ndarray:
+        """Cached embedding, computing (from the normalized text) and storing it on a miss"""
+        vector = self.get(model, text)
+        if vector is None:
+            vector = self.put(model, text, compute(normalize_query(text)))
+        return vector
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with hit rate, size and eviction counts
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["max_entries"] = self.max_entries
+        stats["max_bytes"] = self.max_bytes
+        return stats
+
+
+class RequestMemo:
+    """
+    Request-scoped memo for description-derived artifacts.
+
+    One instance lives for a single request, so every platform in the request
+    shares the same retrieval results and sees the same corpus snapshot.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Value for key, computing it on first use"""
+        if key in self._values:
+            self.hits += 1
+            return self._values[key]
+        self.misses += 1
+        value = compute()
+        self._values[key] = value
+        return value
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Offline RAG retrieval evaluation and latency benchmark
+
+Runs a labeled query set (query -> relevant chunk ids) against a corpus for
+each index configuration and retrieval mode, and reports recall@k, MRR, the
+share of queries with no results, p50/p99 retrieval latency and memory.
+
+No network is needed. Embeddings come from a deterministic hashing embedder,
+or from a cache file recorded once against the OpenAI API with --record and
+replayed on every later run. --synthetic N evaluates a generated corpus of N
+labeled chunks instead, to see how latency and memory scale.
+
+Usage:
+    python rag_eval.py [--corpus barrana_rag_corpus.jsonl] [--eval-set barrana_rag_eval.jsonl]
+                       [--embeddings hash|cache] [--cache rag_eval_embeddings.npz] [--record]
+                       [--configs flat,sq8,hnsw,ivf_flat] [--modes vector,lexical,hybrid]
+                       [--top-k 3] [--min-score 0.3] [--synthetic 20000] [--output report.json]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import zlib
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ann_index import INDEX_TYPES
+from benchmark_rag_index import percentile
+from rag_system import RETRIEVAL_MODES, BarranaRAGSystem
+from rate_limiter import RateLimiter
+
+
+class HashingEmbeddingClient:
+    """
+    Deterministic offline embedder with the OpenAI client interface.
+
+    Words and word bigrams are hashed into a fixed number of dimensions, so
+    texts that share vocabulary are close. Good enough to compare index
+    configurations; absolute recall needs recorded API embeddings.
+    """
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+        self.embeddings = self
+
+    def embed(self, text: str, dimension: int) -> List[float]:
+        vector = np.zeros(dimension, dtype='float32')
+        words = [word.strip(".,!?:;'\"()") for word in text.lower().split()]
+        for term in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            if term:
+                vector[zlib.crc32(term.encode("utf-8")) % dimension] += 1.0
+        return vector.tolist()
+
+    def create(self, model: str, input: List[str], dimensions: Optional[int] = None, **kwargs):
+        return SimpleNamespace(data=[SimpleNamespace(embedding=self.embed(text, dimensions or self.dimension))
+                                     for text in input])
+
+
+class CachedEmbeddingClient:
+    """
+    Replays embeddings from a cache file, keyed by model, dimensions and text.
+
+    With a live client, misses are fetched from the API and added to the
+    cache (save() writes it); without one, a miss raises KeyError so an
+    offline run never silently changes what it measures.
+    """
+
+    def __init__(self, path: str, live_client: Any = None):
+        self.path = path
+        self.live_client = live_client
+        self.vectors = {}
+        if os.path.exists(path):
+            with np.load(path) as cached:
+                self.vectors = {key: cached[key] for key in cached.files}
+        self.misses = 0
+        self.embeddings = self
+
+    @staticmethod
+    def key(model: str, dimensions: Optional[int], text: str) -> str:
+        return hashlib.sha1(f"{model}|{dimensions or ''}|{text}".encode("utf-8")).hexdigest()
+
+    def create(self, model: str, input: List[str], dimensions: Optional[int] = None, **kwargs):
+        keys = [self.key(model, dimensions, text) for text in input]
+        missing = [text for key, text in zip(keys, input) if key not in self.vectors]
+        if missing:
+            if self.live_client is None:
+                raise KeyError(f"{len(missing)} texts are not in {self.path} - run once with --record")
+            self.misses += len(missing)
+            extra = {"dimensions": dimensions} if dimensions else {}
+            response = self.live_client.embeddings.create(model=model, input=missing, **extra)
+            for text, item in zip(missing, response.data):
+                self.vectors[self.key(model, dimensions, text)] = np.asarray(item.embedding, dtype='float32')
+        return SimpleNamespace(data=[SimpleNamespace(embedding=self.vectors[key]) for key in keys])
+
+    def save(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, staging = tempfile.mkstemp(suffix=".npz", dir=directory)
+        os.close(fd)
+        np.savez(staging, **self.vectors)
+        os.replace(staging, self.path)
+
+
+def load_eval_set(path: str) -> List[Dict[str, Any]]:
+    """
+    Read a labeled query set.
+
+    Args:
+        path: JSONL with {"query": ..., "relevant": [chunk ids]} per line
+
+    Returns:
+        Labeled queries
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        queries = [json.loads(line) for line in f if line.strip()]
+    for item in queries:
+        if not item.get("query") or not item.get("relevant"):
+            raise ValueError(f"Eval query needs 'query' and 'relevant': {item}")
+    return queries
+
+
+INDUSTRIES = ["dental clinic", "law firm", "school district", "bakery", "logistics company", "insurance broker",
+              "real estate agency", "accounting practice", "fitness studio", "manufacturing plant"]
+WORKFLOWS = ["invoice processing", "client onboarding", "appointment reminders", "payroll reporting",
+             "inventory forecasting", "lead scoring", "support ticket triage", "contract review",
+             "expense approvals", "shift scheduling", "quote generation", "compliance audits"]
+TOOLS = ["QuickBooks", "HubSpot", "Google Sheets", "Slack", "Salesforce", "Xero", "Zapier", "Airtable"]
+
+
+def synthetic_eval_set(n: int, queries: int = 200, seed: int = 7) -> tuple:
+    """
+    Generated case-study chunks and labeled queries.
+
+    Each chunk describes one industry, workflow and tool; a query names all
+    three and is relevant to every chunk with that combination.
+
+    Returns:
+        (chunks, labeled queries)
+    """
+    rng = np.random.default_rng(seed)
+    chunks, by_combo = [], {}
+    for i in range(n):
+        combo = (INDUSTRIES[i % len(INDUSTRIES)], WORKFLOWS[(i // len(INDUSTRIES)) % len(WORKFLOWS)],
+                 TOOLS[(i // (len(INDUSTRIES) * len(WORKFLOWS))) % len(TOOLS)])
+        industry, workflow, tool = combo
+        chunks.append({"id": f"case_{i}", "source": "Synthetic Case Studies", "source_title": "Case Studies",
+                       "section": industry.title(), "tags": ["case_study"],
+                       "text": f"A {industry} automated {workflow} with {tool}, saving {5 + i % 30} hours a week "
+                               f"for team {i % 17}."})
+        by_combo.setdefault(combo, []).append(f"case_{i}")
+    combos = list(by_combo)
+    labeled = [{"query": f"How was {workflow} automated for a {industry} using {tool}?",
+                "relevant": by_combo[(industry, workflow, tool)]}
+               for industry, workflow, tool in (combos[i] for i in rng.integers(0, len(combos), queries))]
+    return chunks, labeled
+
+
+def ranking_metrics(found: List[List[str]], relevant: List[List[str]], k: int) -> Dict[str, float]:
+    """
+    Recall@k, MRR and the empty-result rate of ranked chunk ids.
+
+    Recall@k counts relevant chunks in the top k out of min(k, |relevant|),
+    so a query with more relevant chunks than k can still score 1.
+    """
+    recalls, reciprocal_ranks = [], []
+    for ids, wanted in zip(found, relevant):
+        wanted = set(wanted)
+        top = ids[:k]
+        recalls.append(len(wanted.intersection(top)) / min(k, len(wanted)))
+        rank = next((i + 1 for i, chunk_id in enumerate(top) if chunk_id in wanted), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+    return {
+        f"recall@{k}": float(np.mean(recalls)) if recalls else 0.0,
+        "mrr": float(np.mean(reciprocal_ranks)) if reciprocal_ranks else 0.0,
+        "empty_rate": float(np.mean([not ids for ids in found])) if found else 0.0,
+    }
+
+
+def evaluate(corpus_path: str, eval_set: List[Dict[str, Any]], client: Any, index_type: str = "flat",
+             mode: str = "vector", top_k: int = 3, min_score: float = 0.3,
+             embedding_model: str = "text-embedding-3-large",
+             index_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Build a RAG system for one configuration and evaluate the labeled queries.
+
+    Query embeddings are computed before timing, so latency is retrieval
+    only (index search, lexical scoring, fusion and filtering).
+
+    Args:
+        corpus_path: JSONL corpus
+        eval_set: Labeled queries
+        client: Embedding client (HashingEmbeddingClient or CachedEmbeddingClient)
+        index_type: One of INDEX_TYPES
+        mode: One of RETRIEVAL_MODES
+        top_k: Results per query
+        min_score: Minimum similarity score (vector results)
+        embedding_model: Embedding model name (part of the cache key)
+        index_params: Index parameter overrides
+
+    Returns:
+        Metrics, latency and memory for the configuration
+    """
+    with tempfile.TemporaryDirectory() as artifacts:
+        rag = BarranaRAGSystem(corpus_path=corpus_path, embedding_model=embedding_model, artifact_dir=artifacts,
+                               index_type=index_type, index_params=index_params, retrieval_mode=mode)
+        rag.client = client
+        rag.embedding_rate_limiter = RateLimiter(0)
+        start = time.perf_counter()
+        if not rag.initialize():
+            raise RuntimeError(f"Could not build the {index_type} index for {corpus_path}")
+        build_seconds = time.perf_counter() - start
+
+        queries = [item["query"] for item in eval_set]
+        if mode != "lexical":
+            rag.embed_queries(queries)
+        found, latencies = [], []
+        for query in queries:
+            start = time.perf_counter()
+            results = rag.retrieve(query, top_k=top_k, min_score=min_score, mode=mode)
+            latencies.append(time.perf_counter() - start)
+            found.append([chunk["id"] for chunk in results])
+
+        stats = rag.get_stats()
+        storage = stats["embedding_storage"]
+        report = {
+            "index": index_type,
+            "effective_index": (stats["index"] or {}).get("type", index_type),
+            "mode": mode,
+            "chunks": stats["chunks_count"],
+            "queries": len(queries),
+            "top_k": top_k,
+            "min_score": min_score,
+            "build_seconds": round(build_seconds, 3),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "index_bytes": storage.get("index_bytes_estimate", 0),
+            "embeddings_resident_bytes": storage.get("embeddings_resident_bytes", 0),
+            "corpus_bytes": stats["corpus_store"]["bytes"] if stats["corpus_store"] else 0,
+        }
+        report.update({key: round(value, 4) for key, value in
+                       ranking_metrics(found, [item["relevant"] for item in eval_set], top_k).items()})
+        report["misses"] = [item["query"] for item, ids in zip(eval_set, found)
+                            if not set(item["relevant"]).intersection(ids)]
+        rag.stop_corpus_watch()
+        return report
+
+
+def run(corpus_path: str, eval_set: List[Dict[str, Any]], client: Any, configs: List[str], modes: List[str],
+        top_k: int = 3, min_score: float = 0.3, embedding_model: str = "text-embedding-3-large") -> List[Dict[str, Any]]:
+    """Evaluate every index configuration; the lexical mode doesn't use the index, so it runs once"""
+    reports = []
+    for mode in modes:
+        for index_type in (configs[:1] if mode == "lexical" else configs):
+            reports.append(evaluate(corpus_path, eval_set, client, index_type, mode, top_k, min_score,
+                                    embedding_model))
+    return reports
+
+
+def print_reports(reports: List[Dict[str, Any]], label: str) -> None:
+    if not reports:
+        return
+    k = reports[0]["top_k"]
+    print(f"\n📊 {label}: {reports[0]['chunks']:,} chunks, {reports[0]['queries']} queries, "
+          f"top_k={k}, min_score={reports[0]['min_score']}")
+    print(f"   {'index':<16} {'mode':<8} {'recall@' + str(k):>9} {'MRR':>6} {'empty':>6} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'index MB':>9} {'corpus MB':>10} {'build s':>8}")
+    for report in reports:
+        index = report["index"]
+        if report["effective_index"] != index:
+            index += f" ({report['effective_index']})"
+        if report["mode"] == "lexical":
+            index = "-"
+        print(f"   {index:<16} {report['mode']:<8} {report[f'recall@{k}']:9.3f} {report['mrr']:6.3f} "
+              f"{report['empty_rate']:6.1%} {report['p50_ms']:8.3f} {report['p99_ms']:8.3f} "
+              f"{report['index_bytes'] / 1e6:9.2f} {report['corpus_bytes'] / 1e6:10.2f} {report['build_seconds']:8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline RAG retrieval evaluation and latency benchmark")
+    parser.add_argument("--corpus", default="barrana_rag_corpus.jsonl", help="JSONL corpus")
+    parser.add_argument("--eval-set", default="barrana_rag_eval.jsonl", help="Labeled queries (JSONL)")
+    parser.add_argument("--synthetic", type=int, default=0, help="Evaluate a generated corpus of this many chunks instead")
+    parser.add_argument("--embeddings", choices=("hash", "cache"), default="hash",
+                        help="hash: offline hashing embedder; cache: embeddings recorded with --record")
+    parser.add_argument("--cache", default="rag_eval_embeddings.npz", help="Embedding cache file")
+    parser.add_argument("--record", action="store_true", help="Fetch cache misses from the OpenAI API and save them")
+    parser.add_argument("--model", default="text-embedding-3-large", help="Embedding model")
+    parser.add_argument("--configs", default="flat,sq8,hnsw,ivf_flat", help="Comma-separated index types")
+    parser.add_argument("--modes", default=",".join(RETRIEVAL_MODES), help="Comma-separated retrieval modes")
+    parser.add_argument("--top-k", type=int, default=3, help="Results per query (recall@k)")
+    parser.add_argument("--min-score", type=float, default=0.3, help="Minimum similarity score")
+    parser.add_argument("--output", default=None, help="Write the reports as JSON here")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    configs = [config for config in args.configs.split(",") if config]
+    modes = [mode for mode in args.modes.split(",") if mode]
+    for config in configs:
+        if config not in INDEX_TYPES:
+            parser.error(f"unknown index type: {config}")
+    for mode in modes:
+        if mode not in RETRIEVAL_MODES:
+            parser.error(f"unknown retrieval mode: {mode}")
+
+    if args.record:
+        from dotenv import load_dotenv
+        from openai import OpenAI
+        load_dotenv()
+        client = CachedEmbeddingClient(args.cache, live_client=OpenAI())
+    else:
+        # The RAG system builds an OpenAI client it never uses offline
+        os.environ.setdefault("OPENAI_API_KEY", "offline")
+        client = CachedEmbeddingClient(args.cache) if args.embeddings == "cache" else HashingEmbeddingClient()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.synthetic:
+            chunks, eval_set = synthetic_eval_set(args.synthetic)
+            corpus_path = os.path.join(tmp, "synthetic_corpus.jsonl")
+            with open(corpus_path, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(chunk) + "\n" for chunk in chunks)
+            label = f"synthetic corpus ({args.embeddings} embeddings)"
+        else:
+            corpus_path = args.corpus
+            eval_set = load_eval_set(args.eval_set)
+            label = f"{args.corpus} ({args.embeddings} embeddings)"
+        reports = run(corpus_path, eval_set, client, configs, modes, args.top_k, args.min_score, args.model)
+
+    if args.record:
+        client.save()
+        print(f"💾 Cached {client.misses} new embeddings in {args.cache}")
+    print_reports(reports, label)
+    for report in reports:
+        if report["misses"]:
+            print(f"   ⚠️ {report['index']}/{report['mode']} missed: {'; '.join(report['misses'][:5])}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Ingest a folder of documents into the RAG corpus
+
+Extracts sections from .docx, .md and .txt files, splits them into
+token-bounded chunks with overlap, and writes the JSONL corpus plus the
+manifest. Extraction and chunking run in a process pool; --embed then
+builds the RAG artifacts, embedding only new or changed chunks in
+concurrent, rate-limited batches (RAG_EMBED_CONCURRENCY, RAG_EMBED_RPM).
+
+Usage:
+    python rag_ingest.py SOURCE_DIR [--output barrana_rag_corpus.jsonl]
+                         [--manifest barrana_rag_manifest.json] [--max-tokens 350]
+                         [--overlap 50] [--workers N] [--embed]
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import time
+import zipfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Tuple
+from xml.etree import ElementTree
+
+from bm25_index import tokenize
+from context_packer import count_tokens
+from corpus_dedup import DEFAULT_THRESHOLD, dedup_report, deduplicate_positions
+
+SUPPORTED_EXTENSIONS = (".docx", ".md", ".txt")
+DEFAULT_SECTION = "Introduction"
+
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+DC_TITLE = "{http://purl.org/dc/elements/1.1/}title"
+HEADING_STYLE = re.compile(r"^(title|heading\d*)$", re.IGNORECASE)
+MARKDOWN_HEADING = re.compile(r"^#{1,6}\s+(.*?)\s*#*\s*$")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+
+def slugify(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_") or "untitled"
+
+
+def _docx_sections(path: str) -> Tuple[str, List[Tuple[str, List[str]]]]:
+    """(document title, [(section title, paragraphs)]) from a .docx file, headings starting sections"""
+    with zipfile.ZipFile(path) as archive:
+        body = ElementTree.fromstring(archive.read("word/document.xml"))
+        title = None
+        if "docProps/core.xml" in archive.namelist():
+            title = ElementTree.fromstring(archive.read("docProps/core.xml")).findtext(DC_TITLE)
+
+    paragraphs = []
+    for paragraph in body.iter(f"{WORD_NS}p"):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f"{WORD_NS}t" and node.text:
+                parts.append(node.text)
+            elif node.tag in (f"{WORD_NS}tab", f"{WORD_NS}br"):
+                parts.append(" ")
+        text = re.sub(r"\s+", " ", "".join(parts)).strip()
+        style = paragraph.find(f"{WORD_NS}pPr/{WORD_NS}pStyle")
+        is_heading = style is not None and HEADING_STYLE.match(style.get(f"{WORD_NS}val", ""))
+        if text:
+            paragraphs.append((text, bool(is_heading)))
+    return title, _group_sections(paragraphs)
+
+
+def _text_sections(path: str) -> Tuple[str, List[Tuple[str, List[str]]]]:
+    """Sections of a Markdown or plain-text file; paragraphs are separated by blank lines"""
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    markdown = path.lower().endswith(".md")
+    paragraphs, buffer = [], []
+    for line in content.splitlines() + [""]:
+        heading = MARKDOWN_HEADING.match(line) if markdown else None
+        if heading or not line.strip():
+            if buffer:
+                paragraphs.append((" ".join(buffer), False))
+                buffer = []
+            if heading:
+                paragraphs.append((heading.group(1), True))
+        else:
+            buffer.append(line.strip())
+    return None, _group_sections(paragraphs)
+
+
+def _group_sections(paragraphs: List[Tuple[str, bool]]) -> List[Tuple[str, List[str]]]:
+    sections = []
+    for text, is_heading in paragraphs:
+        if is_heading:
+            sections.append((text, []))
+        else:
+            if not sections:
+                sections.append((DEFAULT_SECTION, []))
+            sections[-1][1].append(text)
+    return [(title, body) for title, body in sections if body]
+
+
+def extract_sections(path: str) -> Tuple[str, List[Tuple[str, List[str]]]]:
+    """
+    Extract sections from a document.
+
+    Args:
+        path: .docx, .md or .txt file
+
+    Returns:
+        (document title or None, list of (section title, paragraphs))
+    """
+    if path.lower().endswith(".docx"):
+        return _docx_sections(path)
+    return _text_sections(path)
+
+
+def _units(paragraphs: List[str], max_tokens: int) -> List[Tuple[str, int, bool]]:
+    """(text, tokens, starts_paragraph) units: whole paragraphs, or sentences/word windows of long ones"""
+    units = []
+    for paragraph in paragraphs:
+        tokens = count_tokens(paragraph)
+        if tokens <= max_tokens:
+            units.append((paragraph, tokens, True))
+            continue
+        first = True
+        for sentence in SENTENCE_PATTERN.split(paragraph):
+            pieces = [sentence]
+            if count_tokens(sentence) > max_tokens:
+                words = sentence.split()
+                step = max(1, int(max_tokens * 0.7))
+                pieces = [" ".join(words[i:i + step]) for i in range(0, len(words), step)]
+            for piece in pieces:
+                units.append((piece, count_tokens(piece), first))
+                first = False
+    return units
+
+
+def chunk_paragraphs(paragraphs: List[str], max_tokens: int = 350, overlap_tokens: int = 50) -> List[str]:
+    """
+    Split a section into chunks of at most `max_tokens` tokens.
+
+    Paragraphs are kept whole when they fit; longer ones are split at
+    sentence boundaries. Each chunk after the first repeats up to
+    `overlap_tokens` of trailing text from the previous chunk.
+
+    Args:
+        paragraphs: Section paragraphs in order
+        max_tokens: Maximum tokens per chunk
+        overlap_tokens: Tokens of context carried into the next chunk
+
+    Returns:
+        Chunk texts
+    """
+    chunks, current, used = [], [], 0
+    for unit in _units(paragraphs, max_tokens):
+        text, tokens, _ = unit
+        if current and used + tokens > max_tokens:
+            chunks.append(_join(current))
+            # Carry the trailing units that fit in the overlap budget
+            carried, carried_tokens = [], 0
+            for previous in reversed(current):
+                if carried_tokens + previous[1] > overlap_tokens or carried_tokens + previous[1] + tokens > max_tokens:
+                    break
+                carried.insert(0, previous)
+                carried_tokens += previous[1]
+            current, used = carried, carried_tokens
+        current.append(unit)
+        used += tokens
+    if current:
+        chunks.append(_join(current))
+    return chunks
+
+
+def _join(units: List[Tuple[str, int, bool]]) -> str:
+    text = ""
+    for piece, _, starts_paragraph in units:
+        text += (("\n" if starts_paragraph else " ") if text else "") + piece
+    return text
+
+
+def _tags(text: str, count: int = 3) -> List[str]:
+    terms = Counter(token for token in tokenize(text) if len(token) > 3 and not token.isdigit())
+    return [term for term, _ in terms.most_common(count)]
+
+
+def process_document(path: str, max_tokens: int = 350, overlap_tokens: int = 50,
+                     root: str = None) -> Dict[str, Any]:
+    """
+    Extract and chunk one document (runs in a worker process).
+
+    Chunk ids are built from the document's path relative to `root` and the
+    section's position in the document, so repeated headings and same-named
+    files in different folders get distinct ids.
+
+    Returns:
+        Dictionary with the relative file path, sections (paragraph counts and chunks) and any error
+    """
+    filename = os.path.relpath(path, root) if root else os.path.basename(path)
+    name = os.path.splitext(os.path.basename(path))[0]
+    try:
+        title, sections = extract_sections(path)
+        document = {"file": filename, "name": name, "title": title or name, "sections": [], "error": None}
+        doc_slug = slugify(os.path.splitext(filename)[0])
+        for section_number, (section_title, paragraphs) in enumerate(sections, 1):
+            section_slug = slugify(section_title)
+            chunks = []
+            for chunk_index, text in enumerate(chunk_paragraphs(paragraphs, max_tokens, overlap_tokens), 1):
+                chunks.append({
+                    "id": f"{doc_slug}_{section_number}_{section_slug}_{chunk_index}",
+                    "source": name,
+                    "source_title": title or name,
+                    "section": section_title,
+                    "chunk_index": chunk_index,
+                    "text": text,
+                    "word_count": len(text.split()),
+                    "tags": _tags(text),
+                })
+            document["sections"].append({"title": section_title, "paragraphs": len(paragraphs), "chunks": chunks})
+        return document
+    except Exception as e:
+        return {"file": filename, "name": name, "title": name, "sections": [], "error": str(e)}
+
+
+def build_manifest(documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Manifest in the barrana_rag_manifest.json layout"""
+    manifest = {"sources": {}, "sections": {}, "total_chunks": 0}
+    for document in documents:
+        source = {"name": document["name"], "sections": {}, "paragraphs": 0, "chunks": 0}
+        for section in document["sections"]:
+            chunks = len(section["chunks"])
+            entry = source["sections"].setdefault(section["title"], {"paragraphs": 0, "chunks": 0})
+            entry["paragraphs"] += section["paragraphs"]
+            entry["chunks"] += chunks
+            source["paragraphs"] += section["paragraphs"]
+            source["chunks"] += chunks
+            manifest["sections"][section["title"]] = manifest["sections"].get(section["title"], 0) + chunks
+        manifest["sources"][document["file"]] = source
+        manifest["total_chunks"] += source["chunks"]
+    return manifest
+
+
+def write_atomic(path: str, write) -> None:
+    """Write through a temporary file so readers (e.g. the corpus watcher) never see a partial file"""
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, staging = tempfile.mkstemp(prefix=".ingest-", dir=directory)
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8") as f:
+            write(f)
+        os.chmod(staging, 0o644)
+        os.replace(staging, path)
+    except Exception:
+        os.unlink(staging)
+        raise
+
+
+def ingest_directory(source_dir: str, output: str, manifest_path: str, max_tokens: int = 350,
+                     overlap_tokens: int = 50, workers: int = None,
+                     dedup_threshold: float = DEFAULT_THRESHOLD) -> Dict[str, Any]:
+    """
+    Extract, chunk and write a folder of documents.
+
+    Args:
+        source_dir: Folder searched recursively for supported documents
+        output: JSONL corpus to write
+        manifest_path: Manifest to write
+        max_tokens: Maximum tokens per chunk
+        overlap_tokens: Overlap between consecutive chunks of a section
+        workers: Worker processes (default: CPU count)
+        dedup_threshold: Similarity at which chunks count as near-duplicates (0 disables deduplication)
+
+    Returns:
+        The manifest, plus 'errors' for documents that failed
+
+    Raises:
+        FileNotFoundError: If the folder has no supported documents
+        ValueError: If two chunks get the same id (paths that differ only in punctuation)
+    """
+    paths = sorted(
+        os.path.join(root, filename)
+        for root, _, filenames in os.walk(source_dir)
+        for filename in filenames
+        if filename.lower().endswith(SUPPORTED_EXTENSIONS) and not filename.startswith(("~$", "."))
+    )
+    if not paths:
+        raise FileNotFoundError(f"No {', '.join(SUPPORTED_EXTENSIONS)} documents found in {source_dir}")
+
+    start = time.perf_counter()
+    process = partial(process_document, max_tokens=max_tokens, overlap_tokens=overlap_tokens, root=source_dir)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        documents = [process(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            documents = list(pool.map(process, paths, chunksize=max(1, len(paths) // (workers * 4))))
+
+    errors = {}
+    for document in documents:
+        if document["error"]:
+            errors[document["file"]] = document["error"]
+            logging.error(f"❌ Could not ingest {document['file']}: {document['error']}")
+    documents = [document for document in documents if not document["error"]]
+
+    chunks = [chunk for document in documents for section in document["sections"] for chunk in section["chunks"]]
+    duplicate_ids = sorted(chunk_id for chunk_id, count in Counter(chunk["id"] for chunk in chunks).items() if count > 1)
+    if duplicate_ids:
+        raise ValueError(f"Duplicate chunk ids (rename the documents): {', '.join(duplicate_ids[:10])}")
+
+    deduplication = None
+    if dedup_threshold:
+        positions, report = deduplicate_positions(chunks, dedup_threshold)
+        deduplication = dedup_report(chunks, [chunk for chunk in positions if chunk is not None], report)
+        # Canonical chunks stay in their sections with merged provenance; duplicates are dropped
+        position = iter(positions)
+        for document in documents:
+            for section in document["sections"]:
+                section["chunks"] = [kept for kept in (next(position) for _ in section["chunks"]) if kept is not None]
+        logging.info(f"🔧 Removed {report['removed_chunks']} near-duplicate chunks "
+                     f"({len(report['clusters'])} clusters)")
+
+    def write_corpus(f):
+        for document in documents:
+            for section in document["sections"]:
+                for chunk in section["chunks"]:
+                    f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+
+    manifest = build_manifest(documents)
+    if deduplication:
+        manifest["deduplication"] = deduplication
+    write_atomic(output, write_corpus)
+    write_atomic(manifest_path, lambda f: json.dump(manifest, f, indent=2, ensure_ascii=False))
+    logging.info(f"✅ Ingested {len(documents)} documents into {manifest['total_chunks']} chunks "
+                 f"in {time.perf_counter() - start:.1f}s")
+    return dict(manifest, errors=errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest documents into the RAG corpus")
+    parser.add_argument("source_dir", help="Folder of .docx, .md and .txt documents")
+    parser.add_argument("--output", default="barrana_rag_corpus.jsonl", help="JSONL corpus to write")
+    parser.add_argument("--manifest", default="barrana_rag_manifest.json", help="Manifest to write")
+    parser.add_argument("--max-tokens", type=int, default=350, help="Maximum tokens per chunk")
+    parser.add_argument("--overlap", type=int, default=50, help="Tokens of overlap between consecutive chunks")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--dedup-threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Near-duplicate similarity threshold (0 keeps every chunk)")
+    parser.add_argument("--embed", action="store_true", help="Build RAG artifacts for the new corpus")
+    parser.add_argument("--model", default="text-embedding-3-large", help="OpenAI embedding model (with --embed)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    try:
+        manifest = ingest_directory(args.source_dir, args.output, args.manifest, args.max_tokens,
+                                    args.overlap, args.workers, args.dedup_threshold)
+    except Exception as e:
+        print(f"❌ Ingestion failed: {e}")
+        return 1
+    print(f"✅ Wrote {manifest['total_chunks']} chunks from {len(manifest['sources'])} documents to {args.output}")
+    if manifest.get("deduplication"):
+        dedup = manifest["deduplication"]
+        print(f"🔧 Removed {dedup['removed_chunks']} near-duplicates; redundant top-5 results "
+              f"{dedup['redundant_top_k_before']:.1%} -> {dedup['redundant_top_k_after']:.1%}")
+    if manifest["errors"]:
+        print(f"⚠️ {len(manifest['errors'])} documents failed: {', '.join(manifest['errors'])}")
+
+    if args.embed:
+        from dotenv import load_dotenv
+        from rag_system import BarranaRAGSystem
+
+        load_dotenv()
+        rag_system = BarranaRAGSystem(corpus_path=args.output, embedding_model=args.model)
+        if not rag_system.initialize() or not rag_system.get_stats()["vector_index_ready"]:
+            print("❌ Failed to build RAG artifacts")
+            return 1
+        stats = rag_system.get_stats()
+        print(f"✅ RAG artifacts ready: {stats['fingerprint']} - {stats['index_size']} vectors")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
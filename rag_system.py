@@ -1,10 +1,79 @@
+import copy
 import json
 import os
 import logging
+import hashlib
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
 import numpy as np
 import faiss
 from typing import List, Dict, Any, Optional
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from openai import OpenAI, RateLimitError
+
+from ann_index import (apply_search_params, build_ann_index, estimate_index_bytes, is_memory_mapped, read_index,
+                       resolve_params, search_parameters, supports_removal, write_index)
+from bm25_index import BM25Index, reciprocal_rank_fusion
+from corpus_store import CorpusStore
+from context_packer import ContextPacker, count_tokens, format_chunk
+from metadata_filter import MetadataIndex
+from provenance import ProvenanceIndex, summarize_provenance
+from query_batcher import MicroBatcher
+from query_cache import QueryEmbeddingCache, normalize_query
+from rate_limiter import RateLimiter
+
+try:
+    import fcntl
+except ImportError:  # Windows: builds are not coordinated across processes
+    fcntl = None
+
+
+def chunk_faiss_id(chunk_key: str) -> int:
+    """Stable int64 FAISS id derived from a chunk's corpus id"""
+    digest = hashlib.blake2b(chunk_key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") & 0x7FFFFFFFFFFFFFFF
+
+
+def chunk_text_hash(text: str) -> str:
+    """Content hash used to detect changed chunks"""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+RETRIEVAL_MODES = ("vector", "lexical", "hybrid")
+
+
+class RAGSnapshot:
+    """
+    One published corpus version: chunks, index and their stats.
+    
+    Snapshots are never modified after publication; a reload builds a new one
+    and swaps it in, so retrievals that already hold a snapshot keep using it.
+    """
+    
+    def __init__(self, chunks: CorpusStore, chunk_keys: List[str], embeddings: np.ndarray, index,
+                 fingerprint: Optional[str], version: int, loaded_from_artifacts: bool,
+                 last_update: Optional[Dict[str, Any]], index_config: Optional[Dict[str, Any]] = None):
+        self.chunks = chunks
+        self.chunk_keys = chunk_keys
+        self.embeddings = embeddings
+        self.index = index
+        faiss_ids = [chunk_faiss_id(key) for key in chunk_keys]
+        self.id_to_pos = {faiss_id: pos for pos, faiss_id in enumerate(faiss_ids)}
+        self.metadata = MetadataIndex(chunks, np.array(faiss_ids, dtype='int64'))
+        self.lexical = BM25Index(chunks)
+        self.provenance = ProvenanceIndex(chunks)
+        self.token_counts = np.array([count_tokens(format_chunk(chunk)) for chunk in chunks], dtype='int32')
+        self.fingerprint = fingerprint
+        self.version = version
+        self.loaded_from_artifacts = loaded_from_artifacts
+        self.last_update = last_update
+        self.index_config = index_config
+        self.swapped_at = datetime.now().isoformat()
+
 
 class BarranaRAGSystem:
     """
@@ -15,20 +84,90 @@ class BarranaRAGSystem:
     """
     
     def __init__(self, corpus_path: str = "barrana_rag_corpus.jsonl", 
-                 embedding_model: str = "text-embedding-3-large"):
+                 embedding_model: str = "text-embedding-3-large",
+                 artifact_dir: Optional[str] = None,
+                 query_cache: Optional[QueryEmbeddingCache] = None,
+                 index_type: Optional[str] = None,
+                 index_params: Optional[Dict[str, Any]] = None,
+                 embedding_dimensions: Optional[int] = None,
+                 embedding_dtype: Optional[str] = None,
+                 retrieval_mode: Optional[str] = None):
         """
         Initialize the RAG system.
         
         Args:
             corpus_path: Path to the JSONL corpus file
             embedding_model: OpenAI embedding model to use
+            artifact_dir: Directory for persisted embeddings and FAISS indices
+            query_cache: Query-embedding cache (default: a new LRU sized by RAG_QUERY_CACHE_SIZE)
+            index_type: ANN index type: flat, hnsw, ivf_flat or ivf_pq (default: RAG_INDEX_TYPE or flat)
+            index_params: Index parameters, see ann_index.DEFAULT_INDEX_PARAMS (default: RAG_INDEX_PARAMS JSON)
+            embedding_dimensions: Reduced embedding size to request from the API (default: RAG_EMBEDDING_DIMENSIONS or full)
+            embedding_dtype: Storage type of the embeddings matrix, float32 or float16 (default: RAG_EMBEDDING_DTYPE or float32)
+            retrieval_mode: vector, lexical (BM25, no network) or hybrid (fused with RRF) (default: RAG_RETRIEVAL_MODE or hybrid)
         """
         self.corpus_path = corpus_path
         self.embedding_model = embedding_model
+        self.embedding_dimensions = embedding_dimensions or int(os.environ.get("RAG_EMBEDDING_DIMENSIONS", "0")) or None
+        self.embedding_dtype = np.dtype(embedding_dtype or os.environ.get("RAG_EMBEDDING_DTYPE", "float32"))
+        if self.embedding_dtype not in (np.float32, np.float16):
+            raise ValueError(f"Unsupported embedding dtype: {self.embedding_dtype}")
+        self.retrieval_mode = retrieval_mode or os.environ.get("RAG_RETRIEVAL_MODE", "hybrid")
+        if self.retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {self.retrieval_mode}")
+        self.query_timeout = float(os.environ.get("RAG_QUERY_TIMEOUT", "10"))
+        self.vector_retry_interval = 60.0
+        self._next_vector_retry = 0.0
+        self.retrieval_stats = {"vector": 0, "lexical": 0, "hybrid": 0, "lexical_fallbacks": 0}
+        self.context_packer = ContextPacker()
+        self.packing_stats = {"packed": 0, "candidate_tokens": 0, "context_tokens": 0}
+        self.artifact_dir = artifact_dir or os.environ.get("RAG_ARTIFACT_DIR", "rag_artifacts")
+        
+        # Working state of the current build; readers only use the published snapshot
         self.chunks = []
+        self.chunk_keys = []
+        self.chunk_hashes = []
         self.embeddings = None
         self.index = None
-        self.is_loaded = False
+        self.fingerprint = None
+        self.loaded_from_artifacts = False
+        self.last_update = None
+        self._id_to_pos = {}
+        self.index_type = index_type or os.environ.get("RAG_INDEX_TYPE", "flat")
+        self.index_params = dict(index_params or json.loads(os.environ.get("RAG_INDEX_PARAMS") or "{}"))
+        self.index_config = None
+        self.keep_artifacts = 3
+        self.incremental = True
+        # Serve the saved index memory-mapped, so all worker processes share one copy
+        self.index_mmap = os.environ.get("RAG_INDEX_MMAP", "1") != "0"
+        
+        # Corpus embedding: concurrent batches under a shared request rate limit
+        self.embedding_concurrency = max(1, int(os.environ.get("RAG_EMBED_CONCURRENCY", "4")))
+        self.embedding_rate_limiter = RateLimiter(float(os.environ.get("RAG_EMBED_RPM", "500")),
+                                                  burst=self.embedding_concurrency)
+        self.embedding_retries = 3
+        
+        self.query_cache = query_cache or QueryEmbeddingCache(
+            max_entries=int(os.environ.get("RAG_QUERY_CACHE_SIZE", "2048"))
+        )
+        
+        # Micro-batching of concurrent retrievals (off unless RAG_BATCH_WINDOW_MS > 0)
+        self.query_batcher = None
+        batch_window_ms = float(os.environ.get("RAG_BATCH_WINDOW_MS", "0"))
+        if batch_window_ms > 0:
+            self.enable_query_batching(batch_window_ms, int(os.environ.get("RAG_BATCH_MAX", "32")))
+        
+        # Published snapshot and reload bookkeeping
+        self.snapshot = None
+        self.version = 0
+        self.last_reload_error = None
+        self._build_lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._reload_thread = None
+        self._reload_pending = False
+        self._reload_guard = threading.Lock()
+        self._watch_thread = None
+        self._watch_stop = threading.Event()
         
         # Initialize OpenAI client
         self.client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
@@ -37,7 +176,10 @@ class BarranaRAGSystem:
     
     def load_corpus(self) -> bool:
         """
-        Load chunks from JSONL corpus file.
+        Load chunks from JSONL corpus file into a columnar store.
+        
+        If saved artifacts exist for the file's fingerprint, their corpus
+        columns are memory-mapped instead of parsing the JSONL again.
         
         Returns:
             bool: True if successful, False otherwise
@@ -47,25 +189,94 @@ class BarranaRAGSystem:
                 logging.warning(f"⚠️ Corpus file not found: {self.corpus_path}")
                 return False
             
-            self.chunks = []
-            with open(self.corpus_path, 'r', encoding='utf-8') as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-                    if line:
-                        try:
-                            chunk = json.loads(line)
-                            self.chunks.append(chunk)
-                        except json.JSONDecodeError as e:
-                            logging.error(f"❌ JSON decode error on line {line_num}: {e}")
-                            continue
-            
-            logging.info(f"✅ Loaded {len(self.chunks)} chunks from corpus")
+            self.fingerprint = self.compute_fingerprint()
+            self.chunks = None
+            saved = os.path.join(self._artifact_path(self.fingerprint), "corpus")
+            if os.path.isdir(saved):
+                try:
+                    self.chunks = CorpusStore.open(saved, mmap=True)
+                except Exception as e:
+                    logging.warning(f"⚠️ Could not open saved corpus columns at {saved}: {e}")
+            if self.chunks is None:
+                self.chunks = CorpusStore.from_jsonl(self.corpus_path)
+            
+            self.chunk_keys = self._chunk_keys(self.chunks)
+            self.chunk_hashes = self.chunk_hashes_of(self.chunks)
+            
+            logging.info(f"✅ Loaded {len(self.chunks)} chunks from corpus"
+                         f"{' (memory-mapped)' if self.chunks.memory_mapped else ''}")
             return True
             
         except Exception as e:
             logging.error(f"❌ Error loading corpus: {e}")
             return False
     
+    def _chunk_keys(self, chunks: List[Dict]) -> List[str]:
+        """Unique key per chunk: its corpus id, disambiguated if an id repeats"""
+        keys = []
+        seen = {}
+        for position, chunk in enumerate(chunks):
+            key = str(chunk.get('id') or f"chunk_{position}")
+            if key in seen:
+                seen[key] += 1
+                logging.warning(f"⚠️ Duplicate chunk id in corpus: {key}")
+                key = f"{key}#{seen[key]}"
+            else:
+                seen[key] = 0
+            keys.append(key)
+        return keys
+    
+    @property
+    def embedding_key(self) -> str:
+        """Model name plus requested dimensions; vectors are only comparable under the same key"""
+        if self.embedding_dimensions:
+            return f"{self.embedding_model}@{self.embedding_dimensions}"
+        return self.embedding_model
+    
+    def _create_embeddings(self, texts: List[str], timeout: Optional[float] = None) -> np.ndarray:
+        """One embeddings API request, returned as normalized float32 vectors"""
+        kwargs = {"dimensions": self.embedding_dimensions} if self.embedding_dimensions else {}
+        if timeout:
+            kwargs["timeout"] = timeout
+        response = self.client.embeddings.create(model=self.embedding_model, input=texts, **kwargs)
+        return self._normalized(np.array([data.embedding for data in response.data], dtype='float32'))
+    
+    def _embed_texts(self, texts: List[str], batch_size: int = 100) -> np.ndarray:
+        """
+        Embed texts in concurrent, rate-limited batches.
+        
+        Up to `embedding_concurrency` batches are in flight; every request
+        first takes a slot from the shared rate limiter, and rate-limit
+        errors are retried with exponential backoff.
+        
+        Returns:
+            Normalized vectors in the storage dtype, in input order
+        """
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        if not batches:
+            return np.empty((0, 0), dtype=self.embedding_dtype)
+        
+        def embed_batch(number: int, batch: List[str]) -> np.ndarray:
+            for attempt in range(self.embedding_retries + 1):
+                self.embedding_rate_limiter.acquire()
+                try:
+                    logging.info(f"🔄 Processing batch {number}/{len(batches)}")
+                    return self._create_embeddings(batch).astype(self.embedding_dtype)
+                except RateLimitError:
+                    if attempt == self.embedding_retries:
+                        raise
+                    logging.warning(f"⚠️ Embeddings rate limited, retrying batch {number} in {2 ** attempt}s")
+                    time.sleep(2 ** attempt)
+        
+        workers = min(self.embedding_concurrency, len(batches))
+        if workers == 1:
+            all_embeddings = [embed_batch(number, batch) for number, batch in enumerate(batches, 1)]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rag-embed") as pool:
+                all_embeddings = list(pool.map(embed_batch, range(1, len(batches) + 1), batches))
+        
+        return np.concatenate(all_embeddings)
+    
     def generate_embeddings(self) -> bool:
         """
         Generate embeddings for all chunks.
@@ -82,24 +293,8 @@ class BarranaRAGSystem:
             
             # Extract texts for embedding
             texts = [chunk['text'] for chunk in self.chunks]
+            self.embeddings = self._embed_texts(texts)
             
-            # Generate embeddings in batches to avoid rate limits
-            batch_size = 100
-            all_embeddings = []
-            
-            for i in range(0, len(texts), batch_size):
-                batch_texts = texts[i:i + batch_size]
-                logging.info(f"🔄 Processing batch {i//batch_size + 1}/{(len(texts)-1)//batch_size + 1}")
-                
-                response = self.client.embeddings.create(
-                    model=self.embedding_model,
-                    input=batch_texts
-                )
-                
-                batch_embeddings = [data.embedding for data in response.data]
-                all_embeddings.extend(batch_embeddings)
-            
-            self.embeddings = np.array(all_embeddings)
             logging.info(f"✅ Generated embeddings: {self.embeddings.shape}")
             return True
             
@@ -107,6 +302,13 @@ class BarranaRAGSystem:
             logging.error(f"❌ Error generating embeddings: {e}")
             return False
     
+    @staticmethod
+    def _normalized(embeddings: np.ndarray) -> np.ndarray:
+        """float32 copy of embeddings normalized for cosine similarity (stored matrices may be float16)"""
+        normalized = np.array(embeddings, dtype='float32')
+        faiss.normalize_L2(normalized)
+        return normalized
+    
     def build_index(self) -> bool:
         """
         Build FAISS index for similarity search.
@@ -119,120 +321,734 @@ class BarranaRAGSystem:
                 logging.error("❌ No embeddings available. Call generate_embeddings() first.")
                 return False
             
-            dimension = self.embeddings.shape[1]
-            self.index = faiss.IndexFlatIP(dimension)  # Inner product for cosine similarity
-            
-            # Normalize embeddings for cosine similarity
-            embeddings_normalized = self.embeddings.astype('float32')
-            faiss.normalize_L2(embeddings_normalized)
-            self.index.add(embeddings_normalized)
+            # Inner product on normalized vectors (cosine similarity); ID-mapped so chunks can be replaced in place
+            params = resolve_params(self.index_type, self.index_params, len(self.chunks), self.embeddings.shape[1])
+            ids = np.array([chunk_faiss_id(key) for key in self.chunk_keys], dtype='int64')
+            self.index = build_ann_index(self._normalized(self.embeddings), ids, params)
+            self.index_config = dict(params, requested=self._requested_index(), trained_on=len(self.chunks))
+            self._id_to_pos = {int(faiss_id): pos for pos, faiss_id in enumerate(ids)}
             
-            logging.info(f"✅ Built FAISS index with {self.index.ntotal} vectors")
+            logging.info(f"✅ Built {params['type']} FAISS index with {self.index.ntotal} vectors")
             return True
             
         except Exception as e:
             logging.error(f"❌ Error building index: {e}")
             return False
     
+    def _requested_index(self) -> Dict[str, Any]:
+        """Configured index type and build-time parameters (query-time knobs excluded)"""
+        build_params = {key: value for key, value in self.index_params.items()
+                        if key not in ("ef_search", "nprobe")}
+        return {"type": self.index_type, "params": build_params}
+    
+    def _search_overrides(self) -> Dict[str, Any]:
+        return {key: self.index_params[key] for key in ("ef_search", "nprobe") if key in self.index_params}
+    
+    def set_search_params(self, ef_search: Optional[int] = None, nprobe: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Tune query-time accuracy/speed for searches of the next snapshot and for future builds.
+        
+        Args:
+            ef_search: HNSW search beam width
+            nprobe: IVF lists scanned per query
+            
+        Returns:
+            The effective index configuration
+        """
+        overrides = {"ef_search": ef_search, "nprobe": nprobe}
+        self.index_params.update({key: value for key, value in overrides.items() if value is not None})
+        with self._publish_lock:
+            snapshot = self.snapshot
+            if snapshot is None or snapshot.index_config is None:
+                return {}
+            index_config = dict(snapshot.index_config, **self._search_overrides())
+            # Snapshots (and the index they share) are never modified: publish a copy that
+            # differs only in its config, which every search passes to FAISS as parameters
+            updated = copy.copy(snapshot)
+            updated.index_config = index_config
+            self.snapshot = updated
+            self.index_config = index_config
+        logging.info(f"🔧 RAG search params: ef_search={index_config.get('ef_search')}, "
+                     f"nprobe={index_config.get('nprobe')}")
+        return dict(index_config)
+    
+    def compute_fingerprint(self) -> Optional[str]:
+        """
+        Hash the corpus file contents together with the embedding model and dimensions.
+        
+        Returns:
+            Hex fingerprint, or None if the corpus file is missing
+        """
+        if not os.path.exists(self.corpus_path):
+            return None
+        
+        digest = hashlib.sha256()
+        digest.update(self.embedding_key.encode("utf-8"))
+        with open(self.corpus_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()[:32]
+    
+    def _artifact_path(self, fingerprint: str) -> str:
+        return os.path.join(self.artifact_dir, fingerprint)
+    
+    @contextmanager
+    def _artifact_lock(self):
+        """
+        Hold an exclusive lock on this corpus's artifacts, across processes.
+        
+        Server workers that start together build the artifacts once: the
+        first one to get the lock embeds and saves, the others wait for it
+        and then load the saved files. Other corpora have their own lock.
+        """
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        corpus_key = hashlib.sha1(self.corpus_path.encode("utf-8")).hexdigest()[:12]
+        with open(os.path.join(self.artifact_dir, f".build-{corpus_key}.lock"), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def save_artifacts(self) -> bool:
+        """
+        Persist the embeddings matrix and FAISS index under the corpus fingerprint.
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            if self.embeddings is None or self.index is None:
+                logging.error("❌ Nothing to save. Build the index first.")
+                return False
+            
+            fingerprint = self.fingerprint or self.compute_fingerprint()
+            target = self._artifact_path(fingerprint)
+            os.makedirs(self.artifact_dir, exist_ok=True)
+            
+            # Write into a temporary directory and rename, so readers never see partial artifacts
+            staging = tempfile.mkdtemp(prefix=".staging-", dir=self.artifact_dir)
+            np.save(os.path.join(staging, "embeddings.npy"), self.embeddings)
+            write_index(self.index, os.path.join(staging, "index.faiss"))
+            self.chunks.save(os.path.join(staging, "corpus"))
+            with open(os.path.join(staging, "manifest.json"), 'w', encoding='utf-8') as f:
+                json.dump({
+                    "fingerprint": fingerprint,
+                    "corpus_path": self.corpus_path,
+                    "embedding_model": self.embedding_model,
+                    "embedding_dimensions": self.embedding_dimensions,
+                    "embedding_dtype": str(self.embeddings.dtype),
+                    "chunks_count": len(self.chunks),
+                    "dimension": int(self.embeddings.shape[1]),
+                    "created_at": datetime.now().isoformat(),
+                    "chunk_keys": self.chunk_keys,
+                    "chunk_hashes": self.chunk_hashes,
+                    "index": self.index_config
+                }, f)
+            
+            if os.path.exists(target):
+                shutil.rmtree(target)
+            os.replace(staging, target)
+            
+            # Serve everything from the saved files, like a worker that loads them
+            self.embeddings = np.load(os.path.join(target, "embeddings.npy"), mmap_mode='r')
+            self.chunks = CorpusStore.open(os.path.join(target, "corpus"), mmap=True)
+            if self.index_mmap:
+                self.index = read_index(os.path.join(target, "index.faiss"), mmap=True)
+                apply_search_params(self.index, self.index_config or {})
+            
+            self._prune_artifacts(keep=fingerprint)
+            logging.info(f"💾 Saved RAG artifacts to {target}")
+            return True
+            
+        except Exception as e:
+            logging.error(f"❌ Error saving RAG artifacts: {e}")
+            return False
+    
+    def _read_artifacts(self, target: str, mmap: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Read one artifact directory into a dict (manifest, embeddings, index).
+        
+        The index is memory-mapped read-only when mmap and index_mmap are set;
+        otherwise it is a private, writable copy.
+        """
+        with open(os.path.join(target, "manifest.json"), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        index_config = manifest.get("index") or {"type": "flat", "requested": {"type": "flat", "params": {}}}
+        index = read_index(os.path.join(target, "index.faiss"), mmap=mmap and self.index_mmap)
+        index_config.update(self._search_overrides())
+        apply_search_params(index, index_config)
+        return {
+            "manifest": manifest,
+            "index_config": index_config,
+            "keys": manifest.get("chunk_keys", []),
+            "hashes": manifest.get("chunk_hashes", []),
+            "embeddings": np.load(os.path.join(target, "embeddings.npy"), mmap_mode='r'),
+            "index": index
+        }
+    
+    def _artifact_manifests(self) -> List[Dict[str, Any]]:
+        """Manifests of saved artifacts for this corpus path and embedding model, newest first"""
+        manifests = []
+        if not os.path.isdir(self.artifact_dir):
+            return manifests
+        for name in os.listdir(self.artifact_dir):
+            manifest_path = os.path.join(self.artifact_dir, name, "manifest.json")
+            if name.startswith('.') or not os.path.exists(manifest_path):
+                continue
+            try:
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if (manifest.get("corpus_path") == self.corpus_path
+                    and manifest.get("embedding_model") == self.embedding_model
+                    and manifest.get("embedding_dimensions") == self.embedding_dimensions):
+                manifest["_path"] = os.path.join(self.artifact_dir, name)
+                manifests.append(manifest)
+        return sorted(manifests, key=lambda m: m.get("created_at", ""), reverse=True)
+    
+    def _prune_artifacts(self, keep: str) -> None:
+        """Delete old artifact versions of this corpus beyond keep_artifacts"""
+        try:
+            stale = [m for m in self._artifact_manifests() if m.get("fingerprint") != keep][self.keep_artifacts - 1:]
+            for manifest in stale:
+                shutil.rmtree(manifest["_path"], ignore_errors=True)
+        except Exception as e:
+            logging.warning(f"⚠️ Could not prune old RAG artifacts: {e}")
+    
+    def load_artifacts(self, convert: bool = False) -> bool:
+        """
+        Load embeddings and the FAISS index if artifacts exist for the current corpus fingerprint.
+        
+        Artifacts stored with another embedding dtype or index configuration
+        are only converted and re-saved when convert is set, which callers do
+        while holding the artifact lock.
+        
+        Args:
+            convert: Convert mismatched artifacts and save them (caller holds the artifact lock)
+            
+        Returns:
+            bool: True if artifacts matched and were loaded, False otherwise
+        """
+        try:
+            fingerprint = self.fingerprint or self.compute_fingerprint()
+            target = self._artifact_path(fingerprint) if fingerprint else None
+            if not target or not os.path.exists(os.path.join(target, "manifest.json")):
+                return False
+            
+            artifacts = self._read_artifacts(target)
+            if artifacts["keys"] != self.chunk_keys or artifacts["index"].ntotal != len(self.chunks):
+                logging.warning(f"⚠️ RAG artifacts at {target} do not match the loaded corpus, rebuilding")
+                return False
+            
+            convert_dtype = artifacts["embeddings"].dtype != self.embedding_dtype
+            rebuild_index = artifacts["index_config"].get("requested") != self._requested_index()
+            if (convert_dtype or rebuild_index) and not convert:
+                return False
+            
+            if convert_dtype and not rebuild_index:
+                # The index is saved again below, which needs a private (not memory-mapped) copy
+                artifacts = self._read_artifacts(target, mmap=False)
+            
+            self.embeddings = artifacts["embeddings"]
+            if convert_dtype:
+                logging.info(f"🔄 Converting stored embeddings to {self.embedding_dtype}")
+                self.embeddings = self._normalized(self.embeddings).astype(self.embedding_dtype)
+            if rebuild_index:
+                # Same corpus and model, different index configuration: rebuild from the stored embeddings
+                logging.info(f"🔄 Index configuration changed, rebuilding {self.index_type} index from saved embeddings")
+                if not self.build_index():
+                    return False
+            else:
+                self.index = artifacts["index"]
+                self.index_config = artifacts["index_config"]
+                self._id_to_pos = {chunk_faiss_id(key): pos for pos, key in enumerate(self.chunk_keys)}
+            # Save only once embeddings and index both belong to this corpus version
+            if (convert_dtype or rebuild_index) and not self.save_artifacts():
+                logging.warning("⚠️ Converted RAG artifacts could not be saved - serving them from memory")
+            logging.info(f"✅ Loaded RAG artifacts from {target} (no embedding calls needed)")
+            return True
+            
+        except Exception as e:
+            logging.warning(f"⚠️ Could not load RAG artifacts: {e}")
+            return False
+    
+    def _load_latest_artifacts(self) -> Optional[Dict[str, Any]]:
+        """Load the newest saved artifacts of this corpus to use as an incremental base"""
+        for manifest in self._artifact_manifests():
+            try:
+                return self._read_artifacts(manifest["_path"], mmap=False)
+            except Exception as e:
+                logging.warning(f"⚠️ Skipping unreadable RAG artifacts at {manifest['_path']}: {e}")
+        return None
+    
+    def update_index_incrementally(self, base: Dict[str, Any]) -> bool:
+        """
+        Bring a previous embeddings/index state up to date with the loaded corpus.
+        
+        Chunks are matched by id and text hash: unchanged chunks keep their
+        embeddings, only added or changed chunks are embedded, and the
+        ID-mapped index is updated in place (removals plus additions).
+        
+        Args:
+            base: Previous state with 'keys', 'hashes', 'embeddings' and 'index'
+            
+        Returns:
+            bool: True if the delta was applied, False if a full rebuild is needed
+        """
+        try:
+            index = base.get("index")
+            base_embeddings = base.get("embeddings")
+            if index is None or base_embeddings is None or not hasattr(index, "id_map"):
+                return False
+            if len(base["keys"]) != len(base["hashes"]) or len(base["keys"]) != base_embeddings.shape[0]:
+                return False
+            
+            old_positions = {key: pos for pos, key in enumerate(base["keys"])}
+            new_key_set = set(self.chunk_keys)
+            kept_new, kept_old, to_embed, changed = [], [], [], []
+            for pos, (key, text_hash) in enumerate(zip(self.chunk_keys, self.chunk_hashes)):
+                old_pos = old_positions.get(key)
+                if old_pos is not None and base["hashes"][old_pos] == text_hash:
+                    kept_new.append(pos)
+                    kept_old.append(old_pos)
+                else:
+                    to_embed.append(pos)
+                    if old_pos is not None:
+                        changed.append(key)
+            removed = [key for key in base["keys"] if key not in new_key_set]
+            
+            logging.info(f"🔄 Incremental RAG update: {len(to_embed) - len(changed)} added, "
+                         f"{len(changed)} changed, {len(removed)} removed, {len(kept_new)} unchanged")
+            
+            new_embeddings = None
+            if to_embed:
+                new_embeddings = self._embed_texts([self.chunks[pos]['text'] for pos in to_embed])
+                if new_embeddings.shape[1] != base_embeddings.shape[1]:
+                    logging.warning("⚠️ Embedding dimension changed, falling back to a full rebuild")
+                    return False
+            
+            embeddings = np.empty((len(self.chunks), base_embeddings.shape[1]), dtype=self.embedding_dtype)
+            if kept_new:
+                embeddings[kept_new] = self._normalized(base_embeddings[kept_old])
+            if to_embed:
+                embeddings[to_embed] = new_embeddings
+            self.embeddings = embeddings
+            
+            # Update the index in place unless it can't remove vectors, its configuration
+            # changed, or the corpus has doubled since the index was trained
+            index_config = base.get("index_config") or {}
+            stale_ids = [chunk_faiss_id(key) for key in removed + changed]
+            if (index_config.get("requested") != self._requested_index()
+                    or (stale_ids and not supports_removal(index))
+                    or (index_config.get("type", "flat") != "flat"
+                        and len(self.chunks) > 2 * max(index_config.get("trained_on", 0), 1))):
+                logging.info("🔄 Rebuilding the ANN index from cached embeddings (no extra embedding calls)")
+                if not self.build_index():
+                    return False
+            else:
+                if stale_ids:
+                    index.remove_ids(np.array(stale_ids, dtype='int64'))
+                if to_embed:
+                    ids = np.array([chunk_faiss_id(self.chunk_keys[pos]) for pos in to_embed], dtype='int64')
+                    index.add_with_ids(self._normalized(new_embeddings), ids)
+                self.index = index
+                self.index_config = index_config
+                self._id_to_pos = {chunk_faiss_id(key): pos for pos, key in enumerate(self.chunk_keys)}
+            self.last_update = {
+                "added": len(to_embed) - len(changed),
+                "changed": len(changed),
+                "removed": len(removed),
+                "unchanged": len(kept_new),
+                "embedded": len(to_embed),
+                "updated_at": datetime.now().isoformat()
+            }
+            return True
+            
+        except Exception as e:
+            logging.error(f"❌ Error applying incremental RAG update: {e}")
+            return False
+    
+    @property
+    def is_loaded(self) -> bool:
+        """True once a snapshot has been published"""
+        return self.snapshot is not None
+    
     def initialize(self) -> bool:
         """
         Initialize the complete RAG system.
         
+        Embeddings and the index are loaded from disk when artifacts exist for
+        the current corpus and embedding model; otherwise they are built and saved.
+        The result is published as a new snapshot only once it is complete.
+        
         Returns:
             bool: True if successful, False otherwise
         """
+        with self._build_lock:
+            return self._build()
+    
+    def _build(self) -> bool:
+        """Build a new snapshot from the corpus file (caller holds the build lock)"""
         try:
             logging.info("🚀 Initializing RAG system...")
             
+            # The published snapshot (if any) is the base for an incremental update.
+            # Its index is cloned so retrievals still using it are unaffected; a
+            # memory-mapped index is read-only, so the saved artifacts are read instead.
+            base = None
+            current = self.snapshot
+            if current is not None and current.embeddings is not None and not is_memory_mapped(current.index):
+                base = {"keys": current.chunk_keys, "hashes": self.chunk_hashes_of(current.chunks),
+                        "embeddings": current.embeddings, "index": current.index,
+                        "index_config": dict(current.index_config or {})}
+            
             # Load corpus
             if not self.load_corpus():
                 return False
             
-            # Generate embeddings
-            if not self.generate_embeddings():
-                return False
+            self.loaded_from_artifacts = self.load_artifacts()
+            if not self.loaded_from_artifacts:
+                with self._artifact_lock():
+                    # Another process may have saved them while this one waited
+                    self.loaded_from_artifacts = self.load_artifacts(convert=True)
+                    if not self.loaded_from_artifacts and not self._embed_and_index(base, current):
+                        return False
             
-            # Build index
-            if not self.build_index():
-                return False
-            
-            self.is_loaded = True
-            logging.info("✅ RAG system initialized successfully")
+            self.version += 1
+            snapshot = RAGSnapshot(
+                chunks=self.chunks,
+                chunk_keys=self.chunk_keys,
+                embeddings=self.embeddings,
+                index=self.index,
+                fingerprint=self.fingerprint,
+                version=self.version,
+                loaded_from_artifacts=self.loaded_from_artifacts,
+                last_update=self.last_update,
+                index_config=self.index_config
+            )
+            with self._publish_lock:
+                self.snapshot = snapshot
+            logging.info(f"✅ RAG system initialized successfully (version {self.version})")
             return True
             
         except Exception as e:
             logging.error(f"❌ Error initializing RAG system: {e}")
             return False
     
-    def retrieve(self, query: str, top_k: int = 3, min_score: float = 0.7) -> List[Dict]:
+    def _embed_and_index(self, base: Optional[Dict[str, Any]], current: Optional[RAGSnapshot]) -> bool:
+        """Embed and index the loaded corpus and save the artifacts (caller holds the artifact lock)"""
+        # Embed only the delta against the previous state or the newest saved artifacts
+        if self.incremental:
+            if base is not None and hasattr(base["index"], "id_map"):
+                base["index"] = faiss.clone_index(base["index"])
+                apply_search_params(base["index"], base["index_config"])
+            base = base or self._load_latest_artifacts()
+        if not (self.incremental and base and self.update_index_incrementally(base)):
+            # Generate embeddings and build index
+            if self.generate_embeddings() and self.build_index():
+                self.last_update = {"embedded": len(self.chunks), "updated_at": datetime.now().isoformat()}
+            elif self.retrieval_mode == "vector" or current is not None:
+                return False
+            else:
+                # Nothing to fall back to: serve BM25 until embeddings are available again
+                logging.warning("⚠️ Embeddings unavailable - serving lexical-only RAG retrieval")
+                self.embeddings, self.index, self.index_config = None, None, None
+                self._next_vector_retry = time.monotonic() + self.vector_retry_interval
+                self.last_update = {"embedded": 0, "lexical_only": True, "updated_at": datetime.now().isoformat()}
+        
+        if self.index is not None:
+            self.save_artifacts()
+        return True
+    
+    @staticmethod
+    def chunk_hashes_of(chunks: List[Dict]) -> List[str]:
+        """Content hashes of chunks, in order"""
+        return [chunk_text_hash(chunk['text']) for chunk in chunks]
+    
+    def embed_queries(self, queries: List[str]) -> List[np.ndarray]:
+        """
+        Normalized float32 embeddings of queries, served from the query cache when possible.
+        
+        Cache misses are deduplicated and sent as a single embeddings request.
+        
+        Args:
+            queries: Search queries
+            
+        Returns:
+            Read-only 1-D embedding vectors, one per query
+        """
+        vectors = [self.query_cache.get(self.embedding_key, query) for query in queries]
+        missing = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(normalize_query(queries[i]), []).append(i)
+        
+        if missing:
+            texts = list(missing)
+            embedded = self._create_embeddings(texts, timeout=self.query_timeout)
+            for text, vector in zip(texts, embedded):
+                cached = self.query_cache.put(self.embedding_key, text, vector)
+                for i in missing[text]:
+                    vectors[i] = cached
+        
+        return vectors
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        Normalized float32 embedding of a query, served from the query cache when possible.
+        
+        Args:
+            query: Search query
+            
+        Returns:
+            Read-only 1-D embedding vector
+        """
+        return self.embed_queries([query])[0]
+    
+    def enable_query_batching(self, window_ms: float = 5.0, max_batch: int = 32) -> None:
+        """
+        Batch concurrent retrievals: their query embeddings go out as one request
+        and their vectors are searched with one index.search call.
+        
+        Args:
+            window_ms: How long to collect queries after the first one arrives
+            max_batch: Maximum queries per batch
+        """
+        self.disable_query_batching()
+        self.query_batcher = MicroBatcher(self._search_batch, window_ms=window_ms, max_batch=max_batch,
+                                          name="rag-query-batcher")
+        logging.info(f"🔧 RAG query batching enabled ({window_ms} ms window, up to {max_batch} queries)")
+    
+    def disable_query_batching(self) -> None:
+        """Go back to embedding and searching each query on its own"""
+        if self.query_batcher is not None:
+            self.query_batcher.close()
+            self.query_batcher = None
+    
+    def _search_batch(self, requests: List[tuple]) -> List[tuple]:
+        """
+        Embed and search a batch of (query, top_k, snapshot, filter_key) requests.
+        
+        Returns:
+            (scores, ids) arrays per request, in request order
+        """
+        vectors = self.embed_queries([request[0] for request in requests])
+        
+        # Requests queued across a snapshot swap are searched against their own snapshot,
+        # and each distinct filter gets one search with its ID selector
+        groups = {}
+        for i, (_, _, snapshot, filter_key) in enumerate(requests):
+            groups.setdefault((id(snapshot), filter_key), (snapshot, filter_key, []))[2].append(i)
+        
+        results = [None] * len(requests)
+        for snapshot, filter_key, positions in groups.values():
+            selector, matches = snapshot.metadata.selector(filter_key)
+            if matches == 0:
+                for i in positions:
+                    results[i] = (np.empty(0, dtype='float32'), np.empty(0, dtype='int64'))
+                continue
+            params = search_parameters(snapshot.index, snapshot.index_config or {}, selector)
+            k = max(requests[i][1] for i in positions)
+            scores, ids = snapshot.index.search(np.stack([vectors[i] for i in positions]), k, params=params)
+            for row, i in enumerate(positions):
+                top_k = requests[i][1]
+                results[i] = (scores[row, :top_k], ids[row, :top_k])
+        return results
+    
+    def canonical_filters(self, filters: Optional[Dict[str, Any]]) -> tuple:
+        """Hashable key for retrieval filters (platform rules resolved), e.g. for memoizing context"""
+        snapshot = self.snapshot
+        return snapshot.metadata.canonical(filters) if snapshot is not None else ()
+    
+    def _vector_search(self, query: str, top_k: int, snapshot: RAGSnapshot, filter_key: tuple,
+                       min_score: float) -> List[tuple]:
+        """(position, similarity) pairs from the FAISS index, best first"""
+        # Embed the query (cached across requests) and search,
+        # batched with concurrent retrievals when batching is enabled
+        request = (query, top_k, snapshot, filter_key)
+        batcher = self.query_batcher
+        if batcher is not None:
+            scores, indices = batcher.submit(request, timeout=self.query_timeout + 5)
+        else:
+            scores, indices = self._search_batch([request])[0]
+        
+        hits = []
+        for score, idx in zip(scores, indices):
+            pos = snapshot.id_to_pos.get(int(idx))
+            if pos is not None and score >= min_score:
+                hits.append((pos, float(score)))
+        return hits
+    
+    def _similarities(self, query: str, snapshot: RAGSnapshot, positions: List[int]) -> Dict[int, float]:
+        """Cosine similarity of the query to specific chunks, from the stored embeddings"""
+        if not positions or snapshot.embeddings is None:
+            return {}
+        query_vector = self.embed_queries([query])[0]
+        scores = np.asarray(snapshot.embeddings[positions], dtype='float32') @ query_vector
+        return {pos: float(score) for pos, score in zip(positions, scores)}
+    
+    def retrieve(self, query: str, top_k: int = 3, min_score: float = 0.7,
+                 filters: Optional[Dict[str, Any]] = None, mode: Optional[str] = None) -> List[Dict]:
         """
         Retrieve most relevant chunks for a query.
         
         Args:
             query: Search query
             top_k: Number of top results to return
-            min_score: Minimum similarity score threshold
+            min_score: Minimum similarity score threshold; hybrid results need it too (chunks
+                found only by BM25 are scored against the query embedding), only the
+                lexical fallback without embeddings returns unthresholded BM25 results
+            filters: Metadata filters applied inside the index search: tags, source,
+                source_title, section (match any), exclude_tags, exclude_sources,
+                exclude_sections, and platform (applies PLATFORM_FILTERS rules)
+            mode: vector, lexical or hybrid (default: the system's retrieval_mode)
             
         Returns:
-            List of relevant chunks with metadata
+            List of relevant chunks with metadata (read views; convert with dict() to serialize)
         """
         try:
-            if not self.is_loaded or self.index is None:
+            snapshot = self.snapshot
+            if snapshot is None:
                 logging.warning("⚠️ RAG system not initialized. Returning empty results.")
                 return []
             
-            # Embed the query
-            query_response = self.client.embeddings.create(
-                model=self.embedding_model,
-                input=[query]
-            )
-            query_embedding = np.array([query_response.data[0].embedding])
+            mode = mode or self.retrieval_mode
+            filter_key = snapshot.metadata.canonical(filters)
+            # Fusion looks deeper than top_k into both rankings
+            depth = max(top_k * 4, 20) if mode == "hybrid" else top_k
             
-            # Normalize query embedding
-            query_embedding_normalized = query_embedding.astype('float32')
-            faiss.normalize_L2(query_embedding_normalized)
+            vector_hits = None
+            if mode != "lexical":
+                if snapshot.index is None:
+                    self._retry_vector_index()
+                else:
+                    try:
+                        vector_hits = self._vector_search(query, depth, snapshot, filter_key, min_score)
+                    except Exception as e:
+                        if mode == "vector":
+                            raise
+                        logging.warning(f"⚠️ Vector retrieval unavailable ({e}) - using lexical retrieval")
+                if vector_hits is None:
+                    if mode == "vector":
+                        return []
+                    self.retrieval_stats["lexical_fallbacks"] += 1
             
-            # Search
-            scores, indices = self.index.search(query_embedding_normalized, top_k)
+            lexical_hits = []
+            if mode != "vector":
+                lexical_hits = snapshot.lexical.search(query, depth, snapshot.metadata.mask(filter_key))
             
-            # Return relevant chunks
+            if vector_hits is None:
+                used = "lexical"
+                ranked = [(pos, None) for pos, _ in lexical_hits]
+            elif mode == "vector":
+                used = "vector"
+                ranked = [(pos, None) for pos, _ in vector_hits]
+            else:
+                used = "hybrid"
+                ranked = reciprocal_rank_fusion([[pos for pos, _ in vector_hits], [pos for pos, _ in lexical_hits]])
+            self.retrieval_stats[used] += 1
+            
+            similarity = dict(vector_hits or [])
+            if used == "hybrid":
+                # BM25-only hits must reach min_score by their own vector similarity
+                similarity.update(self._similarities(query, snapshot,
+                                                     [pos for pos, _ in lexical_hits if pos not in similarity]))
+                ranked = [(pos, fused) for pos, fused in ranked if similarity.get(pos, -np.inf) >= min_score]
+            lexical = dict(lexical_hits)
             results = []
-            for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
-                if idx < len(self.chunks) and score >= min_score:
-                    chunk = self.chunks[idx].copy()
-                    chunk['similarity_score'] = float(score)
-                    chunk['rank'] = i + 1
-                    results.append(chunk)
-            
-            logging.info(f"🔍 Retrieved {len(results)} relevant chunks for query: '{query[:50]}...'")
+            for i, (pos, fused) in enumerate(ranked[:top_k]):
+                # A fresh view per result; the scores below go to its overlay, not the shared store
+                chunk = snapshot.chunks[pos]
+                chunk['similarity_score'] = similarity.get(pos)
+                if pos in lexical:
+                    chunk['lexical_score'] = lexical[pos]
+                if fused is not None:
+                    chunk['rrf_score'] = fused
+                chunk['retrieval_mode'] = used
+                chunk['rank'] = i + 1
+                chunk['context_tokens'] = int(snapshot.token_counts[pos])
+                results.append(chunk)
+            
+            logging.info(f"🔍 Retrieved {len(results)} relevant chunks ({used}) for query: '{query[:50]}...'")
             return results
             
         except Exception as e:
             logging.error(f"❌ Error retrieving chunks: {e}")
             return []
     
-    def get_context(self, query: str, top_k: int = 3, min_score: float = 0.7) -> str:
+    def _retry_vector_index(self) -> None:
+        """Periodically retry building the vector index while serving lexical-only results"""
+        now = time.monotonic()
+        if now >= self._next_vector_retry:
+            self._next_vector_retry = now + self.vector_retry_interval
+            self.reload_corpus(background=True)
+    
+    def get_context(self, query: str, top_k: int = 3, min_score: float = 0.7,
+                    filters: Optional[Dict[str, Any]] = None, mode: Optional[str] = None,
+                    token_budget: Optional[int] = None) -> str:
         """
         Get formatted context string from retrieved chunks.
         
         Args:
             query: Search query
-            top_k: Number of top results to return
+            top_k: Number of top results to return (without a budget)
             min_score: Minimum similarity score threshold
+            filters: Metadata filters (see retrieve)
+            mode: vector, lexical or hybrid (see retrieve)
+            token_budget: Maximum context tokens; when set, a wider candidate set is
+                packed by maximal marginal relevance instead of taking top_k chunks whole
             
         Returns:
             Formatted context string
         """
-        chunks = self.retrieve(query, top_k, min_score)
+        candidates = top_k if token_budget is None else max(top_k * 3, top_k + 5)
+        chunks = self.retrieve(query, candidates, min_score, filters, mode)
         
         if not chunks:
             return ""
         
-        context_parts = []
-        for chunk in chunks:
-            context_parts.append(f"[Source: {chunk.get('source_title', 'Unknown')} - {chunk.get('section', 'Unknown Section')}]\n{chunk['text']}")
+        if token_budget is None:
+            return "\n\n".join(format_chunk(chunk) for chunk in chunks)
         
-        return "\n\n".join(context_parts)
+        packed = self.context_packer.pack(query, chunks, token_budget)
+        self.packing_stats["packed"] += 1
+        self.packing_stats["candidate_tokens"] += packed["candidate_tokens"]
+        self.packing_stats["context_tokens"] += packed["tokens"]
+        logging.info(f"📦 Packed {packed['chunks']} chunks ({packed['partial_chunks']} partial) into "
+                     f"{packed['tokens']}/{token_budget} context tokens")
+        return packed["context"]
+    
+    def trace_provenance(self, text: str, max_chunks: int = 3, min_overlap: float = 0.4) -> Dict[str, Any]:
+        """
+        Map each sentence of generated content to the corpus chunks it overlaps.
+        
+        Uses the snapshot's precomputed shingle index; no embedding or LLM calls.
+        
+        Args:
+            text: Generated content
+            max_chunks: Maximum supporting chunks per sentence
+            min_overlap: Minimum shingle overlap for a sentence to count as supported
+            
+        Returns:
+            Provenance with per-sentence supporting chunks and overall coverage
+        """
+        start_time = time.perf_counter()
+        snapshot = self.snapshot
+        sentences = snapshot.provenance.match(text, max_chunks) if snapshot else []
+        for sentence in sentences:
+            sentence["chunks"] = []
+            for pos, overlap in sentence.pop("matches"):
+                chunk = snapshot.chunks[pos]
+                sentence["chunks"].append({"id": chunk.get("id"), "source": chunk.get("source"),
+                                           "section": chunk.get("section"), "overlap": overlap})
+        provenance = summarize_provenance(sentences, min_overlap)
+        provenance["elapsed_ms"] = round((time.perf_counter() - start_time) * 1000, 3)
+        return provenance
     
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -241,25 +1057,151 @@ class BarranaRAGSystem:
         Returns:
             Dictionary with system stats
         """
+        snapshot = self.snapshot
         return {
-            "is_loaded": self.is_loaded,
-            "chunks_count": len(self.chunks),
-            "embeddings_shape": self.embeddings.shape if self.embeddings is not None else None,
-            "index_size": self.index.ntotal if self.index is not None else 0,
+            "is_loaded": snapshot is not None,
+            "chunks_count": len(snapshot.chunks) if snapshot else 0,
+            "embeddings_shape": snapshot.embeddings.shape if snapshot and snapshot.embeddings is not None else None,
+            "index_size": snapshot.index.ntotal if snapshot and snapshot.index is not None else 0,
             "corpus_path": self.corpus_path,
-            "embedding_model": self.embedding_model
+            "embedding_model": self.embedding_model,
+            "fingerprint": snapshot.fingerprint if snapshot else None,
+            "loaded_from_artifacts": snapshot.loaded_from_artifacts if snapshot else False,
+            "last_update": snapshot.last_update if snapshot else None,
+            "version": snapshot.version if snapshot else 0,
+            "swapped_at": snapshot.swapped_at if snapshot else None,
+            "reloading": self._build_lock.locked(),
+            "last_reload_error": self.last_reload_error,
+            "watching_corpus": self._watch_thread is not None and self._watch_thread.is_alive(),
+            "query_cache": self.query_cache.get_stats(),
+            "query_batching": self.query_batcher.get_stats() if self.query_batcher else None,
+            "index": snapshot.index_config if snapshot else None,
+            "embedding_storage": self._storage_stats(snapshot),
+            "metadata_filters": snapshot.metadata.get_stats() if snapshot else None,
+            "retrieval_mode": self.retrieval_mode,
+            "vector_index_ready": snapshot is not None and snapshot.index is not None,
+            "lexical_index": snapshot.lexical.get_stats() if snapshot else None,
+            "provenance_index": snapshot.provenance.get_stats() if snapshot else None,
+            "retrieval_counts": dict(self.retrieval_stats),
+            "context_packing": dict(self.packing_stats),
+            "corpus_store": snapshot.chunks.get_stats() if snapshot else None
         }
     
-    def reload_corpus(self) -> bool:
+    def _storage_stats(self, snapshot: Optional[RAGSnapshot]) -> Dict[str, Any]:
+        """Memory used by the embeddings matrix and index of a snapshot"""
+        stats = {"dtype": str(self.embedding_dtype), "dimensions": self.embedding_dimensions}
+        if snapshot is None or snapshot.index is None:
+            return stats
+        embeddings = snapshot.embeddings
+        resident = 0 if embeddings is None or isinstance(embeddings, np.memmap) else int(embeddings.nbytes)
+        index_bytes = estimate_index_bytes(snapshot.index)
+        stats.update({
+            "embeddings_resident_bytes": resident,
+            "embeddings_disk_backed": isinstance(embeddings, np.memmap),
+            "index_bytes_estimate": index_bytes,
+            "index_memory_mapped": is_memory_mapped(snapshot.index),
+            "bytes_per_chunk": int((resident + index_bytes) / max(len(snapshot.chunks), 1))
+        })
+        return stats
+    
+    def reload_corpus(self, background: bool = False) -> bool:
         """
-        Reload the corpus and rebuild the system.
+        Reload the corpus, re-embedding only added or changed chunks.
         
+        The current snapshot keeps serving retrievals until the new one is
+        ready, then it is swapped in atomically.
+        
+        Args:
+            background: Build in a background thread and return immediately
+            
         Returns:
-            bool: True if successful, False otherwise
+            bool: True if successful (or, in background mode, if the reload was started or queued)
         """
         logging.info("🔄 Reloading RAG corpus...")
-        self.is_loaded = False
-        self.chunks = []
-        self.embeddings = None
-        self.index = None
-        return self.initialize()
+        if not background:
+            with self._build_lock:
+                return self._reload()
+        
+        with self._reload_guard:
+            if self._reload_thread is not None and self._reload_thread.is_alive():
+                # A reload is already running; run once more after it so the latest corpus wins
+                self._reload_pending = True
+                return True
+            
+            self._reload_pending = False
+            self._reload_thread = threading.Thread(target=self._reload_worker, name="rag-reload", daemon=True)
+            self._reload_thread.start()
+            return True
+    
+    def _reload(self) -> bool:
+        success = self._build()
+        self.last_reload_error = None if success else f"Reload failed at {datetime.now().isoformat()}"
+        if not success:
+            logging.warning("⚠️ RAG reload failed - keeping the previous snapshot")
+        return success
+    
+    def _reload_worker(self) -> None:
+        while True:
+            with self._build_lock:
+                self._reload()
+            with self._reload_guard:
+                if not self._reload_pending:
+                    self._reload_thread = None
+                    return
+                self._reload_pending = False
+    
+    def wait_for_reload(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for a background reload to finish.
+        
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+            
+        Returns:
+            bool: True if no reload is running anymore
+        """
+        thread = self._reload_thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+    
+    def _corpus_signature(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.corpus_path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+    
+    def start_corpus_watch(self, interval: float = 5.0) -> None:
+        """
+        Poll the corpus file and reload in the background when it changes.
+        
+        Args:
+            interval: Seconds between checks
+        """
+        if self._watch_thread is not None and self._watch_thread.is_alive():
+            return
+        
+        self._watch_stop.clear()
+        initial_signature = self._corpus_signature()
+        
+        def watch():
+            signature = initial_signature
+            while not self._watch_stop.wait(interval):
+                current = self._corpus_signature()
+                if current is not None and current != signature:
+                    signature = current
+                    logging.info(f"🔄 Corpus file changed: {self.corpus_path}")
+                    self.reload_corpus(background=True)
+        
+        self._watch_thread = threading.Thread(target=watch, name="rag-corpus-watch", daemon=True)
+        self._watch_thread.start()
+        logging.info(f"🔍 Watching {self.corpus_path} for changes every {interval}s")
+    
+    def stop_corpus_watch(self) -> None:
+        """Stop the corpus file watcher"""
+        self._watch_stop.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join(timeout=5)
+        self._watch_thread = None
@@ -0,0 +1,51 @@
+import threading
+import time
+from typing import Any, Dict
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket for API requests.
+
+    acquire() blocks until a request may be sent, so concurrent workers
+    together never exceed `requests_per_minute` (with a burst of `burst`).
+    """
+
+    def __init__(self, requests_per_minute: float, burst: int = 1):
+        """
+        Initialize the limiter.
+
+        Args:
+            requests_per_minute: Sustained request rate (0 or less disables limiting)
+            burst: Requests that may be sent back to back after an idle period
+        """
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def acquire(self) -> float:
+        """
+        Wait for a request slot.
+
+        Returns:
+            Seconds spent waiting
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1.0
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.waited += wait
+        # The slot is reserved under the lock; sleeping outside it lets other callers queue behind
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"requests_per_minute": self.rate * 60.0, "burst": self.capacity, "waited_seconds": round(self.waited, 3)}
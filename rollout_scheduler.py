@@ -0,0 +1,394 @@
+import logging
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class RolloutEvent:
+    """A single comment release in an engagement rollout"""
+
+    __slots__ = ("post_id", "comment_id", "platform", "speaker", "text", "reply_to", "due_at", "payload")
+
+    def __init__(self, post_id: str, comment_id: str, platform: str, speaker: str, text: str,
+                 reply_to: Optional[str], due_at: float, payload: Optional[Dict[str, Any]] = None):
+        self.post_id = post_id
+        self.comment_id = comment_id
+        self.platform = platform
+        self.speaker = speaker
+        self.text = text
+        self.reply_to = reply_to
+        self.due_at = due_at
+        self.payload = payload or {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "post_id": self.post_id,
+            "comment_id": self.comment_id,
+            "platform": self.platform,
+            "speaker": self.speaker,
+            "text": self.text,
+            "reply_to": self.reply_to,
+            "due_at": self.due_at,
+        }
+
+
+def parse_duration_range(value: str) -> Tuple[float, float]:
+    """
+    Parse a timing_and_cadence range such as "60–240 sec" or "1–5 min" into seconds.
+
+    Args:
+        value: Range string from comments-engine.json
+
+    Returns:
+        (min_seconds, max_seconds)
+    """
+    numbers = [float(n) for n in re.findall(r"\d+(?:\.\d+)?", value or "")]
+    if not numbers:
+        raise ValueError(f"No duration found in {value!r}")
+    low, high = numbers[0], numbers[-1]
+    unit = (value or "").lower()
+    scale = 3600 if "hour" in unit or re.search(r"\bh\b", unit) else 60 if "min" in unit else 1
+    return low * scale, high * scale
+
+
+def plan_cluster_rollout(cluster: Dict[str, Any], timing_config: Dict[str, str],
+                         rng: Optional[random.Random] = None) -> List[Dict[str, Any]]:
+    """
+    Turn a comment cluster into release offsets (seconds after the post goes live).
+
+    Top-level comments are spread over the rollout window, starting inside the
+    initial_comments window; replies follow their parent after a reply delay.
+    A model-suggested delay is kept when it falls inside the configured range.
+
+    Args:
+        cluster: Comment cluster with 'comments'
+        timing_config: Platform entry from timing_and_cadence
+        rng: Random source (optional, for reproducible plans)
+
+    Returns:
+        List of {comment_id, offset_seconds} ordered by offset
+    """
+    rng = rng or random.Random()
+    initial = parse_duration_range(timing_config.get("initial_comments", "0–3 min"))
+    replies = parse_duration_range(timing_config.get("replies", "30–120 sec"))
+    rollout = parse_duration_range(timing_config.get("rollout_duration", "10–30 min"))
+    window = rng.uniform(*rollout)
+
+    comments = cluster.get("comments", [])
+    top_level = [c for c in comments if not c.get("reply_to")]
+    offsets = {}
+
+    # Top-level comments: first inside the initial window, the rest spread across the rollout
+    first_offset = rng.uniform(*initial)
+    span = max(window * 0.75 - first_offset, 0)
+    for i, comment in enumerate(top_level):
+        if i == 0:
+            offsets[comment.get("id")] = first_offset
+        else:
+            slot = span / max(len(top_level) - 1, 1)
+            offsets[comment.get("id")] = first_offset + slot * (i - 1) + rng.uniform(0, slot)
+
+    # Replies: after their parent, in cluster order so reply chains stay ordered
+    for comment in comments:
+        comment_id = comment.get("id")
+        parent = comment.get("reply_to")
+        if not parent:
+            continue
+        delay = comment.get("suggested_delay_seconds")
+        if not isinstance(delay, (int, float)) or not replies[0] <= delay <= replies[1]:
+            delay = rng.uniform(*replies)
+        parent_offset = offsets.get(parent, first_offset)
+        offsets[comment_id] = min(parent_offset + delay, max(window, parent_offset + replies[0]))
+
+    plan = [{"comment_id": comment_id, "offset_seconds": round(offset, 1)} for comment_id, offset in offsets.items()]
+    return sorted(plan, key=lambda item: item["offset_seconds"])
+
+
+class HierarchicalTimerWheel:
+    """
+    Hierarchical timing wheel (Varghese & Lauck) with power-of-two slots.
+
+    An entry is stored at the lowest level whose higher-order tick bits match
+    the current tick, and cascades down a level each time the lower levels
+    wrap. Insert and expiry are O(1) amortized regardless of how many timers
+    are pending; entries beyond the top level wait in an overflow list.
+    """
+
+    def __init__(self, tick_seconds: float = 1.0, slot_bits: int = 6, levels: int = 4,
+                 start_time: Optional[float] = None):
+        """
+        Initialize the wheel.
+
+        Args:
+            tick_seconds: Resolution of the wheel
+            slot_bits: log2 of slots per level (6 -> 64 slots)
+            levels: Number of wheel levels (4 levels of 64 1-second slots cover ~194 days)
+            start_time: Epoch time of tick zero (defaults to now)
+        """
+        self.tick_seconds = tick_seconds
+        self.slot_bits = slot_bits
+        self.slot_mask = (1 << slot_bits) - 1
+        self.levels = levels
+        self.origin = time.time() if start_time is None else start_time
+        self.current_tick = 0
+        self._wheels = [[[] for _ in range(1 << slot_bits)] for _ in range(levels)]
+        self._overflow = []
+        self._ready = []
+        self.size = 0
+
+    def _tick_for(self, due_at: float) -> int:
+        return math.ceil((due_at - self.origin) / self.tick_seconds - 1e-9)
+
+    def _place(self, tick: int, item: Any) -> None:
+        if tick <= self.current_tick:
+            self._ready.append(item)
+            return
+        for level in range(self.levels):
+            shift = self.slot_bits * (level + 1)
+            if (tick >> shift) == (self.current_tick >> shift):
+                slot = (tick >> (self.slot_bits * level)) & self.slot_mask
+                self._wheels[level][slot].append((tick, item))
+                return
+        self._overflow.append((tick, item))
+
+    def add(self, due_at: float, item: Any) -> None:
+        """Schedule an item to expire at an epoch time"""
+        self._place(self._tick_for(due_at), item)
+        self.size += 1
+
+    def _cascade(self) -> None:
+        tick = self.current_tick
+        for level in range(1, self.levels):
+            if tick & ((1 << (self.slot_bits * level)) - 1):
+                return
+            slot = (tick >> (self.slot_bits * level)) & self.slot_mask
+            entries = self._wheels[level][slot]
+            self._wheels[level][slot] = []
+            for entry_tick, item in entries:
+                self._place(entry_tick, item)
+        if tick & ((1 << (self.slot_bits * self.levels)) - 1) == 0 and self._overflow:
+            entries, self._overflow = self._overflow, []
+            for entry_tick, item in entries:
+                self._place(entry_tick, item)
+
+    def advance(self, now: float) -> List[Any]:
+        """
+        Advance the wheel to an epoch time.
+
+        Args:
+            now: Current epoch time
+
+        Returns:
+            Items that expired at or before now
+        """
+        target = math.floor((now - self.origin) / self.tick_seconds)
+        expired, self._ready = self._ready, []
+        while self.current_tick < target:
+            if self.size - len(expired) == 0:
+                # Nothing pending: jump straight to the target tick
+                self.current_tick = target
+                break
+            self.current_tick += 1
+            self._cascade()
+            expired.extend(self._ready)
+            self._ready = []
+            slot = self.current_tick & self.slot_mask
+            entries = self._wheels[0][slot]
+            if entries:
+                self._wheels[0][slot] = []
+                expired.extend(item for _, item in entries)
+        self.size -= len(expired)
+        return expired
+
+
+class RolloutSink:
+    """Destination for released comments (e.g. a posting queue or team notifier)"""
+
+    def dispatch(self, event: RolloutEvent) -> None:
+        raise NotImplementedError
+
+
+class LocalStubSink(RolloutSink):
+    """Default sink: logs releases and keeps the most recent ones in memory"""
+
+    def __init__(self, max_events: int = 1000):
+        self.max_events = max_events
+        self.events = []
+
+    def dispatch(self, event: RolloutEvent) -> None:
+        logging.info(f"📤 Rollout {event.post_id}: release {event.comment_id} ({event.speaker}) on {event.platform}")
+        self.events.append(event.to_dict())
+        if len(self.events) > self.max_events:
+            del self.events[:len(self.events) - self.max_events]
+
+
+class RolloutScheduler:
+    """
+    Schedules engagement clusters as timestamped comment releases.
+
+    Each cluster is expanded with plan_cluster_rollout using the platform's
+    timing_and_cadence entry, and every release is stored in a hierarchical
+    timer wheel shared by all active posts. Callers either poll due_events()
+    or call dispatch_due() to hand due releases to the configured sink.
+    """
+
+    def __init__(self, timing_and_cadence: Dict[str, Dict[str, str]], sink: Optional[RolloutSink] = None,
+                 tick_seconds: float = 1.0, clock: Callable[[], float] = time.time):
+        """
+        Initialize the scheduler.
+
+        Args:
+            timing_and_cadence: timing_and_cadence section of comments-engine.json
+            sink: Release destination (defaults to LocalStubSink)
+            tick_seconds: Timer wheel resolution
+            clock: Time source returning epoch seconds
+        """
+        self.timing_and_cadence = timing_and_cadence or {}
+        self.sink = sink or LocalStubSink()
+        self.clock = clock
+        self.wheel = HierarchicalTimerWheel(tick_seconds=tick_seconds, start_time=clock())
+        self._cancelled = set()
+        self._posts = {}
+        self._lock = threading.Lock()
+        self._stats = {"scheduled": 0, "dispatched": 0, "cancelled": 0, "max_lateness_seconds": 0.0}
+        self._worker = None
+        self._stop = threading.Event()
+
+    def schedule_cluster(self, cluster: Dict[str, Any], platform: str, post_id: Optional[str] = None,
+                         start_at: Optional[float] = None, rng: Optional[random.Random] = None) -> Dict[str, Any]:
+        """
+        Schedule every comment of a cluster.
+
+        Args:
+            cluster: Comment cluster with 'comments'
+            platform: Platform whose timing_and_cadence applies
+            post_id: Identifier of the live post (generated if omitted)
+            start_at: Epoch time the post went live (defaults to now)
+            rng: Random source (optional)
+
+        Returns:
+            Summary with the post id and the planned release times
+
+        Raises:
+            ValueError: If the post already has releases scheduled (cancel them first)
+        """
+        post_id = post_id or uuid.uuid4().hex[:12]
+        start_at = self.clock() if start_at is None else start_at
+        timing_config = self.timing_and_cadence.get(platform, {})
+        plan = plan_cluster_rollout(cluster, timing_config, rng)
+        comments = {c.get("id"): c for c in cluster.get("comments", [])}
+
+        events = []
+        for item in plan:
+            comment = comments.get(item["comment_id"], {})
+            events.append(RolloutEvent(post_id, item["comment_id"], platform, comment.get("speaker", ""),
+                                       comment.get("text", ""), comment.get("reply_to"),
+                                       start_at + item["offset_seconds"]))
+
+        with self._lock:
+            # Queued releases of the earlier rollout would otherwise count against this one
+            if post_id in self._posts:
+                raise ValueError(f"Post {post_id} already has a scheduled rollout")
+            for event in events:
+                self.wheel.add(event.due_at, event)
+            self._posts[post_id] = {"platform": platform, "remaining": len(events), "start_at": start_at}
+            self._stats["scheduled"] += len(events)
+
+        return {
+            "post_id": post_id,
+            "platform": platform,
+            "events": [event.to_dict() for event in events],
+        }
+
+    def cancel_post(self, post_id: str) -> bool:
+        """Stop releasing comments for a post (e.g. after negative pushback)"""
+        with self._lock:
+            if post_id not in self._posts:
+                return False
+            self._cancelled.add(post_id)
+            return True
+
+    def due_events(self, now: Optional[float] = None) -> List[RolloutEvent]:
+        """
+        Pop every release due at or before now, skipping cancelled posts.
+
+        Args:
+            now: Epoch time (defaults to the scheduler clock)
+
+        Returns:
+            Due events ordered by due time
+        """
+        now = self.clock() if now is None else now
+        with self._lock:
+            expired = self.wheel.advance(now)
+            due = []
+            for event in expired:
+                cancelled = event.post_id in self._cancelled
+                post = self._posts.get(event.post_id)
+                if post is not None:
+                    post["remaining"] -= 1
+                    if post["remaining"] <= 0:
+                        del self._posts[event.post_id]
+                        self._cancelled.discard(event.post_id)
+                if cancelled:
+                    self._stats["cancelled"] += 1
+                    continue
+                due.append(event)
+                self._stats["max_lateness_seconds"] = max(self._stats["max_lateness_seconds"], now - event.due_at)
+        due.sort(key=lambda event: event.due_at)
+        return due
+
+    def dispatch_due(self, now: Optional[float] = None) -> List[RolloutEvent]:
+        """
+        Send every due release to the sink.
+
+        Returns:
+            The dispatched events
+        """
+        due = self.due_events(now)
+        for event in due:
+            try:
+                self.sink.dispatch(event)
+            except Exception as e:
+                logging.error(f"❌ Rollout sink failed for {event.post_id}/{event.comment_id}: {e}")
+        with self._lock:
+            self._stats["dispatched"] += len(due)
+        return due
+
+    def start(self, interval_seconds: float = 1.0) -> None:
+        """Dispatch due releases from a background thread every interval"""
+        if self._worker and self._worker.is_alive():
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval_seconds):
+                self.dispatch_due()
+
+        self._worker = threading.Thread(target=run, name="rollout-scheduler", daemon=True)
+        self._worker.start()
+        logging.info(f"✅ Rollout scheduler dispatching every {interval_seconds}s")
+
+    def stop(self) -> None:
+        """Stop the background dispatcher"""
+        self._stop.set()
+        if self._worker:
+            self._worker.join(timeout=5)
+            self._worker = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get scheduler statistics.
+
+        Returns:
+            Dictionary with scheduler stats
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending_events"] = self.wheel.size
+            stats["active_posts"] = len(self._posts)
+        return stats
@@ -0,0 +1,178 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Optional
+
+import faiss
+import numpy as np
+
+
+class SemanticContentCache:
+    """
+    Generated content keyed by the embedding of its description.
+
+    Each (platform, variant) namespace has its own inner-product index over
+    normalized description embeddings, so a reworded description of the
+    same topic finds the earlier result when its cosine similarity reaches
+    the threshold. Entries expire after a TTL and the least recently used
+    entry is evicted beyond max_entries. Expired entries are dropped when a
+    lookup meets them or, oldest first, when a later result is stored.
+    """
+
+    def __init__(self, embed: Callable[[str], np.ndarray], threshold: float = 0.92,
+                 ttl_seconds: float = 24 * 3600, max_entries: int = 1000):
+        """
+        Initialize the cache.
+
+        Args:
+            embed: Normalized float32 embedding of a description (e.g. the RAG query embedder)
+            threshold: Minimum cosine similarity for a hit
+            ttl_seconds: Entry lifetime (0 or less: never expires)
+            max_entries: Maximum number of cached results across platforms
+        """
+        self.embed = embed
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._indexes = {}
+        # (created_at, id) in store order, so expiry only looks at the oldest entries
+        self._expiry = deque()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0,
+                       "saved_tokens": 0, "embedding_errors": 0}
+
+    def _vector(self, description: str) -> Optional[np.ndarray]:
+        try:
+            return np.ascontiguousarray(self.embed(description), dtype='float32').reshape(1, -1)
+        except Exception:
+            with self._lock:
+                self._stats["embedding_errors"] += 1
+            return None
+
+    def _expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return self.ttl_seconds > 0 and now - entry["created_at"] > self.ttl_seconds
+
+    def _remove(self, entry_id: int) -> None:
+        """Drop an entry and its vector (caller holds the lock)"""
+        entry = self._entries.pop(entry_id)
+        self._indexes[entry["namespace"]].remove_ids(np.array([entry_id], dtype='int64'))
+
+    def lookup(self, description: str, platform: str, variant: str = "") -> Optional[Dict[str, Any]]:
+        """
+        Find a cached result for a similar description on the same platform.
+
+        Args:
+            description: Content description
+            platform: Target platform
+            variant: Anything else the result depends on (e.g. the prompt library version)
+
+        Returns:
+            Copy of the cached entry with 'similarity', or None on a miss
+        """
+        namespace = (platform, variant)
+        if namespace not in self._indexes:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+        vector = self._vector(description)
+        if vector is None:
+            return None
+
+        now = time.time()
+        with self._lock:
+            index = self._indexes[namespace]
+            hit = None
+            if index.ntotal:
+                # A few neighbours, so an expired best match doesn't hide a live one
+                scores, ids = index.search(vector, min(index.ntotal, 4))
+                for score, entry_id in zip(scores[0], ids[0]):
+                    if entry_id < 0 or score < self.threshold:
+                        break
+                    entry = self._entries[int(entry_id)]
+                    if self._expired(entry, now):
+                        self._remove(int(entry_id))
+                        self._stats["expired"] += 1
+                        continue
+                    hit = entry
+                    break
+            if hit is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(hit["id"])
+            hit["hits"] += 1
+            self._stats["hits"] += 1
+            self._stats["saved_tokens"] += hit["tokens"]
+            result = dict(hit, similarity=round(float(score), 4))
+        result.pop("namespace")
+        return result
+
+    def store(self, description: str, platform: str, value: Any, tokens: int = 0, variant: str = "") -> bool:
+        """
+        Cache a generated result.
+
+        Args:
+            description: Content description
+            platform: Target platform
+            value: Generated content to serve on a hit
+            tokens: Tokens the generation used (counted as saved on each hit)
+            variant: See lookup
+
+        Returns:
+            bool: True if stored (False if the description could not be embedded)
+        """
+        vector = self._vector(description)
+        if vector is None:
+            return False
+
+        namespace = (platform, variant)
+        now = time.time()
+        with self._lock:
+            while self._expiry and self.ttl_seconds > 0 and now - self._expiry[0][0] > self.ttl_seconds:
+                _, entry_id = self._expiry.popleft()
+                # Entries evicted or expired on lookup are already gone
+                if entry_id in self._entries:
+                    self._remove(entry_id)
+                    self._stats["expired"] += 1
+            while self._entries and len(self._entries) >= self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+            index = self._indexes.get(namespace)
+            if index is None:
+                index = self._indexes[namespace] = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[1]))
+            entry_id = self._next_id
+            self._next_id += 1
+            index.add_with_ids(vector, np.array([entry_id], dtype='int64'))
+            self._entries[entry_id] = {"id": entry_id, "namespace": namespace, "platform": platform,
+                                       "description": description, "value": value, "tokens": int(tokens),
+                                       "created_at": now, "hits": 0}
+            if self.ttl_seconds > 0:
+                self._expiry.append((now, entry_id))
+            self._stats["stores"] += 1
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._indexes.clear()
+            self._expiry.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with hit rate, saved tokens, size and eviction counts
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["platforms"] = sorted({platform for platform, _ in self._indexes})
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["threshold"] = self.threshold
+        stats["ttl_seconds"] = self.ttl_seconds
+        stats["max_entries"] = self.max_entries
+        return stats
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test batched Barrana reply generation (offline, with a fake OpenAI client)
+"""
+
+import json
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import openai
+from prompt_library import BarranaPromptLibrary
+
+
+class _FakeMessage:
+    def __init__(self, content):
+        self.message = type('Message', (), {'content': content})()
+
+
+class FakeOpenAI:
+    """Records prompts and answers the batch prompt with a canned JSON payload"""
+
+    calls = []
+    batch_payload = None
+
+    def __init__(self, *args, **kwargs):
+        self.chat = self
+        self.completions = self
+
+    def create(self, model, messages, **kwargs):
+        prompt = messages[-1]['content']
+        FakeOpenAI.calls.append(prompt)
+        if 'Return ONLY JSON' in prompt:
+            content = FakeOpenAI.batch_payload
+        else:
+            content = "Single reply"
+        return type('Response', (), {'choices': [_FakeMessage(content)]})()
+
+
+def _run_batch(payload, comments):
+    FakeOpenAI.calls = []
+    FakeOpenAI.batch_payload = payload
+    original = openai.OpenAI
+    openai.OpenAI = FakeOpenAI
+    try:
+        library = BarranaPromptLibrary()
+        return library.generate_barrana_responses_batch(comments, "Post about AI for clinics", "linkedin")
+    finally:
+        openai.OpenAI = original
+
+
+def test_batch_uses_single_completion():
+    """All comments are answered by one request that carries the post once"""
+    print("🧪 Testing batched Barrana replies...")
+
+    comments = ["How does this work for a clinic?", "Isn't this expensive?", "We used it and it worked"]
+    payload = "```json\n" + json.dumps({"responses": [
+        {"index": 3, "response": "Reply three"},
+        {"index": 1, "response": "Reply one"},
+        {"index": 2, "response": "Reply two"},
+    ]}) + "\n```"
+
+    responses = _run_batch(payload, comments)
+
+    assert responses == ["Reply one", "Reply two", "Reply three"]
+    assert len(FakeOpenAI.calls) == 1
+    assert FakeOpenAI.calls[0].count("Post about AI for clinics") == 1
+    assert FakeOpenAI.calls[0].count("Response Strategy:") == len(comments)
+    print("✅ Three replies mapped back from one completion")
+
+
+def test_batch_falls_back_per_item():
+    """Missing or empty items are filled by individual replies"""
+    comments = ["First comment", "Second comment", "Third comment"]
+    payload = json.dumps({"responses": [{"index": 2, "response": "Reply two"}, {"index": 3, "response": ""}]})
+
+    responses = _run_batch(payload, comments)
+
+    assert responses == ["Single reply", "Reply two", "Single reply"]
+    assert len(FakeOpenAI.calls) == 3
+    print("✅ Missing replies filled by per-comment fallback")
+
+
+if __name__ == "__main__":
+    test_batch_uses_single_completion()
+    test_batch_falls_back_per_item()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test token-budgeted, redundancy-aware RAG context packing
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from context_packer import ContextPacker, context_budget, count_tokens, format_chunk
+from testing_helpers import make_rag, write_corpus
+
+OVERVIEW = ("Barrana builds AI automation for small businesses. Our agents connect CRMs, inboxes and "
+            "accounting tools so teams stop copying data by hand. Typical clients save ten hours a week.")
+
+
+def packing_corpus() -> list:
+    return [
+        {"id": "overview", "source": "Barrana Overview", "source_title": "Barrana Company Overview",
+         "section": "Company Mission", "text": OVERVIEW, "similarity_score": 0.9},
+        {"id": "authority", "source": "Added Authority", "source_title": "Added Authority",
+         "section": "Company Mission", "text": OVERVIEW.replace("Typical clients", "Most clients"),
+         "similarity_score": 0.88},
+        {"id": "pricing", "source": "Barrana Services", "source_title": "Barrana Services",
+         "section": "Pricing", "similarity_score": 0.7,
+         "text": "Projects start with a fixed-price automation audit. Implementation is billed per workflow. "
+                 "Support retainers cover monitoring and model updates."},
+        {"id": "founder", "source": "Barrana Overview", "source_title": "Barrana Company Overview",
+         "section": "About the Founder", "similarity_score": 0.5,
+         "text": "Ikram Rana founded Barrana after a decade of building reporting systems for schools."},
+    ]
+
+
+def test_near_duplicates_are_packed_once():
+    """Overlapping chunks don't spend the budget twice"""
+    print("🧪 Testing context packing...")
+    chunks = packing_corpus()
+    packed = ContextPacker().pack("AI automation pricing", chunks, budget=1000)
+    assert packed["context"].count("Our agents connect CRMs") == 1
+    assert "fixed-price automation audit" in packed["context"]
+    assert packed["chunks"] == 3
+    assert packed["tokens"] <= 1000
+    assert packed["tokens"] < packed["candidate_tokens"]
+    print(f"✅ Packed {packed['tokens']} of {packed['candidate_tokens']} candidate tokens")
+
+
+def test_tight_budget_packs_relevant_sentences():
+    """A chunk that doesn't fit contributes its most relevant sentences under its own header"""
+    pricing = dict(packing_corpus()[2], similarity_score=0.95)
+    budget = count_tokens(format_chunk(pricing)) - 5
+    packed = ContextPacker().pack("automation audit pricing", [pricing] + packing_corpus()[:1], budget=budget)
+    assert count_tokens(packed["context"]) <= budget
+    assert packed["partial_chunks"] == 1
+    assert packed["context"].startswith("[Source: Barrana Services - Pricing]\nProjects start with a fixed-price")
+    assert "Support retainers" not in packed["context"]
+    print("✅ Tight budgets keep the relevant sentences")
+
+
+def test_platform_budgets():
+    """Short-form platforms get smaller budgets; configs can override them"""
+    assert context_budget("twitter_quick") < context_budget("linkedin") < context_budget("barrana_blog")
+    assert context_budget("unknown_platform") > 0
+    assert context_budget("twitter", {"context_tokens": 42}) == 42
+
+
+def test_get_context_respects_token_budget():
+    """The RAG system packs a wider candidate set into the budget"""
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        chunks = [{key: value for key, value in chunk.items() if key != "similarity_score"}
+                  for chunk in packing_corpus()]
+        write_corpus(corpus, chunks)
+        rag = make_rag(corpus, os.path.join(tmp, "artifacts"))
+        assert rag.initialize()
+
+        full = rag.get_context("AI automation for small businesses", top_k=3, min_score=-1.0)
+        short = rag.get_context("AI automation for small businesses", top_k=3, min_score=-1.0,
+                                token_budget=context_budget("twitter_quick"))
+        assert short and count_tokens(short) <= context_budget("twitter_quick")
+        assert count_tokens(short) < count_tokens(full)
+
+        long = rag.get_context("AI automation for small businesses", top_k=3, min_score=-1.0,
+                               token_budget=context_budget("barrana_blog"))
+        assert long.count("Our agents connect CRMs") == 1
+        stats = rag.get_stats()["context_packing"]
+        assert stats["packed"] == 2 and stats["context_tokens"] <= stats["candidate_tokens"]
+        print("✅ get_context stays within the platform budget")
+
+
+if __name__ == "__main__":
+    test_near_duplicates_are_packed_once()
+    test_tight_budget_packs_relevant_sentences()
+    test_platform_budgets()
+    test_get_context_respects_token_budget()
+    print("\n🎉 All context packing tests passed!")
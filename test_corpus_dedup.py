@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test near-duplicate chunk removal at corpus build time
+"""
+
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from corpus_dedup import dedup_report, deduplicate_chunks, find_duplicate_clusters
+from rag_ingest import ingest_directory
+
+ANSWERS = [
+    "Barrana automates repetitive back-office work such as invoice entry, onboarding emails and weekly reporting for small businesses.",
+    "Most automation projects go live within four weeks, starting with a fixed-price audit of the current workflows.",
+    "Barrana connects existing tools like CRMs, accounting systems and shared inboxes instead of replacing them.",
+    "Ikram Rana founded Barrana after more than a decade of building reporting systems for schools and districts.",
+]
+
+
+def overlapping_corpus() -> list:
+    chunks = []
+    for i, answer in enumerate(ANSWERS):
+        chunks.append({"id": f"overview_{i}", "source": "Detailed Overview of Barrana", "section": "General Questions",
+                       "text": answer, "tags": ["overview"]})
+    for i, answer in enumerate(ANSWERS[:3]):
+        chunks.append({"id": f"authority_{i}", "source": "Detailed Overview with Added Authority",
+                       "section": "Q&A Section with Added Emphasis on Experience",
+                       "text": answer + " Our team has delivered this for dozens of clients.", "tags": ["authority"]})
+    chunks.append({"id": "pricing", "source": "Pricing", "section": "Pricing",
+                   "text": "Retainers cover monitoring, model updates and a monthly optimisation review."})
+    return chunks
+
+
+def test_clusters_near_duplicates_only():
+    """Reworded copies cluster together; unrelated chunks stay single"""
+    print("🧪 Testing near-duplicate detection...")
+    texts = [chunk["text"] for chunk in overlapping_corpus()]
+    clusters = find_duplicate_clusters(texts, threshold=0.6)
+    assert sorted(sorted(cluster["members"]) for cluster in clusters) == [[0, 4], [1, 5], [2, 6]]
+    assert all(0.6 <= similarity <= 1.0 for cluster in clusters for similarity in cluster["similarity"].values())
+    assert find_duplicate_clusters(texts, threshold=0.99) == []
+    print("✅ Near-duplicates clustered")
+
+
+def test_dedup_keeps_canonical_with_provenance():
+    """The longest member is kept with merged tags and the removed chunks recorded"""
+    chunks = overlapping_corpus()
+    chunks[4]["platforms"] = ["linkedin"]
+    kept, report = deduplicate_chunks(chunks, threshold=0.6)
+    assert report["removed_chunks"] == 3 and report["kept_chunks"] == len(chunks) - 3
+    by_id = {chunk["id"]: chunk for chunk in kept}
+    assert set(by_id) == {"overview_3", "authority_0", "authority_1", "authority_2", "pricing"}
+
+    canonical = by_id["authority_0"]
+    assert canonical["merged_from"][0]["id"] == "overview_0"
+    assert canonical["merged_from"][0]["source"] == "Detailed Overview of Barrana"
+    assert canonical["tags"] == ["authority", "overview"]
+    assert "platforms" not in canonical
+    assert "merged_from" not in chunks[4] and "merged_from" not in by_id["pricing"]
+    print("✅ Canonical chunks keep merged provenance")
+
+
+def test_report_shows_smaller_index_and_less_redundancy():
+    """The report quantifies index savings and top-k redundancy"""
+    chunks = overlapping_corpus()
+    kept, report = deduplicate_chunks(chunks, threshold=0.6)
+    report = dedup_report(chunks, kept, report, dimension=1536)
+    assert report["index_bytes_after"] < report["index_bytes_before"]
+    assert report["redundant_top_k_before"] > 0
+    assert report["redundant_top_k_after"] == 0
+    print(f"✅ Redundant top-k: {report['redundant_top_k_before']:.0%} -> {report['redundant_top_k_after']:.0%}")
+
+
+def test_ingest_deduplicates_across_documents():
+    """Ingesting two overlapping documents writes one copy of the shared Q&A"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "docs")
+        os.makedirs(source)
+        body = "\n\n".join(ANSWERS)
+        with open(os.path.join(source, "overview.md"), "w", encoding="utf-8") as f:
+            f.write(f"# General Questions\n\n{body}\n")
+        with open(os.path.join(source, "authority.md"), "w", encoding="utf-8") as f:
+            f.write(f"# Q&A with Added Emphasis\n\n{body}\n\nWe have delivered this for dozens of clients.\n")
+
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        manifest = ingest_directory(source, corpus, os.path.join(tmp, "manifest.json"), workers=1)
+        with open(corpus, encoding="utf-8") as f:
+            chunks = [json.loads(line) for line in f]
+        assert len(chunks) == 1 and chunks[0]["merged_from"]
+        assert manifest["total_chunks"] == 1
+        assert manifest["deduplication"]["removed_chunks"] == 1
+
+        undeduplicated = ingest_directory(source, corpus, os.path.join(tmp, "manifest.json"), workers=1,
+                                          dedup_threshold=0)
+        assert undeduplicated["total_chunks"] == 2 and "deduplication" not in undeduplicated
+        print("✅ Ingestion removed cross-document duplicates")
+
+
+def test_ingest_keeps_sections_apart_and_rejects_colliding_ids():
+    """Dedup results go back to their own sections; colliding chunk ids stop the build"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "docs")
+        os.makedirs(source)
+        with open(os.path.join(source, "a.md"), "w", encoding="utf-8") as f:
+            f.write(f"# FAQ\n\nAlpha: {' '.join(ANSWERS[:3])}\n\n# FAQ\n\nGamma: {ANSWERS[3]}\n")
+        with open(os.path.join(source, "b.md"), "w", encoding="utf-8") as f:
+            f.write(f"# FAQ\n\nAlpha: {' '.join(ANSWERS[:3])} Thanks.\n")
+
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        manifest = ingest_directory(source, corpus, os.path.join(tmp, "manifest.json"), workers=1)
+        with open(corpus, encoding="utf-8") as f:
+            chunks = [json.loads(line) for line in f]
+        assert [chunk["text"].split(":")[0] for chunk in chunks] == ["Gamma", "Alpha"]
+        assert chunks[0]["id"] == "a_2_faq_1" and chunks[1]["merged_from"][0]["id"] == "a_1_faq_1"
+        assert manifest["sources"]["a.md"]["chunks"] == 1 and manifest["sources"]["b.md"]["chunks"] == 1
+
+        with open(os.path.join(source, "a b.md"), "w", encoding="utf-8") as f:
+            f.write("# FAQ\n\nDelta covers payroll exports for bakeries.\n")
+        with open(os.path.join(source, "a_b.md"), "w", encoding="utf-8") as f:
+            f.write("# FAQ\n\nEpsilon covers onboarding emails for law firms.\n")
+        try:
+            ingest_directory(source, corpus, os.path.join(tmp, "manifest.json"), workers=1)
+            assert False, "expected ValueError"
+        except ValueError as e:
+            assert "a_b_1_faq_1" in str(e)
+        print("✅ Sections rebuilt by position; colliding ids rejected")
+
+
+if __name__ == "__main__":
+    test_clusters_near_duplicates_only()
+    test_dedup_keeps_canonical_with_provenance()
+    test_report_shows_smaller_index_and_less_redundancy()
+    test_ingest_deduplicates_across_documents()
+    test_ingest_keeps_sections_apart_and_rejects_colliding_ids()
+    print("\n🎉 All corpus dedup tests passed!")
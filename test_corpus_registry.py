@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test federated retrieval over multiple named RAG corpora
+"""
+
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from context_packer import context_budget
+from corpus_registry import load_corpora_config
+from query_cache import RequestMemo
+from testing_helpers import FakeEmbeddingClient, base_chunks, case_study_chunks, make_registry, write_corpus
+
+
+def test_config_parsing():
+    """Corpora come from inline JSON, a JSON file, or the single default corpus"""
+    print("🧪 Testing corpus registry config...")
+    assert load_corpora_config("") == {"barrana": {"path": "barrana_rag_corpus.jsonl"}}
+    assert load_corpora_config('{"docs": "docs.jsonl"}') == {"docs": {"path": "docs.jsonl"}}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpora.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"founder": {"path": "founder.jsonl", "watch_interval": 3600, "index_type": "hnsw"}}, f)
+        assert load_corpora_config(path)["founder"]["index_type"] == "hnsw"
+    try:
+        load_corpora_config('{"broken": {"watch_interval": 5}}')
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    print("✅ Config parsed")
+
+
+def test_federated_retrieval_merges_by_normalized_score():
+    """Both corpora are searched with one query embedding and merged by normalized score"""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = FakeEmbeddingClient()
+        registry = make_registry(tmp, client)
+        assert registry.initialize()
+
+        client.calls = 0
+        results = registry.retrieve("dental clinic appointment reminders", top_k=5, min_score=0.0)
+        assert client.calls == 1
+        assert results[0]["corpus"] == "case_studies" and results[0]["id"] == "case_0"
+        assert {chunk["corpus"] for chunk in results} == {"overview", "case_studies"}
+        scores = [chunk["normalized_score"] for chunk in results]
+        assert scores == sorted(scores, reverse=True) and all(0.0 <= score <= 1.0 for score in scores)
+        assert [chunk["rank"] for chunk in results] == [1, 2, 3, 4, 5]
+
+        only_overview = registry.retrieve("dental clinic appointment reminders", top_k=5, min_score=0.0,
+                                          corpora=["overview"])
+        assert {chunk["corpus"] for chunk in only_overview} == {"overview"}
+        try:
+            registry.retrieve("anything", corpora=["missing"])
+            assert False, "expected KeyError"
+        except KeyError:
+            pass
+
+        context = registry.get_context("law firm client intake", top_k=2, min_score=0.0, token_budget=200)
+        assert "conflict checks" in context
+        registry.stop()
+        print("✅ Federated results merged across corpora")
+
+
+def test_one_retrieval_packs_every_platform_budget():
+    """A request retrieves its candidates once and packs them per platform budget"""
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = make_registry(tmp, FakeEmbeddingClient())
+        assert registry.initialize()
+        description = "law firm client intake"
+        memo = RequestMemo()
+        platforms = ["twitter_quick", "linkedin", "barrana_blog", "instagram"]
+        contexts = {}
+        for platform in platforms:
+            candidates = memo.get_or_compute(("rag_candidates", description),
+                                             lambda: registry.context_candidates(description, min_score=0.0))
+            contexts[platform] = registry.pack_context(description, candidates, context_budget(platform))
+        assert registry.query_stats["queries"] == 1
+        assert memo.misses == 1 and memo.hits == len(platforms) - 1
+        for platform in platforms:
+            budget = context_budget(platform)
+            assert contexts[platform] == registry.get_context(description, min_score=0.0, token_budget=budget)
+        assert len(contexts["barrana_blog"]) > len(contexts["twitter_quick"])
+        registry.stop()
+        print("✅ One retrieval packed into every platform budget")
+
+
+def test_reload_one_corpus_leaves_others_untouched():
+    """Rebuilding one corpus keeps the other's snapshot and embeds only the changed corpus"""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = FakeEmbeddingClient()
+        registry = make_registry(tmp, client)
+        assert registry.initialize()
+        overview = registry.get("overview").snapshot
+
+        chunks = case_study_chunks() + [{"id": "case_new", "source": "Case Studies", "section": "Bakery",
+                                         "text": "A bakery automated wholesale order confirmations.", "tags": []}]
+        write_corpus(os.path.join(tmp, "cases.jsonl"), chunks)
+        client.inputs = 0
+        assert registry.reload_corpus("case_studies")
+        assert client.inputs == 1
+        assert registry.get("overview").snapshot is overview
+        assert registry.get("case_studies").snapshot.version == 2
+
+        results = registry.retrieve("bakery wholesale orders", top_k=1, min_score=0.0)
+        assert results[0]["id"] == "case_new"
+        try:
+            registry.reload_corpus("missing")
+            assert False, "expected KeyError"
+        except KeyError:
+            pass
+        registry.stop()
+        print("✅ One corpus rebuilt independently")
+
+
+def test_stats_and_missing_corpus():
+    """A corpus that fails to load is skipped; stats report every corpus"""
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = make_registry(tmp, FakeEmbeddingClient(),
+                                 {"founder": {"path": os.path.join(tmp, "missing.jsonl")}})
+        assert registry.initialize()
+        stats = registry.get_stats()
+        assert stats["corpora_count"] == 3
+        assert sorted(stats["loaded_corpora"]) == ["case_studies", "overview"]
+        assert stats["chunks_count"] == len(base_chunks()) + len(case_study_chunks())
+        assert not stats["corpora"]["founder"]["is_loaded"]
+        assert stats["corpora"]["case_studies"]["chunks_count"] == len(case_study_chunks())
+        assert registry.retrieve("law firm intake", top_k=1, min_score=0.0)[0]["corpus"] == "case_studies"
+        assert registry.retrieve("law firm intake", corpora=["founder"]) == []
+        registry.stop()
+
+
+if __name__ == "__main__":
+    test_config_parsing()
+    test_federated_retrieval_merges_by_normalized_score()
+    test_one_retrieval_packs_every_platform_budget()
+    test_reload_one_corpus_leaves_others_untouched()
+    test_stats_and_missing_corpus()
+    print("\n🎉 All corpus registry tests passed!")
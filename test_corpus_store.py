@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test the columnar corpus store and chunk views
+"""
+
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from corpus_store import ChunkView, CorpusStore
+from testing_helpers import base_chunks, make_rag, write_corpus
+
+
+def mixed_chunks() -> list:
+    return [
+        {"id": "a", "source": "Overview", "source_title": "Company Overview", "section": "Mission",
+         "chunk_index": 1, "text": "Barrana automates workflows.", "tags": ["mission", "ai"]},
+        {"id": "b", "source": "Overview", "section": "Founder", "text": "Café owners love automation ☕",
+         "tags": [], "platforms": ["linkedin"], "author": {"name": "Ikram"}},
+        {"id": 7, "text": "Numeric id and a float score", "score": 0.5, "chunk_index": "3"},
+        {"text": "No id at all", "tags": "single-tag"},
+    ]
+
+
+def test_round_trip_matches_source_dicts():
+    """Views reproduce every field of the original chunks, in memory and memory-mapped"""
+    print("🧪 Testing columnar corpus store...")
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        chunks = mixed_chunks()
+        write_corpus(corpus, chunks)
+        with open(corpus, "a", encoding="utf-8") as f:
+            f.write("{not json\n\n")
+
+        store = CorpusStore.from_jsonl(corpus)
+        assert len(store) == len(chunks)
+        assert [view.copy() for view in store] == chunks
+        assert store[1] == chunks[1] and store[-1] == chunks[-1]
+        assert store[0].get("platforms") is None and "platforms" not in store[0]
+        assert store.text(1) == chunks[1]["text"]
+        assert not store.memory_mapped
+
+        store.save(os.path.join(tmp, "columns"))
+        mapped = CorpusStore.open(os.path.join(tmp, "columns"))
+        assert mapped.memory_mapped
+        assert [view.copy() for view in mapped] == chunks
+        assert mapped.get_stats()["vocabularies"]["source"] == 1
+        print("✅ Store round-trips chunks")
+
+
+def test_views_do_not_share_overlays():
+    """Result fields set on a view never leak into the store or other views"""
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        write_corpus(corpus, mixed_chunks())
+        store = CorpusStore.from_jsonl(corpus)
+
+        view = store[0]
+        assert isinstance(view, ChunkView) and view.row == 0
+        view["similarity_score"] = 0.9
+        view["text"] = "shadowed"
+        assert view["similarity_score"] == 0.9 and view["text"] == "shadowed"
+        assert "similarity_score" not in store[0] and store[0]["text"] == mixed_chunks()[0]["text"]
+
+        del view["text"]
+        assert view["text"] == mixed_chunks()[0]["text"]
+        try:
+            del view["id"]
+            assert False, "stored fields must be read-only"
+        except TypeError:
+            pass
+        assert json.loads(json.dumps(view.copy()))["similarity_score"] == 0.9
+
+
+def test_restart_memory_maps_corpus_columns():
+    """A restart with an unchanged corpus opens the saved columns instead of parsing JSONL"""
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        write_corpus(corpus, base_chunks())
+        first = make_rag(corpus, os.path.join(tmp, "artifacts"))
+        assert first.initialize()
+
+        second = make_rag(corpus, os.path.join(tmp, "artifacts"))
+        assert second.initialize()
+        assert second.get_stats()["corpus_store"]["memory_mapped"]
+
+        results = second.retrieve("workflow automation invoice", top_k=3, min_score=0.0)
+        assert len(results) == 3
+        assert all(isinstance(r, ChunkView) and r["similarity_score"] is not None for r in results)
+        assert "similarity_score" not in second.snapshot.chunks[results[0].row]
+        # Views convert to plain dicts, with their scores, where results are serialized
+        assert json.loads(json.dumps([dict(r) for r in results]))[0]["similarity_score"] is not None
+        print("✅ Restart memory-mapped the corpus columns")
+
+
+if __name__ == "__main__":
+    test_round_trip_matches_source_dicts()
+    test_views_do_not_share_overlays()
+    test_restart_memory_maps_corpus_columns()
+    print("\n🎉 All corpus store tests passed!")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test compact RAG embedding storage (dtype, reduced dimensions, single resident copy)
+"""
+
+import os
+import sys
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from testing_helpers import CORPUS_PATH, FakeEmbeddingClient, base_chunks, make_rag, write_corpus
+
+
+def test_embeddings_are_float32_and_disk_backed():
+    """Only the index keeps a resident copy of the vectors"""
+    print("🧪 Testing compact embedding storage...")
+    with tempfile.TemporaryDirectory() as tmp:
+        rag = make_rag(CORPUS_PATH, tmp)
+        assert rag.initialize()
+        assert rag.embeddings.dtype == np.float32
+        assert isinstance(rag.snapshot.embeddings, np.memmap)
+
+        storage = rag.get_stats()["embedding_storage"]
+        assert storage["embeddings_disk_backed"]
+        assert storage["embeddings_resident_bytes"] == 0
+        assert storage["bytes_per_chunk"] > 0
+        norms = np.linalg.norm(np.asarray(rag.snapshot.embeddings), axis=1)
+        assert np.allclose(norms, 1.0, atol=1e-3)
+        print(f"✅ {storage['bytes_per_chunk']} bytes per chunk")
+
+
+def test_float16_and_reduced_dimensions():
+    """float16 storage with API-side dimension reduction, keyed separately from full-size artifacts"""
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        chunks = base_chunks()
+        write_corpus(corpus, chunks)
+        artifacts = os.path.join(tmp, "artifacts")
+
+        full = make_rag(corpus, artifacts)
+        assert full.initialize()
+
+        client = FakeEmbeddingClient()
+        compact = make_rag(corpus, artifacts, client)
+        compact.embedding_dimensions = 32
+        compact.embedding_dtype = np.dtype("float16")
+        assert compact.compute_fingerprint() != full.compute_fingerprint()
+        assert compact.initialize()
+        assert client.inputs == len(chunks)              # full-size artifacts are not reused
+        assert compact.snapshot.embeddings.shape == (len(chunks), 32)
+        assert compact.snapshot.embeddings.dtype == np.float16
+        assert compact.embed_query("workflow automation").shape == (32,)
+
+        with open(os.path.join(artifacts, compact.fingerprint, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        assert manifest["embedding_dimensions"] == 32 and manifest["embedding_dtype"] == "float16"
+
+        # Incremental reloads keep the compact format
+        chunks[0]["text"] = "Edited chunk about payroll compliance."
+        write_corpus(corpus, chunks)
+        client.inputs = 0
+        assert compact.reload_corpus()
+        assert client.inputs == 1
+        assert compact.snapshot.embeddings.dtype == np.float16
+        assert compact.retrieve("payroll compliance", top_k=1, min_score=0.0)[0]["id"] == chunks[0]["id"]
+
+
+def test_dtype_change_converts_and_saves_artifacts():
+    """Stored float32 artifacts are converted once, saved and served memory-mapped"""
+    with tempfile.TemporaryDirectory() as tmp:
+        assert make_rag(CORPUS_PATH, tmp).initialize()
+
+        client = FakeEmbeddingClient()
+        for _ in range(2):
+            compact = make_rag(CORPUS_PATH, tmp, client)
+            compact.embedding_dtype = np.dtype("float16")
+            assert compact.initialize() and compact.loaded_from_artifacts
+            assert isinstance(compact.snapshot.embeddings, np.memmap)
+            assert compact.snapshot.embeddings.dtype == np.float16
+            assert compact.get_stats()["embedding_storage"]["embeddings_disk_backed"]
+        assert client.inputs == 0
+
+        with open(os.path.join(tmp, compact.fingerprint, "manifest.json"), encoding="utf-8") as f:
+            assert json.load(f)["embedding_dtype"] == "float16"
+        assert compact.retrieve("AI automation for small businesses", min_score=0.0)
+
+
+def test_quantized_index_types():
+    """Scalar-quantized indexes shrink the resident index"""
+    with tempfile.TemporaryDirectory() as tmp:
+        sizes = {}
+        for index_type in ("flat", "sq_fp16", "sq8"):
+            rag = make_rag(CORPUS_PATH, os.path.join(tmp, index_type))
+            rag.index_type = index_type
+            assert rag.initialize()
+            assert rag.retrieve("AI automation for small businesses", min_score=0.0)
+            sizes[index_type] = rag.get_stats()["embedding_storage"]["index_bytes_estimate"]
+        assert sizes["sq8"] < sizes["sq_fp16"] < sizes["flat"]
+
+
+if __name__ == "__main__":
+    test_embeddings_are_float32_and_disk_backed()
+    test_float16_and_reduced_dimensions()
+    test_dtype_change_converts_and_saves_artifacts()
+    test_quantized_index_types()
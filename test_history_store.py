@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test the searchable generation history
+"""
+
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from history_store import HistoryStore
+from rag_eval import HashingEmbeddingClient
+
+EMBEDDER = HashingEmbeddingClient(dimension=256)
+INDUSTRIES = ["dental clinics", "law firms", "bakeries", "schools", "plumbers", "accountants", "gyms", "florists"]
+TASKS = ["invoice reminders", "client onboarding", "appointment scheduling", "inventory forecasting",
+         "review requests", "payroll reports"]
+
+
+def embed(text: str) -> np.ndarray:
+    return np.array(EMBEDDER.embed(text, 256), dtype='float32')
+
+
+def post(i: int, platform: str = "linkedin") -> dict:
+    industry, task = INDUSTRIES[i % len(INDUSTRIES)], TASKS[i % len(TASKS)]
+    return {"topic": f"Automation for {industry}", "description": f"{task} for {industry}", "platform": platform,
+            "prompt": f"Write a {platform} post about {task} for {industry}",
+            "output": f"How {industry} save hours every week with automated {task}. Post {i}.",
+            "metrics": {"word_count": 12}, "engagement": {"comments": [{"text": "Great point"}]}}
+
+
+def test_record_search_and_reload():
+    """Entries are written off-thread, searchable by keyword and vector, and survive a restart"""
+    print("🧪 Testing generation history...")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(tmp, embed=embed)
+        ids = [store.record(post(i, "twitter" if i % 2 else "linkedin")) for i in range(48)]
+        store.flush()
+        assert store.get(ids[5])["prompt"].startswith("Write a twitter post")
+
+        for mode in ("keyword", "vector", "hybrid"):
+            results = store.search("automated payroll reports for accountants", top_k=3, mode=mode)
+            assert results and "payroll reports" in results[0]["output"], mode
+            assert "prompt" not in results[0] and "engagement" not in results[0]
+        twitter = store.search("florists", platform="twitter", top_k=20)
+        assert twitter and all(result["platform"] == "twitter" for result in twitter)
+        recent = store.search(top_k=2)
+        assert [result["id"] for result in recent] == [ids[47], ids[46]]
+        store.close()
+
+        reloaded = HistoryStore(tmp, embed=embed)
+        stats = reloaded.get_stats()
+        assert stats["entries"] == 48 and stats["embedded_entries"] == 48
+        assert reloaded.search("payroll reports accountants", top_k=1, mode="vector")[0]["id"] == \
+            store.search("payroll reports accountants", top_k=1, mode="vector")[0]["id"]
+        reloaded.close()
+        print("✅ History recorded, searched and reloaded")
+
+
+def test_partial_entry_and_embedding_failure():
+    """A torn last line is dropped; without embeddings search falls back to keywords"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(tmp, embed=embed)
+        store.record(post(0))
+        store.close()
+        with open(os.path.join(tmp, "history.jsonl"), "a", encoding="utf-8") as f:
+            f.write('{"id": "torn", "outp')
+
+        def unavailable(text):
+            raise TimeoutError("embedding API unavailable")
+
+        offline = HistoryStore(tmp, embed=unavailable)
+        assert offline.get_stats()["entries"] == 1
+        offline.record(post(1))
+        offline.flush()
+        results = offline.search("law firms onboarding", top_k=5, mode="vector")
+        assert results[0]["description"] == "client onboarding for law firms"
+        stats = offline.get_stats()
+        assert stats["entries"] == 2 and stats["embedded_entries"] == 1 and stats["embedding_errors"] == 2
+        offline.close()
+
+
+def test_filters_apply_before_ranking():
+    """A rare platform or a recent cutoff still finds its entries among many better keyword matches"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(tmp, embed=embed)
+        assert store.search(top_k=5) == []
+        for i in range(300):
+            store.record(post(i))
+        rare = store.record(dict(post(7, "instagram"), created_at="2030-01-01T00:00:00+00:00"))
+        store.flush()
+
+        for mode in ("keyword", "vector", "hybrid"):
+            results = store.search("automated invoice reminders for dental clinics", top_k=1, mode=mode,
+                                   platform="instagram")
+            assert [result["id"] for result in results] == [rare], mode
+        assert [result["id"] for result in store.search("dental clinics", since="2029-12-31T00:00:00")] == [rare]
+        assert store.search("dental clinics", platform="tiktok") == []
+        assert "prompt" in store.get(rare) and not hasattr(store, "_entries")
+
+        for kwargs in ({"top_k": 0}, {"since": "last tuesday"}):
+            try:
+                store.search("dental clinics", **kwargs)
+                assert False, f"expected ValueError for {kwargs}"
+            except ValueError:
+                pass
+        store.close()
+        print("✅ Filters applied before ranking")
+
+
+def test_search_latency_on_large_history():
+    """Tens of thousands of posts are searched in tens of milliseconds"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(tmp)
+        for i in range(20000):
+            store.record(post(i))
+            if i % 500 == 0:
+                store.flush()
+        store.flush()
+
+        start_time = time.time()
+        for _ in range(10):
+            results = store.search("automated invoice reminders for dental clinics", top_k=10, mode="keyword")
+        elapsed_ms = (time.time() - start_time) * 100
+        assert results and elapsed_ms < 100
+        store.close()
+        print(f"✅ Keyword search over 20000 posts: {elapsed_ms:.1f}ms")
+
+
+if __name__ == "__main__":
+    test_record_search_and_reload()
+    test_partial_entry_and_embedding_failure()
+    test_filters_apply_before_ranking()
+    test_search_latency_on_large_history()
+    print("\n🎉 All generation history tests passed!")
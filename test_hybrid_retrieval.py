@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test BM25 lexical retrieval, hybrid RRF fusion and the embedding-free fallback
+"""
+
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from bm25_index import BM25Index, reciprocal_rank_fusion, tokenize
+from testing_helpers import CORPUS_PATH, FakeEmbeddingClient, filtered_corpus, make_rag, write_corpus
+
+
+class FailingEmbeddingClient(FakeEmbeddingClient):
+    """Embedding client whose API is down"""
+
+    def __init__(self):
+        super().__init__()
+        self.failing = True
+
+    def create(self, model, input, dimensions=None, **kwargs):
+        if self.failing:
+            self.calls += 1
+            raise ConnectionError("embeddings API unavailable")
+        return super().create(model, input, dimensions=dimensions, **kwargs)
+
+
+def test_bm25_ranks_exact_terms():
+    """BM25 ranks chunks containing rare query terms first and honours masks"""
+    print("🧪 Testing BM25 index...")
+    chunks = [
+        {"text": "Workflow automation for school reporting systems"},
+        {"text": "Automation automation automation everywhere"},
+        {"text": "Integrating the Xero API with CRM pipelines"},
+        {"text": "The and of with"},
+    ]
+    index = BM25Index(chunks)
+    assert tokenize("The Xero-API and CRM") == ["xero-api", "crm"]
+    assert index.search("xero API", top_k=2)[0][0] == 2
+    assert index.search("school reporting automation", top_k=1)[0][0] == 0
+    assert index.search("the and", top_k=3) == []
+
+    mask = np.array([False, True, True, True])
+    assert all(pos != 0 for pos, _ in index.search("school reporting automation", top_k=3, mask=mask))
+
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1]])
+    assert [pos for pos, _ in fused] == [1, 3, 2]
+    print("✅ BM25 ranking and masks work")
+
+
+def test_lexical_mode_makes_no_embedding_calls():
+    """Pure lexical retrieval never touches the embeddings API"""
+    with tempfile.TemporaryDirectory() as tmp:
+        rag = make_rag(CORPUS_PATH, tmp)
+        assert rag.initialize()
+        calls = rag.client.calls
+
+        results = rag.retrieve("AI automation for small businesses", top_k=3, mode="lexical")
+        assert results
+        assert rag.client.calls == calls
+        assert all(r["retrieval_mode"] == "lexical" and r["similarity_score"] is None for r in results)
+        assert [r["rank"] for r in results] == list(range(1, len(results) + 1))
+        print("✅ Lexical mode served results with zero embedding calls")
+
+
+def test_hybrid_fuses_vector_and_lexical_rankings():
+    """Hybrid results carry both scores and respect metadata filters"""
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        chunks = filtered_corpus()
+        write_corpus(corpus, chunks)
+        by_id = {chunk["id"]: chunk for chunk in chunks}
+
+        rag = make_rag(corpus, os.path.join(tmp, "artifacts"))
+        assert rag.initialize()
+        assert rag.retrieval_mode == "hybrid"
+
+        results = rag.retrieve("founder experience", top_k=5, min_score=-1.0, filters={"platform": "stackoverflow"})
+        assert len(results) == 5
+        assert all(r["retrieval_mode"] == "hybrid" and "rrf_score" in r for r in results)
+        assert all(by_id[r["id"]]["section"] != "About the Founder" for r in results)
+        scores = [r["rrf_score"] for r in results]
+        assert scores == sorted(scores, reverse=True)
+
+        vector = rag.retrieve("founder experience", top_k=5, min_score=-1.0, mode="vector")
+        assert all(r["retrieval_mode"] == "vector" and r["similarity_score"] is not None for r in vector)
+        assert rag.get_stats()["retrieval_counts"]["hybrid"] == 1
+        print("✅ Hybrid retrieval fused both rankings")
+
+
+def test_hybrid_applies_min_score_to_lexical_hits():
+    """Chunks found only by BM25 still need a vector similarity of at least min_score"""
+    with tempfile.TemporaryDirectory() as tmp:
+        rag = make_rag(CORPUS_PATH, tmp)
+        assert rag.initialize()
+        query = "AI automation for small businesses"
+        assert rag.retrieve(query, top_k=3, mode="lexical")
+
+        unfiltered = rag.retrieve(query, top_k=3, min_score=-1.0)
+        similarities = [r["similarity_score"] for r in unfiltered]
+        assert unfiltered and all(score is not None for score in similarities)
+
+        threshold = sorted(similarities)[len(similarities) // 2]
+        kept = rag.retrieve(query, top_k=3, min_score=threshold)
+        assert kept and all(r["similarity_score"] >= threshold for r in kept)
+        assert rag.retrieve(query, top_k=3, min_score=max(similarities) + 1e-3) == []
+
+
+def test_embedding_failure_falls_back_to_lexical():
+    """A failing embeddings API degrades hybrid retrieval to BM25 instead of returning nothing"""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = FailingEmbeddingClient()
+        client.failing = False
+        rag = make_rag(CORPUS_PATH, tmp, client)
+        assert rag.initialize()
+
+        client.failing = True
+        results = rag.retrieve("automation consulting", top_k=3)
+        assert results
+        assert all(r["retrieval_mode"] == "lexical" for r in results)
+        assert rag.retrieve("automation consulting", top_k=3, mode="vector") == []
+        assert rag.get_stats()["retrieval_counts"]["lexical_fallbacks"] == 1
+        print("✅ Embedding failures fell back to lexical retrieval")
+
+
+def test_startup_without_embeddings_serves_lexical_results():
+    """With the API down at startup the system still initializes and answers from BM25"""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = FailingEmbeddingClient()
+        rag = make_rag(CORPUS_PATH, tmp, client)
+        assert rag.initialize()
+        stats = rag.get_stats()
+        assert stats["is_loaded"] and not stats["vector_index_ready"]
+        assert rag._artifact_manifests() == []
+
+        rag.vector_retry_interval = 3600
+        rag._next_vector_retry = time.monotonic() + 3600
+        assert rag.get_context("automation consulting", top_k=2)
+
+        # Once the API is back, the next retrieval after the retry interval rebuilds the vector index
+        client.failing = False
+        rag._next_vector_retry = 0.0
+        rag.retrieve("automation consulting", top_k=2)
+        assert rag.wait_for_reload(timeout=30)
+        assert rag.get_stats()["vector_index_ready"]
+
+        vector_only = make_rag(CORPUS_PATH, os.path.join(tmp, "vector"), FailingEmbeddingClient())
+        vector_only.retrieval_mode = "vector"
+        assert not vector_only.initialize()
+        print("✅ Lexical-only snapshot served results without embeddings")
+
+
+def test_bm25_query_latency():
+    """BM25 queries over a few thousand chunks need no network and stay fast"""
+    chunks = filtered_corpus(5000)
+    index = BM25Index(chunks)
+    start = time.perf_counter()
+    for _ in range(200):
+        index.search("automation workflow integration client", top_k=10)
+    per_query = (time.perf_counter() - start) / 200
+    print(f"⏱️ BM25 query over {len(chunks)} chunks: {per_query * 1e6:.0f} µs")
+    assert per_query < 0.05
+
+
+if __name__ == "__main__":
+    test_bm25_ranks_exact_terms()
+    test_lexical_mode_makes_no_embedding_calls()
+    test_hybrid_fuses_vector_and_lexical_rankings()
+    test_hybrid_applies_min_score_to_lexical_hits()
+    test_embedding_failure_falls_back_to_lexical()
+    test_startup_without_embeddings_serves_lexical_results()
+    test_bm25_query_latency()
+    print("\n🎉 All hybrid retrieval tests passed!")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test the local-first industry classifier
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from industry_classifier import IndustryClassifier
+from prompt_library import BarranaPromptLibrary
+
+
+def _industries():
+    library = BarranaPromptLibrary()
+    return library.get_engagement_config()['industry_detection']['common_industries']
+
+
+def test_confident_descriptions_stay_local():
+    """Clear descriptions are classified without calling the LLM"""
+    print("🧪 Testing local industry classification...")
+
+    llm_calls = []
+    classifier = IndustryClassifier(_industries(), llm_fallback=lambda d: llm_calls.append(d) or "technology")
+
+    cases = {
+        "AI chatbots that cut no-shows for dental clinics and medical practices": "healthcare",
+        "Automated school reporting for teachers and students": "education",
+        "Recover abandoned cart revenue for Shopify e-commerce stores": "e-commerce",
+        "Menu and reservations automation for busy restaurants": "restaurant",
+        "Lead follow-up for realtors handling property listings": "real_estate",
+    }
+    for description, expected in cases.items():
+        assert classifier.classify(description) == expected, description
+        print(f"✅ {expected}: {description}")
+
+    assert llm_calls == []
+
+
+def test_ambiguous_descriptions_use_llm_once():
+    """Ambiguous inputs go to the LLM once and are then served from cache"""
+    llm_calls = []
+    classifier = IndustryClassifier(_industries(), llm_fallback=lambda d: llm_calls.append(d) or "consulting")
+
+    description = "How AI can transform small business operations"
+    assert classifier.classify(description) == "consulting"
+    assert classifier.classify("  how AI can transform   small business operations ") == "consulting"
+    assert len(llm_calls) == 1
+
+    stats = classifier.get_stats()
+    assert stats["llm_calls"] == 1
+    assert stats["cache_hits"] == 1
+    assert stats["llm_calls_avoided"] == 1
+    print(f"✅ Stats: {stats}")
+
+
+def test_unknown_llm_answers_map_to_general_business():
+    """LLM answers outside the industry list are normalized"""
+    classifier = IndustryClassifier(_industries(), llm_fallback=lambda d: "space mining")
+    assert classifier.classify("Something vague") == "general_business"
+
+
+def test_concurrent_lookups_share_one_llm_call():
+    """Platforms classifying the same ambiguous description at once wait for a single LLM call"""
+    llm_calls = []
+
+    def slow_llm(description):
+        llm_calls.append(description)
+        time.sleep(0.1)
+        return "consulting"
+
+    classifier = IndustryClassifier(_industries(), llm_fallback=slow_llm)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(classifier.classify("Growing a small business")))
+               for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["consulting"] * 6 and len(llm_calls) == 1
+    stats = classifier.get_stats()
+    assert stats["llm_calls"] == 1 and stats["coalesced_llm_calls"] + stats["cache_hits"] == 5
+
+
+def test_generic_words_do_not_decide_the_industry():
+    """Words every business uses ('clients', 'platform', 'members', 'health') don't pick an industry"""
+    classifier = IndustryClassifier(_industries())
+    for description in ["A platform that keeps clients and members happy", "Improve the health of your pipeline"]:
+        assert classifier.classify_locally(description) is None, description
+
+
+if __name__ == "__main__":
+    test_confident_descriptions_stay_local()
+    test_ambiguous_descriptions_use_llm_once()
+    test_unknown_llm_answers_map_to_general_business()
+    test_concurrent_lookups_share_one_llm_call()
+    test_generic_words_do_not_decide_the_industry()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test metadata-filtered RAG retrieval (bitmaps + FAISS ID selectors)
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from metadata_filter import MetadataIndex
+from testing_helpers import filtered_corpus, make_rag, write_corpus
+
+
+def test_bitmaps_evaluate_filters():
+    """Include/exclude filters and platform rules resolve to the right chunk positions"""
+    print("🧪 Testing metadata bitmaps...")
+    chunks = filtered_corpus(30)
+    index = MetadataIndex(chunks, np.arange(30, dtype="int64"))
+
+    def matching(filters):
+        bitmap = index.evaluate(index.canonical(filters))
+        return set(range(30)) if bitmap is None else set(index.positions(bitmap).tolist())
+
+    assert matching(None) == set(range(30))
+    assert matching({"tags": "founder"}) == {i for i in range(30) if i % 3 == 1}
+    assert matching({"section": ["Services Questions"], "source": "Source 0"}) == {i for i in range(30) if i % 6 == 0}
+    assert matching({"exclude_tags": ["founder"]}) == {i for i in range(30) if i % 3 != 1}
+    assert matching({"platform": "stackoverflow"}) == {i for i in range(30) if i % 3 != 1 and i != 7}
+    assert 7 in matching({"platform": "linkedin"})
+    assert index.canonical({"platform": "twitter"}) == index.canonical({"platform": "reddit"})
+    print("✅ Bitmap filters resolve correctly")
+
+
+def test_filtered_retrieval_happens_inside_the_search():
+    """Filtered queries return top_k matching chunks without over-fetching"""
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        chunks = filtered_corpus()
+        write_corpus(corpus, chunks)
+        by_id = {chunk["id"]: chunk for chunk in chunks}
+
+        for index_type in ("flat", "hnsw", "ivf_flat"):
+            rag = make_rag(corpus, os.path.join(tmp, index_type))
+            rag.index_type = index_type
+            rag.index_params = {"nprobe": 64}
+            assert rag.initialize()
+
+            results = rag.retrieve("founder experience and background", top_k=5, min_score=-1.0,
+                                   filters={"platform": "stackoverflow"})
+            assert len(results) == 5, index_type
+            assert all(by_id[r["id"]]["section"] != "About the Founder" for r in results)
+
+            results = rag.retrieve("automation workflow", top_k=4, min_score=-1.0, filters={"tags": ["founder"]})
+            assert len(results) == 4
+            assert all("founder" in r["tags"] for r in results)
+
+            assert rag.retrieve("automation", top_k=3, min_score=-1.0, filters={"section": "Missing"}) == []
+        assert rag.get_stats()["metadata_filters"]["cached_selectors"] >= 2
+
+
+if __name__ == "__main__":
+    test_bitmaps_evaluate_filters()
+    test_filtered_retrieval_happens_inside_the_search()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test the cross-post phrase reuse store
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from phrase_store import PhraseReuseStore
+
+
+def _cluster(i):
+    return [
+        {"id": "c1", "speaker": "Person A", "text": f"How would this scale for a {i + 2}-person team?"},
+        {"id": "c2", "speaker": "Barrana", "text": f"Happy to walk through it. Setup usually takes {i + 1} weeks."},
+        {"id": "c3", "speaker": "Person A", "text": "Does the reminder flow support SMS as well?"},
+    ]
+
+
+def test_overused_phrases_and_openers():
+    """Phrases and openers past max_phrase_reuse are reported per persona"""
+    print("🧪 Testing phrase reuse reporting...")
+
+    store = PhraseReuseStore(store_dir=None, width=1 << 16, max_phrase_reuse=2)
+    first_report = store.report_cluster(_cluster(0))
+    assert first_report["overused_phrases"] == {}
+
+    for i in range(3):
+        store.record_cluster(_cluster(i))
+
+    report = store.report_cluster(_cluster(9))
+    assert "happy to walk through" in report["overused_phrases"]
+    assert {"id": "c2", "persona": "Barrana", "opener": "happy to walk", "count": 3} in report["overused_openers"]
+    assert report["repeated_question_structures"]["how would this"] == 3
+    assert store.phrase_count("walk through it") == 3
+
+    openers = store.overused_openers("Barrana")
+    assert openers == {"Barrana": [("happy to walk", 3)]}
+
+    # Both reports flag a key as soon as its count reaches max_phrase_reuse
+    fresh = PhraseReuseStore(store_dir=None, width=1 << 16, max_phrase_reuse=2)
+    for i in range(2):
+        fresh.record_cluster(_cluster(i))
+    assert {"id": "c2", "persona": "Barrana", "opener": "happy to walk", "count": 2} in \
+        fresh.report_cluster(_cluster(9))["overused_openers"]
+    assert fresh.overused_openers("Barrana") == {"Barrana": [("happy to walk", 2)]}
+    assert store.dominant_persona_counts() == {"Person A": 3}
+    print(f"✅ Over-used phrases: {list(report['overused_phrases'])[:5]}")
+
+
+def test_generic_phrasing_is_not_flagged():
+    """Courtesy phrases every thread uses don't make a normal cluster look reused"""
+    store = PhraseReuseStore(store_dir=None, width=1 << 16, max_phrase_reuse=2)
+    for topic in ["invoice matching", "appointment reminders", "intake forms"]:
+        store.record_cluster([
+            {"id": "c1", "speaker": "Person A", "text": f"We set up {topic} last quarter, thanks for sharing!"},
+            {"id": "c2", "speaker": "Barrana", "text": f"Good to hear. Let us know how {topic} works out."},
+        ])
+
+    report = store.report_cluster([
+        {"id": "c1", "speaker": "Person B", "text": "Payroll exports were our bottleneck, thanks for sharing!"},
+        {"id": "c2", "speaker": "Barrana", "text": "That one is common. Let us know if the export mapping helps."},
+    ])
+    assert report["overused_phrases"] == {} and report["overused_openers"] == []
+    assert store.phrase_count("thanks for sharing") == 0 and store.phrase_count("let us know") == 0
+    assert store.phrase_count("last quarter thanks for") == 3
+    print("✅ Generic phrasing is not flagged")
+
+
+def test_store_persists_incrementally():
+    """Counts survive reopening the memory-mapped table"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PhraseReuseStore(store_dir=tmp, width=1 << 16, flush_every=2)
+        sidecar_path = os.path.join(tmp, "phrase_store.json")
+        store.record_cluster(_cluster(0))
+        with open(sidecar_path, encoding="utf-8") as f:
+            assert json.load(f)["packages_recorded"] == 0
+        store.record_cluster(_cluster(1))
+        store.record_cluster(_cluster(2))
+        with open(sidecar_path, encoding="utf-8") as f:
+            assert json.load(f)["packages_recorded"] == 2
+        store.close()
+
+        reopened = PhraseReuseStore(store_dir=tmp, width=1 << 16)
+        assert reopened.packages_recorded == 3
+        assert reopened.opener_count("Person A", "Does the reminder flow") == 3
+        assert os.path.getsize(os.path.join(tmp, "phrase_counts.u32")) == 4 * 4 * (1 << 16)
+        reopened.close()
+
+        for shape in ({"width": 1 << 15}, {"depth": 3, "width": 1 << 16}):
+            try:
+                PhraseReuseStore(store_dir=tmp, **shape)
+                assert False, f"expected ValueError for {shape}"
+            except ValueError:
+                pass
+        print("✅ Phrase counts reloaded from disk")
+
+
+if __name__ == "__main__":
+    test_overused_phrases_and_openers()
+    test_generic_phrasing_is_not_flagged()
+    test_store_persists_incrementally()
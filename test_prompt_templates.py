@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test precompiled per-platform prompt templates
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from prompt_library import BarranaPromptLibrary
+
+LIBRARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Barrana-Merged-Prompt-Library-v3.1.json")
+
+
+def test_compiled_prompt_matches_full_render():
+    """Filling the compiled template gives exactly the fully rendered prompt on every platform"""
+    print("🧪 Testing compiled prompt templates...")
+    library = BarranaPromptLibrary(LIBRARY_PATH)
+    description = "AI for {platform} clinics: 100% of \x00description\x00 reminders → automated"
+    keywords = (["AI automation", "workflow automation"], ["SMB"])
+    platforms = library.get_available_platforms()
+    assert sorted(library._compiled_prompts) == sorted(platforms)
+
+    for platform in platforms:
+        expected = library._render_prompt(library.get_platform_config(platform), platform, description,
+                                          ', '.join(keywords[0]), ', '.join(keywords[1]), "2")
+        assert library.build_prompt(description, platform, *keywords) == expected, platform
+
+    with_context = library.build_prompt(description, "linkedin", *keywords, rag_context="Barrana {context}")
+    assert "Barrana {context}" in with_context and description in with_context
+    try:
+        library.build_prompt(description, "myspace")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    print(f"✅ {len(platforms)} compiled templates match the full render")
+
+
+def test_reload_recompiles_templates():
+    """Editing the library and reloading changes the next prompt"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "library.json")
+        shutil.copy(LIBRARY_PATH, path)
+        library = BarranaPromptLibrary(path)
+        assert "Quarterly review voice" not in library.build_prompt("invoice automation", "linkedin")
+
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        data["platforms"]["linkedin"]["voice"] = "Quarterly review voice"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        library.reload_library()
+        assert "Quarterly review voice" in library.build_prompt("invoice automation", "linkedin")
+        print("✅ Templates recompiled on reload")
+
+
+if __name__ == "__main__":
+    test_compiled_prompt_matches_full_render()
+    test_reload_recompiles_templates()
+    print("\n🎉 All prompt template tests passed!")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test sentence-level provenance of generated content
+"""
+
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from provenance import ProvenanceIndex, split_sentences, summarize_provenance
+from rag_eval import synthetic_eval_set
+from testing_helpers import FakeEmbeddingClient, make_registry
+
+POST = """Small teams lose hours to manual work.
+A dental clinic cut appointment no-shows with automated SMS reminders! Our founder once sailed around Iceland in a rowing boat.
+Barrana offers workflow automation and document processing for small and medium businesses.
+Thoughts?"""
+
+
+def test_sentences_match_their_source_chunks():
+    """Copied claims match their chunk; invented claims and short lines don't"""
+    print("🧪 Testing provenance index...")
+    chunks, _ = synthetic_eval_set(50, queries=1)
+    index = ProvenanceIndex(chunks)
+    text = f"{chunks[7]['text']} Our mascot is a purple giraffe named Steve.\nThoughts?"
+    assert split_sentences(text)[1:] == ["Our mascot is a purple giraffe named Steve.", "Thoughts?"]
+
+    sentences = index.match(text)
+    assert sentences[0]["matches"][0] == (7, 1.0)
+    assert sentences[1]["matches"] == []
+    assert sentences[2]["shingles"] == 0
+
+    for sentence in sentences:
+        sentence["chunks"] = [{"position": pos, "overlap": overlap} for pos, overlap in sentence.pop("matches")]
+    provenance = summarize_provenance(sentences)
+    assert [s["supported"] for s in provenance["sentences"]] == [True, False, False]
+    assert provenance["checked_sentences"] == 2 and provenance["coverage"] == 0.5
+    print("✅ Sentences traced to their chunks")
+
+
+def test_registry_traces_across_corpora():
+    """Each sentence gets its best chunks from every corpus, tagged with the corpus"""
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = make_registry(tmp, FakeEmbeddingClient())
+        assert registry.initialize()
+        provenance = registry.trace_provenance(POST)
+        sentences = provenance["sentences"]
+        assert len(sentences) == 5
+
+        dental, iceland, services = sentences[1], sentences[2], sentences[3]
+        assert dental["supported"] and dental["chunks"][0]["id"] == "case_0"
+        assert dental["chunks"][0]["corpus"] == "case_studies" and dental["chunks"][0]["section"] == "Dental clinic"
+        assert not iceland["supported"]
+        assert services["supported"] and services["chunks"][0]["corpus"] == "overview"
+        assert services["chunks"][0]["id"] == "barrana_2"
+        assert provenance["supported_sentences"] == 2 and not sentences[4]["checked"]
+
+        only_cases = registry.trace_provenance(POST, corpora=["case_studies"])
+        assert not only_cases["sentences"][3]["supported"]
+        assert registry.get("overview").get_stats()["provenance_index"]["documents"] == 8
+        registry.stop()
+        print(f"✅ Provenance traced in {provenance['elapsed_ms']}ms")
+
+
+def test_tracing_a_post_takes_milliseconds():
+    """Matching a long post against a large corpus uses only the precomputed index"""
+    chunks, _ = synthetic_eval_set(20000, queries=1)
+    index = ProvenanceIndex(chunks)
+    post = " ".join(chunk["text"] for chunk in chunks[:15]) + " Nobody has ever automated a lighthouse."
+
+    start_time = time.perf_counter()
+    for _ in range(10):
+        sentences = index.match(post)
+    elapsed_ms = (time.perf_counter() - start_time) * 100
+    assert len(sentences) == 16 and all(sentence["matches"] for sentence in sentences[:15])
+    assert elapsed_ms < 25
+    print(f"✅ 16 sentences traced against 20000 chunks in {elapsed_ms:.2f}ms")
+
+
+if __name__ == "__main__":
+    test_sentences_match_their_source_chunks()
+    test_registry_traces_across_corpora()
+    test_tracing_a_post_takes_milliseconds()
+    print("\n🎉 All provenance tests passed!")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test micro-batched RAG query embedding and search
+"""
+
+import os
+import sys
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from query_batcher import MicroBatcher
+from testing_helpers import CORPUS_PATH, make_rag
+
+
+def test_batcher_groups_concurrent_items():
+    """Concurrent submits share one batch and get their own results back"""
+    print("🧪 Testing micro-batcher...")
+    batches = []
+
+    def process(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(process, window_ms=50, max_batch=8)
+    results = {}
+    threads = [threading.Thread(target=lambda n=n: results.__setitem__(n, batcher.submit(n))) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.close()
+
+    assert results == {n: n * 2 for n in range(8)}
+    assert len(batches) < 8
+    assert batcher.get_stats()["items"] == 8
+    print(f"✅ 8 concurrent items processed in {len(batches)} batch(es)")
+
+
+def test_batcher_propagates_errors():
+    def process(items):
+        raise ValueError("boom")
+
+    batcher = MicroBatcher(process, window_ms=1)
+    try:
+        batcher.submit("x")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    assert batcher.get_stats()["errors"] == 1
+    batcher.close()
+
+
+def test_batched_retrieval_matches_unbatched():
+    """Concurrent retrievals share embedding requests and return the same results"""
+    with tempfile.TemporaryDirectory() as tmp:
+        rag = make_rag(CORPUS_PATH, tmp)
+        assert rag.initialize()
+        queries = [f"AI automation question {n} for small businesses" for n in range(16)]
+        expected = {q: [c["id"] for c in rag.retrieve(q, top_k=2, min_score=0.0)] for q in queries}
+
+        rag.query_cache.clear()
+        rag.client.calls = 0
+        rag.enable_query_batching(window_ms=50, max_batch=16)
+        barrier = threading.Barrier(len(queries))
+        results = {}
+
+        def run(query):
+            barrier.wait()
+            results[query] = [c["id"] for c in rag.retrieve(query, top_k=2, min_score=0.0)]
+
+        threads = [threading.Thread(target=run, args=(q,)) for q in queries]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = rag.get_stats()["query_batching"]
+        rag.disable_query_batching()
+        assert results == expected
+        assert rag.client.calls == stats["batches"] < len(queries)
+        assert stats["max_batch_seen"] > 1
+
+
+if __name__ == "__main__":
+    test_batcher_groups_concurrent_items()
+    test_batcher_propagates_errors()
+    test_batched_retrieval_matches_unbatched()
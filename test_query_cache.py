@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test the query-embedding cache and request-scoped RAG memoization
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from query_cache import QueryEmbeddingCache, RequestMemo, normalize_query
+from testing_helpers import CORPUS_PATH, make_rag
+
+
+def test_lru_limits_and_stats():
+    """Entries are evicted by count and by bytes, and hits are counted"""
+    print("🧪 Testing query embedding cache...")
+    cache = QueryEmbeddingCache(max_entries=2, max_bytes=1024)
+    cache.put("m", "one", np.ones(8))
+    cache.put("m", "two", np.ones(8))
+    assert cache.get("m", "one") is not None      # "one" becomes most recent
+    cache.put("m", "three", np.ones(8))
+    assert cache.get("m", "two") is None          # least recently used was evicted
+    assert cache.get("m", "three") is not None
+    assert cache.get("other-model", "three") is None
+
+    stats = cache.get_stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2 and stats["misses"] == 2
+    assert stats["hit_rate"] == 0.5
+
+    cache.put("m", "big", np.ones(200))             # 800 bytes pushes the total over 1 KB
+    assert cache.get_stats()["bytes"] <= 1024
+
+    vector = cache.get("m", "big")
+    assert not vector.flags.writeable
+    print("✅ LRU cache enforces limits and reports hit rate")
+
+
+def test_normalized_keys():
+    assert normalize_query("  AI   automation\n for\tsmall businesses ") == "AI automation for small businesses"
+    cache = QueryEmbeddingCache()
+    cache.put("m", "AI automation", np.ones(4))
+    assert cache.get("m", " AI  automation ") is not None
+    assert cache.get("m", "ai automation") is None
+
+
+def test_rag_embeds_each_query_once():
+    """Repeated queries hit the cache instead of the embedding API"""
+    with tempfile.TemporaryDirectory() as tmp:
+        rag = make_rag(CORPUS_PATH, tmp)
+        assert rag.initialize()
+        calls = rag.client.calls
+
+        first = rag.retrieve("AI automation for small businesses", min_score=0.0)
+        for _ in range(20):
+            assert rag.retrieve("AI automation  for small businesses", min_score=0.0) == first
+        assert rag.client.calls == calls + 1
+        assert rag.get_stats()["query_cache"]["hits"] == 20
+
+
+def test_request_memo_shares_context_across_platforms():
+    """One request computes the RAG context once for all platforms"""
+    with tempfile.TemporaryDirectory() as tmp:
+        rag = make_rag(CORPUS_PATH, tmp)
+        assert rag.initialize()
+        memo = RequestMemo()
+        description = "How small teams automate invoicing"
+        contexts = [memo.get_or_compute(("rag_context", description),
+                                        lambda: rag.get_context(description, min_score=0.0))
+                    for _ in range(21)]
+        assert len(set(contexts)) == 1
+        assert memo.misses == 1 and memo.hits == 20
+        assert rag.get_stats()["query_cache"]["misses"] == 1
+
+
+if __name__ == "__main__":
+    test_lru_limits_and_stats()
+    test_normalized_keys()
+    test_rag_embeds_each_query_once()
+    test_request_memo_shares_context_across_platforms()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test the offline RAG retrieval evaluation harness
+"""
+
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from rag_eval import (CachedEmbeddingClient, HashingEmbeddingClient, evaluate, load_eval_set, ranking_metrics,
+                      synthetic_eval_set)
+from testing_helpers import CORPUS_PATH, write_corpus
+
+EVAL_SET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "barrana_rag_eval.jsonl")
+
+
+def test_ranking_metrics():
+    """Recall@k is capped at k relevant chunks; MRR uses the first relevant rank"""
+    print("🧪 Testing ranking metrics...")
+    metrics = ranking_metrics([["a", "b", "c"], ["x", "a"], []], [["b"], ["a", "b", "c", "d"], ["a"]], k=3)
+    assert abs(metrics["recall@3"] - (1 + 1 / 3 + 0) / 3) < 1e-9
+    assert abs(metrics["mrr"] - (1 / 2 + 1 / 2 + 0) / 3) < 1e-9
+    assert abs(metrics["empty_rate"] - 1 / 3) < 1e-9
+    print("✅ Metrics computed")
+
+
+def test_bundled_eval_set_matches_corpus():
+    """Every labeled chunk id exists in the shipped corpus"""
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        ids = {json.loads(line)["id"] for line in f if line.strip()}
+    eval_set = load_eval_set(EVAL_SET_PATH)
+    assert eval_set and all(set(item["relevant"]) <= ids for item in eval_set)
+
+
+def test_evaluate_reports_quality_latency_and_memory():
+    """One configuration is evaluated end to end without network access"""
+    with tempfile.TemporaryDirectory() as tmp:
+        chunks, eval_set = synthetic_eval_set(300, queries=30)
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        write_corpus(corpus, chunks)
+
+        report = evaluate(corpus, eval_set, HashingEmbeddingClient(), index_type="flat", mode="hybrid",
+                          top_k=3, min_score=0.0)
+        assert report["chunks"] == 300 and report["queries"] == 30
+        assert report["recall@3"] > 0.9 and report["mrr"] > 0.9
+        assert 0 < report["p50_ms"] <= report["p99_ms"]
+        assert report["index_bytes"] > 0 and report["corpus_bytes"] > 0
+
+        again = evaluate(corpus, eval_set, HashingEmbeddingClient(), index_type="flat", mode="hybrid",
+                         top_k=3, min_score=0.0)
+        assert (again["recall@3"], again["mrr"]) == (report["recall@3"], report["mrr"])
+        print(f"✅ recall@3={report['recall@3']:.3f}, MRR={report['mrr']:.3f}, p99={report['p99_ms']:.2f}ms")
+
+
+def test_cached_embeddings_replay_offline():
+    """Recorded embeddings are replayed exactly; an offline miss is an error"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, "embeddings.npz")
+        recorder = CachedEmbeddingClient(cache_path, live_client=HashingEmbeddingClient())
+        recorded = recorder.create("model", ["invoice automation", "client onboarding"]).data
+        assert recorder.misses == 2
+        recorder.save()
+
+        replay = CachedEmbeddingClient(cache_path)
+        replayed = replay.create("model", ["client onboarding", "invoice automation"]).data
+        assert np.array_equal(replayed[1].embedding, recorded[0].embedding)
+        try:
+            replay.create("model", ["unseen query"])
+            assert False, "expected KeyError"
+        except KeyError:
+            pass
+        try:
+            replay.create("other-model", ["invoice automation"])
+            assert False, "expected KeyError"
+        except KeyError:
+            pass
+        print("✅ Cached embeddings replayed")
+
+
+if __name__ == "__main__":
+    test_ranking_metrics()
+    test_bundled_eval_set_matches_corpus()
+    test_evaluate_reports_quality_latency_and_memory()
+    test_cached_embeddings_replay_offline()
+    print("\n🎉 All RAG evaluation tests passed!")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test zero-downtime RAG reloads (snapshot swap, background reload, corpus watcher)
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from testing_helpers import FakeEmbeddingClient, base_chunks, make_rag, write_corpus
+
+
+class GatedEmbeddingClient(FakeEmbeddingClient):
+    """Blocks document embedding batches until released (query embeddings pass through)"""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.gate.set()
+        self.waiting = threading.Event()
+
+    def create(self, model, input, **kwargs):
+        if len(input) > 1 or input[0].startswith("Edited"):
+            self.waiting.set()
+            self.gate.wait(10)
+        return super().create(model, input, **kwargs)
+
+
+def test_retrievals_keep_working_during_background_reload():
+    """The old snapshot serves queries until the new one is swapped in"""
+    print("🧪 Testing hot reload...")
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        chunks = base_chunks()
+        write_corpus(corpus, chunks)
+
+        client = GatedEmbeddingClient()
+        rag = make_rag(corpus, os.path.join(tmp, "artifacts"), client)
+        assert rag.initialize()
+        assert rag.get_stats()["version"] == 1
+        swapped_at = rag.get_stats()["swapped_at"]
+
+        chunks[0]["text"] = "Edited chunk about payroll compliance."
+        write_corpus(corpus, chunks)
+
+        client.gate.clear()
+        assert rag.reload_corpus(background=True)
+        assert client.waiting.wait(5)
+
+        # Mid-reload: still loaded, still serving the old version
+        stats = rag.get_stats()
+        assert stats["is_loaded"] and stats["reloading"]
+        assert stats["version"] == 1
+        assert len(rag.retrieve("workflow automation invoice", top_k=3, min_score=0.0)) == 3
+
+        client.gate.set()
+        assert rag.wait_for_reload(5)
+        stats = rag.get_stats()
+        assert stats["version"] == 2
+        assert stats["swapped_at"] >= swapped_at
+        assert not stats["reloading"]
+        assert rag.retrieve("payroll compliance", top_k=1, min_score=0.0)[0]["id"] == chunks[0]["id"]
+        print("✅ Old snapshot served queries while the new one was built")
+
+
+def test_failed_reload_keeps_previous_snapshot():
+    """A broken corpus does not take retrieval down"""
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        write_corpus(corpus, base_chunks())
+        rag = make_rag(corpus, os.path.join(tmp, "artifacts"))
+        assert rag.initialize()
+
+        os.remove(corpus)
+        assert not rag.reload_corpus()
+        stats = rag.get_stats()
+        assert stats["is_loaded"] and stats["version"] == 1
+        assert stats["last_reload_error"]
+        assert rag.retrieve("workflow automation", min_score=0.0)
+
+
+def test_corpus_watch_triggers_reload():
+    """Changing the corpus file reloads it in the background"""
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        chunks = base_chunks()
+        write_corpus(corpus, chunks)
+        rag = make_rag(corpus, os.path.join(tmp, "artifacts"))
+        assert rag.initialize()
+
+        rag.start_corpus_watch(interval=0.05)
+        try:
+            assert rag.get_stats()["watching_corpus"]
+            chunks.append({"id": "watched", "source": "Test", "text": "Chunk added while watching."})
+            write_corpus(corpus, chunks)
+            deadline = time.time() + 5
+            while rag.get_stats()["version"] < 2 and time.time() < deadline:
+                time.sleep(0.05)
+            assert rag.get_stats()["version"] == 2
+            assert rag.get_stats()["chunks_count"] == len(chunks)
+        finally:
+            rag.stop_corpus_watch()
+        assert not rag.get_stats()["watching_corpus"]
+
+
+if __name__ == "__main__":
+    test_retrievals_keep_working_during_background_reload()
+    test_failed_reload_keeps_previous_snapshot()
+    test_corpus_watch_triggers_reload()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test incremental RAG re-embedding (only added or changed chunks hit the embedding API)
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from testing_helpers import FakeEmbeddingClient, base_chunks, make_rag, write_corpus
+
+
+def test_reload_embeds_only_delta():
+    """Changed, added and removed chunks are applied to the index in place"""
+    print("🧪 Testing incremental corpus reload...")
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        chunks = base_chunks()
+        write_corpus(corpus, chunks)
+
+        client = FakeEmbeddingClient()
+        rag = make_rag(corpus, os.path.join(tmp, "artifacts"), client)
+        assert rag.initialize()
+        assert client.inputs == len(chunks)
+        previous = rag.snapshot
+
+        chunks[3]["text"] = "Edited chunk about customer onboarding emails."
+        removed = chunks.pop(4)
+        chunks.append({"id": "extra_new", "source": "Test", "source_title": "Test", "section": "Extra",
+                       "text": "Fresh chunk about quarterly reporting dashboards.", "tags": []})
+        write_corpus(corpus, chunks)
+
+        client.inputs = 0
+        assert rag.reload_corpus()
+        assert client.inputs == 2
+        assert previous.index.ntotal == len(chunks)
+        assert rag.snapshot.version == previous.version + 1
+        assert rag.index.ntotal == len(chunks)
+        assert rag.embeddings.shape[0] == len(chunks)
+        assert rag.last_update["changed"] == 1
+        assert rag.last_update["added"] == 1
+        assert rag.last_update["removed"] == 1
+
+        results = rag.retrieve("customer onboarding emails", top_k=1, min_score=0.0)
+        assert results[0]["id"] == chunks[3]["id"]
+        ids = [c["id"] for c in rag.retrieve("workflow automation invoice", top_k=len(chunks), min_score=0.0)]
+        assert removed["id"] not in ids
+        assert "extra_new" in rag.retrieve("quarterly reporting dashboards", top_k=1, min_score=0.0)[0]["id"]
+        print("✅ Reload embedded only the changed and added chunks")
+
+
+def test_restart_uses_previous_artifacts_as_base():
+    """A changed corpus on startup is diffed against the newest saved artifacts"""
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        artifacts = os.path.join(tmp, "artifacts")
+        chunks = base_chunks()
+        write_corpus(corpus, chunks)
+        assert make_rag(corpus, artifacts).initialize()
+
+        chunks[0]["text"] += " Now with an extra sentence."
+        write_corpus(corpus, chunks)
+        client = FakeEmbeddingClient()
+        rag = make_rag(corpus, artifacts, client)
+        assert rag.initialize()
+        assert client.inputs == 1
+        assert rag.retrieve(chunks[0]["text"], top_k=1, min_score=0.0)[0]["id"] == chunks[0]["id"]
+
+        # The updated state was saved, so the next start needs no embedding at all
+        again = make_rag(corpus, artifacts)
+        assert again.initialize()
+        assert again.client.inputs == 0
+
+
+if __name__ == "__main__":
+    test_reload_embeds_only_delta()
+    test_restart_uses_previous_artifacts_as_base()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test the document ingestion pipeline and concurrent corpus embedding
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import zipfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from context_packer import count_tokens
+from rag_ingest import chunk_paragraphs, extract_sections, ingest_directory
+from rate_limiter import RateLimiter
+from testing_helpers import SlowEmbeddingClient, make_rag
+
+DOCUMENT_XML = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>
+{paragraphs}
+</w:body></w:document>"""
+
+
+def docx_paragraph(text: str, style: str = None) -> str:
+    properties = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    return f"<w:p>{properties}<w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def write_docx(path: str, blocks: list) -> None:
+    paragraphs = "\n".join(docx_paragraph(text, style) for text, style in blocks)
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("word/document.xml", DOCUMENT_XML.format(paragraphs=paragraphs))
+
+
+def sample_documents(folder: str) -> None:
+    write_docx(os.path.join(folder, "Detailed Overview.docx"), [
+        ("Barrana builds automation for small teams.", None),
+        ("Services Questions", "Heading1"),
+        ("What does Barrana automate? Invoices, onboarding and reporting workflows.", None),
+        ("How long does a project take? Most automations ship within four weeks.", None),
+        ("About the Founder", "Heading2"),
+        ("Ikram Rana has built reporting systems for schools for over a decade.", None),
+    ])
+    with open(os.path.join(folder, "faq.md"), "w", encoding="utf-8") as f:
+        f.write("# Pricing\n\nProjects start with a fixed-price audit.\n\n# Support\n\nRetainers cover monitoring.\n")
+    with open(os.path.join(folder, "broken.docx"), "wb") as f:
+        f.write(b"not a zip file")
+
+
+def test_extracts_docx_sections():
+    """Headings start sections; text before the first heading is the introduction"""
+    print("🧪 Testing document extraction...")
+    with tempfile.TemporaryDirectory() as tmp:
+        sample_documents(tmp)
+        _, sections = extract_sections(os.path.join(tmp, "Detailed Overview.docx"))
+        assert [title for title, _ in sections] == ["Introduction", "Services Questions", "About the Founder"]
+        assert len(sections[1][1]) == 2
+        print("✅ Sections extracted from .docx")
+
+
+def test_chunker_respects_token_limit_with_overlap():
+    """Chunks stay under max_tokens and consecutive chunks share trailing text"""
+    sentences = [f"Sentence {i} explains workflow automation step number {i} in detail." for i in range(60)]
+    paragraphs = [" ".join(sentences[i:i + 6]) for i in range(0, 60, 6)]
+    chunks = chunk_paragraphs(paragraphs, max_tokens=80, overlap_tokens=20)
+    assert len(chunks) > 3
+    assert all(count_tokens(chunk) <= 80 + 2 for chunk in chunks)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        last_sentence = previous.replace("\n", " ").split(". ")[-1]
+        assert last_sentence.rstrip(".") in chunk
+    assert chunk_paragraphs(["Short paragraph."], max_tokens=80, overlap_tokens=20) == ["Short paragraph."]
+    print("✅ Token-bounded chunks with overlap")
+
+
+def test_ingest_directory_writes_corpus_and_manifest():
+    """A folder becomes a loadable JSONL corpus and a manifest; broken files are reported"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "docs")
+        os.makedirs(source)
+        sample_documents(source)
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        manifest = ingest_directory(source, corpus, os.path.join(tmp, "manifest.json"), workers=2)
+
+        assert list(manifest["errors"]) == ["broken.docx"]
+        assert manifest["total_chunks"] == 5
+        overview = manifest["sources"]["Detailed Overview.docx"]
+        assert overview["sections"]["Services Questions"] == {"paragraphs": 2, "chunks": 1}
+        with open(os.path.join(tmp, "manifest.json"), encoding="utf-8") as f:
+            assert json.load(f)["total_chunks"] == 5
+
+        with open(corpus, encoding="utf-8") as f:
+            chunks = [json.loads(line) for line in f]
+        assert len({chunk["id"] for chunk in chunks}) == 5
+        assert {chunk["source"] for chunk in chunks} == {"Detailed Overview", "faq"}
+        assert all(chunk["text"] and chunk["chunk_index"] == 1 for chunk in chunks)
+
+        rag = make_rag(corpus, os.path.join(tmp, "artifacts"))
+        assert rag.initialize()
+        assert rag.retrieve("fixed-price audit", top_k=1, mode="lexical")[0]["section"] == "Pricing"
+        print("✅ Ingested folder into corpus and manifest")
+
+
+def test_chunk_ids_are_unique_across_headings_and_folders():
+    """Repeated headings and same-named files in subfolders get distinct chunk ids"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "docs")
+        os.makedirs(os.path.join(source, "sub"))
+        with open(os.path.join(source, "a.md"), "w", encoding="utf-8") as f:
+            f.write("# FAQ\n\nAlpha covers invoice reminders for dental clinics.\n\n"
+                    "# FAQ\n\nGamma explains payroll exports for bakeries.\n")
+        with open(os.path.join(source, "sub", "a.md"), "w", encoding="utf-8") as f:
+            f.write("# FAQ\n\nDelta describes onboarding emails for law firms.\n")
+
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        manifest = ingest_directory(source, corpus, os.path.join(tmp, "manifest.json"), workers=1)
+        with open(corpus, encoding="utf-8") as f:
+            chunks = [json.loads(line) for line in f]
+        assert len(chunks) == 3 and len({chunk["id"] for chunk in chunks}) == 3
+        assert [chunk["text"].split()[0] for chunk in chunks] == ["Alpha", "Gamma", "Delta"]
+        assert sorted(manifest["sources"]) == ["a.md", os.path.join("sub", "a.md")]
+        print(f"✅ Unique chunk ids: {[chunk['id'] for chunk in chunks]}")
+
+
+def test_corpus_embedding_runs_concurrent_batches_in_order():
+    """Batches are embedded concurrently and reassembled in corpus order"""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = SlowEmbeddingClient()
+        rag = make_rag(os.path.join(tmp, "unused.jsonl"), tmp, client)
+        rag.embedding_concurrency = 4
+        rag.embedding_rate_limiter = RateLimiter(0)
+        texts = [f"chunk {i} about topic {i % 13}" for i in range(250)]
+
+        start = time.perf_counter()
+        concurrent = rag._embed_texts(texts, batch_size=25)
+        elapsed = time.perf_counter() - start
+        assert client.peak > 1 and elapsed < 10 * 0.05
+
+        rag.embedding_concurrency = 1
+        sequential = rag._embed_texts(texts, batch_size=25)
+        assert (concurrent == sequential).all()
+        print(f"✅ 10 batches embedded in {elapsed:.2f}s with {client.peak} in flight")
+
+
+def test_rate_limiter_spaces_requests():
+    """The limiter holds the sustained rate after the burst"""
+    limiter = RateLimiter(requests_per_minute=1200, burst=2)
+    start = time.perf_counter()
+    for _ in range(6):
+        limiter.acquire()
+    assert time.perf_counter() - start >= 4 / 20 - 0.02
+    assert RateLimiter(0).acquire() == 0.0
+
+
+if __name__ == "__main__":
+    test_extracts_docx_sections()
+    test_chunker_respects_token_limit_with_overlap()
+    test_ingest_directory_writes_corpus_and_manifest()
+    test_chunk_ids_are_unique_across_headings_and_folders()
+    test_corpus_embedding_runs_concurrent_batches_in_order()
+    test_rate_limiter_spaces_requests()
+    print("\n🎉 All ingestion tests passed!")
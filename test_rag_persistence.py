@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test RAG artifact persistence (offline, with a deterministic fake embedding client)
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from testing_helpers import CORPUS_PATH, make_rag
+from rag_system import BarranaRAGSystem
+
+
+def test_restart_with_unchanged_corpus_makes_no_embedding_calls():
+    """The second start loads embeddings and index from disk"""
+    print("🧪 Testing RAG artifact persistence...")
+    with tempfile.TemporaryDirectory() as tmp:
+        first = make_rag(CORPUS_PATH, tmp)
+        assert first.initialize()
+        assert first.client.calls > 0
+        assert not first.get_stats()["loaded_from_artifacts"]
+
+        second = make_rag(CORPUS_PATH, tmp)
+        assert second.initialize()
+        assert second.client.calls == 0
+        assert second.get_stats()["loaded_from_artifacts"]
+        assert second.index.ntotal == first.index.ntotal
+
+        query = "AI automation for small businesses"
+        assert [c["id"] for c in first.retrieve(query, min_score=0.0)] == \
+               [c["id"] for c in second.retrieve(query, min_score=0.0)]
+        print("✅ Restart reused artifacts with zero embedding calls")
+
+
+def test_changed_corpus_or_model_invalidates_artifacts():
+    """Artifacts are keyed by corpus content and embedding model"""
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        shutil.copy(CORPUS_PATH, corpus)
+        artifacts = os.path.join(tmp, "artifacts")
+
+        rag = make_rag(corpus, artifacts)
+        fingerprint = rag.compute_fingerprint()
+        assert rag.initialize()
+
+        other_model = BarranaRAGSystem(corpus_path=corpus, embedding_model="text-embedding-3-small",
+                                       artifact_dir=artifacts)
+        assert other_model.compute_fingerprint() != fingerprint
+
+        with open(corpus, "a", encoding="utf-8") as f:
+            f.write('\n{"id": "barrana_99", "source": "Test", "text": "A brand new chunk about invoices.", "tags": []}\n')
+        changed = make_rag(corpus, artifacts)
+        assert changed.compute_fingerprint() != fingerprint
+        assert changed.initialize()
+        assert changed.client.calls > 0
+        assert changed.index.ntotal == rag.index.ntotal + 1
+
+
+if __name__ == "__main__":
+    test_restart_with_unchanged_corpus_makes_no_embedding_calls()
+    test_changed_corpus_or_model_invalidates_artifacts()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test the memory-mapped RAG index shared across worker processes
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import faiss
+import numpy as np
+
+from ann_index import build_ann_index, is_memory_mapped, read_index, resolve_params, write_index
+from testing_helpers import SlowEmbeddingClient, base_chunks, make_rag, write_corpus
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+WORKER_SCRIPT = """
+import json, sys
+sys.path.insert(0, {repo!r})
+from testing_helpers import make_rag
+rag = make_rag({corpus!r}, {artifacts!r})
+ok = rag.initialize()
+with open("/proc/self/maps") as f:
+    mapped = {index_file!r} in f.read()
+print(json.dumps({{"ok": ok, "calls": rag.client.calls, "memory_mapped": rag.get_stats()["embedding_storage"]["index_memory_mapped"],
+                  "file_mapped": mapped, "top": rag.retrieve("invoice processing", top_k=1, min_score=0.0, mode="vector")[0]["id"]}}))
+"""
+
+
+def test_index_layout_round_trips_for_every_type():
+    """Mapped and writable reads return the same neighbours as the built index"""
+    print("🧪 Testing shareable index files...")
+    rng = np.random.RandomState(5)
+    vectors = rng.rand(600, 32).astype('float32')
+    faiss.normalize_L2(vectors)
+    ids = np.arange(600, dtype='int64') * 7919 + 13
+    with tempfile.TemporaryDirectory() as tmp:
+        for index_type in ("flat", "sq_fp16", "sq8", "hnsw", "ivf_flat"):
+            params = resolve_params(index_type, {}, len(vectors), vectors.shape[1])
+            index = build_ann_index(vectors, ids, params)
+            expected = index.search(vectors[:20], 5)[1]
+            path = os.path.join(tmp, f"{index_type}.faiss")
+            write_index(index, path)
+
+            mapped = read_index(path, mmap=True)
+            writable = read_index(path, mmap=False)
+            assert is_memory_mapped(mapped) == (index_type != "hnsw")
+            assert not is_memory_mapped(writable)
+            assert (mapped.search(vectors[:20], 5)[1] == expected).all()
+            assert (writable.search(vectors[:20], 5)[1] == expected).all()
+            if index_type != "hnsw":
+                writable.remove_ids(ids[:1])
+                assert writable.ntotal == len(vectors) - 1
+        print("✅ Every index type round-trips; flat, SQ and IVF are mapped")
+
+
+def test_second_process_maps_saved_index_without_building():
+    """A new worker process maps the saved files instead of embedding or building"""
+    if not os.path.exists("/proc/self/maps"):
+        print("⚠️ /proc not available, skipping")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        artifacts = os.path.join(tmp, "artifacts")
+        write_corpus(corpus, base_chunks())
+        rag = make_rag(corpus, artifacts)
+        assert rag.initialize()
+        assert rag.get_stats()["embedding_storage"]["index_memory_mapped"]
+        index_file = os.path.join(artifacts, rag.fingerprint, "index.faiss")
+        expected = rag.retrieve("invoice processing", top_k=1, min_score=0.0, mode="vector")[0]["id"]
+
+        script = WORKER_SCRIPT.format(repo=REPO_DIR, corpus=corpus, artifacts=artifacts, index_file=index_file)
+        output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=120)
+        worker = json.loads(output.stdout.strip().splitlines()[-1])
+        assert worker == {"ok": True, "calls": 0, "memory_mapped": True, "file_mapped": True, "top": expected}
+        print("✅ Worker process mapped the shared index with no embedding calls")
+
+
+def test_concurrent_startup_builds_artifacts_once():
+    """Workers starting together wait for the first build instead of embedding again"""
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        chunks = base_chunks()
+        write_corpus(corpus, chunks)
+        client = SlowEmbeddingClient()
+        workers = [make_rag(corpus, os.path.join(tmp, "artifacts"), client) for _ in range(3)]
+        results = []
+        threads = [threading.Thread(target=lambda rag=rag: results.append(rag.initialize())) for rag in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == [True, True, True]
+        assert client.inputs == len(chunks)
+        assert sum(rag.loaded_from_artifacts for rag in workers) == 2
+        assert all(is_memory_mapped(rag.snapshot.index) for rag in workers)
+        print("✅ Three workers, one build")
+
+
+def test_mmap_can_be_disabled():
+    """RAG_INDEX_MMAP=0 keeps a private in-memory index with identical results"""
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        write_corpus(corpus, base_chunks())
+        mapped = make_rag(corpus, os.path.join(tmp, "artifacts"))
+        assert mapped.initialize()
+
+        os.environ["RAG_INDEX_MMAP"] = "0"
+        try:
+            private = make_rag(corpus, os.path.join(tmp, "artifacts"))
+        finally:
+            del os.environ["RAG_INDEX_MMAP"]
+        assert private.initialize() and private.loaded_from_artifacts
+        assert not is_memory_mapped(private.snapshot.index)
+
+        query = "workflow automation invoice"
+        assert ([(c["id"], c["similarity_score"]) for c in mapped.retrieve(query, top_k=5, min_score=0.0, mode="vector")]
+                == [(c["id"], c["similarity_score"]) for c in private.retrieve(query, top_k=5, min_score=0.0, mode="vector")])
+
+
+if __name__ == "__main__":
+    test_index_layout_round_trips_for_every_type()
+    test_second_process_maps_saved_index_without_building()
+    test_concurrent_startup_builds_artifacts_once()
+    test_mmap_can_be_disabled()
+    print("\n🎉 All shared index tests passed!")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test the timer-wheel rollout scheduler
+"""
+
+import json
+import random
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rollout_scheduler import HierarchicalTimerWheel, RolloutScheduler, parse_duration_range, plan_cluster_rollout
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'comments-engine.json'), encoding='utf-8') as f:
+    TIMING = json.load(f)['timing_and_cadence']
+
+CLUSTER = {"comments": [
+    {"id": "c1", "speaker": "Person A", "type": "new", "reply_to": None, "text": "How long is setup?"},
+    {"id": "c2", "speaker": "Barrana", "type": "reply", "reply_to": "c1", "text": "About two weeks.",
+     "suggested_delay_seconds": 90},
+    {"id": "c3", "speaker": "Person B", "type": "new", "reply_to": None, "text": "What about data?"},
+    {"id": "c4", "speaker": "Barrana", "type": "reply", "reply_to": "c3", "text": "Encrypted end to end."},
+    {"id": "c5", "speaker": "Person B", "type": "reply", "reply_to": "c4", "text": "Good to know."},
+]}
+
+
+def test_parse_duration_range():
+    """timing_and_cadence strings are converted to seconds"""
+    assert parse_duration_range(TIMING['linkedin']['replies']) == (60, 240)
+    assert parse_duration_range(TIMING['linkedin']['rollout_duration']) == (1200, 3600)
+    assert parse_duration_range(TIMING['tiktok']['initial_comments']) == (0, 120)
+
+
+def test_plan_respects_cadence():
+    """Replies follow parents inside the reply window and the first comment lands in the initial window"""
+    print("🧪 Testing rollout planning...")
+    for seed in range(50):
+        plan = {p["comment_id"]: p["offset_seconds"] for p in
+                plan_cluster_rollout(CLUSTER, TIMING['linkedin'], random.Random(seed))}
+        assert 60 <= plan["c1"] <= 300
+        assert abs(plan["c2"] - plan["c1"] - 90) < 0.2
+        assert 60 <= plan["c4"] - plan["c3"] <= 240.1
+        assert plan["c5"] > plan["c4"]
+        assert max(plan.values()) <= 3600 + 240
+    print("✅ 50 plans respect LinkedIn cadence")
+
+
+def test_timer_wheel_never_fires_early_or_drops():
+    """Randomized check against a brute-force schedule, including overflow beyond the top level"""
+    rng = random.Random(3)
+    wheel = HierarchicalTimerWheel(tick_seconds=1.0, slot_bits=3, levels=2, start_time=0)
+    now, scheduled, released = 0.0, [], []
+    for _ in range(2000):
+        for _ in range(rng.randint(0, 3)):
+            due = now + rng.uniform(0, 200)
+            scheduled.append(due)
+            wheel.add(due, due)
+        now += rng.uniform(0, 3)
+        for due in wheel.advance(now):
+            assert due <= now
+            released.append(due)
+    assert set(d for d in scheduled if d <= now - 1) <= set(released)
+    assert wheel.size == len(scheduled) - len(released)
+
+
+def test_scheduler_dispatch_and_cancel():
+    """Due events go to the sink in order; cancelled posts stop releasing"""
+    clock = [1000.0]
+    scheduler = RolloutScheduler(TIMING, clock=lambda: clock[0])
+    first = scheduler.schedule_cluster(CLUSTER, "instagram", post_id="post-1", rng=random.Random(1))
+    scheduler.schedule_cluster(CLUSTER, "instagram", post_id="post-2", rng=random.Random(2))
+    try:
+        scheduler.schedule_cluster(CLUSTER, "instagram", post_id="post-2")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+    last_due = max(e["due_at"] for e in first["events"])
+    clock[0] = first["events"][0]["due_at"] + 1
+    dispatched = scheduler.dispatch_due()
+    assert "c1" in [e.comment_id for e in dispatched if e.post_id == "post-1"]
+    assert all(e.due_at <= clock[0] for e in dispatched)
+
+    assert scheduler.cancel_post("post-2")
+    clock[0] = last_due + 3600
+    scheduler.dispatch_due()
+
+    post_1 = [e for e in scheduler.sink.events if e["post_id"] == "post-1"]
+    assert [e["comment_id"] for e in post_1] == [e["comment_id"] for e in first["events"]]
+    stats = scheduler.get_stats()
+    assert stats["pending_events"] == 0 and stats["active_posts"] == 0
+    assert stats["cancelled"] > 0
+    print(f"✅ Scheduler stats: {stats}")
+
+
+def test_rollout_endpoints_need_admin_token_and_valid_start():
+    """Rollout routes are admin-only and reject a start_at that is not a timestamp"""
+    os.environ.setdefault("OPENAI_API_KEY", "test-key")
+    os.environ.setdefault("RAG_CORPORA", '{"none": "missing_corpus.jsonl"}')
+    import app
+
+    client = app.app.test_client()
+    body = {"platform": "linkedin", "post_id": "post-1", "engagement_package": CLUSTER}
+    previous_token = app.ADMIN_TOKEN
+    try:
+        app.ADMIN_TOKEN = None
+        assert client.post('/api/rollouts', json=body).status_code == 403
+
+        app.ADMIN_TOKEN = "secret"
+        assert client.post('/api/rollouts', json=body).status_code == 401
+        assert client.post('/api/rollouts/due', headers={"X-Admin-Token": "wrong"}).status_code == 401
+        assert client.delete('/api/rollouts/post-1').status_code == 401
+
+        headers = {"X-Admin-Token": "secret"}
+        for start_at in ["soon", [1], "nan"]:
+            response = client.post('/api/rollouts', json=dict(body, start_at=start_at), headers=headers)
+            assert response.status_code == 400 and "start_at" in response.get_json()["error"]
+
+        start_at = time.time() + 3600
+        response = client.post('/api/rollouts', json=dict(body, start_at=str(start_at)), headers=headers)
+        assert response.status_code == 200
+        assert response.get_json()["rollout"]["events"][0]["due_at"] >= start_at
+        assert client.post('/api/rollouts/due', headers=headers).get_json() == {"events": []}
+        assert client.delete('/api/rollouts/post-1', headers=headers).status_code == 200
+    finally:
+        app.ADMIN_TOKEN = previous_token
+        app.rollout_scheduler.cancel_post("post-1")
+
+
+if __name__ == "__main__":
+    test_parse_duration_range()
+    test_plan_respects_cadence()
+    test_timer_wheel_never_fires_early_or_drops()
+    test_scheduler_dispatch_and_cancel()
+    test_rollout_endpoints_need_admin_token_and_valid_start()
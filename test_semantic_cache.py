@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test the semantic cache of generated content
+"""
+
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from rag_eval import HashingEmbeddingClient
+from semantic_cache import SemanticContentCache
+
+EMBEDDER = HashingEmbeddingClient(dimension=256)
+
+
+def embed(text: str) -> np.ndarray:
+    vector = np.array(EMBEDDER.embed(text, 256), dtype='float32')
+    return vector / np.linalg.norm(vector)
+
+
+def test_reworded_description_hits_same_platform_only():
+    """A similar description on the same platform and prompt version is a hit"""
+    print("🧪 Testing semantic content cache...")
+    cache = SemanticContentCache(embed, threshold=0.5)
+    assert cache.lookup("AI for school reporting", "linkedin") is None
+    assert cache.store("AI for school reporting", "linkedin", "LinkedIn post", tokens=900, variant="3.1")
+
+    hit = cache.lookup("automated school reporting with AI", "linkedin", variant="3.1")
+    assert hit["value"] == "LinkedIn post" and hit["similarity"] >= 0.5
+    assert hit["description"] == "AI for school reporting"
+    assert cache.lookup("automated school reporting with AI", "twitter", variant="3.1") is None
+    assert cache.lookup("automated school reporting with AI", "linkedin", variant="3.2") is None
+    assert cache.lookup("payroll compliance for restaurants", "linkedin", variant="3.1") is None
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 4
+    assert stats["saved_tokens"] == 900 and stats["hit_rate"] == 0.2
+    print(f"✅ Reworded description served from cache (similarity {hit['similarity']})")
+
+
+def test_entries_expire_after_ttl():
+    """Expired entries are never served and are dropped from the index"""
+    cache = SemanticContentCache(embed, threshold=0.5, ttl_seconds=0.05)
+    cache.store("AI for school reporting", "linkedin", "old post")
+    time.sleep(0.1)
+    assert cache.lookup("AI for school reporting", "linkedin") is None
+    stats = cache.get_stats()
+    assert stats["expired"] == 1 and stats["entries"] == 0
+
+
+def test_store_drops_expired_entries_oldest_first():
+    """Storing a result drops every expired entry, including ones a lookup already removed"""
+    cache = SemanticContentCache(embed, threshold=0.5, ttl_seconds=0.05)
+    cache.store("AI for school reporting", "linkedin", "school post")
+    cache.store("invoice automation for dentists", "twitter", "dentist post")
+    time.sleep(0.1)
+    assert cache.lookup("AI for school reporting", "linkedin") is None
+    cache.store("inventory forecasting for bakeries", "linkedin", "bakery post")
+
+    stats = cache.get_stats()
+    assert stats["expired"] == 2 and stats["entries"] == 1
+    assert cache.lookup("inventory forecasting for bakeries", "linkedin")["value"] == "bakery post"
+
+
+def test_least_recently_used_entry_is_evicted():
+    """Beyond max_entries the least recently used result goes first"""
+    cache = SemanticContentCache(embed, threshold=0.9, max_entries=2)
+    cache.store("invoice automation for dentists", "linkedin", "dentists")
+    cache.store("onboarding emails for law firms", "linkedin", "law firms")
+    assert cache.lookup("invoice automation for dentists", "linkedin")["value"] == "dentists"
+    cache.store("inventory forecasting for bakeries", "linkedin", "bakeries")
+
+    assert cache.lookup("onboarding emails for law firms", "linkedin") is None
+    assert cache.lookup("invoice automation for dentists", "linkedin")["value"] == "dentists"
+    assert cache.lookup("inventory forecasting for bakeries", "linkedin")["value"] == "bakeries"
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_embedding_failure_is_a_miss():
+    """Without embeddings the cache steps aside and generation proceeds"""
+    available = [True]
+
+    def flaky(text):
+        if not available[0]:
+            raise TimeoutError("embedding API unavailable")
+        return embed(text)
+
+    cache = SemanticContentCache(flaky)
+    assert cache.store("AI for school reporting", "linkedin", "post")
+    available[0] = False
+    assert cache.lookup("AI for school reporting", "linkedin") is None
+    assert not cache.store("AI for payroll", "linkedin", "post")
+    assert cache.get_stats()["embedding_errors"] == 2
+
+
+if __name__ == "__main__":
+    test_reworded_description_hits_same_platform_only()
+    test_entries_expire_after_ttl()
+    test_store_drops_expired_entries_oldest_first()
+    test_least_recently_used_entry_is_evicted()
+    test_embedding_failure_is_a_miss()
+    print("\n🎉 All semantic cache tests passed!")
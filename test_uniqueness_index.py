@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test the engagement uniqueness (near-duplicate) index
+"""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from prompt_library import BarranaPromptLibrary
+from uniqueness_index import EngagementUniquenessIndex
+
+PAST_CLUSTER = [
+    {"id": "c1", "speaker": "Person A", "text": "How would the reminder flow handle a 3-person dental clinic in Austin?"},
+    {"id": "c2", "speaker": "Barrana", "text": "We usually start with appointment reminders and a WhatsApp intake bot, live within two weeks."},
+    {"id": "c3", "speaker": "Person B", "text": "Isn't patient data exposed when a chatbot handles bookings?"},
+]
+
+
+def test_near_duplicates_are_flagged():
+    """Reworded comments from earlier posts are caught, fresh ones are not"""
+    print("🧪 Testing near-duplicate detection...")
+
+    index = EngagementUniquenessIndex(index_dir=None, banned_phrases=["great question"])
+    index.add_cluster(PAST_CLUSTER, "linkedin")
+
+    new_cluster = [
+        {"id": "c1", "speaker": "Person A", "text": "How would the reminder flow handle a 3 person dental clinic in Austin??"},
+        {"id": "c2", "speaker": "Person E", "text": "Those menu photos are 🔥 can't wait to try it"},
+        {"id": "c3", "speaker": "Barrana", "text": "Great question! Encryption and access logs come standard."},
+    ]
+    violations = {v["id"]: [r["type"] for r in v["reasons"]] for v in index.check_cluster(new_cluster)}
+
+    assert violations == {"c1": ["near_duplicate"], "c3": ["banned_phrase"]}
+    print(f"✅ Violations: {violations}")
+
+
+def test_in_thread_duplicates_are_flagged():
+    """Repetition inside a single cluster is flagged too"""
+    index = EngagementUniquenessIndex(index_dir=None)
+    cluster = [
+        {"id": "c1", "speaker": "Person C", "text": "We cut our admin time by a third after switching."},
+        {"id": "c2", "speaker": "Person C", "text": "We cut our admin time by a third after switching!"},
+    ]
+    violations = index.check_cluster(cluster)
+    assert [v["id"] for v in violations] == ["c2"]
+    assert violations[0]["reasons"][0]["type"] == "in_thread_duplicate"
+
+
+def test_index_persists_and_merges():
+    """Entries survive a reload and remain searchable after buffer merges"""
+    with tempfile.TemporaryDirectory() as tmp:
+        index = EngagementUniquenessIndex(index_dir=tmp, merge_threshold=64)
+        for i in range(20):
+            index.add_cluster([{"id": "c1", "speaker": "Person D",
+                                "text": f"Tagging @ClinicOwner{i} - post number {i} about patient reminders and intake"}],
+                              "instagram")
+        assert index.get_stats()["comments_count"] == 20
+
+        reloaded = EngagementUniquenessIndex(index_dir=tmp)
+        assert reloaded.get_stats()["comments_count"] == 20
+        match = reloaded.query("Tagging @ClinicOwner7 - post number 7 about patient reminders and intake")
+        assert match is not None and match["platform"] == "instagram"
+        print("✅ Index reloaded from disk")
+
+
+def test_query_latency():
+    """Checks stay well under a millisecond per comment"""
+    index = EngagementUniquenessIndex(index_dir=None)
+    index.add_cluster([{"text": f"Comment number {i} about automation for shop {i % 97}"} for i in range(5000)], "facebook")
+
+    start = time.perf_counter()
+    for i in range(200):
+        index.query(f"A brand new remark {i} on scheduling software")
+    per_query_ms = (time.perf_counter() - start) * 1000 / 200
+    print(f"✅ {per_query_ms:.3f} ms per comment check")
+    assert per_query_ms < 5
+
+
+def test_failed_regeneration_keeps_flags_and_indexes_cluster():
+    """When the rewrite request fails the cluster keeps its violations and is still indexed"""
+    class FailingCompletions:
+        def create(self, **kwargs):
+            raise TimeoutError("completion API unavailable")
+
+    class FailingClient:
+        chat = type("Chat", (), {"completions": FailingCompletions()})()
+
+    library = BarranaPromptLibrary()
+    library.uniqueness_index = EngagementUniquenessIndex(index_dir=None)
+    library.uniqueness_index.add_cluster(PAST_CLUSTER, "linkedin")
+    cluster = {"comments": [dict(comment) for comment in PAST_CLUSTER]}
+
+    library._enforce_comment_uniqueness(cluster, FailingClient(), "Post about dental clinics", "instagram")
+    assert [v["id"] for v in cluster["meta"]["uniqueness_violations"]] == ["c1", "c2", "c3"]
+    assert library.uniqueness_index.get_stats()["comments_count"] == 2 * len(PAST_CLUSTER)
+
+
+if __name__ == "__main__":
+    test_near_duplicates_are_flagged()
+    test_in_thread_duplicates_are_flagged()
+    test_index_persists_and_merges()
+    test_query_latency()
+    test_failed_regeneration_keeps_flags_and_indexes_cluster()
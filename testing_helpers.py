@@ -0,0 +1,126 @@
+"""
+Shared helpers for tests and benchmarks: fake embedding clients, RAG and registry factories and corpus fixtures
+
+A plain module (not conftest.py) so benchmarks and test files run as scripts
+can import it too (`from testing_helpers import make_rag`).
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from corpus_registry import CorpusRegistry
+from rag_system import BarranaRAGSystem
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "barrana_rag_corpus.jsonl")
+SECTIONS = ["Services Questions", "About the Founder", "Technical & Implementation Questions"]
+
+
+class FakeEmbeddingClient:
+    """Hashed bag-of-words embeddings; counts every embeddings.create call and input"""
+
+    def __init__(self, dimension: int = 64):
+        self.dimension = dimension
+        self.calls = 0
+        self.inputs = 0
+        self.embeddings = self
+
+    def embed(self, text: str, dimension: int = None) -> list:
+        vector = np.zeros(dimension or self.dimension)
+        for word in text.lower().split():
+            vector[zlib.crc32(word.strip(".,!?'\"").encode()) % len(vector)] += 1.0
+        return vector.tolist()
+
+    def create(self, model, input, dimensions=None, **kwargs):
+        self.calls += 1
+        self.inputs += len(input)
+        items = [type("Embedding", (), {"embedding": self.embed(text, dimensions)})() for text in input]
+        return type("EmbeddingResponse", (), {"data": items})()
+
+
+class SlowEmbeddingClient(FakeEmbeddingClient):
+    """Fake client with API latency that records the peak number of concurrent requests"""
+
+    def __init__(self):
+        super().__init__()
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def create(self, model, input, dimensions=None, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        try:
+            return super().create(model, input, dimensions=dimensions, **kwargs)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def make_rag(corpus_path: str, artifact_dir: str, client: FakeEmbeddingClient = None) -> BarranaRAGSystem:
+    rag = BarranaRAGSystem(corpus_path=corpus_path, artifact_dir=artifact_dir)
+    rag.client = client or FakeEmbeddingClient()
+    return rag
+
+
+def write_corpus(path: str, chunks: list) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            f.write(json.dumps(chunk) + "\n")
+
+
+def base_chunks() -> list:
+    with open(CORPUS_PATH, "r", encoding="utf-8") as f:
+        chunks = [json.loads(line) for line in f if line.strip()]
+    for i in range(5):
+        chunks.append({"id": f"extra_{i}", "source": "Test", "source_title": "Test", "section": "Extra",
+                       "text": f"Extra chunk {i} about workflow automation and invoice processing step {i}.",
+                       "tags": ["test"]})
+    return chunks
+
+
+def filtered_corpus(n: int = 200) -> list:
+    chunks = []
+    for i in range(n):
+        section = SECTIONS[i % len(SECTIONS)]
+        tags = ["founder", "bio"] if section == "About the Founder" else ["services", "automation"]
+        chunk = {"id": f"doc_{i}", "source": f"Source {i % 2}", "source_title": f"Source {i % 2}",
+                 "section": section, "tags": tags,
+                 "text": f"Chunk {i}: automation experience and workflow integration for client {i % 11}."}
+        if i == 7:
+            chunk["platforms"] = ["linkedin"]
+        chunks.append(chunk)
+    return chunks
+
+
+def case_study_chunks() -> list:
+    return [{"id": f"case_{i}", "source": "Case Studies", "source_title": "Case Studies", "section": name,
+             "text": text, "tags": ["case_study"]}
+            for i, (name, text) in enumerate([
+                ("Dental clinic", "A dental clinic cut appointment no-shows with automated SMS reminders."),
+                ("Law firm", "A law firm automated client intake forms and conflict checks."),
+                ("School district", "A school district replaced manual attendance reports with a nightly dashboard."),
+            ])]
+
+
+def make_registry(tmp: str, client: FakeEmbeddingClient, extra: dict = None) -> CorpusRegistry:
+    overview = os.path.join(tmp, "overview.jsonl")
+    cases = os.path.join(tmp, "cases.jsonl")
+    write_corpus(overview, base_chunks())
+    write_corpus(cases, case_study_chunks())
+    corpora = {"overview": {"path": overview}, "case_studies": {"path": cases, "watch_interval": 0}}
+    corpora.update(extra or {})
+    registry = CorpusRegistry(corpora, artifact_dir=os.path.join(tmp, "artifacts"))
+    for system in registry.systems.values():
+        system.client = client
+    return registry
@@ -0,0 +1,361 @@
+import json
+import logging
+import os
+import re
+import threading
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+
+_SHIFT = np.uint64(32)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation/emoji and collapse whitespace"""
+    text = re.sub(r"[^\w\s']", " ", (text or "").lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class MinHasher:
+    """
+    Vectorized MinHash over character shingles.
+
+    Character shingles are used instead of word n-grams because most
+    engagement comments are one or two short sentences. Permutations use
+    multiply-shift hashing (wrapping uint64 arithmetic), which avoids a
+    modulo per shingle.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 7):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.randint(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> np.ndarray:
+        """Hash the character shingles of a normalized text to uint32 values"""
+        normalized = normalize_text(text)
+        size = self.shingle_size
+        if len(normalized) <= size:
+            grams = {normalized} if normalized else set()
+        else:
+            grams = {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+        return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+    def signature(self, text: str) -> np.ndarray:
+        """Compute the MinHash signature of a text"""
+        hashed = self.shingles(text)
+        if hashed.size == 0:
+            return np.full(self.num_perm, 0xFFFFFFFF, dtype=np.uint32)
+        permuted = (np.outer(self._a, hashed) + self._b[:, None]) >> _SHIFT
+        return permuted.min(axis=1).astype(np.uint32)
+
+
+class EngagementUniquenessIndex:
+    """
+    Persistent MinHash/LSH index of generated comments and Barrana replies.
+
+    Signatures are split into bands; each band is hashed to a 64-bit key and
+    stored in one sorted key array, so a lookup is a single vectorized binary
+    search instead of a scan over every stored comment. Recent additions live
+    in a small in-memory buffer that is merged into the sorted arrays in bulk.
+
+    On disk the index is two append-only files: raw signatures and a JSONL of
+    comment metadata. The band keys are rebuilt from signatures at load time.
+    """
+
+    def __init__(self, index_dir: str = "engagement_index", similarity_threshold: float = 0.7,
+                 banned_phrases: Optional[List[str]] = None, num_perm: int = 128, bands: int = 32,
+                 merge_threshold: int = 65536):
+        """
+        Initialize the index.
+
+        Args:
+            index_dir: Directory holding the persisted index (None for in-memory only)
+            similarity_threshold: Estimated Jaccard similarity that counts as a near-duplicate
+            banned_phrases: Phrases that must never appear in generated comments
+            num_perm: Number of MinHash permutations
+            bands: Number of LSH bands (num_perm must be divisible by bands)
+            merge_threshold: Buffered band entries before merging into the sorted arrays
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.index_dir = index_dir
+        self.similarity_threshold = similarity_threshold
+        self.banned_phrases = [normalize_text(p) for p in (banned_phrases or []) if normalize_text(p)]
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.merge_threshold = merge_threshold
+
+        rng = np.random.RandomState(11)
+        self._band_mix = rng.randint(1, 2 ** 62, size=(bands, self.rows), dtype=np.uint64) | np.uint64(1)
+        self._band_salt = rng.randint(1, 2 ** 62, size=bands, dtype=np.uint64)
+
+        self._signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self._count = 0
+        self._meta = []
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._key_ids = np.empty(0, dtype=np.int64)
+        self._pending = {}
+        self._pending_entries = 0
+        self._lock = threading.RLock()
+
+        if index_dir:
+            self.load()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def _paths(self):
+        return (os.path.join(self.index_dir, "signatures.u32"),
+                os.path.join(self.index_dir, "comments.jsonl"))
+
+    def load(self) -> bool:
+        """
+        Load persisted signatures and metadata.
+
+        Returns:
+            bool: True if an existing index was loaded, False otherwise
+        """
+        signatures_path, meta_path = self._paths()
+        if not (os.path.exists(signatures_path) and os.path.exists(meta_path)):
+            return False
+
+        try:
+            signatures = np.fromfile(signatures_path, dtype=np.uint32)
+            signatures = signatures[: (signatures.size // self.hasher.num_perm) * self.hasher.num_perm]
+            signatures = signatures.reshape(-1, self.hasher.num_perm)
+
+            meta = []
+            with open(meta_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        try:
+                            meta.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            break
+
+            # A crash between the two appends leaves them out of step; keep the common prefix
+            count = min(len(meta), signatures.shape[0])
+            with self._lock:
+                self._signatures = np.ascontiguousarray(signatures[:count])
+                self._count = count
+                self._meta = meta[:count]
+                keys = self._band_keys(self._signatures)
+                ids = np.repeat(np.arange(count, dtype=np.int64), self.bands)
+                order = np.argsort(keys.ravel(), kind="stable")
+                self._keys = keys.ravel()[order]
+                self._key_ids = ids[order]
+                self._pending = {}
+                self._pending_entries = 0
+
+            logging.info(f"✅ Loaded engagement uniqueness index with {count} comments")
+            return True
+
+        except Exception as e:
+            logging.error(f"❌ Error loading engagement uniqueness index: {e}")
+            return False
+
+    def _persist(self, signatures: np.ndarray, meta: List[Dict[str, Any]]) -> None:
+        """Append new entries to the on-disk files"""
+        if not self.index_dir:
+            return
+        os.makedirs(self.index_dir, exist_ok=True)
+        signatures_path, meta_path = self._paths()
+        with open(signatures_path, "ab") as f:
+            f.write(np.ascontiguousarray(signatures, dtype=np.uint32).tobytes())
+        with open(meta_path, "a", encoding="utf-8") as f:
+            for item in meta:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+    # ------------------------------------------------------------------
+    # LSH internals
+    # ------------------------------------------------------------------
+    def _band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """Hash each band of each signature to a 64-bit key (shape: n x bands)"""
+        banded = signatures.reshape(-1, self.bands, self.rows).astype(np.uint64)
+        return (banded * self._band_mix).sum(axis=2) ^ self._band_salt
+
+    def _candidates(self, keys: np.ndarray) -> np.ndarray:
+        """Return ids of stored comments sharing at least one band with the query"""
+        found = []
+        if self._keys.size:
+            left = np.searchsorted(self._keys, keys, side="left")
+            right = np.searchsorted(self._keys, keys, side="right")
+            for lo, hi in zip(left, right):
+                if hi > lo:
+                    found.append(self._key_ids[lo:hi])
+        for key in keys.tolist():
+            ids = self._pending.get(key)
+            if ids:
+                found.append(np.asarray(ids, dtype=np.int64))
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def _merge_pending(self) -> None:
+        """Fold buffered band keys into the sorted arrays"""
+        if not self._pending:
+            return
+        keys = []
+        ids = []
+        for key, key_ids in self._pending.items():
+            keys.extend([key] * len(key_ids))
+            ids.extend(key_ids)
+        keys = np.concatenate([self._keys, np.asarray(keys, dtype=np.uint64)])
+        ids = np.concatenate([self._key_ids, np.asarray(ids, dtype=np.int64)])
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._key_ids = ids[order]
+        self._pending = {}
+        self._pending_entries = 0
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def find_banned_phrases(self, text: str) -> List[str]:
+        """Return the banned phrases contained in a text"""
+        normalized = f" {normalize_text(text)} "
+        return [phrase for phrase in self.banned_phrases if f" {phrase} " in normalized]
+
+    def query(self, text: str, signature: Optional[np.ndarray] = None) -> Optional[Dict[str, Any]]:
+        """
+        Find the most similar stored comment above the similarity threshold.
+
+        Args:
+            text: Comment text
+            signature: Precomputed MinHash signature (optional)
+
+        Returns:
+            Dictionary with the matched comment metadata and similarity, or None
+        """
+        if signature is None:
+            signature = self.hasher.signature(text)
+        keys = self._band_keys(signature[None, :])[0]
+
+        with self._lock:
+            candidates = self._candidates(keys)
+            if candidates.size == 0:
+                return None
+            similarities = (self._signatures[candidates] == signature).mean(axis=1)
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.similarity_threshold:
+                return None
+            match = dict(self._meta[int(candidates[best])])
+
+        match["similarity"] = round(similarity, 3)
+        return match
+
+    def check_cluster(self, comments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Check a comment cluster against the index and against itself.
+
+        Args:
+            comments: Cluster comments (dicts with at least 'text')
+
+        Returns:
+            List of violations, one per offending comment
+        """
+        violations = []
+        seen = []
+
+        for comment in comments:
+            text = comment.get("text", "")
+            if not text:
+                continue
+            signature = self.hasher.signature(text)
+            reasons = []
+
+            banned = self.find_banned_phrases(text)
+            if banned:
+                reasons.append({"type": "banned_phrase", "phrases": banned})
+
+            match = self.query(text, signature)
+            if match:
+                reasons.append({"type": "near_duplicate", "similarity": match["similarity"],
+                                "matched_text": match.get("text", ""), "matched_platform": match.get("platform")})
+
+            for other_id, other_signature in seen:
+                similarity = float((other_signature == signature).mean())
+                if similarity >= self.similarity_threshold:
+                    reasons.append({"type": "in_thread_duplicate", "similarity": round(similarity, 3),
+                                    "matched_id": other_id})
+                    break
+
+            seen.append((comment.get("id"), signature))
+
+            if reasons:
+                violations.append({"id": comment.get("id"), "speaker": comment.get("speaker"),
+                                   "text": text, "reasons": reasons})
+
+        return violations
+
+    def add_cluster(self, comments: List[Dict[str, Any]], platform: str) -> int:
+        """
+        Store every comment of a cluster in the index.
+
+        Args:
+            comments: Cluster comments (dicts with at least 'text')
+            platform: Platform the cluster was generated for
+
+        Returns:
+            Number of comments added
+        """
+        texts = [c for c in comments if c.get("text")]
+        if not texts:
+            return 0
+
+        created_at = datetime.now().isoformat()
+        signatures = np.stack([self.hasher.signature(c["text"]) for c in texts])
+        meta = [{"text": c["text"], "speaker": c.get("speaker"), "platform": platform,
+                 "created_at": created_at} for c in texts]
+        keys = self._band_keys(signatures)
+
+        with self._lock:
+            start = self._count
+            if start + len(texts) > self._signatures.shape[0]:
+                capacity = max(1024, (start + len(texts)) * 2)
+                grown = np.empty((capacity, self.hasher.num_perm), dtype=np.uint32)
+                grown[:start] = self._signatures[:start]
+                self._signatures = grown
+            self._signatures[start:start + len(texts)] = signatures
+            self._meta.extend(meta)
+            self._count = start + len(texts)
+
+            for offset, row in enumerate(keys.tolist()):
+                for key in row:
+                    self._pending.setdefault(key, []).append(start + offset)
+            self._pending_entries += keys.size
+            if self._pending_entries >= self.merge_threshold:
+                self._merge_pending()
+
+            try:
+                self._persist(signatures, meta)
+            except Exception as e:
+                logging.error(f"❌ Error persisting engagement uniqueness index: {e}")
+
+        return len(texts)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get index statistics.
+
+        Returns:
+            Dictionary with index stats
+        """
+        with self._lock:
+            return {
+                "comments_count": self._count,
+                "pending_band_entries": self._pending_entries,
+                "similarity_threshold": self.similarity_threshold,
+                "bands": self.bands,
+                "rows_per_band": self.rows,
+                "index_dir": self.index_dir,
+            }